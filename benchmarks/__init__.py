@@ -0,0 +1,12 @@
+"""
+Suíte de benchmarks do robô.
+
+    python -m benchmarks                      # roda tudo e imprime JSON
+    python -m benchmarks --filter indicators  # apenas os casos cujo nome contém 'indicators'
+    python -m benchmarks --save-baseline      # grava benchmarks/baseline.json
+    python -m benchmarks --check              # falha (exit 1) se houver regressão contra o baseline
+
+Os dados são sintéticos e fixos (semente fixa) e o cliente da Binance é o
+emulador em processo (src/emulator) com contagem de requisições por método.
+Deve ser executado a partir da raiz do repositório.
+"""
@@ -0,0 +1,69 @@
+import argparse
+import contextlib
+import json
+import os
+import platform
+import sys
+from datetime import datetime
+
+from .cases import GROUPS
+from .harness import compare, measure
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks do robô")
+    parser.add_argument("--filter", default="", help="Roda apenas os casos cujo nome contém o texto")
+    parser.add_argument("--repeat", type=int, default=None, help="Sobrescreve o número de repetições de todos os casos")
+    parser.add_argument("--output", help="Arquivo JSON de saída (padrão: stdout)")
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--save-baseline", action="store_true", help="Grava os resultados como novo baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Variação aceita antes de apontar regressão")
+    parser.add_argument("--check", action="store_true", help="Sai com código 1 se houver regressão")
+    args = parser.parse_args()
+
+    results = []
+    # Prints de construção dos bots/modelos vão para o stderr para não misturar com o JSON
+    with contextlib.redirect_stdout(sys.stderr):
+        for group, build in GROUPS.items():
+            for case in build():
+                if args.filter and args.filter not in case.name:
+                    continue
+                print(f"⏱️  {case.name}...")
+                results.append(measure(case, args.repeat))
+
+    output = {
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "results": results,
+    }
+
+    if os.path.exists(args.baseline) and not args.save_baseline:
+        with open(args.baseline) as f:
+            output["comparison"] = compare(results, json.load(f), args.tolerance)
+
+    text = json.dumps(output, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text)
+    else:
+        print(text)
+
+    if args.save_baseline:
+        with open(args.baseline, "w") as f:
+            f.write(text)
+        print(f"Baseline gravado em {args.baseline}", file=sys.stderr)
+
+    regressions = [item for item in output.get("comparison", []) if item["regressions"]]
+    for item in regressions:
+        print(f"❌ Regressão em {item['name']}: {', '.join(item['regressions'])} "
+              f"(tempo {item['time_ratio']}x, memória {item['memory_ratio']}x, requisições {item['requests_delta']:+d})",
+              file=sys.stderr)
+    if args.check and regressions:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""Casos de benchmark: ciclo do robô, indicadores, estratégias, modelos e rotas da API."""
+
+import os
+
+from flask import Flask
+
+from .fixtures import SYMBOL, make_client, make_stock_data, no_sleep, temporary_database
+from .harness import BenchmarkCase
+
+
+def _bot(client):
+    from modules.BinanceRobot import BinanceTraderBot
+    return BinanceTraderBot("BTC", SYMBOL, 0.001, 100, "5m", client_binance=client)
+
+
+# ------------------------------------------------------------------
+# Robô
+
+def bot_cases():
+    import modules.BinanceRobot as robot_module
+    from indicators import indicator_cache
+
+    def setup_bot():
+        client, _ = make_client()
+        bot = _bot(client)
+        client.reset()
+        indicator_cache.clear()
+        return bot
+
+    def execute(bot):
+        with no_sleep(robot_module):
+            bot.execute()
+
+    return [
+        # Banco temporário: o ciclo grava o histórico local de ordens
+        BenchmarkCase("bot.execute", execute, setup=setup_bot, context=lambda: temporary_database(bots=0),
+                      requests=lambda bot: bot.client_binance.counts, repeat=10),
+        BenchmarkCase("bot.getStockData_ClosePrice_OpenTime", lambda bot: bot.getStockData_ClosePrice_OpenTime(),
+                      setup=setup_bot, requests=lambda bot: bot.client_binance.counts, repeat=20),
+    ]
+
+
+# ------------------------------------------------------------------
+# Indicadores e estratégias (sem cache: stock_data sem attrs de par/intervalo)
+
+def indicator_cases():
+    from indicators.rsi import rsi
+    from indicators.macd import macd
+
+    stock_data = make_stock_data()
+    return [
+        BenchmarkCase("indicators.rsi", lambda data: rsi(data["close_price"], 14), setup=lambda: stock_data, repeat=50),
+        BenchmarkCase("indicators.macd", lambda data: macd(data["close_price"], 12, 26, 9), setup=lambda: stock_data, repeat=50),
+    ]
+
+
+def strategy_cases():
+    from strategies.moving_average import getMovingAverageTradeStrategy
+    from strategies.moving_average_antecipation import getMovingAverageAntecipationTradeStrategy
+
+    stock_data = make_stock_data()
+    return [
+        BenchmarkCase("strategies.moving_average", lambda data: getMovingAverageTradeStrategy(data),
+                      setup=lambda: stock_data, repeat=50),
+        BenchmarkCase("strategies.moving_average_antecipation",
+                      lambda data: getMovingAverageAntecipationTradeStrategy(data, 0.5),
+                      setup=lambda: stock_data, repeat=50),
+    ]
+
+
+# ------------------------------------------------------------------
+# Modelos
+
+def model_cases():
+    def get_all_bots(_):
+        from Models.BotTradeModel import BotTradeModel
+        return BotTradeModel.get_all_bots()
+
+    return [
+        BenchmarkCase("models.BotTradeModel.get_all_bots", get_all_bots,
+                      context=lambda: temporary_database(bots=50, trades_per_bot=100), repeat=20),
+    ]
+
+
+# ------------------------------------------------------------------
+# Rotas da API (Flask test client, login desativado, cliente da Binance emulado)
+
+def api_cases():
+    import api
+
+    client, _ = make_client(balances={"USDT": 10000.0, "BTC": 0.5, "ETH": 2.0, "SOL": 10.0})
+    app = Flask("benchmarks")
+    app.config["LOGIN_DISABLED"] = True
+    from flask_login import LoginManager
+    LoginManager(app)
+    app.register_blueprint(api.api_bp)
+    test_client = app.test_client()
+
+    def setup():
+        os.environ.setdefault("BINANCE_API_KEY", "benchmark")
+        os.environ.setdefault("BINANCE_SECRET_KEY", "benchmark")
+        api.create_binance_client = lambda api_key, api_secret: client
+        client.reset()
+        return test_client
+
+    def wallet(test_client):
+        response = test_client.get("/api/wallet")
+        assert response.status_code == 200, response.get_data(as_text=True)
+
+    return [
+        BenchmarkCase("api.wallet", wallet, setup=setup, requests=lambda _: client.counts, repeat=30),
+    ]
+
+
+GROUPS = {
+    "bot": bot_cases,
+    "indicators": indicator_cases,
+    "strategies": strategy_cases,
+    "models": model_cases,
+    "api": api_cases,
+}
@@ -0,0 +1,125 @@
+"""Dados sintéticos fixos e cliente da Binance com contagem de requisições."""
+
+import os
+import sys
+import types
+import random
+import sqlite3
+import tempfile
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SRC_DIR = os.path.join(ROOT_DIR, "src")
+if SRC_DIR not in sys.path:
+    sys.path.insert(0, SRC_DIR)
+
+from emulator import build_emulator, EmulatorClient  # noqa: E402
+
+SEED = 42
+FIXED_NOW = 1_700_000_000.0  # Relógio fixo: candles não "andam" entre repetições
+SYMBOL = "BTCUSDT"
+
+
+class CountingClient:
+    """Encaminha para o cliente real e conta as chamadas por método."""
+
+    def __init__(self, client):
+        self._client = client
+        self.counts = Counter()
+
+    def reset(self):
+        self.counts.clear()
+
+    def __getattr__(self, name):
+        attribute = getattr(self._client, name)
+        if not callable(attribute):
+            return attribute
+
+        def counted(*args, **kwargs):
+            self.counts[name] += 1
+            return attribute(*args, **kwargs)
+        return counted
+
+
+def make_client(api_key="benchmark", balances=None):
+    """Emulador com histórico sintético determinístico e cliente com contagem."""
+    emulator, markets = build_emulator(
+        ["BTCUSDT", "ETHUSDT", "SOLUSDT", "BNBUSDT"], seed=SEED, clock=lambda: FIXED_NOW,
+        default_balances=balances or {"USDT": 10000.0, "BTC": 0.0},
+    )
+    return CountingClient(EmulatorClient(emulator, api_key)), emulator
+
+
+def make_stock_data(rows=500, seed=SEED):
+    """DataFrame no mesmo formato de getStockData_ClosePrice_OpenTime."""
+    rng = np.random.default_rng(seed)
+    close = 60000 * np.exp(np.cumsum(rng.normal(0, 0.002, rows)))
+    open_price = np.concatenate(([close[0]], close[:-1]))
+    open_time = pd.date_range("2024-01-01", periods=rows, freq="5min", tz="UTC").tz_convert("America/Sao_Paulo")
+    stock_data = pd.DataFrame({
+        "close_price": close,
+        "open_time": open_time,
+        "open_price": open_price,
+        "high_price": np.maximum(open_price, close) * 1.001,
+        "low_price": np.minimum(open_price, close) * 0.999,
+        "volume": rng.uniform(1, 20, rows),
+    })
+    return stock_data
+
+
+@contextmanager
+def temporary_database(bots=50, trades_per_bot=100):
+    """
+    Banco SQLite temporário com bot_trades preenchida.
+    Os modelos abrem 'src/database.db' relativo ao diretório atual, então
+    o diretório de trabalho é trocado durante o uso.
+    """
+    previous_dir = os.getcwd()
+    with tempfile.TemporaryDirectory() as directory:
+        os.makedirs(os.path.join(directory, "src"))
+        os.chdir(directory)
+        try:
+            from Models.BotTradeModel import BotTradeModel
+            BotTradeModel.init_db()
+            rng = random.Random(SEED)
+            start = datetime(2024, 1, 1)
+            rows = []
+            for bot in range(bots):
+                for trade in range(trades_per_bot):
+                    price = 60000 * (1 + rng.uniform(-0.05, 0.05))
+                    quantity = 0.001
+                    rows.append((
+                        f"bot_{bot}", SYMBOL, "BUY" if trade % 2 == 0 else "SELL", price, quantity,
+                        price * quantity, (start + timedelta(minutes=5 * (bot * trades_per_bot + trade))).strftime("%Y-%m-%d %H:%M:%S"),
+                    ))
+            conn = sqlite3.connect("src/database.db")
+            conn.executemany(
+                "INSERT INTO bot_trades (bot_id, operation_code, trade_type, price, quantity, total_value, timestamp) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)", rows,
+            )
+            conn.commit()
+            conn.close()
+            yield directory
+        finally:
+            os.chdir(previous_dir)
+
+
+@contextmanager
+def no_sleep(module):
+    """
+    Substitui o `time` do módulo por uma cópia com sleep instantâneo.
+    As esperas fixas do ciclo não são custo de processamento e dominariam a medição.
+    """
+    original = module.time
+    patched = types.SimpleNamespace(**{name: getattr(original, name) for name in dir(original) if not name.startswith("__")})
+    patched.sleep = lambda seconds: None
+    module.time = patched
+    try:
+        yield
+    finally:
+        module.time = original
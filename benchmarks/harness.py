@@ -0,0 +1,115 @@
+"""Medição (tempo, alocações, requisições) e comparação com o baseline."""
+
+import contextlib
+import gc
+import io
+import statistics
+import time
+import tracemalloc
+
+
+class BenchmarkCase:
+    """
+    Parameters:
+        name (str): Nome único (ex: 'indicators.rsi').
+        run (callable): Função medida; recebe o retorno de setup.
+        setup (callable, optional): Prepara o estado de cada repetição (fora da medição).
+        requests (callable, optional): state -> Counter com as requisições feitas na repetição.
+        context (callable, optional): Context manager que envolve todas as repetições (ex: banco temporário).
+        repeat (int): Número de repetições cronometradas.
+    """
+
+    def __init__(self, name, run, setup=None, requests=None, context=None, repeat=20):
+        self.name = name
+        self.run = run
+        self.setup = setup or (lambda: None)
+        self.requests = requests
+        self.context = context or contextlib.nullcontext
+        self.repeat = repeat
+
+
+def _silenced(function, state):
+    # Os módulos do robô usam print em todo o ciclo; não medimos a escrita no terminal
+    with contextlib.redirect_stdout(io.StringIO()):
+        return function(state)
+
+
+def measure(case: BenchmarkCase, repeat=None):
+    with case.context():
+        return _measure(case, repeat or case.repeat)
+
+
+def _measure(case, repeat):
+    timings = []
+    requests = {}
+
+    # Aquecimento (caches de import, JIT do pandas etc.)
+    _silenced(case.run, case.setup())
+
+    for _ in range(repeat):
+        state = case.setup()
+        gc.collect()
+        started = time.perf_counter()
+        _silenced(case.run, state)
+        timings.append((time.perf_counter() - started) * 1000)
+        if case.requests is not None:
+            requests = dict(case.requests(state))
+
+    # Alocações medidas em uma execução separada (tracemalloc deixa tudo mais lento)
+    state = case.setup()
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    _silenced(case.run, state)
+    after = tracemalloc.take_snapshot()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    stats = after.compare_to(before, "filename")
+    allocated_blocks = sum(max(s.count_diff, 0) for s in stats)
+
+    return {
+        "name": case.name,
+        "repeat": repeat,
+        "wall_ms": {
+            "min": round(min(timings), 4),
+            "median": round(statistics.median(timings), 4),
+            "mean": round(statistics.mean(timings), 4),
+        },
+        "alloc_peak_kb": round(peak / 1024, 2),
+        "alloc_blocks": allocated_blocks,
+        "requests": requests,
+        "requests_total": sum(requests.values()),
+    }
+
+
+def compare(results, baseline, tolerance=0.25):
+    """
+    Compara os resultados com o baseline.
+    Regressão: mediana de tempo ou pico de memória acima de (1 + tolerance)x, ou mais requisições.
+
+    Returns:
+        list[dict]: Um item por caso presente nos dois conjuntos.
+    """
+    previous = {item["name"]: item for item in baseline.get("results", [])}
+    report = []
+    for result in results:
+        base = previous.get(result["name"])
+        if base is None:
+            continue
+        time_ratio = result["wall_ms"]["median"] / base["wall_ms"]["median"] if base["wall_ms"]["median"] else 1.0
+        memory_ratio = result["alloc_peak_kb"] / base["alloc_peak_kb"] if base["alloc_peak_kb"] else 1.0
+        regressions = []
+        if time_ratio > 1 + tolerance:
+            regressions.append("wall_ms")
+        if memory_ratio > 1 + tolerance:
+            regressions.append("alloc_peak_kb")
+        if result["requests_total"] > base["requests_total"]:
+            regressions.append("requests")
+        report.append({
+            "name": result["name"],
+            "time_ratio": round(time_ratio, 3),
+            "memory_ratio": round(memory_ratio, 3),
+            "requests_delta": result["requests_total"] - base["requests_total"],
+            "regressions": regressions,
+        })
+    return report
@@ -41,29 +41,54 @@ def create_app():
     
     # Registrar rotas principais
     
+    # /health e /status devolvem o retrato do coletor de saúde da API (src/modules/HealthMonitor.py),
+    # sem chamadas à Binance ou ao banco por requisição
+
     @app.route('/health')
     def health():
         """Rota para verificar a saúde da aplicação."""
+        try:
+            from src.api import get_health_snapshot
+            snapshot = get_health_snapshot()
+        except Exception as e:
+            logger.error(f"Erro ao obter retrato de saúde: {str(e)}")
+            snapshot = None
+
+        if snapshot is None:
+            return jsonify({
+                'status': 'healthy',
+                'timestamp': datetime.now().isoformat(),
+                'environment': os.environ.get('FLASK_ENV', 'development')
+            })
+
+        # Retrato desatualizado = coletor parado: o balanceador deve tirar a instância
         return jsonify({
-            'status': 'healthy',
+            'status': 'unhealthy' if snapshot['stale'] else snapshot['status'],
             'timestamp': datetime.now().isoformat(),
+            'collected_at': snapshot['collected_at_iso'],
+            'age_seconds': snapshot['age_seconds'],
             'environment': os.environ.get('FLASK_ENV', 'development')
-        })
+        }), 503 if snapshot['stale'] else 200
     
     @app.route('/status')
     def status():
         """Verifica o status completo do sistema."""
         try:
-            from src.check_binance import check_binance_connection
-            binance_status = check_binance_connection()
-            db_status = os.path.exists(os.path.join('src', 'database.db'))
+            from src.api import get_health_snapshot
+            snapshot = get_health_snapshot()
+            checks = snapshot['checks']
             
             return jsonify({
                 'api_status': 'online',
-                'binance_connected': binance_status,
-                'database_exists': db_status,
+                'status': snapshot['status'],
+                'binance_connected': checks.get('binance', {}).get('connection') == 'normal',
+                'database_exists': checks.get('database', {}).get('status') == 'ok',
+                'checks': checks,
                 'environment': os.environ.get('FLASK_ENV', 'development'),
-                'timestamp': datetime.now().isoformat()
+                'timestamp': datetime.now().isoformat(),
+                'collected_at': snapshot['collected_at_iso'],
+                'age_seconds': snapshot['age_seconds'],
+                'stale': snapshot['stale']
             })
         except Exception as e:
             logger.error(f"Erro ao verificar status: {str(e)}")
@@ -0,0 +1,258 @@
+import json
+import sqlite3
+import time
+
+
+class BotLeaseModel:
+    """
+    Tabela de coordenação entre réplicas da API (nós): cada robô tem no máximo um dono,
+    com um lease renovado periodicamente. Lease vencido (nó parado ou travado) fica
+    livre para outro nó assumir; o `epoch` aumenta a cada troca de dono.
+    O índice único por par (entre robôs ativos) impede dois robôs no mesmo par/modo.
+    """
+
+    # Espera máxima pela trava do SQLite, em segundos: bem abaixo do intervalo de renovação (ttl/3),
+    # para uma renovação presa falhar antes do lease vencer (o BotCoordinator reduz conforme o ttl)
+    busy_timeout = 2.0
+
+    @staticmethod
+    def _connect():
+        return sqlite3.connect('src/database.db', timeout=BotLeaseModel.busy_timeout)
+
+    @staticmethod
+    def init_db():
+        conn = BotLeaseModel._connect()
+        cursor = conn.cursor()
+
+        cursor.execute('''
+        CREATE TABLE IF NOT EXISTS bot_nodes (
+            node_id TEXT PRIMARY KEY,
+            heartbeat REAL NOT NULL,
+            started_at REAL NOT NULL
+        )
+        ''')
+
+        cursor.execute('''
+        CREATE TABLE IF NOT EXISTS bot_leases (
+            bot_id TEXT PRIMARY KEY,
+            operation_code TEXT NOT NULL,
+            stock_code TEXT NOT NULL,
+            config TEXT NOT NULL,
+            desired TEXT NOT NULL DEFAULT 'running',
+            owner TEXT,
+            lease_expires REAL NOT NULL DEFAULT 0,
+            epoch INTEGER NOT NULL DEFAULT 0,
+            created_at REAL NOT NULL,
+            updated_at REAL NOT NULL
+        )
+        ''')
+
+        cursor.execute('''
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_bot_leases_pair ON bot_leases (operation_code, stock_code)
+        WHERE desired = 'running'
+        ''')
+
+        conn.commit()
+        conn.close()
+
+        print("Tabelas de coordenação de robôs inicializadas com sucesso!")
+
+    @staticmethod
+    def heartbeat(node_id, ttl):
+        """Registra o nó como vivo e retorna os nós vivos (heartbeat dentro do TTL)."""
+        now = time.time()
+        conn = BotLeaseModel._connect()
+        try:
+            cursor = conn.cursor()
+            cursor.execute('''
+            INSERT INTO bot_nodes (node_id, heartbeat, started_at) VALUES (?, ?, ?)
+            ON CONFLICT (node_id) DO UPDATE SET heartbeat = excluded.heartbeat
+            ''', (node_id, now, now))
+            conn.commit()
+            cursor.execute('SELECT node_id FROM bot_nodes WHERE heartbeat >= ? ORDER BY node_id', (now - ttl,))
+            return [row[0] for row in cursor.fetchall()]
+        finally:
+            conn.close()
+
+    @staticmethod
+    def remove_node(node_id):
+        conn = BotLeaseModel._connect()
+        try:
+            conn.execute('DELETE FROM bot_nodes WHERE node_id = ?', (node_id,))
+            conn.commit()
+        finally:
+            conn.close()
+
+    @staticmethod
+    def register(bot_id, operation_code, stock_code, config, owner, ttl):
+        """
+        Cadastra um robô já atribuído a `owner`.
+
+        Returns:
+            int | None: epoch do lease, ou None se já existe robô ativo no par.
+        """
+        now = time.time()
+        conn = BotLeaseModel._connect()
+        try:
+            conn.execute('''
+            INSERT INTO bot_leases (bot_id, operation_code, stock_code, config, owner, lease_expires, epoch, created_at, updated_at)
+            VALUES (?, ?, ?, ?, ?, ?, 1, ?, ?)
+            ''', (bot_id, operation_code, stock_code, json.dumps(config), owner, now + ttl, now, now))
+            conn.commit()
+            return 1
+        except sqlite3.IntegrityError:
+            return None
+        finally:
+            conn.close()
+
+    @staticmethod
+    def renew(node_id, ttl):
+        """
+        Renova os leases do nó.
+
+        Returns:
+            dict: {bot_id: desired} dos robôs que continuam com este dono
+                ('stopped' = parada solicitada por outro nó).
+        """
+        now = time.time()
+        conn = BotLeaseModel._connect()
+        try:
+            cursor = conn.cursor()
+            cursor.execute('''
+            UPDATE bot_leases SET lease_expires = ?, updated_at = ?
+            WHERE owner = ? AND lease_expires >= ?
+            ''', (now + ttl, now, node_id, now))
+            conn.commit()
+            cursor.execute('SELECT bot_id, desired FROM bot_leases WHERE owner = ? AND lease_expires >= ?', (node_id, now))
+            return dict(cursor.fetchall())
+        finally:
+            conn.close()
+
+    @staticmethod
+    def check(bot_id, owner, epoch):
+        """
+        Confere se o lease do robô ainda é de `owner` no `epoch` informado e não venceu
+        (usado pelo robô antes de enviar ordens).
+
+        Returns:
+            float | None: vencimento do lease, ou None se outro nó/epoch assumiu ou o lease venceu.
+        """
+        now = time.time()
+        conn = BotLeaseModel._connect()
+        try:
+            row = conn.execute('''
+            SELECT lease_expires FROM bot_leases
+            WHERE bot_id = ? AND owner = ? AND epoch = ? AND lease_expires >= ?
+            ''', (bot_id, owner, epoch, now)).fetchone()
+            return row[0] if row else None
+        finally:
+            conn.close()
+
+    @staticmethod
+    def claim(node_id, limit, ttl):
+        """
+        Assume até `limit` robôs ativos sem dono ou com lease vencido (mais antigos primeiro).
+
+        Returns:
+            list: [(bot_id, config, epoch), ...]
+        """
+        if limit <= 0:
+            return []
+        now = time.time()
+        conn = BotLeaseModel._connect()
+        conn.isolation_level = None
+        try:
+            cursor = conn.cursor()
+            # Trava de escrita antes de ler: dois nós não assumem o mesmo robô
+            cursor.execute('BEGIN IMMEDIATE')
+            cursor.execute('''
+            SELECT bot_id, config, epoch FROM bot_leases
+            WHERE desired = 'running' AND (owner IS NULL OR lease_expires < ?)
+            ORDER BY created_at LIMIT ?
+            ''', (now, limit))
+            claimed = [(bot_id, json.loads(config), epoch + 1) for bot_id, config, epoch in cursor.fetchall()]
+            cursor.executemany('''
+            UPDATE bot_leases SET owner = ?, lease_expires = ?, epoch = ?, updated_at = ? WHERE bot_id = ?
+            ''', [(node_id, now + ttl, epoch, now, bot_id) for bot_id, _, epoch in claimed])
+            cursor.execute('COMMIT')
+            return claimed
+        except Exception:
+            if conn.in_transaction:
+                conn.execute('ROLLBACK')
+            raise
+        finally:
+            conn.close()
+
+    @staticmethod
+    def release(node_id, bot_ids):
+        """Libera os leases do nó (o robô continua ativo e outro nó pode assumi-lo imediatamente)."""
+        if not bot_ids:
+            return
+        conn = BotLeaseModel._connect()
+        try:
+            conn.executemany('''
+            UPDATE bot_leases SET owner = NULL, lease_expires = 0, updated_at = ? WHERE bot_id = ? AND owner = ?
+            ''', [(time.time(), bot_id, node_id) for bot_id in bot_ids])
+            conn.commit()
+        finally:
+            conn.close()
+
+    @staticmethod
+    def request_stop(bot_id):
+        """
+        Marca o robô para parar; o nó dono o encerra na próxima rodada.
+
+        Returns:
+            tuple | None: (dono, lease válido) ou None se o robô não existe.
+        """
+        now = time.time()
+        conn = BotLeaseModel._connect()
+        try:
+            cursor = conn.cursor()
+            cursor.execute('SELECT owner, lease_expires FROM bot_leases WHERE bot_id = ?', (bot_id,))
+            row = cursor.fetchone()
+            if row is None:
+                return None
+            cursor.execute("UPDATE bot_leases SET desired = 'stopped', updated_at = ? WHERE bot_id = ?", (now, bot_id))
+            conn.commit()
+            return row[0], row[1] >= now
+        finally:
+            conn.close()
+
+    @staticmethod
+    def remove(bot_id):
+        conn = BotLeaseModel._connect()
+        try:
+            conn.execute('DELETE FROM bot_leases WHERE bot_id = ?', (bot_id,))
+            conn.commit()
+        finally:
+            conn.close()
+
+    @staticmethod
+    def count_running():
+        conn = BotLeaseModel._connect()
+        try:
+            return conn.execute("SELECT COUNT(*) FROM bot_leases WHERE desired = 'running'").fetchone()[0]
+        finally:
+            conn.close()
+
+    @staticmethod
+    def list_leases():
+        now = time.time()
+        conn = BotLeaseModel._connect()
+        conn.row_factory = sqlite3.Row
+        try:
+            rows = conn.execute('SELECT * FROM bot_leases ORDER BY created_at').fetchall()
+            return [{
+                'bot_id': row['bot_id'],
+                'operation_code': row['operation_code'],
+                'stock_code': row['stock_code'],
+                'desired': row['desired'],
+                'owner': row['owner'],
+                'lease_valid': row['lease_expires'] >= now,
+                'lease_expires': row['lease_expires'],
+                'epoch': row['epoch'],
+                'created_at': row['created_at'],
+            } for row in rows]
+        finally:
+            conn.close()
@@ -3,6 +3,8 @@ import json
 import datetime
 import os
 
+from Models.FillLedgerModel import FillLedgerModel
+
 class BotTradeModel:
     @staticmethod
     def init_db():
@@ -29,6 +31,11 @@ class BotTradeModel:
         CREATE INDEX IF NOT EXISTS idx_bot_id ON bot_trades (bot_id)
         ''')
         
+        # Paginação por chave (timestamp, id) e filtro por intervalo
+        cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_bot_trades_bot_time ON bot_trades (bot_id, timestamp, id)
+        ''')
+        
         conn.commit()
         conn.close()
         
@@ -80,35 +87,87 @@ class BotTradeModel:
         Returns:
             list: Lista de dicionários com as operações
         """
-        conn = sqlite3.connect('src/database.db')
-        conn.row_factory = sqlite3.Row
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-        SELECT * FROM bot_trades 
-        WHERE bot_id = ? 
-        ORDER BY timestamp ASC
-        ''', (bot_id,))
+        return list(BotTradeModel.iter_trades(bot_id))
+
+    @staticmethod
+    def iter_trades(bot_id, after=None, start_time=None, end_time=None, limit=None, batch_size=500):
+        """
+        Percorre as operações em ordem (timestamp, id) lendo em blocos (fetchmany),
+        sem carregar o histórico inteiro em memória.
         
-        trades = [dict(row) for row in cursor.fetchall()]
-        conn.close()
+        Parameters:
+            after (tuple): Chave (timestamp, id) da última operação já recebida (paginação por chave)
+            start_time / end_time (str): Intervalo 'YYYY-MM-DD HH:MM:SS' (inclusivo)
+            limit (int): Quantidade máxima de operações
         
-        return trades
+        Returns:
+            generator: Dicionários com as operações
+        """
+        query = 'SELECT * FROM bot_trades WHERE bot_id = ?'
+        params = [bot_id]
+        if after is not None:
+            query += ' AND (timestamp, id) > (?, ?)'
+            params += list(after)
+        if start_time is not None:
+            query += ' AND timestamp >= ?'
+            params.append(start_time)
+        if end_time is not None:
+            query += ' AND timestamp <= ?'
+            params.append(end_time)
+        query += ' ORDER BY timestamp ASC, id ASC'
+        if limit is not None:
+            query += ' LIMIT ?'
+            params.append(limit)
+
+        conn = sqlite3.connect('src/database.db')
+        conn.row_factory = sqlite3.Row
+        try:
+            cursor = conn.execute(query, params)
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                for row in rows:
+                    yield dict(row)
+        finally:
+            conn.close()
         
     @staticmethod
-    def get_bot_statistics(bot_id):
+    def get_bot_statistics(bot_id, current_price=None):
         """
         Calcula estatísticas para um bot específico
 
         Parameters:
             bot_id (str): ID do bot
+            current_price (float): Preço atual do par, para o PnL não realizado (padrão: último preço conhecido)
 
         Returns:
             dict: Dicionário com estatísticas do bot
         """
-        trades = BotTradeModel.get_trades_by_bot(bot_id)
+        # Com execuções registradas, usa o custo da posição (FIFO, com taxas) já calculado
+        try:
+            statistics = FillLedgerModel.get_statistics(bot_id, current_price)
+            if statistics is not None:
+                return statistics
+        except Exception as e:
+            print(f"Erro ao ler custo da posição do bot {bot_id}: {e}")
+
+        # Agregado no próprio banco (sem carregar as operações em memória)
+        conn = sqlite3.connect('src/database.db')
+        cursor = conn.cursor()
+        cursor.execute('''
+        SELECT COUNT(*),
+               COALESCE(SUM(trade_type = 'BUY'), 0),
+               COALESCE(SUM(trade_type = 'SELL'), 0),
+               MAX(price), MIN(price),
+               COALESCE(SUM(CASE WHEN trade_type = 'BUY' THEN total_value END), 0),
+               COALESCE(SUM(CASE WHEN trade_type = 'SELL' THEN total_value END), 0)
+        FROM bot_trades WHERE bot_id = ?
+        ''', (bot_id,))
+        total_trades, buy_trades, sell_trades, highest_price, lowest_price, total_buy_volume, total_sell_volume = cursor.fetchone()
+        conn.close()
 
-        if not trades:
+        if not total_trades:
             return {
                 "total_trades": 0,
                 "buy_trades": 0,
@@ -123,19 +182,6 @@ class BotTradeModel:
                 "total_sell_volume": 0
             }
 
-        # Contar operações por tipo
-        buy_trades = [t for t in trades if t["trade_type"] == "BUY"]
-        sell_trades = [t for t in trades if t["trade_type"] == "SELL"]
-        
-        # Calcular valores extremos
-        all_prices = [t["price"] for t in trades]
-        highest_price = max(all_prices) if all_prices else 0
-        lowest_price = min(all_prices) if all_prices else 0
-        
-        # Calcular volumes de compra e venda
-        total_buy_volume = sum(t["total_value"] for t in buy_trades)
-        total_sell_volume = sum(t["total_value"] for t in sell_trades)
-        
         # Calcular lucro ou prejuízo
         total_profit = total_sell_volume - total_buy_volume
         
@@ -149,9 +195,9 @@ class BotTradeModel:
             profit_percentage = (total_profit / initial_balance) * 100
         
         return {
-            "total_trades": len(trades),
-            "buy_trades": len(buy_trades),
-            "sell_trades": len(sell_trades),
+            "total_trades": total_trades,
+            "buy_trades": buy_trades,
+            "sell_trades": sell_trades,
             "total_profit": total_profit,
             "profit_percentage": profit_percentage,
             "initial_balance": initial_balance,
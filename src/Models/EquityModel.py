@@ -0,0 +1,122 @@
+import sqlite3
+
+from modules.Downsample import lttb
+
+# Resoluções mantidas (segundos): 0 = cada ciclo, depois agregados de 15min, 1h e 1 dia
+RESOLUTIONS = (0, 15*60, 60*60, 24*60*60)
+
+
+class EquityModel:
+    """
+    Série de patrimônio por bot/simulação, registrada a cada ciclo.
+    Cada amostra atualiza também os agregados (abertura/máxima/mínima/fechamento) das
+    resoluções maiores, então um intervalo longo é lido na resolução mais grossa que
+    ainda tem pontos suficientes e reduzido por LTTB (modules/Downsample.py).
+    """
+
+    @staticmethod
+    def init_db():
+        conn = sqlite3.connect('src/database.db')
+        cursor = conn.cursor()
+
+        # Sem rowid: a chave primária é o próprio índice (série, resolução, início do período)
+        cursor.execute('''
+        CREATE TABLE IF NOT EXISTS equity_series (
+            series_id TEXT NOT NULL,
+            resolution INTEGER NOT NULL,
+            bucket INTEGER NOT NULL,
+            open REAL NOT NULL,
+            high REAL NOT NULL,
+            low REAL NOT NULL,
+            close REAL NOT NULL,
+            price REAL,
+            samples INTEGER NOT NULL,
+            PRIMARY KEY (series_id, resolution, bucket)
+        ) WITHOUT ROWID
+        ''')
+
+        conn.commit()
+        conn.close()
+
+        print("Tabela de série de patrimônio inicializada com sucesso!")
+
+    @staticmethod
+    def record(series_id, timestamp, equity, price=None):
+        """
+        Registra uma amostra de patrimônio.
+
+        Parameters:
+            timestamp (int): Momento da amostra em ms.
+            equity (float): Patrimônio na moeda de cotação.
+            price (float): Preço do ativo no momento.
+        """
+        seconds = int(timestamp // 1000)
+        conn = sqlite3.connect('src/database.db', timeout=30)
+        cursor = conn.cursor()
+        cursor.executemany('''
+        INSERT INTO equity_series (series_id, resolution, bucket, open, high, low, close, price, samples)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, 1)
+        ON CONFLICT (series_id, resolution, bucket) DO UPDATE SET
+            high = MAX(high, excluded.high),
+            low = MIN(low, excluded.low),
+            close = excluded.close,
+            price = excluded.price,
+            samples = samples + 1
+        ''', [
+            (series_id, resolution, seconds - seconds % resolution if resolution else seconds,
+             equity, equity, equity, equity, price)
+            for resolution in RESOLUTIONS
+        ])
+        conn.commit()
+        conn.close()
+
+    @staticmethod
+    def get_series(series_id, start_time=None, end_time=None, points=500):
+        """
+        Curva de patrimônio no intervalo, com no máximo `points` pontos.
+
+        Parameters:
+            start_time / end_time (int): Intervalo em ms (padrão: toda a série).
+
+        Returns:
+            dict: {'resolution' (s), 'points': [[timestamp_ms, patrimônio], ...], 'first', 'last', 'high', 'low'}
+        """
+        start = int(start_time // 1000) if start_time is not None else 0
+        end = int(end_time // 1000) if end_time is not None else 2**62
+        # Lê até algumas vezes o alvo e deixa o LTTB escolher os pontos
+        max_rows = max(points, 1) * 8
+
+        conn = sqlite3.connect('src/database.db')
+        cursor = conn.cursor()
+        try:
+            resolution = RESOLUTIONS[-1]
+            for candidate in RESOLUTIONS:
+                # Agregados começam antes do intervalo: inclui o período que contém o início
+                bucket_start = start - start % candidate if candidate else start
+                cursor.execute('''
+                SELECT COUNT(*) FROM equity_series
+                WHERE series_id = ? AND resolution = ? AND bucket BETWEEN ? AND ?
+                ''', (series_id, candidate, bucket_start, end))
+                if cursor.fetchone()[0] <= max_rows:
+                    resolution = candidate
+                    break
+
+            bucket_start = start - start % resolution if resolution else start
+            cursor.execute('''
+            SELECT bucket, close, high, low FROM equity_series
+            WHERE series_id = ? AND resolution = ? AND bucket BETWEEN ? AND ?
+            ORDER BY bucket
+            ''', (series_id, resolution, bucket_start, end))
+            rows = cursor.fetchall()
+        finally:
+            conn.close()
+
+        series = lttb([(bucket * 1000, close) for bucket, close, _, _ in rows], points)
+        return {
+            'resolution': resolution,
+            'points': [[timestamp, equity] for timestamp, equity in series],
+            'first': rows[0][1] if rows else None,
+            'last': rows[-1][1] if rows else None,
+            'high': max(row[2] for row in rows) if rows else None,
+            'low': min(row[3] for row in rows) if rows else None,
+        }
@@ -0,0 +1,277 @@
+import sqlite3
+import json
+import logging
+import time
+
+from modules.CostBasis import CostBasis
+
+
+class FillLedgerModel:
+    """
+    Execuções (fills) de cada bot, vindas do GET /api/v3/myTrades (com taxas),
+    e o custo da posição mantido de forma incremental (modules/CostBasis.py).
+    O myTrades é por par: só entram as execuções de ordens enviadas pelo próprio bot
+    (bot_orders), então dois bots no mesmo par não dividem nem duplicam execuções.
+    As estatísticas leem uma linha de bot_cost_basis, sem varrer as operações.
+    """
+
+    @staticmethod
+    def init_db():
+        conn = sqlite3.connect('src/database.db')
+        cursor = conn.cursor()
+
+        cursor.execute('''
+        CREATE TABLE IF NOT EXISTS bot_fills (
+            bot_id TEXT NOT NULL,
+            account TEXT NOT NULL,
+            symbol TEXT NOT NULL,
+            trade_id INTEGER NOT NULL,
+            order_id INTEGER NOT NULL,
+            side TEXT NOT NULL,
+            price REAL NOT NULL,
+            quantity REAL NOT NULL,
+            quote_quantity REAL NOT NULL,
+            commission REAL NOT NULL,
+            commission_asset TEXT,
+            is_maker INTEGER,
+            time INTEGER NOT NULL,
+            PRIMARY KEY (account, symbol, trade_id)
+        )
+        ''')
+        cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_bot_fills_bot_time ON bot_fills (bot_id, time)
+        ''')
+
+        # Dono de cada ordem enviada pelos bots (as execuções são atribuídas pelo orderId)
+        cursor.execute('''
+        CREATE TABLE IF NOT EXISTS bot_orders (
+            account TEXT NOT NULL,
+            symbol TEXT NOT NULL,
+            order_id INTEGER NOT NULL,
+            bot_id TEXT NOT NULL,
+            created_at REAL NOT NULL,
+            PRIMARY KEY (account, symbol, order_id)
+        )
+        ''')
+
+        # Estado do custo da posição por bot (atualizado a cada nova execução)
+        cursor.execute('''
+        CREATE TABLE IF NOT EXISTS bot_cost_basis (
+            bot_id TEXT PRIMARY KEY,
+            account TEXT NOT NULL,
+            symbol TEXT NOT NULL,
+            method TEXT NOT NULL,
+            lots TEXT NOT NULL,
+            position_quantity REAL NOT NULL,
+            position_cost REAL NOT NULL,
+            realized_pnl REAL NOT NULL,
+            fees REAL NOT NULL,
+            unmatched_quantity REAL NOT NULL,
+            buy_trades INTEGER NOT NULL,
+            sell_trades INTEGER NOT NULL,
+            buy_volume REAL NOT NULL,
+            sell_volume REAL NOT NULL,
+            highest_price REAL,
+            lowest_price REAL,
+            mark_price REAL,
+            last_trade_id INTEGER,
+            start_time INTEGER NOT NULL,
+            updated_at REAL NOT NULL
+        )
+        ''')
+
+        conn.commit()
+        conn.close()
+
+        print("Tabelas de execuções e custo de posição inicializadas com sucesso!")
+
+    @staticmethod
+    def get_cost_basis(bot_id):
+        conn = sqlite3.connect('src/database.db')
+        conn.row_factory = sqlite3.Row
+        cursor = conn.cursor()
+        try:
+            cursor.execute('SELECT * FROM bot_cost_basis WHERE bot_id = ?', (bot_id,))
+            row = cursor.fetchone()
+        except sqlite3.OperationalError:
+            row = None  # Tabela ainda não criada
+        conn.close()
+        return dict(row) if row else None
+
+    @staticmethod
+    def register_orders(bot_id, account, symbol, order_ids):
+        """Marca as ordens como do bot (chamado logo após o envio de cada ordem)."""
+        if not order_ids:
+            return
+        conn = sqlite3.connect('src/database.db', timeout=30)
+        conn.executemany('''
+        INSERT OR IGNORE INTO bot_orders (account, symbol, order_id, bot_id, created_at) VALUES (?, ?, ?, ?, ?)
+        ''', [(account, symbol, order_id, bot_id, time.time()) for order_id in order_ids])
+        conn.commit()
+        conn.close()
+
+    @staticmethod
+    def get_order_ids(bot_id, account, symbol):
+        conn = sqlite3.connect('src/database.db', timeout=30)
+        try:
+            rows = conn.execute('SELECT order_id FROM bot_orders WHERE bot_id = ? AND account = ? AND symbol = ?',
+                                (bot_id, account, symbol)).fetchall()
+        except sqlite3.OperationalError:
+            rows = []  # Tabela ainda não criada
+        conn.close()
+        return {row[0] for row in rows}
+
+    @staticmethod
+    def commission_rate(client_binance, asset, quote_asset, time_ms, cache):
+        """
+        Preço do ativo da taxa (ex: BNB) na moeda de cotação, no minuto da execução
+        (par direto ou invertido). None se não há par para converter.
+        """
+        minute = int(time_ms) // 60000 * 60000
+        key = (asset, minute)
+        if key not in cache:
+            cache[key] = None
+            for pair, inverted in ((asset + quote_asset, False), (quote_asset + asset, True)):
+                try:
+                    klines = client_binance.get_klines(symbol=pair, interval='1m', startTime=minute, limit=1)
+                except Exception:
+                    continue
+                if klines and float(klines[0][4]) > 0:
+                    close = float(klines[0][4])
+                    cache[key] = 1 / close if inverted else close
+                    break
+        return cache[key]
+
+    @staticmethod
+    def sync_fills(client_binance, bot_id, account, symbol, base_asset, quote_asset, start_time, method="fifo", mark_price=None, page_limit=1000):
+        """
+        Busca as execuções novas do par (fromId após a última conhecida; na primeira vez,
+        as mais recentes a partir de start_time) e aplica ao custo da posição do bot as que
+        são de ordens dele. O cursor (last_trade_id) avança por todas as execuções lidas,
+        mesmo sem nenhuma do bot, para a próxima rodada não reler a última página.
+        Taxas em outro ativo (ex: BNB) entram convertidas para a moeda de cotação.
+
+        Returns:
+            int: Quantidade de execuções novas
+        """
+        state = FillLedgerModel.get_cost_basis(bot_id) or {
+            'method': method, 'lots': '[]', 'realized_pnl': 0.0, 'fees': 0.0, 'unmatched_quantity': 0.0,
+            'buy_trades': 0, 'sell_trades': 0, 'buy_volume': 0.0, 'sell_volume': 0.0,
+            'highest_price': None, 'lowest_price': None, 'last_trade_id': None, 'start_time': start_time,
+        }
+        engine = CostBasis(state['method'], json.loads(state['lots']), state['realized_pnl'], state['fees'], state['unmatched_quantity'])
+
+        order_ids = FillLedgerModel.get_order_ids(bot_id, account, symbol)
+        new_fills = []
+        last_trade_id = state['last_trade_id']
+        while True:
+            if last_trade_id is None:
+                trades = client_binance.get_my_trades(symbol=symbol, limit=page_limit)
+            else:
+                trades = client_binance.get_my_trades(symbol=symbol, fromId=last_trade_id + 1, limit=page_limit)
+            trades = sorted(trades, key=lambda trade: trade['id'])
+            if trades:
+                last_trade_id = trades[-1]['id']
+            new_fills += [trade for trade in trades if trade['orderId'] in order_ids and trade['time'] >= state['start_time']]
+            if len(trades) < page_limit or state['last_trade_id'] is None:
+                break
+
+        rates = {}
+        for trade in new_fills:
+            side = 'BUY' if trade['isBuyer'] else 'SELL'
+            price, quantity = float(trade['price']), float(trade['qty'])
+            commission = float(trade['commission'])
+            commission_asset = trade['commissionAsset']
+            fee_quote = fee_base = 0.0
+            if commission_asset == quote_asset:
+                fee_quote = commission
+            elif commission_asset == base_asset:
+                fee_base = commission
+            elif commission > 0:
+                rate = FillLedgerModel.commission_rate(client_binance, commission_asset, quote_asset, trade['time'], rates)
+                if rate is None:
+                    logging.error(f"[FillLedger] Taxa de {commission} {commission_asset} da execução {trade['id']} sem par para converter em {quote_asset}")
+                else:
+                    fee_quote = commission * rate
+            engine.apply_fill(side, price, quantity, fee_quote=fee_quote, fee_base=fee_base)
+            state[f"{side.lower()}_trades"] += 1
+            state[f"{side.lower()}_volume"] += float(trade['quoteQty'])
+            state['highest_price'] = max(price, state['highest_price'] or price)
+            state['lowest_price'] = min(price, state['lowest_price'] or price)
+
+        if new_fills:
+            mark_price = mark_price or float(new_fills[-1]['price'])
+
+        conn = sqlite3.connect('src/database.db', timeout=30)
+        cursor = conn.cursor()
+        cursor.executemany('''
+        INSERT OR IGNORE INTO bot_fills
+        (bot_id, account, symbol, trade_id, order_id, side, price, quantity, quote_quantity, commission, commission_asset, is_maker, time)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ''', [(
+            bot_id, account, symbol, trade['id'], trade['orderId'], 'BUY' if trade['isBuyer'] else 'SELL',
+            float(trade['price']), float(trade['qty']), float(trade['quoteQty']),
+            float(trade['commission']), trade['commissionAsset'], int(bool(trade.get('isMaker'))), trade['time']
+        ) for trade in new_fills])
+
+        engine_state = engine.state()
+        cursor.execute('''
+        INSERT INTO bot_cost_basis
+        (bot_id, account, symbol, method, lots, position_quantity, position_cost, realized_pnl, fees, unmatched_quantity,
+         buy_trades, sell_trades, buy_volume, sell_volume, highest_price, lowest_price, mark_price, last_trade_id, start_time, updated_at)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT (bot_id) DO UPDATE SET
+            lots = excluded.lots, position_quantity = excluded.position_quantity, position_cost = excluded.position_cost,
+            realized_pnl = excluded.realized_pnl, fees = excluded.fees, unmatched_quantity = excluded.unmatched_quantity,
+            buy_trades = excluded.buy_trades, sell_trades = excluded.sell_trades,
+            buy_volume = excluded.buy_volume, sell_volume = excluded.sell_volume,
+            highest_price = excluded.highest_price, lowest_price = excluded.lowest_price,
+            mark_price = COALESCE(excluded.mark_price, bot_cost_basis.mark_price),
+            last_trade_id = excluded.last_trade_id, updated_at = excluded.updated_at
+        ''', (
+            bot_id, account, symbol, engine_state['method'], json.dumps(engine_state['lots']),
+            engine.position, engine.cost, engine.realized_pnl, engine.fees, engine.unmatched_quantity,
+            state['buy_trades'], state['sell_trades'], state['buy_volume'], state['sell_volume'],
+            state['highest_price'], state['lowest_price'], mark_price, last_trade_id, state['start_time'], time.time()
+        ))
+        conn.commit()
+        conn.close()
+        return len(new_fills)
+
+    @staticmethod
+    def get_statistics(bot_id, current_price=None, fee_rate=0.001):
+        """
+        Resultado do bot pelo custo da posição: PnL realizado, não realizado (no preço atual
+        ou no último preço conhecido) e preço de equilíbrio. None se o bot não tem execuções registradas.
+        """
+        state = FillLedgerModel.get_cost_basis(bot_id)
+        if state is None:
+            return None
+
+        engine = CostBasis(state['method'], json.loads(state['lots']), state['realized_pnl'], state['fees'], state['unmatched_quantity'])
+        price = current_price or state['mark_price']
+        unrealized_pnl = engine.unrealized_pnl(price)
+        total_profit = engine.realized_pnl + unrealized_pnl
+        initial_balance = state['buy_volume']
+
+        return {
+            "total_trades": state['buy_trades'] + state['sell_trades'],
+            "buy_trades": state['buy_trades'],
+            "sell_trades": state['sell_trades'],
+            "total_profit": total_profit,
+            "profit_percentage": (total_profit / initial_balance) * 100 if initial_balance > 0 else 0,
+            "initial_balance": initial_balance,
+            "final_balance": initial_balance + total_profit,
+            "highest_price": state['highest_price'] or 0,
+            "lowest_price": state['lowest_price'] or 0,
+            "total_buy_volume": state['buy_volume'],
+            "total_sell_volume": state['sell_volume'],
+            "realized_pnl": engine.realized_pnl,
+            "unrealized_pnl": unrealized_pnl,
+            "fees": engine.fees,
+            "position_quantity": engine.position,
+            "average_cost": engine.average_cost,
+            "break_even_price": engine.break_even_price(fee_rate),
+            "mark_price": price or 0,
+            "cost_basis_method": engine.method,
+        }
@@ -0,0 +1,238 @@
+import sqlite3
+import hashlib
+import threading
+import time
+
+# Status em que a ordem não muda mais
+FINAL_STATUSES = ("FILLED", "CANCELED", "EXPIRED", "REJECTED", "EXPIRED_IN_MATCH")
+
+_sync_locks = {}
+_sync_locks_guard = threading.Lock()
+
+
+class OrderLedgerModel:
+    """
+    Histórico local de ordens por conta e par, sincronizado de forma incremental
+    com GET /api/v3/allOrders a partir de orderId.
+    O cursor de sincronização é a ordem não finalizada mais antiga (ou a próxima
+    após a última conhecida), então cada sincronização traz apenas ordens novas ou
+    ainda em aberto. A última ordem executada por lado fica em uma tabela própria
+    (consulta por chave primária).
+    """
+
+    @staticmethod
+    def init_db():
+        conn = sqlite3.connect('src/database.db')
+        cursor = conn.cursor()
+
+        cursor.execute('''
+        CREATE TABLE IF NOT EXISTS order_ledger (
+            account TEXT NOT NULL,
+            symbol TEXT NOT NULL,
+            order_id INTEGER NOT NULL,
+            client_order_id TEXT,
+            order_list_id INTEGER,
+            side TEXT NOT NULL,
+            type TEXT NOT NULL,
+            status TEXT NOT NULL,
+            price REAL,
+            orig_qty REAL,
+            executed_qty REAL,
+            cummulative_quote_qty REAL,
+            time INTEGER NOT NULL,
+            update_time INTEGER,
+            PRIMARY KEY (account, symbol, order_id)
+        )
+        ''')
+
+        cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_order_ledger_side_status_time ON order_ledger (account, symbol, side, status, time)
+        ''')
+        cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_order_ledger_time ON order_ledger (account, symbol, time)
+        ''')
+
+        # Última ordem executada por lado (BUY/SELL)
+        cursor.execute('''
+        CREATE TABLE IF NOT EXISTS order_ledger_last_fill (
+            account TEXT NOT NULL,
+            symbol TEXT NOT NULL,
+            side TEXT NOT NULL,
+            order_id INTEGER NOT NULL,
+            price REAL NOT NULL,
+            quantity REAL NOT NULL,
+            time INTEGER NOT NULL,
+            PRIMARY KEY (account, symbol, side)
+        )
+        ''')
+
+        # Cursor de sincronização por conta/par
+        cursor.execute('''
+        CREATE TABLE IF NOT EXISTS order_ledger_sync (
+            account TEXT NOT NULL,
+            symbol TEXT NOT NULL,
+            next_order_id INTEGER NOT NULL,
+            synced_at REAL NOT NULL,
+            PRIMARY KEY (account, symbol)
+        )
+        ''')
+
+        conn.commit()
+        conn.close()
+
+        print("Tabela de histórico de ordens inicializada com sucesso!")
+
+    @staticmethod
+    def account_key(client_binance):
+        """Identifica a conta sem guardar a chave da API: hash do endpoint + API key."""
+        endpoint = getattr(client_binance, 'custom_api_url', None) or getattr(client_binance, 'API_URL', '')
+        api_key = getattr(client_binance, 'API_KEY', None) or ''
+        return hashlib.sha1(f"{endpoint}|{api_key}".encode()).hexdigest()[:16]
+
+    @staticmethod
+    def _sync_lock(account, symbol):
+        with _sync_locks_guard:
+            return _sync_locks.setdefault((account, symbol), threading.Lock())
+
+    @staticmethod
+    def sync(client_binance, account, symbol, page_limit=1000):
+        """
+        Busca as ordens a partir do cursor salvo (na primeira vez, todo o histórico)
+        e atualiza o histórico local.
+
+        Returns:
+            int: Quantidade de ordens recebidas da corretora
+        """
+        with OrderLedgerModel._sync_lock(account, symbol):
+            conn = sqlite3.connect('src/database.db', timeout=30)
+            cursor = conn.cursor()
+            try:
+                cursor.execute('SELECT next_order_id FROM order_ledger_sync WHERE account = ? AND symbol = ?', (account, symbol))
+                row = cursor.fetchone()
+                next_order_id = row[0] if row else 1
+
+                received = 0
+                while True:
+                    orders = client_binance.get_all_orders(symbol=symbol, orderId=next_order_id, limit=page_limit)
+                    if not orders:
+                        break
+                    OrderLedgerModel._upsert(cursor, account, symbol, orders)
+                    received += len(orders)
+                    if len(orders) < page_limit:
+                        break
+                    next_order_id = max(order['orderId'] for order in orders) + 1
+
+                # Próximo cursor: ordem em aberto mais antiga ou a seguinte à última conhecida
+                cursor.execute(f'''
+                SELECT COALESCE(
+                    (SELECT MIN(order_id) FROM order_ledger WHERE account = ? AND symbol = ? AND status NOT IN ({",".join("?" * len(FINAL_STATUSES))})),
+                    (SELECT MAX(order_id) + 1 FROM order_ledger WHERE account = ? AND symbol = ?),
+                    1)
+                ''', (account, symbol, *FINAL_STATUSES, account, symbol))
+                cursor.execute('''
+                INSERT INTO order_ledger_sync (account, symbol, next_order_id, synced_at) VALUES (?, ?, ?, ?)
+                ON CONFLICT (account, symbol) DO UPDATE SET next_order_id = excluded.next_order_id, synced_at = excluded.synced_at
+                ''', (account, symbol, cursor.fetchone()[0], time.time()))
+
+                conn.commit()
+                return received
+            finally:
+                conn.close()
+
+    @staticmethod
+    def _upsert(cursor, account, symbol, orders):
+        cursor.executemany('''
+        INSERT INTO order_ledger
+        (account, symbol, order_id, client_order_id, order_list_id, side, type, status, price,
+         orig_qty, executed_qty, cummulative_quote_qty, time, update_time)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT (account, symbol, order_id) DO UPDATE SET
+            status = excluded.status,
+            executed_qty = excluded.executed_qty,
+            cummulative_quote_qty = excluded.cummulative_quote_qty,
+            update_time = excluded.update_time
+        ''', [(
+            account, symbol, order['orderId'], order.get('clientOrderId'), order.get('orderListId', -1),
+            order['side'], order['type'], order['status'], float(order['price']),
+            float(order['origQty']), float(order['executedQty']), float(order['cummulativeQuoteQty']),
+            order['time'], order.get('updateTime', order['time'])
+        ) for order in orders])
+
+        # Última ordem executada por lado: substitui só se for mais recente
+        # (pela updateTime, momento da execução; `time` é a criação e uma ordem antiga pode executar depois)
+        cursor.executemany('''
+        INSERT INTO order_ledger_last_fill (account, symbol, side, order_id, price, quantity, time)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT (account, symbol, side) DO UPDATE SET
+            order_id = excluded.order_id, price = excluded.price, quantity = excluded.quantity, time = excluded.time
+        WHERE excluded.time >= order_ledger_last_fill.time
+        ''', [(
+            account, symbol, order['side'], order['orderId'],
+            float(order['cummulativeQuoteQty']) / float(order['executedQty']),
+            float(order['executedQty']), order.get('updateTime', order['time'])
+        ) for order in orders if order['status'] == 'FILLED' and float(order['executedQty']) > 0])
+
+    @staticmethod
+    def get_last_fill(account, symbol, side):
+        """
+        Última ordem executada (FILLED) do lado informado.
+
+        Returns:
+            dict | None: {'order_id', 'price' (preço médio executado), 'quantity', 'time'}
+        """
+        conn = sqlite3.connect('src/database.db')
+        conn.row_factory = sqlite3.Row
+        cursor = conn.cursor()
+        cursor.execute('''
+        SELECT order_id, price, quantity, time FROM order_ledger_last_fill
+        WHERE account = ? AND symbol = ? AND side = ?
+        ''', (account, symbol, side))
+        row = cursor.fetchone()
+        conn.close()
+        return dict(row) if row else None
+
+    @staticmethod
+    def get_open_order_ids(account, symbol):
+        """Ordens ainda não finalizadas segundo o histórico local."""
+        conn = sqlite3.connect('src/database.db')
+        cursor = conn.cursor()
+        cursor.execute(f'''
+        SELECT order_id FROM order_ledger
+        WHERE account = ? AND symbol = ? AND status NOT IN ({",".join("?" * len(FINAL_STATUSES))})
+        ''', (account, symbol, *FINAL_STATUSES))
+        ids = {row[0] for row in cursor.fetchall()}
+        conn.close()
+        return ids
+
+    @staticmethod
+    def get_orders(account, symbol, side=None, status=None, start_time=None, end_time=None, limit=100):
+        """
+        Consulta o histórico local (mais recentes primeiro), sem o limite de 100 ordens da API.
+
+        Parameters:
+            start_time / end_time (int): Intervalo em ms (campo time da ordem).
+        """
+        query = 'SELECT * FROM order_ledger WHERE account = ? AND symbol = ?'
+        params = [account, symbol]
+        if side:
+            query += ' AND side = ?'
+            params.append(side)
+        if status:
+            query += ' AND status = ?'
+            params.append(status)
+        if start_time is not None:
+            query += ' AND time >= ?'
+            params.append(start_time)
+        if end_time is not None:
+            query += ' AND time <= ?'
+            params.append(end_time)
+        query += ' ORDER BY time DESC LIMIT ?'
+        params.append(limit)
+
+        conn = sqlite3.connect('src/database.db')
+        conn.row_factory = sqlite3.Row
+        cursor = conn.cursor()
+        cursor.execute(query, params)
+        orders = [dict(row) for row in cursor.fetchall()]
+        conn.close()
+        return orders
@@ -29,6 +29,11 @@ class SimulationTradeModel:
         CREATE INDEX IF NOT EXISTS idx_simulation_id ON simulation_trades (simulation_id)
         ''')
         
+        # Paginação por chave (timestamp, id) e filtro por intervalo
+        cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_simulation_trades_time ON simulation_trades (simulation_id, timestamp, id)
+        ''')
+        
         conn.commit()
         conn.close()
         
@@ -80,20 +85,50 @@ class SimulationTradeModel:
         Returns:
             list: Lista de dicionários com as operações
         """
-        conn = sqlite3.connect('src/database.db')
-        conn.row_factory = sqlite3.Row
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-        SELECT * FROM simulation_trades 
-        WHERE simulation_id = ? 
-        ORDER BY timestamp ASC
-        ''', (simulation_id,))
+        return list(SimulationTradeModel.iter_trades(simulation_id))
+
+    @staticmethod
+    def iter_trades(simulation_id, after=None, start_time=None, end_time=None, limit=None, batch_size=500):
+        """
+        Percorre as operações em ordem (timestamp, id) lendo em blocos (fetchmany),
+        sem carregar o histórico inteiro em memória.
         
-        trades = [dict(row) for row in cursor.fetchall()]
-        conn.close()
+        Parameters:
+            after (tuple): Chave (timestamp, id) da última operação já recebida (paginação por chave)
+            start_time / end_time (str): Intervalo 'YYYY-MM-DD HH:MM:SS' (inclusivo)
+            limit (int): Quantidade máxima de operações
         
-        return trades
+        Returns:
+            generator: Dicionários com as operações
+        """
+        query = 'SELECT * FROM simulation_trades WHERE simulation_id = ?'
+        params = [simulation_id]
+        if after is not None:
+            query += ' AND (timestamp, id) > (?, ?)'
+            params += list(after)
+        if start_time is not None:
+            query += ' AND timestamp >= ?'
+            params.append(start_time)
+        if end_time is not None:
+            query += ' AND timestamp <= ?'
+            params.append(end_time)
+        query += ' ORDER BY timestamp ASC, id ASC'
+        if limit is not None:
+            query += ' LIMIT ?'
+            params.append(limit)
+
+        conn = sqlite3.connect('src/database.db')
+        conn.row_factory = sqlite3.Row
+        try:
+            cursor = conn.execute(query, params)
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                for row in rows:
+                    yield dict(row)
+        finally:
+            conn.close()
         
     @staticmethod
     def get_simulation_statistics(simulation_id):
@@ -106,9 +141,22 @@ class SimulationTradeModel:
         Returns:
             dict: Dicionário com estatísticas da simulação
         """
-        trades = SimulationTradeModel.get_trades_by_simulation(simulation_id)
+        # Agregado no próprio banco (sem carregar as operações em memória)
+        conn = sqlite3.connect('src/database.db')
+        cursor = conn.cursor()
+        cursor.execute('''
+        SELECT COUNT(*),
+               COALESCE(SUM(trade_type = 'BUY'), 0),
+               COALESCE(SUM(trade_type = 'SELL'), 0),
+               COALESCE(SUM(CASE WHEN trade_type = 'BUY' THEN total_value END), 0),
+               COALESCE(SUM(CASE WHEN trade_type = 'SELL' THEN total_value END), 0),
+               MIN(timestamp), MAX(timestamp)
+        FROM simulation_trades WHERE simulation_id = ?
+        ''', (simulation_id,))
+        total_trades, buy_trades, sell_trades, total_buy_value, total_sell_value, first_trade_date, last_trade_date = cursor.fetchone()
+        conn.close()
         
-        if not trades:
+        if not total_trades:
             return {
                 "total_trades": 0,
                 "buy_trades": 0,
@@ -119,12 +167,6 @@ class SimulationTradeModel:
                 "profit_loss_percentage": 0
             }
         
-        buy_trades = [t for t in trades if t["trade_type"] == "BUY"]
-        sell_trades = [t for t in trades if t["trade_type"] == "SELL"]
-        
-        total_buy_value = sum(t["total_value"] for t in buy_trades)
-        total_sell_value = sum(t["total_value"] for t in sell_trades)
-        
         profit_loss = total_sell_value - total_buy_value
         profit_loss_percentage = 0
         
@@ -132,15 +174,15 @@ class SimulationTradeModel:
             profit_loss_percentage = (profit_loss / total_buy_value) * 100
             
         return {
-            "total_trades": len(trades),
-            "buy_trades": len(buy_trades),
-            "sell_trades": len(sell_trades),
+            "total_trades": total_trades,
+            "buy_trades": buy_trades,
+            "sell_trades": sell_trades,
             "total_buy_value": total_buy_value,
             "total_sell_value": total_sell_value,
             "profit_loss": profit_loss,
             "profit_loss_percentage": profit_loss_percentage,
-            "first_trade_date": trades[0]["timestamp"] if trades else None,
-            "last_trade_date": trades[-1]["timestamp"] if trades else None
+            "first_trade_date": first_trade_date,
+            "last_trade_date": last_trade_date
         }
     
     @staticmethod
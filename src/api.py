@@ -11,6 +11,8 @@ import logging
 import threading
 import time
 import json
+import signal
+from concurrent.futures import ThreadPoolExecutor, as_completed, TimeoutError as FuturesTimeoutError
 from datetime import datetime
 from flask import Blueprint, request, jsonify, render_template, redirect, url_for, Response
 from flask_login import login_required, current_user
@@ -34,21 +36,45 @@ from Models.AssetStartModel import AssetStartModel
 from Models.CoinModel import CoinModel
 from Models.SimulationTradeModel import SimulationTradeModel
 from Models.BotTradeModel import BotTradeModel
+from Models.OrderLedgerModel import OrderLedgerModel
+from Models.FillLedgerModel import FillLedgerModel
+from Models.EquityModel import EquityModel
+from Models.BotLeaseModel import BotLeaseModel
 from modules.BinanceRobot import BinanceTraderBot
+from modules.BinanceClient import BinanceClient
+from modules.HealthMonitor import health_collector
+from modules.JsonResponse import json_response, ndjson_response
+from modules.CoinSearch import coin_catalog
+from modules.BotShards import ShardedBotPool
+from modules.BotCoordinator import BotCoordinator
+from modules.BotSupervisor import bot_supervisor, replace_bot, ACTIVE_STATES
+from modules.Resilience import breakers_snapshot
+from modules.SessionRecorder import session_path
+from modules.Profiler import ProfilerBusy, sample_stacks, summarize, collapsed_lines
+from modules.PaperTrading import PaperExchange, SyntheticCandleFeed, BinanceCandleFeed, getCandleFeed
+from indicators import indicator_cache
 
 # Configurações globais
 VOLATILITY_FACTOR = 0.5
 ACCEPTABLE_LOSS_PERCENTAGE = 0
+CHASE_BOUND_BPS = 20  # Quanto a perseguição de ordens pode andar a partir do preço enviado (pontos-base)
 STOP_LOSS_PERCENTAGE = 3
 FALLBACK_ACTIVATED = True
 CANDLE_PERIOD = Client.KLINE_INTERVAL_5MINUTE
 TEMPO_ENTRE_TRADES = 5 * 60
 DELAY_ENTRE_ORDENS = 15 * 60
+BINANCE_BASE_ENDPOINT = os.environ.get('BINANCE_BASE_ENDPOINT') # Ex: http://127.0.0.1:8900 (emulador local)
+BOT_SHARDS = int(os.environ.get('BOT_SHARDS', 0)) # > 0: robôs em N processos (modules/BotShards.py)
+BOT_COORDINATION = os.environ.get('BOT_COORDINATION', '').lower() in ('1', 'true', 'yes') # Várias réplicas da API com leases (modules/BotCoordinator.py)
+BOT_LEASE_TTL = float(os.environ.get('BOT_LEASE_TTL', 30))
+BOT_RECORD_DIR = os.environ.get('BOT_RECORD_DIR') # Grava as chamadas de cada robô para reprodução (modules/SessionRecorder.py)
 
 # Dicionários e configurações do robô
 running_bots = {}
 simulation_bots = {}
 bots_lock = threading.Lock()
+bot_pool = None # ShardedBotPool quando BOT_SHARDS > 0
+bot_coordinator = None # BotCoordinator quando BOT_COORDINATION está ativo
 log_messages = []
 log_lock = threading.Lock()
 
@@ -69,46 +95,97 @@ def add_log_message(message, type="info"):
             log_messages.pop(0)
         logger.info(message)
 
+def create_binance_client(api_key, api_secret):
+    """Cria o cliente da Binance, apontando para BINANCE_BASE_ENDPOINT quando configurado."""
+    if BINANCE_BASE_ENDPOINT:
+        return BinanceClient(api_key, api_secret, base_endpoint=BINANCE_BASE_ENDPOINT, sync=False, ping=False)
+    return Client(api_key, api_secret)
+
 class SimulationTraderBot(BinanceTraderBot):
-    """Classe para simulação de trades."""
-    def __init__(self, *args, **kwargs):
-        super().__init__(*args, **kwargs)
+    """
+    Bot de simulação (paper trading).
+    Executa o mesmo execute() do bot real contra uma conta virtual (modules/PaperTrading.py):
+    ordens limitadas ficam abertas e são preenchidas pelos próximos candles, com taxa e slippage.
+    """
+    def __init__(self, *args, simulation_id=None, paper_exchange=None, **kwargs):
+        # A simulação avança por candles (step), sem feed de preços em tempo real para o motor de ordens
+        kwargs.setdefault('order_chasing', False)
+        kwargs.setdefault('use_order_ledger', False) # Ordens virtuais não entram no histórico local da conta
+        super().__init__(*args, client_binance=paper_exchange, **kwargs)
         self.simulation_mode = True
-        self.simulation_trades = []
-        self.simulation_balance = 0
-        self.simulation_stock_balance = 0
-        self.initial_price = 0
-    
-    # Métodos simplificados para simulação
-    def buyMarketOrder(self):
-        return True
-    
-    def sellMarketOrder(self):
-        return True
-    
-    def buyLimitedOrder(self, price=0):
-        return True
-    
-    def sellLimitedOrder(self, price=0):
-        return True
-    
-    def getActualTradePosition(self):
-        return False
-    
+        self.simulation_id = simulation_id
+        self.paper_exchange = paper_exchange
+        self.initial_price = paper_exchange.last_price
+        self.initial_equity = paper_exchange.equity()
+        self.closing_position = False
+        self.simulation_lock = threading.Lock()
+        paper_exchange.on_fill = self.onPaperFill
+
+    @property
+    def simulation_balance(self):
+        return sum(self.paper_exchange.balances.get(self.paper_exchange.quote_code, (0.0, 0.0)))
+
+    @property
+    def simulation_stock_balance(self):
+        return sum(self.paper_exchange.balances.get(self.stock_code, (0.0, 0.0)))
+
+    # Registra cada execução virtual no histórico da simulação
+    def onPaperFill(self, order, price, quantity):
+        if self.closing_position:
+            trade_type = 'SELL_FINAL'
+        else:
+            trade_type = order.side + ('_MARKET' if order.type == 'MARKET' else '')
+        SimulationTradeModel.register_trade(
+            simulation_id=self.simulation_id,
+            operation_code=self.operation_code,
+            trade_type=trade_type,
+            price=price,
+            quantity=quantity,
+            total_value=price * quantity
+        )
+
+    # Patrimônio virtual no horário do candle simulado
+    def getEquitySample(self):
+        exchange = self.paper_exchange
+        return self.simulation_id, exchange.now_ms(), exchange.equity(), exchange.last_price
+
+    def step(self, steps=1):
+        """Avança `steps` candles; a cada candle as ordens abertas são preenchidas e o execute() roda."""
+        executed = 0
+        with self.simulation_lock:
+            for _ in range(steps):
+                if not self.paper_exchange.step():
+                    break  # Sem candle novo disponível (feed real ainda não fechou o próximo)
+                self.execute()
+                executed += 1
+        return executed
+
+    def closePosition(self):
+        """Cancela as ordens abertas e vende o saldo do ativo a mercado (SELL_FINAL)."""
+        with self.simulation_lock:
+            exchange = self.paper_exchange
+            for order in list(exchange.open_orders):
+                exchange.cancel_order(symbol=self.operation_code, orderId=order.order_id)
+            free = exchange.balances.get(self.stock_code, [0.0, 0.0])[0]
+            quantity = self.adjust_to_step(free, self.step_size)
+            if quantity >= self.step_size:
+                self.closing_position = True
+                try:
+                    exchange.create_order(symbol=self.operation_code, side='SELL', type='MARKET', quantity=quantity)
+                finally:
+                    self.closing_position = False
+
     def run(self):
-        """Método para compatibilidade com o bot real. 
-        Nas simulações, este método não é usado, pois as operações são 
-        executadas manualmente passo a passo pelo usuário."""
+        """Método para compatibilidade com o bot real.
+        Nas simulações, os candles avançam quando o usuário executa um passo."""
         logger.info(f"Bot de simulação iniciado para {self.operation_code}")
-        while True:
-            # Em simulações, não fazemos nada aqui, pois as operações
-            # são controladas pelo usuário através da interface
-            time.sleep(60)  # Dormir para não consumir CPU
-            
+        while not self.stop_event.is_set():
+            self.stop_event.wait(60)  # Dormir para não consumir CPU
+
     def stop(self):
         """Método para interromper o funcionamento do bot."""
         logger.info(f"Bot de simulação {self.operation_code} sendo finalizado")
-        # Não precisamos fazer nada especial aqui para simulações
+        self.stop_event.set()
         return True
 
 # Rota principal
@@ -162,7 +239,7 @@ def test_binance():
     
     try:
         # Tentar criar um cliente Binance
-        client = Client(api_key, api_secret)
+        client = create_binance_client(api_key, api_secret)
         
         # Verificar a conexão obtendo informações da conta
         status = client.get_system_status()
@@ -242,63 +319,121 @@ def simulation_history_page():
 def dashboard():
     return redirect('/')
 
+# Verificações do coletor de saúde (modules/HealthMonitor.py), executadas em segundo plano
+_health_binance_client = None
+
+def check_binance_health():
+    """Status do sistema da Binance com um cliente reaproveitado entre as coletas."""
+    global _health_binance_client
+    api_key = os.environ.get('BINANCE_API_KEY', 'NÃO DEFINIDA')
+    api_secret = os.environ.get('BINANCE_SECRET_KEY', 'NÃO DEFINIDA')
+    if api_key in ('NÃO DEFINIDA', 'sua_api_key_aqui') or api_secret in ('NÃO DEFINIDA', 'sua_secret_key_aqui'):
+        return {"status": "not_configured", "connection": "not_configured"}
+
+    if _health_binance_client is None:
+        _health_binance_client = create_binance_client(api_key, api_secret)
+    status = _health_binance_client.get_system_status()
+    connection = status['status'] == 0 and "normal" or "maintenance"
+    return {"status": "ok" if connection == "normal" else "degraded", "connection": connection}
+
+def check_circuits_health():
+    """Circuit breakers das chamadas à Binance (abertos = corretora falhando ou limite de requisições)."""
+    circuits = breakers_snapshot()
+    unavailable = [name for name, circuit in circuits.items() if circuit["state"] != "closed"]
+    return {"status": "degraded" if unavailable else "ok", "open": unavailable, "circuits": circuits}
+
+def check_database_health():
+    conn = sqlite3.connect('src/database.db', timeout=5)
+    try:
+        tables = conn.execute("SELECT COUNT(*) FROM sqlite_master WHERE type = 'table'").fetchone()[0]
+    finally:
+        conn.close()
+    return {"status": "ok", "tables": tables}
+
+def check_bots_health():
+    """Robôs em execução e o estado de cada um no supervisor (ativo, travado, falhando, morto)."""
+    active_bots = []
+    with bots_lock:
+        bots = list(running_bots.items())
+    for bot_id, bot in bots:
+        supervision = bot_supervisor.describe(bot_id, bot)
+        alive = supervision["state"] in ACTIVE_STATES
+        try:
+            # Garantir valores default seguros para atributos que podem não existir
+            last_operation = "NONE"
+            if hasattr(bot, 'last_operation') and bot.last_operation:
+                last_operation = bot.last_operation
+
+            active_bots.append({
+                "id": bot_id,
+                "stock_code": bot.stock_code,
+                "operation_code": bot.operation_code,
+                "position": "Vendido" if last_operation == "SELL" else "Comprado" if last_operation == "BUY" else "Indefinido",
+                "last_buy_price": bot.last_buy_price if hasattr(bot, 'last_buy_price') else 0,
+                "last_sell_price": bot.last_sell_price if hasattr(bot, 'last_sell_price') else 0,
+                "wallet_balance": bot.last_stock_account_balance if hasattr(bot, 'last_stock_account_balance') else 0,
+                "alive": alive,
+                **supervision
+            })
+        except Exception as e:
+            logger.error(f"Erro ao obter detalhes do bot {bot_id}: {str(e)}")
+            # Adicionar o bot mesmo com erro para que o usuário veja que ele existe
+            active_bots.append({
+                "id": bot_id,
+                "stock_code": bot.stock_code if hasattr(bot, 'stock_code') else "Desconhecido",
+                "operation_code": bot.operation_code if hasattr(bot, 'operation_code') else "Desconhecido",
+                "position": "Erro",
+                "last_buy_price": 0,
+                "last_sell_price": 0,
+                "wallet_balance": 0,
+                "alive": alive,
+                "error": str(e)
+            })
+    result = {
+        "status": "ok" if all(bot["alive"] for bot in active_bots) else "degraded",
+        "running": len(active_bots),
+        "active_bots": active_bots
+    }
+    if bot_pool is not None:
+        shards = bot_pool.status()
+        result["shards"] = shards
+        result["running"] += sum(shard.get("bots", 0) for shard in shards)
+        if not all(shard["alive"] and "error" not in shard for shard in shards):
+            result["status"] = "degraded"
+    return result
+
+def init_health_collector():
+    health_collector.interval = float(os.environ.get('HEALTH_CHECK_INTERVAL', 30))
+    health_collector.stale_after = health_collector.interval * 3
+    health_collector.register('binance', check_binance_health)
+    health_collector.register('database', check_database_health)
+    health_collector.register('binance_circuits', check_circuits_health)
+    health_collector.register('bots', check_bots_health)
+    health_collector.register('indicator_cache', lambda: {"status": "ok", **indicator_cache.stats()})
+    health_collector.start()
+
+def get_health_snapshot():
+    """Último retrato do coletor de saúde (sem I/O por requisição)."""
+    return health_collector.get_snapshot()
+
 # Rotas da API
-# Rota para obter o status da API
+# Rota para obter o status da API (retrato do coletor de saúde)
 @api_bp.route('/api/status', methods=['GET'])
 def api_status():
     try:
-        api_key = os.environ.get('BINANCE_API_KEY', 'NÃO DEFINIDA')
-        api_secret = os.environ.get('BINANCE_SECRET_KEY', 'NÃO DEFINIDA')
-        
-        # Verificar conexão com a Binance se as chaves estiverem definidas
-        binance_status = "not_configured"
-        if api_key != 'NÃO DEFINIDA' and api_secret != 'NÃO DEFINIDA' and api_key != 'sua_api_key_aqui' and api_secret != 'sua_secret_key_aqui':
-            try:
-                client = Client(api_key, api_secret)
-                status = client.get_system_status()
-                binance_status = status['status'] == 0 and "normal" or "maintenance"
-            except:
-                binance_status = "error"
-        
-        # Obter bots ativos
-        active_bots = []
-        with bots_lock:
-            for bot_id, bot in running_bots.items():
-                try:
-                    # Garantir valores default seguros para atributos que podem não existir
-                    last_operation = "NONE"
-                    if hasattr(bot, 'last_operation') and bot.last_operation:
-                        last_operation = bot.last_operation
-                    
-                    active_bots.append({
-                        "id": bot_id,
-                        "stock_code": bot.stock_code,
-                        "operation_code": bot.operation_code,
-                        "position": "Vendido" if last_operation == "SELL" else "Comprado" if last_operation == "BUY" else "Indefinido",
-                        "last_buy_price": bot.last_buy_price if hasattr(bot, 'last_buy_price') else 0,
-                        "last_sell_price": bot.last_sell_price if hasattr(bot, 'last_sell_price') else 0,
-                        "wallet_balance": bot.last_stock_account_balance if hasattr(bot, 'last_stock_account_balance') else 0
-                    })
-                except Exception as e:
-                    logger.error(f"Erro ao obter detalhes do bot {bot_id}: {str(e)}")
-                    # Adicionar o bot mesmo com erro para que o usuário veja que ele existe
-                    active_bots.append({
-                        "id": bot_id,
-                        "stock_code": bot.stock_code if hasattr(bot, 'stock_code') else "Desconhecido",
-                        "operation_code": bot.operation_code if hasattr(bot, 'operation_code') else "Desconhecido",
-                        "position": "Erro",
-                        "last_buy_price": 0,
-                        "last_sell_price": 0,
-                        "wallet_balance": 0,
-                        "error": str(e)
-                    })
-        
+        snapshot = get_health_snapshot()
+        checks = snapshot["checks"]
         return jsonify({
             "status": "ok",
             "server_time": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-            "binance_connection": binance_status,
+            "binance_connection": checks.get("binance", {}).get("connection", "error"),
             "version": "1.0.0",
-            "active_bots": active_bots
+            "active_bots": checks.get("bots", {}).get("active_bots", []),
+            "indicator_cache": {k: v for k, v in checks.get("indicator_cache", {}).items() if k not in ("status", "latency_ms")},
+            "health": snapshot["status"],
+            "collected_at": snapshot["collected_at_iso"],
+            "age_seconds": snapshot["age_seconds"],
+            "stale": snapshot["stale"]
         })
     except Exception as e:
         return jsonify({
@@ -321,7 +456,7 @@ def get_wallet():
             }), 400
         
         try:
-            client = Client(api_key, api_secret)
+            client = create_binance_client(api_key, api_secret)
             account = client.get_account()
             
             # Obter todos os preços atuais para converter em USDT
@@ -387,7 +522,7 @@ def get_wallet():
             # Ordenar por valor em USDT (do maior para o menor)
             balances.sort(key=lambda x: x['usdt_value'], reverse=True)
             
-            return jsonify({
+            return json_response({
                 "status": "success",
                 "balances": balances,
                 "total_usdt_value": total_usdt_value,
@@ -406,6 +541,72 @@ def get_wallet():
             "message": str(e)
         }), 500
 
+def launch_bot(bot_id, bot_config, lease=None):
+    """
+    Cria e inicia um robô neste nó: no shard responsável pelo par (BOT_SHARDS > 0) ou
+    em uma thread deste processo. Retorna o shard (ou None no modo local).
+    `lease` = (node_id, epoch) com BOT_COORDINATION: o robô só envia ordens com ele válido.
+    """
+    if bot_pool is not None:
+        return bot_pool.start_bot(bot_id, bot_config, lease=lease)
+
+    bot = spawn_bot(bot_id, bot_config, lease=lease)
+
+    # Adicionar bot à lista de robôs em execução
+    with bots_lock:
+        running_bots[bot_id] = bot
+    bot_supervisor.watch(bot_id, bot, restart_local_bot)
+    return None
+
+def spawn_bot(bot_id, bot_config, previous=None, lease=None):
+    """Cria o robô (a partir do estado de `previous`, se informado) e inicia a thread dele."""
+    # Definir globalmente as variáveis necessárias
+    import modules.BinanceRobot as BinanceRobot
+    BinanceRobot.api_key = os.environ.get('BINANCE_API_KEY')
+    BinanceRobot.secret_key = os.environ.get('BINANCE_SECRET_KEY')
+
+    logger.info("Criando instância do bot...")
+    record_session = session_path(BOT_RECORD_DIR, bot_id) if BOT_RECORD_DIR else None
+    bot = BinanceTraderBot(**bot_config, record_session=record_session, bot_id=bot_id)
+
+    # Verificar se o bot tem os atributos necessários
+    missing_attrs = [attr for attr in ('stock_code', 'operation_code', 'traded_quantity') if not hasattr(bot, attr)]
+    if missing_attrs:
+        raise RuntimeError(f"Bot criado com propriedades ausentes: {', '.join(missing_attrs)}")
+
+    bot.config = bot_config
+    bot.lease = lease
+    if previous is not None:
+        bot.restoreState(previous)
+
+    # Iniciar a thread do robô usando o método run implementado na classe
+    bot_thread = threading.Thread(target=bot.run, name=f"bot-{bot_id}")
+    bot_thread.daemon = True
+    bot_thread.start()
+    bot.thread = bot_thread # Liveness no coletor de saúde
+    return bot
+
+def restart_local_bot(bot_id, old_bot):
+    """Reinício pelo supervisor no modo local (ver BotSupervisor.replace_bot)."""
+    bot = replace_bot(bot_id, old_bot, running_bots, bots_lock, spawn_bot)
+    if bot is None:
+        return None
+    add_log_message(f"Robô {bot_id} reiniciado pelo supervisor", "warning")
+    return bot
+
+def stop_local_bot(bot_id, cancel_orders=True):
+    """Para um robô deste nó (thread local ou shard). Retorna False se ele não roda aqui."""
+    bot_supervisor.unwatch(bot_id)
+    with bots_lock:
+        bot = running_bots.pop(bot_id, None)
+    if bot is not None:
+        bot.stop(cancel_orders)
+        return True
+    if bot_pool is not None and bot_pool.has(bot_id):
+        bot_pool.stop_bot(bot_id, cancel_orders)
+        return True
+    return False
+
 # Listar robôs em execução
 @api_bp.route('/api/bot/list', methods=['GET'])
 @login_required
@@ -423,14 +624,14 @@ def list_bots():
                 if hasattr(bot, 'last_price') and bot.last_price:
                     last_price = bot.last_price
                 
+                # Estado real (heartbeat, último ciclo, tempo no ar, reinícios) vindo do supervisor
                 bot_info = {
                     "id": bot_id,
                     "stock_code": bot.stock_code,
                     "operation_code": bot.operation_code,
                     "last_operation": last_operation,
                     "last_price": last_price,
-                    "is_active": True,
-                    "start_time": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+                    **bot_supervisor.describe(bot_id, bot)
                 }
                 bots_info.append(bot_info)
             except Exception as e:
@@ -442,11 +643,30 @@ def list_bots():
                     "error": str(e),
                     "is_active": False
                 })
-        
-        return jsonify({
-            "status": "success",
-            "bots": bots_info
-        })
+
+    # Robôs dos shards (consultados fora do lock, em paralelo)
+    if bot_pool is not None:
+        bots_info.extend(bot_pool.list_bots())
+
+    # Robôs de outros nós (tabela de leases)
+    if bot_coordinator is not None:
+        local_ids = {bot["id"] for bot in bots_info}
+        for lease in BotLeaseModel.list_leases():
+            if lease["bot_id"] in local_ids or lease["desired"] != "running":
+                continue
+            bots_info.append({
+                "id": lease["bot_id"],
+                "stock_code": lease["stock_code"],
+                "operation_code": lease["operation_code"],
+                "node": lease["owner"],
+                "is_active": lease["lease_valid"],
+                "start_time": datetime.fromtimestamp(lease["created_at"]).strftime("%Y-%m-%d %H:%M:%S")
+            })
+
+    return jsonify({
+        "status": "success",
+        "bots": bots_info
+    })
 
 # Iniciar robô
 @api_bp.route('/api/bot/start', methods=['POST'])
@@ -483,6 +703,12 @@ def start_bot():
                         "error": f"Já existe um robô em execução para {symbol} com modo {operation_mode}",
                         "code": "bot_already_running"
                     }), 400
+        if bot_pool is not None and bot_pool.find(symbol, operation_mode):
+            return jsonify({
+                "success": False,
+                "error": f"Já existe um robô em execução para {symbol} com modo {operation_mode}",
+                "code": "bot_already_running"
+            }), 400
         
         # Verificar se as variáveis de ambiente da Binance estão definidas
         api_key = os.environ.get('BINANCE_API_KEY')
@@ -499,7 +725,7 @@ def start_bot():
         # Verificar saldo antes de iniciar
         try:
             logger.info("Verificando saldo na Binance...")
-            client = Client(api_key, api_secret)
+            client = create_binance_client(api_key, api_secret)
             account = client.get_account()
             
             # Verificar saldo base para comprar (se precisamos de USDT, BTC, etc.)
@@ -538,68 +764,52 @@ def start_bot():
         
         # Tudo ok, criar e iniciar o bot
         try:
-            from modules.BinanceRobot import BinanceTraderBot
-            # Definir globalmente as variáveis necessárias
-            import modules.BinanceRobot as BinanceRobot
-            BinanceRobot.api_key = api_key
-            BinanceRobot.secret_key = api_secret
-            
-            logger.info("Criando instância do bot...")
-            bot = BinanceTraderBot(
-                stock_code=operation_mode,
-                operation_code=symbol,
-                traded_quantity=traded_quantity,
-                traded_percentage=100,  # 100% do valor definido pelo usuário
-                candle_period=CANDLE_PERIOD,
-                volatility_factor=data.get('volatility_factor', VOLATILITY_FACTOR),
-                acceptable_loss_percentage=data.get('acceptable_loss', ACCEPTABLE_LOSS_PERCENTAGE),
-                stop_loss_percentage=data.get('stop_loss', STOP_LOSS_PERCENTAGE),
-                fallback_activated=data.get('fallback_activated', FALLBACK_ACTIVATED)
-            )
-            
-            # Verificar se o bot foi criado corretamente
-            if not bot:
-                logger.error("Falha ao instanciar BinanceTraderBot - retorno None")
-                return jsonify({
-                    "success": False,
-                    "error": "Falha ao criar o bot trader. Verifique os logs para mais detalhes.",
-                    "code": "bot_creation_failed"
-                }), 500
-            
-            # Verificar se o bot tem os atributos necessários
-            required_attrs = ['stock_code', 'operation_code', 'traded_quantity']
-            missing_attrs = []
-            for attr in required_attrs:
-                if not hasattr(bot, attr):
-                    missing_attrs.append(attr)
-            
-            if missing_attrs:
-                logger.error(f"Bot criado com atributos ausentes: {missing_attrs}")
-                return jsonify({
-                    "success": False,
-                    "error": f"Bot criado com propriedades ausentes: {', '.join(missing_attrs)}",
-                    "code": "invalid_bot_instance"
-                }), 500
-            
-            # Definir o ID do bot para o histórico
-            bot.bot_id = bot_id
-            
-            # Adicionar bot à lista de robôs em execução
-            with bots_lock:
-                running_bots[bot_id] = bot
-            
-            # Iniciar a thread do robô usando o método run implementado na classe
-            bot_thread = threading.Thread(target=bot.run)
-            bot_thread.daemon = True
-            bot_thread.start()
-            
-            add_log_message(f"Bot iniciado para {symbol} com modo {operation_mode}", "success")
-            
-            return jsonify({
+            bot_config = {
+                "stock_code": operation_mode,
+                "operation_code": symbol,
+                "traded_quantity": traded_quantity,
+                "traded_percentage": 100,  # 100% do valor definido pelo usuário
+                "candle_period": CANDLE_PERIOD,
+                "volatility_factor": data.get('volatility_factor', VOLATILITY_FACTOR),
+                "acceptable_loss_percentage": data.get('acceptable_loss', ACCEPTABLE_LOSS_PERCENTAGE),
+                "stop_loss_percentage": data.get('stop_loss', STOP_LOSS_PERCENTAGE),
+                "fallback_activated": data.get('fallback_activated', FALLBACK_ACTIVATED),
+                "use_protective_monitor": data.get('protective_monitor', False),
+                "take_profit_percentage": data.get('take_profit'),
+                "trailing_stop_percentage": data.get('trailing_stop'),
+                "order_book_pricing": data.get('order_book_pricing', 'depth'),  # 'depth' | 'touch' | None (fechamento ± %)
+                "order_chasing": data.get('order_chasing', True),
+                "chase_bound_bps": data.get('chase_bound_bps', CHASE_BOUND_BPS)
+            }
+
+            # Multi-nó: cadastra o robô com lease deste nó (um robô por par entre todas as réplicas)
+            lease = None
+            if bot_coordinator is not None:
+                lease = bot_coordinator.register(bot_id, symbol, operation_mode, bot_config)
+                if lease is None:
+                    return jsonify({
+                        "success": False,
+                        "error": f"Já existe um robô em execução para {symbol} com modo {operation_mode}",
+                        "code": "bot_already_running"
+                    }), 400
+
+            try:
+                shard_id = launch_bot(bot_id, bot_config, lease)
+            except Exception:
+                if bot_coordinator is not None:
+                    bot_coordinator.forget(bot_id)
+                raise
+
+            add_log_message(f"Bot iniciado para {symbol} com modo {operation_mode}" + (f" (shard {shard_id})" if shard_id is not None else ""), "success")
+
+            response = {
                 "success": True,
                 "message": f"Robô iniciado com sucesso para {symbol}",
                 "bot_id": bot_id
-            })
+            }
+            if shard_id is not None:
+                response["shard"] = shard_id
+            return jsonify(response)
             
         except Exception as e:
             error_msg = f"Erro ao criar ou iniciar bot: {str(e)}"
@@ -645,24 +855,30 @@ def start_bot():
 @login_required
 def stop_bot(bot_id):
     try:
-        with bots_lock:
-            if bot_id not in running_bots:
-                return jsonify({
-                    "status": "error",
-                    "message": f"Robô com ID {bot_id} não encontrado"
-                }), 404
-            
-            # Parar o robô
-            bot = running_bots[bot_id]
-            bot.stop()
-            
-            # Remover da lista de robôs em execução
-            del running_bots[bot_id]
-            
+        # Robô deste nó: sai da lista sob o lock; o cancelamento das ordens (rede) acontece fora dele
+        if stop_local_bot(bot_id):
+            if bot_coordinator is not None:
+                bot_coordinator.forget(bot_id)
             return jsonify({
                 "status": "success",
                 "message": f"Robô {bot_id} parado com sucesso"
             })
+
+        # Robô de outro nó: o dono o encerra (cancelando as ordens) na próxima rodada de coordenação
+        lease = BotLeaseModel.request_stop(bot_id) if bot_coordinator is not None else None
+        if lease is not None:
+            owner, lease_valid = lease
+            if owner is None or not lease_valid:
+                BotLeaseModel.remove(bot_id)
+            return jsonify({
+                "status": "success",
+                "message": f"Parada do robô {bot_id} solicitada ao nó {owner}" if owner and lease_valid else f"Robô {bot_id} parado com sucesso"
+            })
+
+        return jsonify({
+            "status": "error",
+            "message": f"Robô com ID {bot_id} não encontrado"
+        }), 404
             
     except Exception as e:
         return jsonify({
@@ -670,6 +886,95 @@ def stop_bot(bot_id):
             "message": str(e)
         }), 500
 
+# Profiling em produção (modules/Profiler.py), só para administradores
+@api_bp.route('/api/admin/profile', methods=['GET'])
+@login_required
+def profile_threads():
+    """
+    Amostra as pilhas dos robôs e das demais threads (deste processo e dos shards) por
+    `duration` segundos a `rate` amostras/s. `format=collapsed` devolve o texto para o
+    flamegraph.pl/speedscope; o padrão é o resumo por robô (camadas e funções mais frequentes).
+    """
+    if not current_user.is_admin:
+        return jsonify({'success': False, 'error': 'Permissão negada'}), 403
+    try:
+        duration = float(request.args.get('duration', 10))
+        rate = float(request.args.get('rate', 100))
+        include_idle = request.args.get('idle', 'false').lower() in ('1', 'true', 'yes')
+        with bots_lock:
+            bots = dict(running_bots)
+
+        # Shards amostram ao mesmo tempo que este processo
+        with ThreadPoolExecutor(max_workers=1, thread_name_prefix="profile-shards") as executor:
+            shards = executor.submit(bot_pool.sample, duration, rate, include_idle) if bot_pool is not None else None
+            processes = [("api", sample_stacks(bots, duration, rate, include_idle))]
+            if shards is not None:
+                for shard_id, result in sorted(shards.result().items()):
+                    if isinstance(result, Exception):
+                        logger.error(f"Erro ao amostrar shard {shard_id}: {str(result)}")
+                        continue
+                    processes.append((f"shard-{shard_id}", result))
+
+        if request.args.get('format') == 'collapsed':
+            lines = []
+            for name, result in processes:
+                lines.extend(collapsed_lines(result["threads"], prefix=name if len(processes) > 1 else None))
+            return Response('\n'.join(lines) + '\n', mimetype='text/plain')
+
+        summaries = []
+        bots_profile = {}
+        for name, result in processes:
+            threads = summarize(result["threads"])
+            summaries.append({"process": name, "pid": result["pid"], "samples": result["samples"], "threads": threads})
+            for label, thread in threads.items():
+                if label.startswith("bot:"):
+                    bots_profile[label[4:]] = {"process": name, **thread}
+        return jsonify({
+            'success': True,
+            'duration': processes[0][1]["duration"],
+            'rate': processes[0][1]["rate"],
+            'bots': bots_profile,
+            'processes': summaries
+        })
+    except ProfilerBusy as e:
+        return jsonify({'success': False, 'error': str(e)}), 409
+    except Exception as e:
+        logger.error(f"Erro ao amostrar pilhas: {str(e)}")
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@api_bp.route('/api/admin/profile/bot/<bot_id>/cycle', methods=['POST'])
+@login_required
+def profile_bot_cycle(bot_id):
+    """
+    cProfile do próximo ciclo execute() do robô (executado pela própria thread do robô).
+    Aguarda até `timeout` segundos; se o ciclo ainda não rodou, responde 202 e um novo
+    POST volta a aguardar o mesmo pedido.
+    """
+    if not current_user.is_admin:
+        return jsonify({'success': False, 'error': 'Permissão negada'}), 403
+    try:
+        data = request.get_json(silent=True) or {}
+        timeout = min(float(data.get('timeout', request.args.get('timeout', 60))), 600)
+        sort = data.get('sort', request.args.get('sort', 'cumulative'))
+        if sort not in ('cumulative', 'tottime'):
+            return jsonify({'success': False, 'error': "sort deve ser 'cumulative' ou 'tottime'"}), 400
+
+        with bots_lock:
+            bot = running_bots.get(bot_id)
+        if bot is not None:
+            profile = bot.requestCycleProfile(sort=sort)
+            profile.wait(timeout)
+            result = profile.describe()
+        elif bot_pool is not None and bot_pool.has(bot_id):
+            result = bot_pool.profile_cycle(bot_id, timeout, sort)
+        else:
+            return jsonify({'success': False, 'error': f'Robô com ID {bot_id} não encontrado'}), 404
+
+        return jsonify({'success': True, 'bot_id': bot_id, 'profile': result}), 200 if result["status"] == "done" else 202
+    except Exception as e:
+        logger.error(f"Erro ao perfilar ciclo do robô {bot_id}: {str(e)}")
+        return jsonify({'success': False, 'error': str(e)}), 500
+
 # Endpoints para moedas
 @api_bp.route('/api/coins', methods=['GET'])
 @login_required
@@ -809,18 +1114,40 @@ def start_simulation():
         
         # Criar um bot de simulação e armazená-lo
         try:
-            # Obter preço atual da moeda
             api_key = os.environ.get('BINANCE_API_KEY')
             api_secret = os.environ.get('BINANCE_SECRET_KEY')
-            
+            quote_code = operation_code.replace(stock_code, '')
+            tick_size, step_size = 0.01, 0.00001
+
+            # Candles reais da Binance quando há API configurada; senão, candles sintéticos reproduzíveis
             if api_key and api_secret and api_key != 'sua_api_key_aqui' and api_secret != 'sua_secret_key_aqui':
-                client = Client(api_key, api_secret)
-                ticker = client.get_ticker(symbol=operation_code)
-                current_price = float(ticker['lastPrice'])
+                client = create_binance_client(api_key, api_secret)
+                feed = getCandleFeed((operation_code, CANDLE_PERIOD, 'binance'),
+                                     lambda: BinanceCandleFeed(client, operation_code, CANDLE_PERIOD))
+                for f in client.get_symbol_info(operation_code)['filters']:
+                    if f['filterType'] == 'PRICE_FILTER':
+                        tick_size = float(f['tickSize'])
+                    elif f['filterType'] == 'LOT_SIZE':
+                        step_size = float(f['stepSize'])
             else:
-                # Valor fictício para teste se não tiver API
-                current_price = 1000.0
-                
+                seed = data.get('seed', 0)
+                initial_price = float(data.get('initial_price', 1000.0))
+                feed = getCandleFeed((operation_code, CANDLE_PERIOD, 'synthetic', seed, initial_price),
+                                     lambda: SyntheticCandleFeed(operation_code, CANDLE_PERIOD, start_price=initial_price, seed=seed))
+            current_price = feed.candles[-1][4]
+
+            # Saldo virtual inicial na moeda de cotação (padrão: o suficiente para comprar a quantidade, com folga
+            # para o preço limite acima do fechamento)
+            initial_balance = float(data.get('initial_balance', quantity * current_price * 1.1))
+            paper_exchange = PaperExchange(
+                feed, stock_code, quote_code,
+                balances={quote_code: initial_balance},
+                tick_size=tick_size,
+                step_size=step_size,
+                fee_rate=float(data.get('fee_rate', 0.001)),
+                slippage_bps=float(data.get('slippage_bps', 5)),
+            )
+
             # Criar bot de simulação
             sim_bot = SimulationTraderBot(
                 stock_code=stock_code,
@@ -831,14 +1158,11 @@ def start_simulation():
                 volatility_factor=volatility_factor,
                 acceptable_loss_percentage=acceptable_loss,
                 stop_loss_percentage=stop_loss,
-                fallback_activated=fallback_activated
+                fallback_activated=fallback_activated,
+                simulation_id=simulation_id,
+                paper_exchange=paper_exchange
             )
             
-            # Configurar valores iniciais
-            sim_bot.simulation_balance = quantity
-            sim_bot.simulation_stock_balance = 0
-            sim_bot.initial_price = current_price
-            
             # Registrar na lista de simulações ativas
             with bots_lock:
                 simulation_bots[simulation_id] = sim_bot
@@ -905,35 +1229,92 @@ def list_simulation_history():
         logger.error(f"Erro ao listar histórico de simulações: {str(e)}")
         return jsonify({'success': False, 'error': str(e)}), 500
 
+def parse_history_time(value, end=False):
+    """Aceita 'YYYY-MM-DD HH:MM:SS', só a data ou timestamp em ms; retorna no formato salvo nas operações."""
+    if not value:
+        return None
+    if value.isdigit():
+        return datetime.fromtimestamp(int(value) / 1000).strftime("%Y-%m-%d %H:%M:%S")
+    value = value.replace('T', ' ')
+    if len(value) == 10:  # Só a data: dia inteiro
+        value += " 23:59:59" if end else " 00:00:00"
+    return value
+
+def trade_history_params():
+    """
+    Paginação e filtros do histórico de operações (query string):
+        cursor: next_cursor da página anterior (chave timestamp|id)
+        limit: operações por página (máx. 1000; sem limit, todo o intervalo em streaming)
+        start / end: intervalo ('YYYY-MM-DD[ HH:MM:SS]' ou timestamp em ms)
+        format: 'ndjson' para uma operação por linha
+    """
+    after = None
+    cursor = request.args.get('cursor')
+    if cursor:
+        timestamp, _, trade_id = cursor.rpartition('|')
+        after = (timestamp, int(trade_id))
+    limit = request.args.get('limit', type=int)
+    if limit is not None:
+        limit = min(max(limit, 1), 1000)
+    return {
+        'after': after,
+        'start_time': parse_history_time(request.args.get('start')),
+        'end_time': parse_history_time(request.args.get('end'), end=True),
+        'limit': limit,
+    }
+
+def trade_history_page(iter_trades, owner_id, params):
+    """
+    Operações para a resposta: com limit, a página (lê limit + 1 para saber se há próxima)
+    e o cursor seguinte; sem limit, um gerador lido do banco durante o envio.
+
+    Returns:
+        tuple: (operações, next_cursor)
+    """
+    limit = params['limit']
+    if limit is None:
+        return iter_trades(owner_id, **params), None
+    page = list(iter_trades(owner_id, **{**params, 'limit': limit + 1}))
+    next_cursor = None
+    if len(page) > limit:
+        page = page[:limit]
+        next_cursor = f"{page[-1]['timestamp']}|{page[-1]['id']}"
+    return page, next_cursor
+
 @api_bp.route('/api/simulation/history/<simulation_id>', methods=['GET'])
 @login_required
 def get_simulation_history(simulation_id):
     try:
-        # Buscar trades da simulação
-        trades = SimulationTradeModel.get_trades_by_simulation(simulation_id)
-        
-        if not trades:
+        params = trade_history_params()
+
+        # Primeira operação da simulação (existência e detalhes)
+        first_trade = list(SimulationTradeModel.iter_trades(simulation_id, limit=1))
+        if not first_trade:
             return jsonify({
                 'success': False,
                 'error': 'Simulação não encontrada ou sem operações'
             }), 404
         
+        # Uma operação por linha, lida do banco em blocos durante o envio
+        if request.args.get('format') == 'ndjson':
+            return ndjson_response(SimulationTradeModel.iter_trades(simulation_id, **params))
+        
+        trades, next_cursor = trade_history_page(SimulationTradeModel.iter_trades, simulation_id, params)
+        
         # Obter estatísticas
         statistics = SimulationTradeModel.get_simulation_statistics(simulation_id)
         
         # Obter detalhes adicionais da simulação, se disponível
-        simulation_details = {}
-        for trade in trades:
-            simulation_details['operation_code'] = trade['operation_code']
-            break
+        simulation_details = {'operation_code': first_trade[0]['operation_code']}
         
-        return jsonify({
+        return json_response({
             'success': True,
             'simulation_id': simulation_id,
-            'trades': trades,
             'statistics': statistics,
-            'details': simulation_details
-        })
+            'details': simulation_details,
+            'next_cursor': next_cursor,
+            'trades': trades
+        }, stream=True)
         
     except Exception as e:
         logger.error(f"Erro ao obter histórico da simulação {simulation_id}: {str(e)}")
@@ -964,12 +1345,112 @@ def init_models():
         CoinModel.init_db()
         SimulationTradeModel.init_db()
         BotTradeModel.init_db()  # Inicializar o modelo do bot real
+        OrderLedgerModel.init_db()  # Histórico local de ordens da corretora
+        FillLedgerModel.init_db()  # Execuções e custo da posição de cada bot
+        EquityModel.init_db()  # Série de patrimônio dos bots e simulações
+        BotLeaseModel.init_db()  # Leases dos robôs entre réplicas da API
         logger.info("Modelos inicializados com sucesso!")
         return True
     except Exception as e:
         logger.error(f"Erro ao inicializar modelos: {str(e)}")
         return False
 
+def drain_bots(timeout=60):
+    """
+    Para todos os robôs em paralelo (loop encerrado + ordens canceladas), informando o progresso.
+    Os robôs saem da lista sob o lock; as paradas rodam fora dele.
+    Retorna (parados, total).
+    """
+    # Sem novas aquisições de leases nem reinícios durante o encerramento
+    if bot_coordinator is not None:
+        bot_coordinator.stop()
+    bot_supervisor.stop()
+
+    with bots_lock:
+        bots = list(running_bots.items())
+        running_bots.clear()
+
+    # Shards param os próprios robôs em paralelo
+    shard_stopped, shard_total, finished = (0, 0, [])
+    if bot_pool is not None and bot_pool.assignments:
+        add_log_message(f"Encerrando {len(bot_pool.assignments)} robô(s) nos shards...", "warning")
+        shard_stopped, shard_total, finished = bot_pool.drain(timeout)
+    if not bots:
+        release_bot_leases(finished)
+        return shard_stopped, shard_total
+
+    add_log_message(f"Encerrando {len(bots)} robô(s)...", "warning")
+    stopped = 0
+    executor = ThreadPoolExecutor(max_workers=min(8, len(bots)), thread_name_prefix="bot-drain")
+    futures = {executor.submit(bot.stop): bot_id for bot_id, bot in bots}
+    try:
+        for future in as_completed(futures, timeout=timeout):
+            bot_id = futures[future]
+            try:
+                if future.result():
+                    stopped += 1
+                finished.append(bot_id)
+                add_log_message(f"Robô {bot_id} parado ({stopped}/{len(bots)})", "info")
+            except Exception as e:
+                add_log_message(f"Erro ao parar robô {bot_id}: {str(e)}", "error")
+    except FuturesTimeoutError:
+        add_log_message(f"Tempo esgotado ao encerrar robôs: {stopped}/{len(bots)} parados", "error")
+    executor.shutdown(wait=False)
+    release_bot_leases(finished)
+    return stopped + shard_stopped, len(bots) + shard_total
+
+def release_bot_leases(stopped):
+    # Os robôs continuam cadastrados: outro nó assume os já parados sem esperar o lease vencer
+    # Um robô cujo stop não terminou no prazo ainda pode enviar ordens: o lease dele só vence
+    if bot_coordinator is not None:
+        try:
+            bot_coordinator.release_stopped(stopped)
+        except Exception as e:
+            logger.error(f"Erro ao liberar leases dos robôs: {str(e)}")
+
+def init_bot_supervisor():
+    """Prazos do supervisor de robôs (ciclo travado e falhas seguidas que disparam o reinício)."""
+    bot_supervisor.cycle_deadline = float(os.environ.get('BOT_CYCLE_DEADLINE', bot_supervisor.cycle_deadline))
+    bot_supervisor.max_failures = int(os.environ.get('BOT_MAX_FAILURES', bot_supervisor.max_failures))
+    bot_supervisor.start()
+
+def init_bot_pool():
+    """Com BOT_SHARDS > 0, inicia os processos dos shards (robôs distribuídos por hash do par)."""
+    global bot_pool
+    if BOT_SHARDS <= 0 or bot_pool is not None:
+        return bot_pool
+    bot_pool = ShardedBotPool(BOT_SHARDS, on_log=add_log_message)
+    bot_pool.start()
+    logger.info(f"Robôs distribuídos em {BOT_SHARDS} processo(s)")
+    return bot_pool
+
+def init_bot_coordinator():
+    """Com BOT_COORDINATION ativo, este nó passa a disputar/renovar leases dos robôs cadastrados no banco."""
+    global bot_coordinator
+    if not BOT_COORDINATION or bot_coordinator is not None:
+        return bot_coordinator
+    bot_coordinator = BotCoordinator(launch_bot, stop_local_bot, lease_ttl=BOT_LEASE_TTL)
+    bot_coordinator.start()
+    logger.info(f"Coordenação de robôs ativa (nó {bot_coordinator.node_id}, lease de {BOT_LEASE_TTL:.0f}s)")
+    return bot_coordinator
+
+def install_shutdown_handler(timeout=60):
+    """No SIGTERM (ex: docker stop, deploy), para os robôs em paralelo antes de sair."""
+    if threading.current_thread() is not threading.main_thread():
+        return False
+    previous = signal.getsignal(signal.SIGTERM)
+
+    def handle_sigterm(signum, frame):
+        logger.info("SIGTERM recebido, encerrando robôs...")
+        drain_bots(timeout)
+        if callable(previous):
+            previous(signum, frame)
+        else:
+            raise SystemExit(0)
+
+    signal.signal(signal.SIGTERM, handle_sigterm)
+    return True
+
 # Função para inicializar a API - usada pelo run.py
 def init_api(app):
     """Inicializa a API e registra o blueprint no aplicativo Flask."""
@@ -993,6 +1474,21 @@ def init_api(app):
         
         # Registrar blueprint
         app.register_blueprint(api_bp)
+
+        # Encerramento gracioso dos robôs no SIGTERM
+        install_shutdown_handler()
+
+        # Heartbeats, prazos de ciclo e reinício automático dos robôs
+        init_bot_supervisor()
+
+        # Processos dos robôs (modo com shards)
+        init_bot_pool()
+
+        # Leases entre réplicas (modo multi-nó)
+        init_bot_coordinator()
+
+        # Status do sistema coletado em segundo plano (/api/status, /health, /status)
+        init_health_collector()
         
         # Registrar endpoints para arquivos estáticos se necessário
         # Não precisamos disso pois já configuramos o static_folder no run.py
@@ -1019,98 +1515,30 @@ def execute_simulation(simulation_id):
             
             sim_bot = simulation_bots[simulation_id]
         
-        # Obter preço atual (pode ser o preço real ou simulado)
-        try:
-            api_key = os.environ.get('BINANCE_API_KEY')
-            api_secret = os.environ.get('BINANCE_SECRET_KEY')
-            
-            if api_key and api_secret and api_key != 'sua_api_key_aqui' and api_secret != 'sua_secret_key_aqui':
-                client = Client(api_key, api_secret)
-                ticker = client.get_ticker(symbol=sim_bot.operation_code)
-                current_price = float(ticker['lastPrice'])
-            else:
-                # Simular variação de preço para testes
-                base_price = sim_bot.initial_price
-                variation = (float(time.time() % 100) / 100 - 0.5) * 0.02  # Variação de ±1%
-                current_price = base_price * (1 + variation)
-        except Exception as e:
-            logger.error(f"Erro ao obter preço atual: {str(e)}")
-            # Caso falhe, usar um preço com pequena variação baseado no último
-            last_price = 1000  # valor padrão
-            if hasattr(sim_bot, 'last_price') and sim_bot.last_price:
-                last_price = sim_bot.last_price
-            variation = (float(time.time() % 100) / 100 - 0.5) * 0.01  # Variação de ±0.5%
-            current_price = last_price * (1 + variation)
-        
-        # Atualizar o preço atual do bot
+        # Avança um ou mais candles: as ordens virtuais são preenchidas e o execute() real decide
+        data = request.get_json(silent=True) or {}
+        steps = max(1, min(int(data.get('steps', 1)), 10000))
+        executed = sim_bot.step(steps)
+
+        exchange = sim_bot.paper_exchange
+        current_price = exchange.last_price
         sim_bot.last_price = current_price
-        
-        # Simular decisão de compra ou venda
-        current_position = False
-        if hasattr(sim_bot, 'last_operation') and sim_bot.last_operation:
-            current_position = sim_bot.last_operation == "BUY"  # True se comprado, False se vendido
-        
-        # Definir uma operação de acordo com regras simples
-        decision = None
-        trade_type = None
-        
-        # Se não tivermos uma operação anterior, começar com compra
-        if not hasattr(sim_bot, 'last_operation') or not sim_bot.last_operation:
-            decision = "BUY"
-            trade_type = "BUY"
-        else:
-            # Alternar entre compra e venda para simular operações
-            decision = "SELL" if sim_bot.last_operation == "BUY" else "BUY"
-            trade_type = decision
-        
-        # Aplicar a decisão
-        sim_bot.last_operation = decision
-        
-        # Calcular valores (simplificados para simulação)
-        quantity = sim_bot.traded_quantity
-        total_value = current_price * quantity
-        
-        # Registrar operação no histórico
-        trade_id = SimulationTradeModel.register_trade(
-            simulation_id=simulation_id,
-            operation_code=sim_bot.operation_code,
-            trade_type=trade_type,
-            price=current_price,
-            quantity=quantity,
-            total_value=total_value
-        )
-        
-        # Atualizar estatísticas do bot
-        if trade_type == "BUY":
-            sim_bot.simulation_balance -= total_value
-            sim_bot.simulation_stock_balance += quantity
-            sim_bot.buy_price = current_price
-            # Também atualizar last_buy_price para manter consistência
-            sim_bot.last_buy_price = current_price
-        else:  # SELL
-            sim_bot.simulation_balance += total_value
-            sim_bot.simulation_stock_balance -= quantity
-            sim_bot.sell_price = current_price
-            # Também atualizar last_sell_price para manter consistência
-            sim_bot.last_sell_price = current_price
-        
-        # Calcular lucro/prejuízo
-        profit_loss = 0
-        if hasattr(sim_bot, 'buy_price') and sim_bot.buy_price:
-            if hasattr(sim_bot, 'sell_price') and sim_bot.sell_price:
-                price_diff = sim_bot.sell_price - sim_bot.buy_price
-                profit_loss = price_diff * quantity
-        
+        position = sim_bot.simulation_stock_balance >= sim_bot.step_size
+        profit_loss = exchange.equity() - sim_bot.initial_equity
+
         return jsonify({
             'success': True,
-            'trade_id': trade_id,
             'simulation_id': simulation_id,
-            'position': 'Comprado' if sim_bot.last_operation == 'BUY' else 'Vendido',
+            'steps': executed,
+            'position': 'Comprado' if position else 'Vendido',
             'price': current_price,
-            'quantity': quantity,
-            'total_value': total_value,
+            'quantity': sim_bot.traded_quantity,
+            'stock_balance': sim_bot.simulation_stock_balance,
+            'wallet_balance': sim_bot.simulation_balance,
+            'open_orders': len(exchange.get_open_orders()),
+            'equity': exchange.equity(),
             'profit_loss': profit_loss,
-            'message': f'Simulação executada com sucesso. Operação: {trade_type}'
+            'message': f'Simulação executada com sucesso ({executed} candle(s))'
         })
         
     except Exception as e:
@@ -1131,43 +1559,9 @@ def stop_simulation(simulation_id):
             
             sim_bot = simulation_bots[simulation_id]
         
-        # Obter preço atual para finalização
-        try:
-            api_key = os.environ.get('BINANCE_API_KEY')
-            api_secret = os.environ.get('BINANCE_SECRET_KEY')
-            
-            if api_key and api_secret and api_key != 'sua_api_key_aqui' and api_secret != 'sua_secret_key_aqui':
-                client = Client(api_key, api_secret)
-                ticker = client.get_ticker(symbol=sim_bot.operation_code)
-                current_price = float(ticker['lastPrice'])
-            else:
-                # Usar preço atual armazenado ou base
-                current_price = sim_bot.last_price if hasattr(sim_bot, 'last_price') and sim_bot.last_price else sim_bot.initial_price
-        except Exception as e:
-            logger.error(f"Erro ao obter preço final: {str(e)}")
-            current_price = sim_bot.last_price if hasattr(sim_bot, 'last_price') and sim_bot.last_price else 1000
-        
-        # Se o bot estiver comprado, realizar venda final para fechar posição
-        if hasattr(sim_bot, 'last_operation') and sim_bot.last_operation == "BUY" and sim_bot.simulation_stock_balance > 0:
-            quantity = sim_bot.simulation_stock_balance
-            total_value = current_price * quantity
-            
-            # Registrar operação final
-            SimulationTradeModel.register_trade(
-                simulation_id=simulation_id,
-                operation_code=sim_bot.operation_code,
-                trade_type='SELL_FINAL',
-                price=current_price,
-                quantity=quantity,
-                total_value=total_value
-            )
-            
-            # Atualizar estatísticas
-            sim_bot.simulation_balance += total_value
-            sim_bot.simulation_stock_balance = 0
-            sim_bot.sell_price = current_price
-            sim_bot.last_sell_price = current_price
-            sim_bot.last_operation = "SELL"
+        # Fechar a posição virtual a mercado (registrada como SELL_FINAL)
+        sim_bot.closePosition()
+        current_price = sim_bot.paper_exchange.last_price
         
         # Obter todas as operações
         trades = SimulationTradeModel.get_trades_by_simulation(simulation_id)
@@ -1179,11 +1573,12 @@ def stop_simulation(simulation_id):
         total_buy_value = sum(float(t['total_value']) for t in buy_trades)
         total_sell_value = sum(float(t['total_value']) for t in sell_trades)
         
-        profit_loss = total_sell_value - total_buy_value
+        # Resultado pelo patrimônio virtual (já inclui taxas e slippage)
+        profit_loss = sim_bot.paper_exchange.equity() - sim_bot.initial_equity
         profit_loss_percentage = 0
         
-        if total_buy_value > 0:
-            profit_loss_percentage = (profit_loss / total_buy_value) * 100
+        if sim_bot.initial_equity > 0:
+            profit_loss_percentage = (profit_loss / sim_bot.initial_equity) * 100
         
         # Registrar resultados finais
         results = {
@@ -1239,94 +1634,42 @@ def get_binance_coins():
         page = int(request.args.get('page', 1))
         limit = int(request.args.get('limit', 100))  # Limitar a 100 moedas por página
         
-        client = Client(api_key, api_secret)
-        
-        # Obter informações de todos os símbolos
-        exchange_info = client.get_exchange_info()
-        symbols = exchange_info['symbols']
-        
-        # Obter preços atuais
-        tickers = client.get_all_tickers()
-        price_map = {ticker['symbol']: ticker['price'] for ticker in tickers}
+        # Busca por símbolo, ativo ou nome (prefixo e erros de digitação), ordenada por relevância
+        query = request.args.get('q', '').strip()
         
-        # Obter lista de moedas de cada tipo
-        all_coins = []
-        
-        # Categorizar moedas
-        categories = {
-            'USDT': [],    # Stablecoins com USDT
-            'BTC': [],     # Criptomoedas cotadas em BTC
-            'ETH': [],     # Criptomoedas cotadas em ETH
-            'BNB': [],     # Criptomoedas cotadas em BNB
-            'BUSD': [],    # Stablecoins com BUSD
-            'FIAT': [],    # Moedas fiduciárias
-            'OTHER': []    # Outras moedas
-        }
+        client = create_binance_client(api_key, api_secret)
         
-        # Lista de principais memecoins conhecido (pode atualizar conforme necessário)
-        memecoins = ['DOGE', 'SHIB', 'PEPE', 'FLOKI', 'BABYDOGE', 'ELON', 'SAMO', 'BONK', 'WOJAK']
+        # Pares em negociação categorizados e indexados (reconstruídos só quando o exchange info muda)
+        catalog = coin_catalog.refresh(client, names=lambda: {coin['symbol']: coin['name'] for coin in CoinModel.get_all()})
+        categories = catalog.categories
         
-        for symbol_info in symbols:
-            if symbol_info['status'] != 'TRADING':
-                continue  # Pular símbolos que não estão em negociação
-                
-            symbol = symbol_info['symbol']
-            base_asset = symbol_info['baseAsset']
-            quote_asset = symbol_info['quoteAsset']
-            
-            # Determinar categoria
-            category = 'OTHER'
-            if quote_asset == 'USDT':
-                category = 'USDT'
-            elif quote_asset == 'BTC':
-                category = 'BTC'
-            elif quote_asset == 'ETH':
-                category = 'ETH'
-            elif quote_asset == 'BNB':
-                category = 'BNB'
-            elif quote_asset == 'BUSD':
-                category = 'BUSD'
-            elif quote_asset in ['EUR', 'USD', 'GBP', 'AUD', 'BRL']:
-                category = 'FIAT'
-            
-            # Verificar se é uma memecoin
-            is_memecoin = base_asset in memecoins
-            
-            # Criar objeto de moeda
-            coin_data = {
-                'symbol': symbol,
-                'baseAsset': base_asset,
-                'quoteAsset': quote_asset,
-                'price': price_map.get(symbol, "0"),
-                'category': category,
-                'is_memecoin': is_memecoin
-            }
-            
-            # Adicionar à categoria correspondente
-            categories[category].append(coin_data)
-            
-            # Adicionar à lista completa
-            all_coins.append(coin_data)
-        
-        # Filtrar por tipo se solicitado
-        if coin_type:
-            if coin_type == 'memecoin':
-                filtered_coins = [coin for coin in all_coins if coin['is_memecoin']]
-            else:
-                filtered_coins = categories.get(coin_type.upper(), [])
+        # Aplicar paginação
+        start_idx = (page - 1) * limit
+        if query:
+            # Só as moedas até o fim da página são ordenadas; as demais entram na contagem
+            total_count, results = catalog.search(query, coin_type, limit=start_idx + limit)
+            filtered_coins = [coin for _, coin in results]
+            scores = [score for score, _ in results]
         else:
-            filtered_coins = all_coins
+            filtered_coins = catalog.filter(coin_type)
+            total_count = len(filtered_coins)
+            scores = None
         
-        # Aplicar paginação
-        total_count = len(filtered_coins)
         total_pages = (total_count + limit - 1) // limit
+        end_idx = min(start_idx + limit, len(filtered_coins))
         
-        start_idx = (page - 1) * limit
-        end_idx = min(start_idx + limit, total_count)
+        # Obter preços atuais (apenas para a página retornada)
+        tickers = client.get_all_tickers()
+        price_map = {ticker['symbol']: ticker['price'] for ticker in tickers}
         
-        paginated_coins = filtered_coins[start_idx:end_idx]
+        paginated_coins = []
+        for position in range(start_idx, end_idx):
+            coin = {**filtered_coins[position], 'price': price_map.get(filtered_coins[position]['symbol'], "0")}
+            if scores is not None:
+                coin['score'] = scores[position]
+            paginated_coins.append(coin)
         
-        return jsonify({
+        return json_response({
             "success": True,
             "coins": paginated_coins,
             "pagination": {
@@ -1343,9 +1686,10 @@ def get_binance_coins():
                 "busd": len(categories['BUSD']),
                 "fiat": len(categories['FIAT']),
                 "other": len(categories['OTHER']),
-                "memecoin": sum(1 for coin in all_coins if coin['is_memecoin'])
-            }
-        })
+                "memecoin": len(catalog.memecoins)
+            },
+            "query": query or None
+        }, stream=True)
     except BinanceAPIException as e:
         return jsonify({
             "success": False,
@@ -1387,23 +1731,33 @@ def list_bot_history():
 @login_required
 def get_bot_history(bot_id):
     try:
-        # Buscar trades do bot
-        trades = BotTradeModel.get_trades_by_bot(bot_id)
-        
-        if not trades:
+        params = trade_history_params()
+
+        # Primeira operação do bot (existência e detalhes)
+        first_trade = list(BotTradeModel.iter_trades(bot_id, limit=1))
+        if not first_trade:
             return jsonify({
                 'success': False,
                 'error': 'Bot não encontrado ou sem operações'
             }), 404
         
-        # Obter estatísticas
-        statistics = BotTradeModel.get_bot_statistics(bot_id)
+        # Uma operação por linha, lida do banco em blocos durante o envio
+        if request.args.get('format') == 'ndjson':
+            return ndjson_response(BotTradeModel.iter_trades(bot_id, **params))
+        
+        trades, next_cursor = trade_history_page(BotTradeModel.iter_trades, bot_id, params)
+        
+        # Obter estatísticas (PnL não realizado no último fechamento, se o bot está rodando)
+        current_price = None
+        with bots_lock:
+            bot = running_bots.get(bot_id)
+        stock_data = getattr(bot, 'stock_data', None)
+        if stock_data is not None and len(stock_data) > 0:
+            current_price = float(stock_data["close_price"].iloc[-1])
+        statistics = BotTradeModel.get_bot_statistics(bot_id, current_price)
         
         # Obter detalhes adicionais do bot, se disponível
-        bot_details = {}
-        for trade in trades:
-            bot_details['operation_code'] = trade['operation_code']
-            break
+        bot_details = {'operation_code': first_trade[0]['operation_code']}
             
         # Extrair códigos de operação e stock do formato bot_id: BTCUSDT_BTC_timestamp
         parts = bot_id.split('_')
@@ -1413,14 +1767,42 @@ def get_bot_history(bot_id):
         bot_details['stock_code'] = stock_code
         bot_details['operation_code'] = operation_code
         
-        return jsonify({
+        return json_response({
             'success': True,
             'bot_id': bot_id,
-            'trades': trades,
             'statistics': statistics,
-            'details': bot_details
-        })
+            'details': bot_details,
+            'next_cursor': next_cursor,
+            'trades': trades
+        }, stream=True)
         
     except Exception as e:
         logger.error(f"Erro ao obter histórico do bot {bot_id}: {str(e)}")
-        return jsonify({'success': False, 'error': str(e)}), 500 
\ No newline at end of file
+        return jsonify({'success': False, 'error': str(e)}), 500 
+
+def equity_curve_response(series_id):
+    """
+    Curva de patrimônio reduzida para o gráfico.
+    Query string: start / end (timestamps em ms) e points (máximo de pontos, padrão 500).
+    """
+    try:
+        start_time = request.args.get('start', type=int)
+        end_time = request.args.get('end', type=int)
+        points = min(max(request.args.get('points', 500, type=int), 3), 5000)
+        curve = EquityModel.get_series(series_id, start_time, end_time, points)
+        return jsonify({'success': True, 'series_id': series_id, **curve})
+    except Exception as e:
+        logger.error(f"Erro ao obter curva de patrimônio de {series_id}: {str(e)}")
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+# Endpoint para a curva de patrimônio de um bot
+@api_bp.route('/api/bot/equity/<bot_id>', methods=['GET'])
+@login_required
+def get_bot_equity(bot_id):
+    return equity_curve_response(bot_id)
+
+# Endpoint para a curva de patrimônio de uma simulação
+@api_bp.route('/api/simulation/equity/<simulation_id>', methods=['GET'])
+@login_required
+def get_simulation_equity(simulation_id):
+    return equity_curve_response(simulation_id)
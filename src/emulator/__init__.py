@@ -0,0 +1,56 @@
+"""
+Emulador local da Binance (API Spot) com motor de casamento em processo.
+Permite rodar centenas de bots sem rate limit nem dinheiro real:
+
+    python -m src.emulator --port 8900 --symbols BTCUSDT,ETHUSDT
+    BINANCE_BASE_ENDPOINT=http://127.0.0.1:8900 python src/main.py
+"""
+
+from .engine import ExchangeError, MatchingEngine, SymbolConfig, INTERVALS
+from .exchange import ExchangeEmulator
+from .market import SyntheticMarket, KlineReplay, MarketRunner
+from .client import EmulatorClient
+
+# Pares padrão: (base, cotação, preço inicial, tickSize, stepSize)
+DEFAULT_SYMBOLS = {
+    "BTCUSDT": ("BTC", "USDT", 60000.0, 0.01, 0.00001),
+    "ETHUSDT": ("ETH", "USDT", 3000.0, 0.01, 0.0001),
+    "SOLUSDT": ("SOL", "USDT", 150.0, 0.01, 0.001),
+    "BNBUSDT": ("BNB", "USDT", 550.0, 0.01, 0.001),
+    "BTCBRL": ("BTC", "BRL", 330000.0, 1.0, 0.00001),
+}
+
+
+def build_emulator(symbols=None, seed=None, history=500, volatility=0.001, default_balances=None, clock=None):
+    """
+    Cria o emulador com os pares informados, histórico sintético e um formador de mercado por par.
+
+    Returns:
+        tuple: (ExchangeEmulator, list[SyntheticMarket])
+    """
+    engine = MatchingEngine(clock=clock, default_balances=default_balances)
+    emulator = ExchangeEmulator(engine)
+    markets = []
+    for index, symbol in enumerate(symbols or DEFAULT_SYMBOLS):
+        base, quote, price, tick_size, step_size = DEFAULT_SYMBOLS.get(symbol, (symbol[:-4], symbol[-4:], 100.0, 0.01, 0.001))
+        emulator.add_symbol(symbol, base, quote, tick_size, step_size, last_price=price)
+        market = SyntheticMarket(engine, symbol, price, volatility=volatility,
+                                 seed=None if seed is None else seed + index)
+        market.seed_history(history)
+        markets.append(market)
+    return emulator, markets
+
+
+__all__ = [
+    "ExchangeError",
+    "MatchingEngine",
+    "SymbolConfig",
+    "INTERVALS",
+    "ExchangeEmulator",
+    "SyntheticMarket",
+    "KlineReplay",
+    "MarketRunner",
+    "EmulatorClient",
+    "DEFAULT_SYMBOLS",
+    "build_emulator",
+]
@@ -0,0 +1,23 @@
+import argparse
+
+from . import build_emulator, MarketRunner
+from .server import run_server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Emulador local da Binance")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8900)
+    parser.add_argument("--symbols", default="BTCUSDT,ETHUSDT,SOLUSDT,BNBUSDT,BTCBRL")
+    parser.add_argument("--tick-interval", type=float, default=1.0, help="Segundos entre passos do mercado sintético")
+    parser.add_argument("--volatility", type=float, default=0.001)
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    emulator, markets = build_emulator(args.symbols.split(","), seed=args.seed, volatility=args.volatility)
+    MarketRunner(markets, interval=args.tick_interval).start()
+    run_server(emulator, args.host, args.port)
+
+
+if __name__ == "__main__":
+    main()
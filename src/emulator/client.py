@@ -0,0 +1,122 @@
+"""
+Cliente em processo: mesma interface do python-binance (métodos usados pelo robô),
+chamando o emulador diretamente, sem HTTP. Útil para testes de carga e benchmarks.
+"""
+
+import json
+
+from binance.exceptions import BinanceAPIException
+
+from .exchange import ExchangeEmulator
+
+
+class _Response:
+    def __init__(self, status_code, text):
+        self.status_code = status_code
+        self.text = text
+        self.request = None
+
+
+class EmulatorClient:
+
+    def __init__(self, emulator: ExchangeEmulator, api_key="emulator", api_secret=None):
+        self.emulator = emulator
+        self.API_KEY = api_key
+        self.API_SECRET = api_secret
+        self.timestamp_offset = 0
+
+    def _call(self, method, path, **params):
+        params = {k: v for k, v in params.items() if v is not None}
+        status, body = self.emulator.handle(method, path, params, self.API_KEY)
+        if status >= 400:
+            text = json.dumps(body)
+            raise BinanceAPIException(_Response(status, text), status, text)
+        return body
+
+    # Chamadas genéricas usadas para endpoints sem método dedicado (ex: orderList/oco)
+    def _get(self, path, signed=False, version="v3", **kwargs):
+        return self._call("GET", f"{version}/{path}", **kwargs.get("data", {}))
+
+    def _post(self, path, signed=False, version="v3", **kwargs):
+        return self._call("POST", f"{version}/{path}", **kwargs.get("data", {}))
+
+    def _delete(self, path, signed=False, version="v3", **kwargs):
+        return self._call("DELETE", f"{version}/{path}", **kwargs.get("data", {}))
+
+    # ------------------------------------------------------------------
+
+    def ping(self):
+        return self._call("GET", "v3/ping")
+
+    def get_server_time(self):
+        return self._call("GET", "v3/time")
+
+    def get_exchange_info(self):
+        return self._call("GET", "v3/exchangeInfo")
+
+    def get_symbol_info(self, symbol):
+        symbols = self._call("GET", "v3/exchangeInfo", symbol=symbol)["symbols"]
+        return symbols[0] if symbols else None
+
+    def get_klines(self, **params):
+        return self._call("GET", "v3/klines", **params)
+
+    def get_order_book(self, **params):
+        return self._call("GET", "v3/depth", **params)
+
+    def get_symbol_ticker(self, **params):
+        return self._call("GET", "v3/ticker/price", **params)
+
+    def get_all_tickers(self):
+        return self._call("GET", "v3/ticker/price")
+
+    def get_orderbook_ticker(self, **params):
+        return self._call("GET", "v3/ticker/bookTicker", **params)
+
+    def get_ticker(self, **params):
+        return self._call("GET", "v3/ticker/24hr", **params)
+
+    def get_account(self, **params):
+        return self._call("GET", "v3/account", **params)
+
+    def get_asset_balance(self, asset, **params):
+        for balance in self.get_account()["balances"]:
+            if balance["asset"] == asset.upper():
+                return balance
+        return None
+
+    def get_open_orders(self, **params):
+        return self._call("GET", "v3/openOrders", **params)
+
+    def get_all_orders(self, **params):
+        return self._call("GET", "v3/allOrders", **params)
+
+    def get_my_trades(self, **params):
+        return self._call("GET", "v3/myTrades", **params)
+
+    def get_order(self, **params):
+        return self._call("GET", "v3/order", **params)
+
+    def create_order(self, **params):
+        return self._call("POST", "v3/order", **params)
+
+    def create_test_order(self, **params):
+        return self._call("POST", "v3/order/test", **params)
+
+    def order_market_buy(self, **params):
+        return self.create_order(side="BUY", type="MARKET", **params)
+
+    def order_market_sell(self, **params):
+        return self.create_order(side="SELL", type="MARKET", **params)
+
+    def order_limit_buy(self, timeInForce="GTC", **params):
+        return self.create_order(side="BUY", type="LIMIT", timeInForce=timeInForce, **params)
+
+    def order_limit_sell(self, timeInForce="GTC", **params):
+        return self.create_order(side="SELL", type="LIMIT", timeInForce=timeInForce, **params)
+
+    def cancel_order(self, **params):
+        return self._call("DELETE", "v3/order", **params)
+
+    def stream_get_listen_key(self):
+        return self._call("POST", "v3/userDataStream")["listenKey"]
@@ -0,0 +1,828 @@
+"""
+Motor de casamento de ordens do emulador local da Binance.
+Livro com prioridade preço-tempo, contas com saldo livre/bloqueado,
+ordens LIMIT/MARKET/LIMIT_MAKER, stops (STOP_LOSS[_LIMIT]/TAKE_PROFIT[_LIMIT]),
+listas OCO e candles agregados a partir dos negócios.
+"""
+
+import heapq
+import itertools
+import threading
+import time
+from collections import deque
+
+EPSILON = 1e-12
+
+# Intervalos de candle suportados (em ms)
+INTERVALS = {
+    "1m": 60_000,
+    "3m": 3 * 60_000,
+    "5m": 5 * 60_000,
+    "15m": 15 * 60_000,
+    "30m": 30 * 60_000,
+    "1h": 60 * 60_000,
+    "2h": 2 * 60 * 60_000,
+    "4h": 4 * 60 * 60_000,
+    "1d": 24 * 60 * 60_000,
+}
+
+STOP_TYPES = ("STOP_LOSS", "STOP_LOSS_LIMIT", "TAKE_PROFIT", "TAKE_PROFIT_LIMIT")
+LIMIT_TYPES = ("LIMIT", "LIMIT_MAKER", "STOP_LOSS_LIMIT", "TAKE_PROFIT_LIMIT")
+TERMINAL_STATUS = ("FILLED", "CANCELED", "EXPIRED", "REJECTED")
+
+
+class ExchangeError(Exception):
+    """Erro no formato da Binance ({"code": ..., "msg": ...})."""
+
+    def __init__(self, code, msg, status=400):
+        super().__init__(msg)
+        self.code = code
+        self.msg = msg
+        self.status = status
+
+
+# ------------------------------------------------------------------
+# Estruturas
+
+class SymbolConfig:
+    def __init__(self, symbol, base_asset, quote_asset, tick_size=0.01, step_size=0.00001, min_qty=None, min_notional=0.0):
+        self.symbol = symbol
+        self.base_asset = base_asset
+        self.quote_asset = quote_asset
+        self.tick_size = tick_size
+        self.step_size = step_size
+        self.min_qty = min_qty if min_qty is not None else step_size
+        self.min_notional = min_notional
+
+
+class Reservation:
+    """Saldo bloqueado por uma ordem (ou compartilhado pelas pernas de uma OCO)."""
+    __slots__ = ("asset", "amount", "orders")
+
+    def __init__(self, asset, amount):
+        self.asset = asset
+        self.amount = amount
+        self.orders = []
+
+
+class Account:
+    def __init__(self, account_id, balances=None, unlimited=False):
+        self.account_id = account_id
+        self.unlimited = unlimited  # Formador de mercado sintético: sem checagem de saldo
+        self.balances = {}
+        for asset, amount in (balances or {}).items():
+            self.balances[asset] = [float(amount), 0.0]
+        self.open_orders = set()
+        self.orders_by_symbol = {}
+        self.trades = []
+
+    def balance(self, asset):
+        return self.balances.setdefault(asset, [0.0, 0.0])
+
+    def lock(self, asset, amount):
+        if self.unlimited:
+            return
+        balance = self.balance(asset)
+        if balance[0] + EPSILON < amount:
+            raise ExchangeError(-2010, "Account has insufficient balance for requested action.")
+        balance[0] -= amount
+        balance[1] += amount
+
+    def unlock(self, asset, amount):
+        if self.unlimited or amount <= 0:
+            return
+        balance = self.balance(asset)
+        balance[1] -= amount
+        balance[0] += amount
+
+    def consume_locked(self, asset, amount):
+        if self.unlimited:
+            return
+        self.balance(asset)[1] -= amount
+
+    def add_free(self, asset, amount):
+        if self.unlimited:
+            return
+        self.balance(asset)[0] += amount
+
+
+class Order:
+    __slots__ = (
+        "order_id", "client_order_id", "account", "symbol", "side", "type", "time_in_force",
+        "price", "stop_price", "orig_qty", "executed_qty", "cumm_quote", "status", "time",
+        "update_time", "order_list_id", "fills", "is_working", "reservation", "quote_order_qty",
+        "seq",
+    )
+
+    def __init__(self, order_id, account, symbol, side, type, quantity, price=None, stop_price=None,
+                 time_in_force=None, client_order_id=None, now=0, quote_order_qty=None):
+        self.order_id = order_id
+        self.client_order_id = client_order_id or f"emu_{order_id}"
+        self.account = account
+        self.symbol = symbol
+        self.side = side
+        self.type = type
+        self.time_in_force = time_in_force or ("GTC" if type in LIMIT_TYPES else None)
+        self.price = price or 0.0
+        self.stop_price = stop_price or 0.0
+        self.orig_qty = quantity or 0.0
+        self.executed_qty = 0.0
+        self.cumm_quote = 0.0
+        self.status = "NEW"
+        self.time = now
+        self.update_time = now
+        self.order_list_id = -1
+        self.fills = []
+        self.is_working = type not in STOP_TYPES
+        self.reservation = None
+        self.quote_order_qty = quote_order_qty
+        self.seq = order_id
+
+    @property
+    def remaining(self):
+        return self.orig_qty - self.executed_qty
+
+    @property
+    def is_open(self):
+        return self.status not in TERMINAL_STATUS
+
+
+class BookSide:
+    """Um lado do livro: níveis de preço (em ticks) com filas FIFO."""
+
+    def __init__(self, is_bid):
+        self.is_bid = is_bid
+        self.levels = {}   # ticks -> deque[Order]
+        self.volume = {}   # ticks -> quantidade total no nível
+        self._heap = []
+
+    def best(self):
+        while self._heap:
+            key = self._heap[0]
+            ticks = -key if self.is_bid else key
+            if ticks in self.levels:
+                return ticks
+            heapq.heappop(self._heap)
+        return None
+
+    def add(self, ticks, order):
+        if ticks not in self.levels:
+            self.levels[ticks] = deque()
+            self.volume[ticks] = 0.0
+            heapq.heappush(self._heap, -ticks if self.is_bid else ticks)
+        self.levels[ticks].append(order)
+        self.volume[ticks] += order.remaining
+
+    def reduce(self, ticks, quantity):
+        self.volume[ticks] -= quantity
+        if self.volume[ticks] < EPSILON:
+            self.volume[ticks] = 0.0
+
+    def remove(self, ticks, order):
+        level = self.levels.get(ticks)
+        if level is None:
+            return
+        try:
+            level.remove(order)
+        except ValueError:
+            return
+        self.reduce(ticks, order.remaining)
+        if not level:
+            del self.levels[ticks]
+            del self.volume[ticks]
+
+    def drop_level_if_empty(self, ticks):
+        if ticks in self.levels and not self.levels[ticks]:
+            del self.levels[ticks]
+            del self.volume[ticks]
+
+    def depth(self, limit):
+        prices = sorted(self.levels, reverse=self.is_bid)[:limit]
+        return [(ticks, self.volume[ticks]) for ticks in prices]
+
+
+class OrderBook:
+    def __init__(self, config: SymbolConfig):
+        self.config = config
+        self.bids = BookSide(is_bid=True)
+        self.asks = BookSide(is_bid=False)
+        self.stops = []          # Ordens stop aguardando disparo
+        self.update_id = 1
+        self.last_price = 0.0
+        self.changed = {}        # (is_bid, ticks) alterados na operação atual
+
+    def to_ticks(self, price):
+        return int(round(price / self.config.tick_size))
+
+    def to_price(self, ticks):
+        return round(ticks * self.config.tick_size, 12)
+
+
+class KlineSeries:
+    """Candles de um par/intervalo no formato da Binance, atualizados a cada negócio."""
+
+    def __init__(self, interval_ms, max_candles=5000):
+        self.interval_ms = interval_ms
+        self.max_candles = max_candles
+        self.candles = deque(maxlen=max_candles)
+
+    def _new_candle(self, open_time, price):
+        return [open_time, price, price, price, price, 0.0, open_time + self.interval_ms - 1, 0.0, 0, 0.0, 0.0]
+
+    def roll_to(self, now_ms, last_price):
+        """Cria candles sem negócios (planos) até o intervalo de now_ms."""
+        if not self.candles:
+            if last_price <= 0:
+                return
+            self.candles.append(self._new_candle(now_ms - now_ms % self.interval_ms, last_price))
+            return
+        open_time = self.candles[-1][0]
+        current = now_ms - now_ms % self.interval_ms
+        gap = (current - open_time) // self.interval_ms
+        if gap <= 0:
+            return
+        # Limita a quantidade de candles planos criados de uma vez
+        start = max(open_time + self.interval_ms, current - (self.max_candles - 1) * self.interval_ms)
+        close = self.candles[-1][4]
+        for t in range(start, current + 1, self.interval_ms):
+            self.candles.append(self._new_candle(t, close))
+
+    def on_trade(self, now_ms, price, quantity, taker_is_buyer):
+        self.roll_to(now_ms, price)
+        candle = self.candles[-1]
+        candle[2] = max(candle[2], price)
+        candle[3] = min(candle[3], price)
+        candle[4] = price
+        candle[5] += quantity
+        candle[7] += quantity * price
+        candle[8] += 1
+        if taker_is_buyer:
+            candle[9] += quantity
+            candle[10] += quantity * price
+
+    def seed(self, candles):
+        for candle in candles:
+            self.candles.append(list(candle))
+
+
+# ------------------------------------------------------------------
+
+class MatchingEngine:
+    """
+    Motor de casamento com prioridade preço-tempo.
+    Thread-safe (um único lock): pensado para centenas de bots e milhares de ordens por segundo em um processo.
+    """
+
+    def __init__(self, clock=None, fee_rate=0.001, default_balances=None):
+        self.clock = clock or time.time
+        self.fee_rate = fee_rate
+        self.default_balances = default_balances if default_balances is not None else {"USDT": 10000.0, "BRL": 50000.0}
+        self.symbols = {}
+        self.books = {}
+        self.klines = {}
+        self.accounts = {}
+        self.orders = {}
+        self.order_lists = {}
+        self.lock = threading.RLock()
+        self.subscribers = []
+        self._order_ids = itertools.count(1)
+        self._trade_ids = itertools.count(1)
+        self._list_ids = itertools.count(1)
+        self._pending_events = []
+
+    # ------------------------------------------------------------------
+    # Configuração
+
+    def now_ms(self):
+        return int(self.clock() * 1000)
+
+    def add_symbol(self, config: SymbolConfig, last_price=0.0):
+        with self.lock:
+            self.symbols[config.symbol] = config
+            book = OrderBook(config)
+            book.last_price = last_price
+            self.books[config.symbol] = book
+            self.klines[config.symbol] = {name: KlineSeries(ms) for name, ms in INTERVALS.items()}
+            for series in self.klines[config.symbol].values():
+                series.roll_to(self.now_ms(), last_price)
+
+    def seed_klines(self, symbol, interval, candles):
+        """Carrega candles históricos (formato da Binance) para um intervalo."""
+        with self.lock:
+            series = self.klines[symbol][interval]
+            series.candles.clear()
+            series.seed(candles)
+            if candles:
+                self.books[symbol].last_price = float(candles[-1][4])
+
+    def get_account(self, account_id, create=True):
+        with self.lock:
+            account = self.accounts.get(account_id)
+            if account is None:
+                if not create:
+                    raise ExchangeError(-2015, "Invalid API-key, IP, or permissions for action.", status=401)
+                account = Account(account_id, self.default_balances)
+                self.accounts[account_id] = account
+            return account
+
+    def add_account(self, account_id, balances=None, unlimited=False):
+        with self.lock:
+            account = Account(account_id, balances or {}, unlimited=unlimited)
+            self.accounts[account_id] = account
+            return account
+
+    def subscribe(self, callback):
+        """callback(stream, event) recebe eventos no formato dos streams da Binance."""
+        with self.lock:
+            self.subscribers.append(callback)
+
+    def unsubscribe(self, callback):
+        with self.lock:
+            if callback in self.subscribers:
+                self.subscribers.remove(callback)
+
+    # ------------------------------------------------------------------
+    # Ordens
+
+    def _book(self, symbol):
+        if symbol not in self.books:
+            raise ExchangeError(-1121, "Invalid symbol.")
+        return self.books[symbol]
+
+    def _round_qty(self, config, quantity):
+        steps = int(quantity / config.step_size + 1e-9)
+        return round(steps * config.step_size, 12)
+
+    def place_order(self, account_id, symbol, side, type, quantity=None, price=None, stop_price=None,
+                    time_in_force=None, client_order_id=None, quote_order_qty=None, order_list_id=-1,
+                    reservation=None):
+        with self.lock:
+            order = self._create_order(account_id, symbol, side, type, quantity, price, stop_price,
+                                       time_in_force, client_order_id, quote_order_qty, order_list_id, reservation)
+            self._process(order)
+            self._flush()
+            return order
+
+    def _create_order(self, account_id, symbol, side, type, quantity, price, stop_price, time_in_force,
+                      client_order_id, quote_order_qty, order_list_id, reservation):
+        book = self._book(symbol)
+        config = book.config
+        account = self.get_account(account_id)
+
+        side = (side or "").upper()
+        type = (type or "").upper()
+        if side not in ("BUY", "SELL"):
+            raise ExchangeError(-1102, "Mandatory parameter 'side' was not sent, was empty/null, or malformed.")
+        if type not in ("MARKET",) + LIMIT_TYPES + STOP_TYPES:
+            raise ExchangeError(-1116, "Invalid orderType.")
+
+        quantity = float(quantity) if quantity not in (None, "") else None
+        price = float(price) if price not in (None, "") else None
+        stop_price = float(stop_price) if stop_price not in (None, "") else None
+        quote_order_qty = float(quote_order_qty) if quote_order_qty not in (None, "") else None
+
+        if type in LIMIT_TYPES and not price:
+            raise ExchangeError(-1102, "Mandatory parameter 'price' was not sent, was empty/null, or malformed.")
+        if type in STOP_TYPES and not stop_price:
+            raise ExchangeError(-1102, "Mandatory parameter 'stopPrice' was not sent, was empty/null, or malformed.")
+        if quantity is None and not (type == "MARKET" and quote_order_qty):
+            raise ExchangeError(-1102, "Mandatory parameter 'quantity' was not sent, was empty/null, or malformed.")
+
+        if quantity is not None:
+            if quantity + EPSILON < config.min_qty:
+                raise ExchangeError(-1013, "Filter failure: LOT_SIZE")
+            quantity = self._round_qty(config, quantity)
+        if price is not None:
+            price = book.to_price(book.to_ticks(price))
+        if stop_price is not None:
+            stop_price = book.to_price(book.to_ticks(stop_price))
+
+        if type == "LIMIT_MAKER":
+            best = book.asks.best() if side == "BUY" else book.bids.best()
+            ticks = book.to_ticks(price)
+            if best is not None and ((side == "BUY" and ticks >= best) or (side == "SELL" and ticks <= best)):
+                raise ExchangeError(-2010, "Order would immediately match and take.")
+
+        now = self.now_ms()
+        order = Order(next(self._order_ids), account, symbol, side, type, quantity, price, stop_price,
+                      time_in_force, client_order_id, now, quote_order_qty)
+        order.order_list_id = order_list_id
+
+        # Reserva de saldo
+        if reservation is None:
+            if side == "SELL":
+                reservation = Reservation(config.base_asset, quantity)
+            elif type in LIMIT_TYPES:
+                reservation = Reservation(config.quote_asset, quantity * price)
+            if reservation is not None:
+                account.lock(reservation.asset, reservation.amount)
+        if reservation is not None:
+            reservation.orders.append(order)
+        order.reservation = reservation
+
+        self.orders[order.order_id] = order
+        account.open_orders.add(order.order_id)
+        account.orders_by_symbol.setdefault(symbol, []).append(order.order_id)
+        return order
+
+    def _process(self, order):
+        book = self.books[order.symbol]
+        if order.type in STOP_TYPES:
+            book.stops.append(order)
+            self._emit_execution(order, "NEW")
+            return
+
+        self._emit_execution(order, "NEW")
+        if order.time_in_force == "FOK" and not self._can_fill(book, order):
+            self._finish(order, "EXPIRED")
+            return
+
+        self._match(book, order)
+
+        if order.remaining <= EPSILON and order.quote_order_qty is None:
+            return
+        if order.type == "MARKET" or order.time_in_force in ("IOC", "FOK"):
+            if order.is_open:
+                self._finish(order, "EXPIRED")
+            return
+        if order.is_open:
+            ticks = book.to_ticks(order.price)
+            side = book.bids if order.side == "BUY" else book.asks
+            side.add(ticks, order)
+            self._mark_changed(book, order.side == "BUY", ticks)
+
+    def _can_fill(self, book, order):
+        opposite = book.asks if order.side == "BUY" else book.bids
+        limit = book.to_ticks(order.price) if order.price else None
+        available = 0.0
+        for ticks, volume in opposite.depth(len(opposite.levels)):
+            if limit is not None and ((order.side == "BUY" and ticks > limit) or (order.side == "SELL" and ticks < limit)):
+                break
+            available += volume
+            if available + EPSILON >= order.orig_qty:
+                return True
+        return False
+
+    def _match(self, book, taker):
+        opposite = book.asks if taker.side == "BUY" else book.bids
+        limit = book.to_ticks(taker.price) if taker.type != "MARKET" else None
+        quote_left = taker.quote_order_qty
+
+        while True:
+            if taker.quote_order_qty is None and taker.remaining <= EPSILON:
+                break
+            best = opposite.best()
+            if best is None:
+                break
+            if limit is not None and ((taker.side == "BUY" and best > limit) or (taker.side == "SELL" and best < limit)):
+                break
+            level = opposite.levels[best]
+            maker = level[0]
+            if not maker.is_open:
+                level.popleft()
+                opposite.drop_level_if_empty(best)
+                continue
+
+            price = book.to_price(best)
+            quantity = min(maker.remaining, taker.remaining) if taker.quote_order_qty is None else maker.remaining
+            if quote_left is not None:
+                quantity = min(quantity, self._round_qty(book.config, quote_left / price))
+            if taker.side == "BUY" and taker.type == "MARKET" and not taker.account.unlimited:
+                affordable = self._round_qty(book.config, taker.account.balance(book.config.quote_asset)[0] / price)
+                quantity = min(quantity, affordable)
+            if quantity <= EPSILON:
+                break
+
+            self._trade(book, maker, taker, price, quantity)
+            opposite.reduce(best, quantity)
+            self._mark_changed(book, not (taker.side == "BUY"), best)
+            if quote_left is not None:
+                quote_left -= quantity * price
+            if maker.remaining <= EPSILON:
+                level.popleft()
+                opposite.drop_level_if_empty(best)
+
+        if taker.quote_order_qty is not None:
+            taker.orig_qty = taker.executed_qty
+
+    def _trade(self, book, maker, taker, price, quantity):
+        config = book.config
+        now = self.now_ms()
+        trade_id = next(self._trade_ids)
+        for order, is_maker in ((maker, True), (taker, False)):
+            self._settle(config, order, price, quantity, is_maker, trade_id, now)
+        book.last_price = price
+
+        taker_is_buyer = taker.side == "BUY"
+        for series in self.klines[book.config.symbol].values():
+            series.on_trade(now, price, quantity, taker_is_buyer)
+
+        self._pending_events.append((f"{config.symbol.lower()}@trade", {
+            "e": "trade", "E": now, "s": config.symbol, "t": trade_id,
+            "p": f"{price:.8f}", "q": f"{quantity:.8f}", "T": now, "m": not taker_is_buyer,
+        }))
+
+        # Execução de uma perna de OCO cancela a outra
+        for order in (maker, taker):
+            if order.order_list_id != -1:
+                self._cancel_other_legs(order)
+
+        self._trigger_stops(book)
+
+    def _settle(self, config, order, price, quantity, is_maker, trade_id, now):
+        account = order.account
+        notional = price * quantity
+        reservation = order.reservation
+
+        if order.side == "BUY":
+            if reservation is not None:
+                reserved = quantity * order.price
+                reservation.amount -= reserved
+                account.consume_locked(config.quote_asset, reserved)
+                account.add_free(config.quote_asset, reserved - notional)
+            else:
+                account.add_free(config.quote_asset, -notional)
+            commission = quantity * self.fee_rate
+            account.add_free(config.base_asset, quantity - commission)
+            commission_asset = config.base_asset
+        else:
+            if reservation is not None:
+                reservation.amount -= quantity
+                account.consume_locked(config.base_asset, quantity)
+            else:
+                account.add_free(config.base_asset, -quantity)
+            commission = notional * self.fee_rate
+            account.add_free(config.quote_asset, notional - commission)
+            commission_asset = config.quote_asset
+
+        order.executed_qty += quantity
+        order.cumm_quote += notional
+        order.update_time = now
+        fill = {
+            "price": f"{price:.8f}", "qty": f"{quantity:.8f}", "commission": f"{commission:.8f}",
+            "commissionAsset": commission_asset, "tradeId": trade_id,
+        }
+        order.fills.append(fill)
+        account.trades.append({
+            "symbol": config.symbol, "id": trade_id, "orderId": order.order_id, "orderListId": order.order_list_id,
+            "price": f"{price:.8f}", "qty": f"{quantity:.8f}", "quoteQty": f"{notional:.8f}",
+            "commission": f"{commission:.8f}", "commissionAsset": commission_asset, "time": now,
+            "isBuyer": order.side == "BUY", "isMaker": is_maker, "isBestMatch": True,
+        })
+
+        if order.remaining <= EPSILON and order.quote_order_qty is None:
+            self._finish(order, "FILLED", last_fill=(price, quantity))
+        else:
+            order.status = "PARTIALLY_FILLED"
+            self._emit_execution(order, "TRADE", last_fill=(price, quantity))
+
+    def _finish(self, order, status, last_fill=None):
+        order.status = status
+        order.update_time = self.now_ms()
+        order.account.open_orders.discard(order.order_id)
+        reservation = order.reservation
+        if reservation is not None and all(not o.is_open for o in reservation.orders):
+            order.account.unlock(reservation.asset, max(reservation.amount, 0.0))
+            reservation.amount = 0.0
+        self._emit_execution(order, "TRADE" if status == "FILLED" else status, last_fill=last_fill)
+
+    def _trigger_stops(self, book):
+        if not book.stops:
+            return
+        last = book.last_price
+        triggered = []
+        for order in book.stops:
+            if not order.is_open:
+                continue
+            is_stop_loss = order.type.startswith("STOP_LOSS")
+            if order.side == "SELL":
+                hit = last <= order.stop_price if is_stop_loss else last >= order.stop_price
+            else:
+                hit = last >= order.stop_price if is_stop_loss else last <= order.stop_price
+            if hit:
+                triggered.append(order)
+        if not triggered:
+            return
+        book.stops = [o for o in book.stops if o.is_open and o not in triggered]
+        for order in triggered:
+            order.is_working = True
+            if order.type in ("STOP_LOSS", "TAKE_PROFIT"):
+                self._match_as(book, order, market=True)
+            else:
+                self._match_as(book, order, market=False)
+
+    def _match_as(self, book, order, market):
+        original_type = order.type
+        order.type = "MARKET" if market else "LIMIT"
+        try:
+            self._match(book, order)
+        finally:
+            order.type = original_type
+        if not order.is_open:
+            return
+        if market:
+            self._finish(order, "EXPIRED")
+            return
+        ticks = book.to_ticks(order.price)
+        side = book.bids if order.side == "BUY" else book.asks
+        side.add(ticks, order)
+        self._mark_changed(book, order.side == "BUY", ticks)
+
+    def _cancel_other_legs(self, order):
+        order_list = self.order_lists.get(order.order_list_id)
+        if not order_list:
+            return
+        for other in order_list["orders"]:
+            if other is not order and other.is_open:
+                self._cancel(other)
+        if all(not o.is_open for o in order_list["orders"]) or order.status == "FILLED":
+            order_list["status"] = "ALL_DONE"
+
+    def cancel_order(self, account_id, symbol, order_id=None, client_order_id=None):
+        with self.lock:
+            order = self._find_order(account_id, symbol, order_id, client_order_id)
+            if not order.is_open:
+                raise ExchangeError(-2011, "Unknown order sent.")
+            if order.order_list_id != -1:
+                for leg in self.order_lists[order.order_list_id]["orders"]:
+                    if leg.is_open:
+                        self._cancel(leg)
+                self.order_lists[order.order_list_id]["status"] = "ALL_DONE"
+            else:
+                self._cancel(order)
+            self._flush()
+            return order
+
+    def cancel_all(self, account_id, symbol):
+        with self.lock:
+            account = self.get_account(account_id)
+            canceled = []
+            for order_id in list(account.open_orders):
+                order = self.orders[order_id]
+                if order.symbol == symbol and order.is_open:
+                    self._cancel(order)
+                    canceled.append(order)
+            self._flush()
+            return canceled
+
+    def _cancel(self, order):
+        book = self.books[order.symbol]
+        if order in book.stops:
+            book.stops.remove(order)
+        elif order.is_working:
+            ticks = book.to_ticks(order.price) if order.price else None
+            if ticks is not None:
+                side = book.bids if order.side == "BUY" else book.asks
+                side.remove(ticks, order)
+                self._mark_changed(book, order.side == "BUY", ticks)
+        self._finish(order, "CANCELED")
+
+    def _find_order(self, account_id, symbol, order_id=None, client_order_id=None):
+        account = self.get_account(account_id)
+        order = None
+        if order_id not in (None, ""):
+            order = self.orders.get(int(order_id))
+        elif client_order_id:
+            for candidate_id in reversed(account.orders_by_symbol.get(symbol, [])):
+                if self.orders[candidate_id].client_order_id == client_order_id:
+                    order = self.orders[candidate_id]
+                    break
+        if order is None or order.account is not account or order.symbol != symbol:
+            raise ExchangeError(-2013, "Order does not exist.")
+        return order
+
+    def place_oco(self, account_id, symbol, side, quantity, above, below, list_client_order_id=None):
+        """
+        Cria uma lista OCO com duas pernas.
+        above/below: dict(type, price, stop_price, time_in_force) no formato do endpoint orderList/oco.
+        """
+        with self.lock:
+            book = self._book(symbol)
+            config = book.config
+            account = self.get_account(account_id)
+            quantity = self._round_qty(config, float(quantity))
+
+            if side == "SELL":
+                reservation = Reservation(config.base_asset, quantity)
+            else:
+                max_price = max(float(leg.get("price") or leg.get("stop_price") or 0) for leg in (above, below))
+                reservation = Reservation(config.quote_asset, quantity * max_price)
+            account.lock(reservation.asset, reservation.amount)
+
+            list_id = next(self._list_ids)
+            legs = []
+            try:
+                for leg in (below, above):
+                    order = self._create_order(account_id, symbol, side, leg["type"], quantity, leg.get("price"),
+                                               leg.get("stop_price"), leg.get("time_in_force"), None, None,
+                                               list_id, reservation)
+                    legs.append(order)
+            except ExchangeError:
+                for order in legs:
+                    order.status = "REJECTED"
+                    account.open_orders.discard(order.order_id)
+                account.unlock(reservation.asset, reservation.amount)
+                raise
+            self.order_lists[list_id] = {
+                "orderListId": list_id, "contingencyType": "OCO", "status": "EXECUTING",
+                "listClientOrderId": list_client_order_id or f"emu_list_{list_id}",
+                "transactionTime": self.now_ms(), "symbol": symbol, "orders": legs,
+            }
+            for order in legs:
+                if order.is_open:
+                    self._process(order)
+            self._flush()
+            return self.order_lists[list_id]
+
+    # ------------------------------------------------------------------
+    # Eventos
+
+    def _mark_changed(self, book, is_bid, ticks):
+        book.changed[(is_bid, ticks)] = True
+
+    def _emit_execution(self, order, execution_type, last_fill=None):
+        last_price, last_qty = last_fill if last_fill else (0.0, 0.0)
+        self._pending_events.append((f"user@{order.account.account_id}", {
+            "e": "executionReport", "E": self.now_ms(), "s": order.symbol, "c": order.client_order_id,
+            "S": order.side, "o": order.type, "f": order.time_in_force or "GTC",
+            "q": f"{order.orig_qty:.8f}", "p": f"{order.price:.8f}", "P": f"{order.stop_price:.8f}",
+            "x": execution_type, "X": order.status, "i": order.order_id, "g": order.order_list_id,
+            "l": f"{last_qty:.8f}", "z": f"{order.executed_qty:.8f}", "L": f"{last_price:.8f}",
+            "Z": f"{order.cumm_quote:.8f}", "T": order.update_time, "O": order.time,
+        }))
+
+    def _flush(self):
+        """Publica os eventos acumulados na operação (um depthUpdate por operação)."""
+        for symbol, book in self.books.items():
+            if not book.changed:
+                continue
+            first = book.update_id
+            bids, asks = [], []
+            for (is_bid, ticks) in book.changed:
+                side = book.bids if is_bid else book.asks
+                entry = [f"{book.to_price(ticks):.8f}", f"{side.volume.get(ticks, 0.0):.8f}"]
+                (bids if is_bid else asks).append(entry)
+            book.update_id += 1
+            book.changed = {}
+            self._pending_events.append((f"{symbol.lower()}@depth", {
+                "e": "depthUpdate", "E": self.now_ms(), "s": symbol,
+                "U": first, "u": first, "b": bids, "a": asks,
+            }))
+
+        if not self._pending_events or not self.subscribers:
+            self._pending_events = []
+            return
+        events, self._pending_events = self._pending_events, []
+        for callback in list(self.subscribers):
+            for stream, event in events:
+                try:
+                    callback(stream, event)
+                except Exception:
+                    pass
+
+    # ------------------------------------------------------------------
+    # Consultas
+
+    def depth(self, symbol, limit=100):
+        with self.lock:
+            book = self._book(symbol)
+            return {
+                "lastUpdateId": book.update_id - 1,
+                "bids": [[f"{book.to_price(t):.8f}", f"{q:.8f}"] for t, q in book.bids.depth(limit)],
+                "asks": [[f"{book.to_price(t):.8f}", f"{q:.8f}"] for t, q in book.asks.depth(limit)],
+            }
+
+    def book_ticker(self, symbol):
+        with self.lock:
+            book = self._book(symbol)
+            bid, ask = book.bids.best(), book.asks.best()
+            return {
+                "symbol": symbol,
+                "bidPrice": f"{book.to_price(bid) if bid is not None else 0:.8f}",
+                "bidQty": f"{book.bids.volume.get(bid, 0.0):.8f}",
+                "askPrice": f"{book.to_price(ask) if ask is not None else 0:.8f}",
+                "askQty": f"{book.asks.volume.get(ask, 0.0):.8f}",
+            }
+
+    def get_klines(self, symbol, interval, limit=500, start_time=None, end_time=None):
+        with self.lock:
+            if interval not in INTERVALS:
+                raise ExchangeError(-1120, "Invalid interval.")
+            book = self._book(symbol)
+            series = self.klines[symbol][interval]
+            series.roll_to(self.now_ms(), book.last_price)
+            candles = list(series.candles)
+        if start_time is not None:
+            candles = [c for c in candles if c[0] >= int(start_time)]
+        if end_time is not None:
+            candles = [c for c in candles if c[0] <= int(end_time)]
+        limit = min(int(limit or 500), 1000)
+        if start_time is not None:
+            candles = candles[:limit]
+        else:
+            candles = candles[-limit:]
+        return [
+            [c[0], f"{c[1]:.8f}", f"{c[2]:.8f}", f"{c[3]:.8f}", f"{c[4]:.8f}", f"{c[5]:.8f}",
+             c[6], f"{c[7]:.8f}", c[8], f"{c[9]:.8f}", f"{c[10]:.8f}", "0"]
+            for c in candles
+        ]
@@ -0,0 +1,353 @@
+"""
+Camada REST do emulador: traduz (método, caminho, parâmetros) para o motor de
+casamento e devolve as respostas no formato da API Spot da Binance.
+Usada tanto pelo servidor HTTP (server.py) quanto pelo cliente em processo (client.py).
+"""
+
+import json
+
+from .engine import ExchangeError, INTERVALS, MatchingEngine, SymbolConfig
+
+
+def _fmt(value):
+    return f"{value:.8f}"
+
+
+def _format_number(value):
+    # Filtros da Binance usam strings com 8 casas
+    return f"{float(value):.8f}"
+
+
+class ExchangeEmulator:
+    """
+    Emulador da API Spot da Binance.
+    Não valida assinaturas: a API key (header X-MBX-APIKEY) apenas identifica a conta,
+    criada no primeiro acesso com os saldos padrão do motor.
+    """
+
+    def __init__(self, engine: MatchingEngine = None):
+        self.engine = engine or MatchingEngine()
+        self.request_count = 0
+        self.routes = {
+            ("GET", "v3/ping"): self.ping,
+            ("GET", "v3/time"): self.server_time,
+            ("GET", "v3/exchangeInfo"): self.exchange_info,
+            ("GET", "v3/klines"): self.klines,
+            ("GET", "v3/depth"): self.depth,
+            ("GET", "v3/ticker/price"): self.ticker_price,
+            ("GET", "v3/ticker/bookTicker"): self.book_ticker,
+            ("GET", "v3/ticker/24hr"): self.ticker_24hr,
+            ("GET", "v3/account"): self.account,
+            ("GET", "v3/openOrders"): self.open_orders,
+            ("DELETE", "v3/openOrders"): self.cancel_open_orders,
+            ("GET", "v3/allOrders"): self.all_orders,
+            ("GET", "v3/myTrades"): self.my_trades,
+            ("GET", "v3/order"): self.get_order,
+            ("POST", "v3/order"): self.new_order,
+            ("POST", "v3/order/test"): self.test_order,
+            ("DELETE", "v3/order"): self.cancel_order,
+            ("POST", "v3/orderList/oco"): self.new_order_list_oco,
+            ("POST", "v3/order/oco"): self.new_order_oco_legacy,
+            ("POST", "v3/userDataStream"): self.user_data_stream,
+            ("PUT", "v3/userDataStream"): self.keepalive_user_data_stream,
+            ("DELETE", "v3/userDataStream"): self.keepalive_user_data_stream,
+        }
+
+    # ------------------------------------------------------------------
+
+    def add_symbol(self, symbol, base_asset, quote_asset, tick_size=0.01, step_size=0.00001, last_price=0.0, **kwargs):
+        self.engine.add_symbol(SymbolConfig(symbol, base_asset, quote_asset, tick_size, step_size, **kwargs), last_price)
+
+    def handle(self, method, path, params=None, api_key=None):
+        """
+        Processa uma requisição.
+
+        Parameters:
+            method (str): GET | POST | PUT | DELETE.
+            path (str): Caminho após /api/ (ex: 'v3/order').
+
+        Returns:
+            tuple: (status_http, corpo) onde corpo é dict/list serializável.
+        """
+        self.request_count += 1
+        route = self.routes.get((method.upper(), path.strip("/")))
+        if route is None:
+            return 404, {"code": -1000, "msg": f"Endpoint não suportado pelo emulador: {method} {path}"}
+        params = dict(params or {})
+        try:
+            return 200, route(params, api_key)
+        except ExchangeError as e:
+            return e.status, {"code": e.code, "msg": e.msg}
+        except (KeyError, ValueError) as e:
+            return 400, {"code": -1102, "msg": f"Parâmetro inválido: {e}"}
+
+    def _account_id(self, api_key):
+        if not api_key:
+            raise ExchangeError(-2014, "API-key format invalid.", status=401)
+        return api_key
+
+    def _symbol(self, params):
+        symbol = params.get("symbol")
+        if not symbol:
+            raise ExchangeError(-1102, "Mandatory parameter 'symbol' was not sent, was empty/null, or malformed.")
+        return symbol.upper()
+
+    # ------------------------------------------------------------------
+    # Públicos
+
+    def ping(self, params, api_key):
+        return {}
+
+    def server_time(self, params, api_key):
+        return {"serverTime": self.engine.now_ms()}
+
+    def exchange_info(self, params, api_key):
+        wanted = None
+        if params.get("symbol"):
+            wanted = {params["symbol"].upper()}
+        elif params.get("symbols"):
+            wanted = set(json.loads(params["symbols"]))
+        symbols = []
+        for config in self.engine.symbols.values():
+            if wanted and config.symbol not in wanted:
+                continue
+            symbols.append({
+                "symbol": config.symbol,
+                "status": "TRADING",
+                "baseAsset": config.base_asset,
+                "baseAssetPrecision": 8,
+                "quoteAsset": config.quote_asset,
+                "quotePrecision": 8,
+                "quoteAssetPrecision": 8,
+                "orderTypes": ["LIMIT", "LIMIT_MAKER", "MARKET", "STOP_LOSS", "STOP_LOSS_LIMIT", "TAKE_PROFIT", "TAKE_PROFIT_LIMIT"],
+                "ocoAllowed": True,
+                "isSpotTradingAllowed": True,
+                "filters": [
+                    {"filterType": "PRICE_FILTER", "minPrice": _format_number(config.tick_size),
+                     "maxPrice": "1000000.00000000", "tickSize": _format_number(config.tick_size)},
+                    {"filterType": "LOT_SIZE", "minQty": _format_number(config.min_qty),
+                     "maxQty": "9000000.00000000", "stepSize": _format_number(config.step_size)},
+                    {"filterType": "NOTIONAL", "minNotional": _format_number(config.min_notional)},
+                ],
+                "permissions": ["SPOT"],
+            })
+        return {"timezone": "UTC", "serverTime": self.engine.now_ms(), "rateLimits": [], "exchangeFilters": [], "symbols": symbols}
+
+    def klines(self, params, api_key):
+        interval = params.get("interval")
+        if interval not in INTERVALS:
+            raise ExchangeError(-1120, "Invalid interval.")
+        return self.engine.get_klines(
+            self._symbol(params), interval, limit=params.get("limit", 500),
+            start_time=params.get("startTime"), end_time=params.get("endTime"),
+        )
+
+    def depth(self, params, api_key):
+        return self.engine.depth(self._symbol(params), int(params.get("limit", 100)))
+
+    def ticker_price(self, params, api_key):
+        if params.get("symbol"):
+            symbol = self._symbol(params)
+            return {"symbol": symbol, "price": _fmt(self.engine._book(symbol).last_price)}
+        return [{"symbol": s, "price": _fmt(b.last_price)} for s, b in self.engine.books.items()]
+
+    def book_ticker(self, params, api_key):
+        if params.get("symbol"):
+            return self.engine.book_ticker(self._symbol(params))
+        return [self.engine.book_ticker(s) for s in self.engine.books]
+
+    def ticker_24hr(self, params, api_key):
+        def stats(symbol):
+            candles = self.engine.get_klines(symbol, "1h", limit=24)
+            last = float(candles[-1][4]) if candles else 0.0
+            first = float(candles[0][1]) if candles else 0.0
+            change = last - first
+            return {
+                "symbol": symbol,
+                "priceChange": _fmt(change),
+                "priceChangePercent": f"{(change / first * 100) if first else 0:.3f}",
+                "lastPrice": _fmt(last),
+                "openPrice": _fmt(first),
+                "highPrice": _fmt(max((float(c[2]) for c in candles), default=0.0)),
+                "lowPrice": _fmt(min((float(c[3]) for c in candles), default=0.0)),
+                "volume": _fmt(sum(float(c[5]) for c in candles)),
+                "quoteVolume": _fmt(sum(float(c[7]) for c in candles)),
+                "count": sum(c[8] for c in candles),
+            }
+        if params.get("symbol"):
+            return stats(self._symbol(params))
+        return [stats(s) for s in self.engine.books]
+
+    # ------------------------------------------------------------------
+    # Conta
+
+    def account(self, params, api_key):
+        account = self.engine.get_account(self._account_id(api_key))
+        with self.engine.lock:
+            balances = [
+                {"asset": asset, "free": _fmt(max(free, 0.0)), "locked": _fmt(max(locked, 0.0))}
+                for asset, (free, locked) in account.balances.items()
+            ]
+        return {
+            "makerCommission": 10, "takerCommission": 10, "buyerCommission": 0, "sellerCommission": 0,
+            "canTrade": True, "canWithdraw": False, "canDeposit": False,
+            "updateTime": self.engine.now_ms(), "accountType": "SPOT", "balances": balances, "permissions": ["SPOT"],
+        }
+
+    def order_payload(self, order, full=False):
+        payload = {
+            "symbol": order.symbol,
+            "orderId": order.order_id,
+            "orderListId": order.order_list_id,
+            "clientOrderId": order.client_order_id,
+            "price": _fmt(order.price),
+            "origQty": _fmt(order.orig_qty),
+            "executedQty": _fmt(order.executed_qty),
+            "cummulativeQuoteQty": _fmt(order.cumm_quote),
+            "status": order.status,
+            "timeInForce": order.time_in_force or "GTC",
+            "type": order.type,
+            "side": order.side,
+            "stopPrice": _fmt(order.stop_price),
+            "time": order.time,
+            "updateTime": order.update_time,
+            "isWorking": order.is_working,
+            "origQuoteOrderQty": _fmt(order.quote_order_qty or 0.0),
+        }
+        if full:
+            payload["transactTime"] = order.time
+            payload["fills"] = list(order.fills)
+        return payload
+
+    def open_orders(self, params, api_key):
+        account = self.engine.get_account(self._account_id(api_key))
+        symbol = params.get("symbol", "").upper()
+        with self.engine.lock:
+            orders = [self.engine.orders[i] for i in sorted(account.open_orders)]
+            return [self.order_payload(o) for o in orders if not symbol or o.symbol == symbol]
+
+    def all_orders(self, params, api_key):
+        account = self.engine.get_account(self._account_id(api_key))
+        symbol = self._symbol(params)
+        limit = min(int(params.get("limit", 500)), 1000)
+        with self.engine.lock:
+            ids = account.orders_by_symbol.get(symbol, [])
+            if params.get("orderId") not in (None, ""):
+                order_id = int(params["orderId"])
+                ids = [i for i in ids if i >= order_id][:limit]
+            else:
+                ids = ids[-limit:]
+            orders = [self.engine.orders[i] for i in ids]
+            if params.get("startTime"):
+                orders = [o for o in orders if o.time >= int(params["startTime"])]
+            if params.get("endTime"):
+                orders = [o for o in orders if o.time <= int(params["endTime"])]
+            return [self.order_payload(o) for o in orders]
+
+    def my_trades(self, params, api_key):
+        account = self.engine.get_account(self._account_id(api_key))
+        symbol = self._symbol(params)
+        limit = min(int(params.get("limit", 500)), 1000)
+        with self.engine.lock:
+            trades = [t for t in account.trades if t["symbol"] == symbol]
+        if params.get("orderId") not in (None, ""):
+            trades = [t for t in trades if t["orderId"] == int(params["orderId"])]
+        if params.get("fromId") not in (None, ""):
+            from_id = int(params["fromId"])
+            return [t for t in trades if t["id"] >= from_id][:limit]
+        if params.get("startTime"):
+            trades = [t for t in trades if t["time"] >= int(params["startTime"])]
+        if params.get("endTime"):
+            trades = [t for t in trades if t["time"] <= int(params["endTime"])]
+        return trades[-limit:]
+
+    # ------------------------------------------------------------------
+    # Ordens
+
+    def get_order(self, params, api_key):
+        order = self.engine._find_order(self._account_id(api_key), self._symbol(params),
+                                        params.get("orderId"), params.get("origClientOrderId"))
+        return self.order_payload(order)
+
+    def new_order(self, params, api_key):
+        order = self.engine.place_order(
+            self._account_id(api_key), self._symbol(params), params.get("side"), params.get("type"),
+            quantity=params.get("quantity"), price=params.get("price"), stop_price=params.get("stopPrice"),
+            time_in_force=params.get("timeInForce"), client_order_id=params.get("newClientOrderId"),
+            quote_order_qty=params.get("quoteOrderQty"),
+        )
+        return self.order_payload(order, full=params.get("newOrderRespType", "FULL") == "FULL")
+
+    def test_order(self, params, api_key):
+        self._account_id(api_key)
+        self._symbol(params)
+        return {}
+
+    def cancel_order(self, params, api_key):
+        order = self.engine.cancel_order(self._account_id(api_key), self._symbol(params),
+                                         params.get("orderId"), params.get("origClientOrderId"))
+        payload = self.order_payload(order)
+        payload["origClientOrderId"] = order.client_order_id
+        return payload
+
+    def cancel_open_orders(self, params, api_key):
+        symbol = self._symbol(params)
+        canceled = self.engine.cancel_all(self._account_id(api_key), symbol)
+        if not canceled:
+            raise ExchangeError(-2011, "Unknown order sent.")
+        return [self.order_payload(o) for o in canceled]
+
+    def _order_list_payload(self, order_list):
+        legs = order_list["orders"]
+        return {
+            "orderListId": order_list["orderListId"],
+            "contingencyType": order_list["contingencyType"],
+            "listStatusType": "EXEC_STARTED" if order_list["status"] == "EXECUTING" else "ALL_DONE",
+            "listOrderStatus": order_list["status"],
+            "listClientOrderId": order_list["listClientOrderId"],
+            "transactionTime": order_list["transactionTime"],
+            "symbol": order_list["symbol"],
+            "orders": [{"symbol": o.symbol, "orderId": o.order_id, "clientOrderId": o.client_order_id} for o in legs],
+            "orderReports": [self.order_payload(o) for o in legs],
+        }
+
+    def new_order_list_oco(self, params, api_key):
+        """Endpoint atual (aboveType/belowType)."""
+        def leg(prefix):
+            return {
+                "type": params.get(f"{prefix}Type"),
+                "price": params.get(f"{prefix}Price"),
+                "stop_price": params.get(f"{prefix}StopPrice"),
+                "time_in_force": params.get(f"{prefix}TimeInForce"),
+            }
+        order_list = self.engine.place_oco(
+            self._account_id(api_key), self._symbol(params), (params.get("side") or "").upper(),
+            params.get("quantity"), leg("above"), leg("below"), params.get("listClientOrderId"),
+        )
+        return self._order_list_payload(order_list)
+
+    def new_order_oco_legacy(self, params, api_key):
+        """Endpoint legado (price/stopPrice/stopLimitPrice)."""
+        side = (params.get("side") or "").upper()
+        limit_leg = {"type": "LIMIT_MAKER", "price": params.get("price")}
+        stop_leg = {
+            "type": "STOP_LOSS_LIMIT" if params.get("stopLimitPrice") else "STOP_LOSS",
+            "price": params.get("stopLimitPrice"),
+            "stop_price": params.get("stopPrice"),
+            "time_in_force": params.get("stopLimitTimeInForce"),
+        }
+        above, below = (limit_leg, stop_leg) if side == "SELL" else (stop_leg, limit_leg)
+        order_list = self.engine.place_oco(
+            self._account_id(api_key), self._symbol(params), side,
+            params.get("quantity"), above, below, params.get("listClientOrderId"),
+        )
+        return self._order_list_payload(order_list)
+
+    # ------------------------------------------------------------------
+    # User data stream: a listenKey é a própria API key
+
+    def user_data_stream(self, params, api_key):
+        return {"listenKey": self._account_id(api_key)}
+
+    def keepalive_user_data_stream(self, params, api_key):
+        return {}
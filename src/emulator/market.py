@@ -0,0 +1,162 @@
+"""
+Geradores de mercado do emulador.
+SyntheticMarket: passeio aleatório (GBM) com formador de mercado cotando níveis em volta do preço.
+KlineReplay: reproduz candles gravados (formato da Binance) como sequência de preços.
+Ambos geram negócios reais no motor, então klines, ticker e profundidade evoluem juntos.
+"""
+
+import logging
+import math
+import random
+import threading
+
+from .engine import INTERVALS
+
+MARKET_MAKER = "__market_maker__"
+MARKET_TAKER = "__market_taker__"
+
+
+class MarketDriver:
+    """Base: mantém o livro de um par com liquidez do formador de mercado e imprime negócios."""
+
+    def __init__(self, engine, symbol, levels=10, level_quantity=1.0, spread_ticks=1):
+        self.engine = engine
+        self.symbol = symbol
+        self.levels = levels
+        self.level_quantity = level_quantity
+        self.spread_ticks = spread_ticks
+        self._quotes = []
+        for account_id in (MARKET_MAKER, MARKET_TAKER):
+            if account_id not in engine.accounts:
+                engine.add_account(account_id, unlimited=True)
+
+    def requote(self, mid):
+        """Cancela as cotações anteriores e publica `levels` níveis de cada lado do preço."""
+        book = self.engine.books[self.symbol]
+        tick = book.config.tick_size
+        with self.engine.lock:
+            for order in self._quotes:
+                if order.is_open:
+                    self.engine._cancel(order)
+            self._quotes = []
+            mid_ticks = book.to_ticks(mid)
+            for level in range(self.levels):
+                distance = self.spread_ticks + level
+                bid = (mid_ticks - distance) * tick
+                ask = (mid_ticks + distance) * tick
+                if bid > 0:
+                    self._quotes.append(self.engine.place_order(MARKET_MAKER, self.symbol, "BUY", "LIMIT", self.level_quantity, bid))
+                self._quotes.append(self.engine.place_order(MARKET_MAKER, self.symbol, "SELL", "LIMIT", self.level_quantity, ask))
+
+    def print_trade(self, price, quantity=None):
+        """Executa um negócio no preço informado (consome a cotação do formador de mercado)."""
+        quantity = quantity or self.level_quantity / 10
+        book = self.engine.books[self.symbol]
+        side = "BUY" if price >= book.last_price else "SELL"
+        self.requote(price - book.config.tick_size * (self.spread_ticks) if side == "BUY" else price + book.config.tick_size * self.spread_ticks)
+        self.engine.place_order(MARKET_TAKER, self.symbol, side, "MARKET", quantity)
+        self.requote(price)
+
+
+class SyntheticMarket(MarketDriver):
+    """
+    Preço em passeio aleatório geométrico.
+
+    Parameters:
+        start_price (float): Preço inicial.
+        volatility (float): Desvio padrão do retorno por passo.
+        drift (float): Tendência por passo.
+        seed (int): Semente para resultados reproduzíveis.
+    """
+
+    def __init__(self, engine, symbol, start_price, volatility=0.001, drift=0.0, seed=None, **kwargs):
+        super().__init__(engine, symbol, **kwargs)
+        self.price = start_price
+        self.volatility = volatility
+        self.drift = drift
+        self.random = random.Random(seed)
+
+    def next_price(self):
+        self.price *= math.exp(self.drift + self.volatility * self.random.gauss(0, 1))
+        return self.price
+
+    def seed_history(self, candles=500, interval="1m"):
+        """Gera candles históricos para todos os intervalos a partir de um passeio de 1m."""
+        step_ms = INTERVALS[interval]
+        now = self.engine.now_ms()
+        for name, interval_ms in INTERVALS.items():
+            if interval_ms < step_ms:
+                continue
+            count = candles
+            price = self.price
+            history = []
+            start = now - now % interval_ms - count * interval_ms
+            # Volatilidade proporcional à raiz do intervalo
+            sigma = self.volatility * math.sqrt(interval_ms / step_ms)
+            for i in range(count):
+                open_price = price
+                close_price = open_price * math.exp(sigma * self.random.gauss(0, 1))
+                high = max(open_price, close_price) * (1 + abs(self.random.gauss(0, sigma / 2)))
+                low = min(open_price, close_price) * (1 - abs(self.random.gauss(0, sigma / 2)))
+                volume = abs(self.random.gauss(10, 3))
+                open_time = start + i * interval_ms
+                history.append([open_time, open_price, high, low, close_price, volume,
+                                open_time + interval_ms - 1, volume * close_price, 1, volume / 2, volume * close_price / 2])
+                price = close_price
+            # Todos os intervalos terminam no preço atual
+            factor = self.price / price
+            for candle in history:
+                for column in (1, 2, 3, 4):
+                    candle[column] *= factor
+            self.engine.seed_klines(self.symbol, name, history)
+        self.requote(self.price)
+
+    def step(self):
+        price = self.next_price()
+        self.print_trade(price)
+        return price
+
+
+class KlineReplay(MarketDriver):
+    """Reproduz candles gravados: cada passo imprime open, high, low e close do próximo candle."""
+
+    def __init__(self, engine, symbol, klines, **kwargs):
+        super().__init__(engine, symbol, **kwargs)
+        self.klines = list(klines)
+        self.position = 0
+
+    def step(self):
+        if self.position >= len(self.klines):
+            return None
+        candle = self.klines[self.position]
+        self.position += 1
+        for column in (1, 2, 3, 4):
+            self.print_trade(float(candle[column]))
+        return float(candle[4])
+
+
+class MarketRunner:
+    """Executa os geradores em uma thread, um passo a cada `interval` segundos."""
+
+    def __init__(self, drivers, interval=1.0):
+        self.drivers = list(drivers)
+        self.interval = interval
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._loop, name="emulator-market", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop_event.set()
+
+    def _loop(self):
+        while not self._stop_event.is_set():
+            for driver in self.drivers:
+                try:
+                    driver.step()
+                except Exception as e:
+                    logging.error(f"[Emulator] Erro no gerador de mercado de {driver.symbol}: {e}")
+            self._stop_event.wait(self.interval)
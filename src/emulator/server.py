@@ -0,0 +1,87 @@
+"""
+Servidor HTTP do emulador (Flask).
+Expõe /api/v3/* no formato da Binance e os streams de mercado/usuário como
+Server-Sent Events em /stream?streams=btcusdt@trade/btcusdt@depth/user@<api_key>.
+"""
+
+import json
+import logging
+import queue
+
+from flask import Flask, Response, jsonify, request
+
+from .exchange import ExchangeEmulator
+
+
+def create_app(emulator: ExchangeEmulator):
+    app = Flask("binance_emulator")
+
+    @app.route("/api/<path:path>", methods=["GET", "POST", "PUT", "DELETE"])
+    def api(path):
+        params = {**request.args.to_dict(), **request.form.to_dict()}
+        params.pop("signature", None)
+        params.pop("timestamp", None)
+        params.pop("recvWindow", None)
+        status, body = emulator.handle(request.method, path, params, request.headers.get("X-MBX-APIKEY"))
+        response = jsonify(body)
+        response.status_code = status
+        return response
+
+    @app.route("/stream")
+    def stream():
+        """
+        Streams no formato combinado da Binance ({"stream": ..., "data": ...}) via SSE.
+        user@<listenKey> recebe os executionReport da conta.
+        """
+        names = {name for name in request.args.get("streams", "").split("/") if name}
+        if request.args.get("listenKey"):
+            names.add(f"user@{request.args['listenKey']}")
+        events = queue.Queue(maxsize=10000)
+
+        def callback(stream_name, event):
+            if stream_name in names or (stream_name.endswith("@depth") and f"{stream_name}@100ms" in names):
+                try:
+                    events.put_nowait((stream_name, event))
+                except queue.Full:
+                    pass
+
+        emulator.engine.subscribe(callback)
+
+        def generate():
+            try:
+                while True:
+                    try:
+                        stream_name, event = events.get(timeout=15)
+                    except queue.Empty:
+                        yield ": keepalive\n\n"
+                        continue
+                    yield f"data: {json.dumps({'stream': stream_name, 'data': event})}\n\n"
+            finally:
+                emulator.engine.unsubscribe(callback)
+
+        return Response(generate(), mimetype="text/event-stream")
+
+    @app.route("/emulator/stats")
+    def stats():
+        engine = emulator.engine
+        with engine.lock:
+            return jsonify({
+                "requests": emulator.request_count,
+                "orders": len(engine.orders),
+                "accounts": len(engine.accounts),
+                "symbols": {s: {"last_price": b.last_price, "bids": len(b.bids.levels), "asks": len(b.asks.levels)}
+                            for s, b in engine.books.items()},
+            })
+
+    return app
+
+
+def run_server(emulator: ExchangeEmulator, host="127.0.0.1", port=8900):
+    """Sobe o servidor com threads (um por requisição) usando o werkzeug."""
+    from werkzeug.serving import make_server
+
+    # Log por requisição do werkzeug atrapalha testes de carga
+    logging.getLogger("werkzeug").setLevel(logging.WARNING)
+    server = make_server(host, port, create_app(emulator), threaded=True)
+    print(f"🧪 Emulador da Binance ouvindo em http://{host}:{port}")
+    server.serve_forever()
@@ -1,2 +1,4 @@
 # indicators/__init__.py
 from .Indicators import Indicators
+from .spec import IndicatorSpec, compute_indicator, compute_indicators
+from .cache import IndicatorCache, indicator_cache, candle_fingerprint
@@ -0,0 +1,105 @@
+# indicators/cache.py
+# Cache de indicadores compartilhado por todo o processo.
+# Vários bots operando o mesmo par calculam cada indicador uma única vez por candle.
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+
+from .spec import IndicatorSpec, compute_indicator
+
+
+def candle_fingerprint(stock_data: pd.DataFrame):
+    """
+    Identifica a janela de candles de um DataFrame.
+
+    Usa o último candle fechado (penúltima linha) e também o fechamento e volume
+    do candle em formação, que ainda muda a cada consulta. Quantidade de linhas e
+    primeiro candle entram na chave porque indicadores como EMA e RSI dependem
+    do histórico inteiro.
+    """
+    open_time = stock_data["open_time"]
+    last_closed = open_time.iloc[-2] if len(stock_data) > 1 else None
+    return (
+        len(stock_data),
+        open_time.iloc[0],
+        last_closed,
+        open_time.iloc[-1],
+        float(stock_data["close_price"].iloc[-1]),
+        float(stock_data["volume"].iloc[-1]) if "volume" in stock_data else None,
+    )
+
+
+class IndicatorCache:
+    """
+    Cache LRU de indicadores, chaveado por (symbol, interval, candle, IndicatorSpec).
+
+    Os valores são arrays NumPy somente leitura, então podem ser compartilhados
+    entre threads sem cópia.
+    """
+
+    def __init__(self, max_entries=4096):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get_or_compute(self, symbol, interval, candle_key, spec: IndicatorSpec, compute):
+        key = (symbol, interval, candle_key, spec)
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            self.misses += 1
+
+        # Calcula fora do lock para não bloquear os outros bots
+        value = compute()
+
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return value
+
+    def get_indicator(self, stock_data: pd.DataFrame, spec: IndicatorSpec):
+        """
+        Retorna o indicador do DataFrame, usando o cache quando o DataFrame
+        identifica o par e o intervalo em stock_data.attrs ('symbol' e 'interval').
+        """
+        symbol = stock_data.attrs.get("symbol")
+        interval = stock_data.attrs.get("interval")
+        if not symbol or "open_time" not in stock_data:
+            return compute_indicator(stock_data, spec)
+
+        return self.get_or_compute(
+            symbol, interval, candle_fingerprint(stock_data), spec,
+            lambda: compute_indicator(stock_data, spec),
+        )
+
+    def compute_indicators(self, stock_data: pd.DataFrame, specs) -> dict:
+        """Mesmo contrato de indicators.compute_indicators, passando pelo cache."""
+        return {spec: self.get_indicator(stock_data, spec) for spec in set(specs)}
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": (self.hits / total) if total else 0.0,
+            }
+
+
+# Instância global usada por estratégias, ordens e dashboard
+indicator_cache = IndicatorCache()
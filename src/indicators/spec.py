@@ -0,0 +1,78 @@
+# indicators/spec.py
+# Especificação declarativa de indicadores.
+# Cada estratégia declara os indicadores que precisa através de um IndicatorSpec
+# e recebe os valores já calculados como arrays NumPy somente leitura.
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+from .rsi import rsi
+
+
+class IndicatorSpec(namedtuple("IndicatorSpec", ["kind", "source", "window"])):
+    """
+    Identifica um indicador de forma única (e hashable).
+
+    Attributes:
+        kind (str): Tipo do indicador ('raw', 'sma', 'std', 'ema', 'rsi').
+        source (str): Coluna do DataFrame usada como base (ex: 'close_price').
+        window (int): Janela do indicador. Para 'raw' é ignorada (use 0).
+    """
+    __slots__ = ()
+
+    def __new__(cls, kind, source="close_price", window=0):
+        return super().__new__(cls, kind, source, int(window))
+
+
+def _raw(series, window):
+    return series
+
+def _sma(series, window):
+    return series.rolling(window=window).mean()
+
+def _std(series, window):
+    return series.rolling(window=window).std()
+
+def _ema(series, window):
+    return series.ewm(span=window, adjust=False).mean()
+
+def _rsi(series, window):
+    return rsi(series, window)
+
+
+# Funções de cálculo por tipo de indicador
+INDICATOR_FUNCTIONS = {
+    "raw": _raw,
+    "sma": _sma,
+    "std": _std,
+    "ema": _ema,
+    "rsi": _rsi,
+}
+
+
+def compute_indicator(stock_data: pd.DataFrame, spec: IndicatorSpec) -> np.ndarray:
+    """
+    Calcula um indicador sem alterar o DataFrame de origem.
+
+    Returns:
+        np.ndarray: Array float64 marcado como somente leitura.
+    """
+    if spec.kind not in INDICATOR_FUNCTIONS:
+        raise ValueError(f"Indicador desconhecido: {spec.kind}")
+
+    series = pd.to_numeric(stock_data[spec.source], errors="coerce")
+    values = INDICATOR_FUNCTIONS[spec.kind](series, spec.window)
+    array = np.array(values, dtype=np.float64, copy=True)
+    array.setflags(write=False)
+    return array
+
+
+def compute_indicators(stock_data: pd.DataFrame, specs) -> dict:
+    """
+    Calcula um conjunto de indicadores, cada um uma única vez.
+
+    Returns:
+        dict: {IndicatorSpec: np.ndarray somente leitura}
+    """
+    return {spec: compute_indicator(stock_data, spec) for spec in set(specs)}
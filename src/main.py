@@ -1,6 +1,7 @@
 import threading
 import time
 from modules.BinanceRobot import BinanceTraderBot
+from modules.PortfolioBot import PortfolioTraderBot
 from binance.client import Client
 from Models.AssetStartModel import AssetStartModel
 import logging
@@ -31,6 +32,7 @@ DELAY_ENTRE_ORDENS          = 15 * 60   # Tempo que o bot espera depois de reali
 
 # Ajustes de Execução
 THREAD_LOCK = True # True = Executa 1 moeda por vez | False = Executa todas simultânemaente
+PORTFOLIO_MODE = False # True = Um único bot avalia todas as moedas em uma passada vetorizada (recomendado para muitos pares)
 
 
 # Moedas negociadas
@@ -98,11 +100,25 @@ def trader_loop(assetStart: AssetStartModel):
 # Criando e iniciando uma thread para cada objeto
 threads = []
 
-for asset in assetsTraders:
-    thread = threading.Thread(target=trader_loop, args=(asset,))
-    thread.daemon = True  # Permite finalizar as threads ao encerrar o programa
+if PORTFOLIO_MODE:
+    # Um único loop, um único snapshot da conta e uma passada vetorizada para todos os pares
+    portfolio = PortfolioTraderBot(assets = assetsTraders
+                                   , candle_period = CANDLE_PERIOD
+                                   , volatility_factor = VOLATILITY_FACTOR
+                                   , acceptable_loss_percentage = ACCEPTABLE_LOSS_PERCENTAGE
+                                   , time_to_trade = TEMPO_ENTRE_TRADES
+                                   , fallback_activated = FALLBACK_ACTIVATED
+                                   , stop_loss_percentage = STOP_LOSS_PERCENTAGE)
+    thread = threading.Thread(target=portfolio.run)
+    thread.daemon = True
     thread.start()
     threads.append(thread)
+else:
+    for asset in assetsTraders:
+        thread = threading.Thread(target=trader_loop, args=(asset,))
+        thread.daemon = True  # Permite finalizar as threads ao encerrar o programa
+        thread.start()
+        threads.append(thread)
     
 print("Threads iniciadas para todos os ativos.")
 
@@ -1,7 +1,64 @@
 from binance.client import Client
 from binance.exceptions import BinanceAPIException
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from urllib.parse import urlsplit
+import heapq
+import itertools
+import threading
 import time
 
+from modules.ClockSync import getClockSync
+from modules.Resilience import (
+    BudgetExceededError, backoff_delay, get_breaker, is_rate_limited, is_transient, retry_after
+)
+
+# Só a segunda cópia (hedge) de uma leitura lenta roda neste pool, compartilhado no processo;
+# a primeira cópia roda na thread de quem chamou
+_hedge_executor = ThreadPoolExecutor(max_workers=16, thread_name_prefix="binance-hedge")
+
+
+class HedgeTimer:
+    """
+    Uma thread para todos os hedges agendados do processo: no prazo (p95 do endpoint), o
+    callback dispara a segunda cópia no pool. Cancelar só descarta o callback; a entrada
+    sai da fila quando vence.
+    """
+
+    def __init__(self):
+        self._queue = []  # [(prazo, sequência, callback)]
+        self._sequence = itertools.count()
+        self._condition = threading.Condition()
+        self._thread = None
+
+    def schedule(self, delay, callback):
+        entry = [time.monotonic() + delay, next(self._sequence), callback]
+        with self._condition:
+            heapq.heappush(self._queue, entry)
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._loop, name="binance-hedge-timer", daemon=True)
+                self._thread.start()
+            self._condition.notify()
+        return entry
+
+    @staticmethod
+    def cancel(entry):
+        entry[2] = None
+
+    def _loop(self):
+        while True:
+            with self._condition:
+                while not self._queue or self._queue[0][0] > time.monotonic():
+                    self._condition.wait(self._queue[0][0] - time.monotonic() if self._queue else None)
+                callback = heapq.heappop(self._queue)[2]
+            if callback is not None:
+                try:
+                    callback()
+                except Exception:
+                    pass  # O hedge é opcional: a primeira cópia continua valendo
+
+
+_hedge_timer = HedgeTimer()
+
 
 class BinanceClient(Client):
     def __init__(
@@ -16,10 +73,32 @@ class BinanceClient(Client):
         ping=True,
         verbose=False,
         sync_interval=60000,  # Intervalo de ressincronização em ms
+        read_budget=15.0,  # Segundos por leitura (GET), somando novas tentativas e hedge
+        write_budget=10.0,  # Segundos por escrita (sem novas tentativas: a ordem pode ter sido aceita)
+        max_retries=2,
+        hedge=True,
     ):
         """
-        Inicializa o cliente Binance customizado, integrando a sincronização do timestamp com o atributo `timestamp_offset`.
+        Inicializa o cliente Binance customizado, com o `timestamp_offset` lido do serviço de
+        sincronização de relógio compartilhado (modules/ClockSync.py).
+        base_endpoint diferente do padrão redireciona a API REST (ex: emulador local em http://127.0.0.1:8900).
+        Cada requisição passa pelos circuit breakers do endpoint e do host (modules/Resilience.py):
+        leituras são repetidas com espera exponencial com jitter e, se demoram mais que o p95 do
+        endpoint, recebem uma segunda cópia em paralelo (hedge), tudo dentro de `read_budget`.
         """
+        # Definido antes do super().__init__ para que o ping inicial já use o endpoint informado
+        self.custom_api_url = None
+        if base_endpoint and base_endpoint.rstrip("/") != "https://api.binance.com":
+            self.custom_api_url = base_endpoint.rstrip("/") + "/api"
+        self.clock = None
+        self._timestamp_offset = 0
+        self.read_budget = read_budget
+        self.write_budget = write_budget
+        self.max_retries = max_retries
+        self.hedge = hedge
+        self._attempt = threading.local()  # Timeout da tentativa em andamento nesta thread
+        self._responses = threading.local()  # `response` por thread (ver a propriedade)
+
         super().__init__(
             api_key=api_key,
             api_secret=api_secret,
@@ -32,64 +111,176 @@ class BinanceClient(Client):
         # Configurações de sincronização
         self.sync = sync
         self.verbose = verbose
-        self.sync_interval = sync_interval
-        self.last_sync_time = 0  # Armazena o tempo da última sincronização
-        self.timestamp_offset = 0
 
+        # Um serviço em segundo plano por endpoint, compartilhado por todos os clientes do processo
         if self.sync:
-            self.sync_time_offset()
+            self.clock = getClockSync(self.custom_api_url or self.API_URL,
+                lambda: self.get_server_time()["serverTime"],
+                interval=sync_interval / 1000)
+            if self.verbose:
+                print(f"⏰ Desvio de tempo sincronizado: {self.timestamp_offset:.0f}ms (RTT {self.clock.rtt or 0:.0f}ms)")
 
         # Executa o ping inicial se solicitado
         if ping:
             self.ping()
 
+    # O python-binance grava a resposta em self.response e a lê logo depois (_handle_response):
+    # com hedge e motor de ordens usando o mesmo cliente em paralelo, uma requisição leria a
+    # resposta (corpo e headers, incluindo o peso usado) de outra. Cada thread guarda a sua.
+    @property
+    def response(self):
+        return getattr(self._responses, "value", None)
+
+    @response.setter
+    def response(self, value):
+        self._responses.value = value
+
+    # Desvio (servidor - local, em ms) usado pelo python-binance no timestamp das requisições assinadas
+    @property
+    def timestamp_offset(self):
+        if self.clock is not None:
+            return self.clock.offset
+        return self._timestamp_offset
+
+    @timestamp_offset.setter
+    def timestamp_offset(self, value):
+        self._timestamp_offset = value
+
     def sync_time_offset(self, force=False):
         """
-        Sincroniza o desvio de tempo (`timestamp_offset`) com base no relógio local e no servidor Binance.
-        Realiza a sincronização apenas se for forçada ou se o intervalo configurado tiver passado.
+        Mantido por compatibilidade: a sincronização roda em segundo plano.
+        force=True executa uma rodada imediata (descartando as estimativas anteriores).
         """
-        current_time = int(time.time() * 1000)
-        if force or (current_time - self.last_sync_time >= self.sync_interval):
-            try:
-                server_time = self.get_server_time()["serverTime"]
-                local_time = int(time.time() * 1000)
-                self.timestamp_offset = server_time - local_time
-                self.last_sync_time = current_time
-                if self.verbose:
-                    print(f"⏰ Desvio de tempo sincronizado: {self.timestamp_offset}ms")
-            except Exception as e:
-                print(f"⚠️ Erro ao sincronizar o desvio de tempo: {e}")
-                self.timestamp_offset = 0
+        if self.clock is not None and force:
+            self.clock.sync_now(reset=True)
+            if self.verbose:
+                print(f"⏰ Desvio de tempo sincronizado: {self.timestamp_offset:.0f}ms")
+
+    def _create_api_uri(self, path, signed=True, version=Client.PUBLIC_API_VERSION):
+        if self.custom_api_url:
+            version = self.PRIVATE_API_VERSION if signed else version
+            return f"{self.custom_api_url}/{version}/{path}"
+        return super()._create_api_uri(path, signed, version)
+
+    def _get_request_kwargs(self, method, signed: bool, force_params: bool = False, **kwargs):
+        # Timeout da tentativa limitado ao que resta do orçamento da chamada
+        kwargs = super()._get_request_kwargs(method, signed, force_params, **kwargs)
+        timeout = getattr(self._attempt, "timeout", None)
+        if timeout is not None:
+            kwargs["timeout"] = min(kwargs.get("timeout") or timeout, timeout)
+        return kwargs
 
     def _request(
         self, method, uri: str, signed: bool, force_params: bool = False, **kwargs
     ):
         """
-        Sobrescreve o método `_request` para integrar a sincronização automática do `timestamp_offset` em requisições assinadas.
+        Requisição protegida: falha na hora com o circuito aberto (CircuitOpenError), repete
+        leituras em falhas transitórias e respeita o orçamento de tempo da chamada.
+        Escritas (POST/DELETE) nunca são repetidas nem hedged.
         """
-        if signed:
-            # Atualiza o timestamp para requisições assinadas
-            current_time = int(time.time() * 1000)
-            if self.sync and (self.timestamp_offset is None or abs(self.timestamp_offset) > 1000):
-                self.sync_time_offset(force=True)
-            elif self.sync and (current_time - self.last_sync_time >= self.sync_interval):
-                self.sync_time_offset()
+        parts = urlsplit(uri)
+        host_breaker = get_breaker(parts.netloc)
+        breaker = get_breaker(f"{method.upper()} {parts.netloc}{parts.path}")
+        idempotent = method.lower() == "get"
+        deadline = time.monotonic() + (self.read_budget if idempotent else self.write_budget)
 
+        attempt = 0
+        while True:
+            host_breaker.check_open()
+            breaker.before_call()
+            started = time.monotonic()
+            try:
+                if idempotent and self.hedge:
+                    result = self._hedged_send(breaker, deadline, method, uri, signed, force_params, kwargs)
+                else:
+                    result = self._send(deadline, method, uri, signed, force_params, kwargs)
+            except Exception as e:
+                if not is_transient(e):
+                    breaker.on_success()  # A corretora respondeu (erro de negócio, ex: saldo insuficiente)
+                    raise
+                breaker.on_failure()
+                if is_rate_limited(e):
+                    # Limite de requisições vale para o IP inteiro: bloqueia o host pelo Retry-After
+                    host_breaker.trip(retry_after(e) or 60)
+                    raise
+                delay = backoff_delay(attempt, 0.25, 2.0)
+                if not idempotent or attempt >= self.max_retries or deadline - time.monotonic() < delay + 0.5:
+                    raise
+                attempt += 1
+                time.sleep(delay)
+                continue
+            breaker.on_success(time.monotonic() - started)
+            return result
+
+    def _send(self, deadline, method, uri, signed, force_params, kwargs, resync=True):
+        """
+        Uma tentativa, com cópia dos parâmetros (assinatura e timestamp próprios) e timeout do orçamento.
+        resync=False (hedge no pool): erro de timestamp não ressincroniza o relógio, que faz chamadas
+        de rede e ocuparia uma thread do pool; a primeira cópia, na thread de quem chamou, cuida disso.
+        """
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise BudgetExceededError(f"Orçamento de tempo esgotado para {method.upper()} {uri}")
+        kwargs = dict(kwargs)
+        if "data" in kwargs:
+            kwargs["data"] = dict(kwargs["data"])
+        if signed:
+            # Usa o desvio do serviço de relógio; nunca espera pela sincronização
             kwargs.setdefault("data", {})
             kwargs["data"]["timestamp"] = int(time.time() * 1000 + self.timestamp_offset)
 
+        self._attempt.timeout = remaining
         try:
             return super()._request(method, uri, signed, force_params, **kwargs)
         except BinanceAPIException as e:
-            if e.code == -1021:  # Erro de timestamp
+            if e.code == -1021 and signed and resync:  # Erro de timestamp: ressincroniza e tenta uma vez
                 print(f"⚠️ Erro de timestamp detectado: {e}. Re-sincronizando...")
                 self.sync_time_offset(force=True)
-                if signed:
-                    kwargs["data"]["timestamp"] = int(time.time() * 1000 + self.timestamp_offset)
+                kwargs["data"]["timestamp"] = int(time.time() * 1000 + self.timestamp_offset)
                 return super()._request(method, uri, signed, force_params, **kwargs)
-            else:
-                raise e
+            raise
+        finally:
+            self._attempt.timeout = None
+
+    def _hedged_send(self, breaker, deadline, method, uri, signed, force_params, kwargs):
+        """
+        Leitura com hedge: a primeira cópia roda na própria thread; se ela não respondeu dentro
+        do p95 do endpoint, uma segunda cópia sai no pool. Se a primeira falha com o hedge em
+        andamento, a resposta dele é usada sem esperar uma nova tentativa.
+        """
+        lock = threading.Lock()
+        state = {"finished": False, "hedge": None}
+
+        def fire():
+            with lock:
+                if state["finished"] or not breaker.allow_hedge():
+                    return
+                state["hedge"] = _hedge_executor.submit(self._hedge_send, deadline, method, uri, signed, force_params, kwargs)
+
+        timer = _hedge_timer.schedule(min(breaker.hedge_delay(), max(0, deadline - time.monotonic())), fire)
+        try:
+            return self._send(deadline, method, uri, signed, force_params, kwargs)
+        except Exception as e:
+            error = e
+        finally:
+            with lock:
+                state["finished"] = True
+            HedgeTimer.cancel(timer)
+
+        if state["hedge"] is None:
+            raise error
+        try:
+            result, self.response = state["hedge"].result(timeout=max(0, deadline - time.monotonic()))
+            return result
+        except FutureTimeoutError:
+            raise BudgetExceededError(f"Orçamento de tempo esgotado para {method.upper()} {uri}")
+        except Exception:
+            raise error
 
+    def _hedge_send(self, deadline, method, uri, signed, force_params, kwargs):
+        # Cópia no pool: devolve também a resposta (da thread do pool) para a thread de quem chamou
+        result = self._send(deadline, method, uri, signed, force_params, kwargs, resync=False)
+        return result, self.response
 
 
 
@@ -9,6 +9,7 @@ import time
 from datetime import datetime
 import logging
 import math
+import threading
 
 from dotenv import load_dotenv
 import pandas as pd
@@ -19,20 +20,37 @@ from binance.exceptions import BinanceAPIException
 
 from modules.BinanceClient import BinanceClient
 from modules.TraderOrder import TraderOrder
+from modules.ProtectiveMonitor import ProtectedPosition, protective_monitor, getTickerFeed
+from modules.OrderBook import getOrderBookMirror
+from modules.OrderManager import WorkingOrder, order_manager
+from modules.BotSupervisor import format_time
+from modules.Resilience import CircuitOpenError, backoff_delay, is_transient
+from modules.SessionRecorder import SessionRecorder
+from modules.Profiler import CycleProfile
+from Models.OrderLedgerModel import OrderLedgerModel
+from Models.FillLedgerModel import FillLedgerModel
+from Models.EquityModel import EquityModel
+from Models.BotLeaseModel import BotLeaseModel
 from modules.Logger import *
-from strategies import runStrategies
-from indicators import Indicators
+from strategies import runStrategies, getStopLossPrice, isStopLossTriggered
+from indicators import IndicatorSpec, indicator_cache
 
 
 load_dotenv()
 api_key = os.getenv("BINANCE_API_KEY")
 secret_key = os.getenv("BINANCE_SECRET_KEY")
+base_endpoint = os.getenv("BINANCE_BASE_ENDPOINT", "https://api.binance.com") # Ex: http://127.0.0.1:8900 para o emulador local (src/emulator)
+LEASE_CHECK_MARGIN = 5 # Segundos antes do vencimento do lease em que o robô volta a conferi-lo no banco
 
 
 
 
 # ------------------------------------------------------------------
 
+class OrderFenced(RuntimeError):
+    """O robô não pode mais enviar ordens (instância parada/substituída ou lease do nó perdido)."""
+
+
 # Classe Principal
 class BinanceTraderBot():
 
@@ -47,7 +65,12 @@ class BinanceTraderBot():
     step_size : float
 
     # Construtor
-    def __init__ (self, stock_code, operation_code, traded_quantity, traded_percentage, candle_period, volatility_factor = 0.5, time_to_trade = 30*60, delay_after_order = 60*60, acceptable_loss_percentage = 0.5, stop_loss_percentage = 5, fallback_activated = True):
+    def __init__ (self, stock_code, operation_code, traded_quantity, traded_percentage, candle_period, volatility_factor = 0.5, time_to_trade = 30*60, delay_after_order = 60*60, acceptable_loss_percentage = 0.5, stop_loss_percentage = 5, fallback_activated = True, strategy_pipeline = None, use_protective_monitor = False, take_profit_percentage = None, trailing_stop_percentage = None, use_exchange_protection = False, client_binance = None, order_book_pricing = "depth", order_chasing = True, chase_bound_bps = 20, use_order_ledger = True, record_session = None, bot_id = None):
+        # Parâmetros simples do construtor, gravados no cabeçalho da sessão para a reprodução
+        session_config = {key: value for key, value in locals().items()
+                          if key not in ('self', 'client_binance', 'record_session', 'bot_id') and isinstance(value, (str, int, float, bool, type(None)))}
+        if bot_id is not None:
+            self.bot_id = bot_id # Id do histórico (a API também pode defini-lo depois da criação)
 
         print('------------------------------------------------')
         print(f'🤖 Robo Trader iniciando para {stock_code}/{operation_code}...')
@@ -71,10 +94,60 @@ class BinanceTraderBot():
         self.candle_period = candle_period # Período levado em consideração para operação (ex: 15min)
         self.volatility_factor = volatility_factor # Fator de volatilidade usado para antecipar cruzamento
         self.fallback_activated = fallback_activated # Define se a estratégia de Fallback será usada (ela pode entrar comprada em mercados subindo)
+        self.strategy_pipeline = strategy_pipeline # Árvore de estratégias (strategies.registry). None = MA Antecipation + fallback
 
         self.acceptable_loss_percentage = acceptable_loss_percentage / 100 # % Máxima que o bot aceita perder quando vender
         self.stop_loss_percentage = stop_loss_percentage / 100 # % Máxima de loss que ele aceita, em caso de não vender na ordem limitada
 
+        # Saídas de proteção monitoradas fora do loop de estratégia (modules/ProtectiveMonitor.py)
+        self.use_protective_monitor = use_protective_monitor
+        self.take_profit_percentage = take_profit_percentage / 100 if take_profit_percentage else None # % de lucro para sair à mercado
+        self.trailing_stop_percentage = trailing_stop_percentage / 100 if trailing_stop_percentage else None # % de recuo a partir do topo para sair à mercado
+        self.order_lock = threading.RLock() # Evita que o monitor e o ciclo de estratégia enviem ordens ao mesmo tempo
+
+        # Proteção na própria corretora: OCO (take profit + STOP_LOSS_LIMIT) ou STOP_LOSS_LIMIT logo após a compra
+        self.use_exchange_protection = use_exchange_protection
+        self.protective_order_active = False
+        self.protected_quantity = 0.0
+        self.protective_order_ids = [] # Pernas da proteção na corretora (OCO ou stop)
+
+        # Preço das ordens limitadas pelo livro de ofertas (modules/OrderBook.py)
+        # "depth" = nível que executa toda a quantidade | "touch" = melhor oferta oposta | None = regra antiga (fechamento ± %)
+        self.order_book_pricing = order_book_pricing
+        self.order_book_max_age = 5 # Segundos: livro mais antigo que isso é atualizado por snapshot antes de precificar
+
+        # Ordens limitadas reprecificadas pelo motor de ordens (modules/OrderManager.py) enquanto o topo se move
+        self.order_chasing = order_chasing
+        # Limite da perseguição em pontos-base a partir do preço enviado (independe do acceptable_loss_percentage, que por padrão é 0)
+        self.chase_bound_bps = chase_bound_bps
+
+        self.stop_event = threading.Event() # Sinaliza para o loop do run() encerrar
+
+        # Multi-nó (modules/BotCoordinator.py): lease (node_id, epoch) definido por quem inicia o robô
+        # Sem o lease válido no banco o robô não envia ordens (outro nó pode estar operando o par)
+        self.lease = None
+        self.lease_valid_until = 0.0 # Lease conferido no banco até este instante (time.time())
+
+        # Sinais de vida para o supervisor (modules/BotSupervisor.py), em segundos (time.time())
+        self.created_at = time.time()   # Primeiro início (mantido nos reinícios)
+        self.run_started_at = None      # Início do run() desta instância
+        self.last_heartbeat = None      # Última volta do loop
+        self.cycle_started_at = None    # Ciclo em andamento (None entre ciclos)
+        self.last_cycle_at = None       # Último ciclo concluído sem erro
+        self.consecutive_failures = 0
+        self.last_error = None
+        self.cycle_profile = None       # cProfile pedido para o próximo ciclo (modules/Profiler.py)
+
+        # Histórico local de ordens (Models/OrderLedgerModel.py), sincronizado só quando algo mudou
+        self.use_order_ledger = use_order_ledger
+        self.order_ledger_account = None
+        self.order_ledger_balances = None # Saldos do par na última sincronização
+        self.order_ledger_interval = 15*60 # Sincronização de segurança (ordens manuais, etc.)
+        self.order_ledger_next_sync = 0
+
+        # Execuções do bot (myTrades) e custo da posição FIFO com taxas (Models/FillLedgerModel.py)
+        self.cost_basis_method = "fifo"
+
         # Configurações de tempos de espera
         self.time_to_trade = time_to_trade
         self.delay_after_order = delay_after_order
@@ -82,12 +155,23 @@ class BinanceTraderBot():
 
         print('Inicializando cliente Binance...')
         try:
-            self.client_binance = BinanceClient(api_key, secret_key, sync=True, sync_interval=30000, verbose=True) # Inicia o client da Binance
+            # Cliente injetado (ex: emulator.EmulatorClient) ou o client da Binance apontando para base_endpoint
+            self.client_binance = client_binance or BinanceClient(api_key, secret_key, base_endpoint=base_endpoint, sync=True, sync_interval=30000, verbose=True)
+            # Serviços compartilhados do processo (feed de preços, livro de ofertas, perseguição de ordens) usam o
+            # cliente sem gravação: as chamadas deles não são do robô e o mercado (feed_key) é o do cliente real
+            self.service_client = self.client_binance
+            # Gravação da sessão (modules/SessionRecorder.py): chamadas e respostas do próprio robô, para reprodução
+            if record_session:
+                self.client_binance = SessionRecorder(self.client_binance, record_session, header={"bot_id": bot_id, "config": session_config})
+                print(f'Sessão gravada em {record_session}')
             print('Cliente Binance inicializado com sucesso')
         except Exception as e:
             print(f'ERRO ao inicializar cliente Binance: {str(e)}')
             raise e
 
+        # Execuções anteriores ao bot não entram no resultado dele (relógio do cliente: na reprodução, o horário gravado)
+        self.started_at = self.getTimestamp()
+
         try:
             print('Definindo step size e tick size...')
             self.setStepSizeAndTickSize()
@@ -109,11 +193,15 @@ class BinanceTraderBot():
             self.actual_trade_position = self.getActualTradePosition()              # Posição atual (False = Vendido | True = Comprado)
             self.stock_data = self.getStockData_ClosePrice_OpenTime()               # Atualiza dados usados nos modelos
             self.open_orders = self.getOpenOrders()                                 # Retorna uma lista com todas as ordens abertas
+            self.syncOrderLedger()                                                  # Sincroniza o histórico local de ordens, se algo mudou
             self.last_buy_price = self.getLastBuyPrice(verbose)                            # Salva o último valor de compra executado com sucesso
             self.last_sell_price = self.getLastSellPrice(verbose)                          # Salva o último valor de venda executado com sucesso
 
         except BinanceAPIException as e:
             print(f"Erro na atualização de dados: {e}")
+            # Falha da corretora (5xx, limite de requisições): interrompe o ciclo em vez de seguir com dados antigos
+            if is_transient(e):
+                raise
 
     # ------------------------------------------------------------------
     # GETS Principais
@@ -184,11 +272,15 @@ class BinanceTraderBot():
         prices["open_time"] = prices["open_time"].dt.tz_convert("America/Sao_Paulo")
 
 
+        # Identifica o par e o intervalo, usados como chave no cache de indicadores
+        prices.attrs["symbol"] = self.operation_code
+        prices.attrs["interval"] = self.candle_period
+
         # CÁLCULOS PRÉVIOS...
 
         # Calcula a volatilidade (desvio padrão) dos preços
-        # self.stock_data["volatility"] = self.stock_data["close_price"].rolling(window=volatility_window).std()
-        prices["volatility"] = prices["close_price"].rolling(window=volatility_window).std()
+        # Calculada uma única vez por candle para todos os bots do mesmo par
+        prices["volatility"] = indicator_cache.get_indicator(prices, IndicatorSpec("std", "close_price", volatility_window))
 
 
         return prices;
@@ -197,97 +289,126 @@ class BinanceTraderBot():
     # Retorna o preço da última ordem de compra executada para o ativo configurado.
     # Retorna 0.0 se nenhuma ordem de compra foi encontrada.
     def getLastBuyPrice(self, verbose=False):
-        try:
-            # Obtém o histórico de ordens do par configurado
-            all_orders = self.client_binance.get_all_orders(symbol=self.operation_code, limit = 100)
-
-            # Filtra apenas as ordens de compra executadas (FILLED)
-            executed_buy_orders = [
-                order for order in all_orders 
-                if order['side'] == 'BUY' and order['status'] == 'FILLED'
-            ]
-
-            if executed_buy_orders:
-                # Ordena as ordens por tempo (timestamp) para obter a mais recente
-                last_executed_order = sorted(executed_buy_orders, key=lambda x: x['time'], reverse=True)[0]
-
-                # print(f'ÚLTIMA EXECUTADA: {last_executed_order}')
-
-                # Retorna o preço da última ordem de compra executada
-                last_buy_price = float(last_executed_order['cummulativeQuoteQty']) / float(last_executed_order['executedQty'])
-                                # Corrige o timestamp para a chave correta
-                datetime_transact = datetime.utcfromtimestamp(last_executed_order['time'] / 1000).strftime('(%H:%M:%S) %d-%m-%Y')
-                if verbose:
-                    print(f"\nÚltima ordem de COMPRA executada para {self.operation_code}:")
-                    print(f" - Data: {datetime_transact} | Preço: {self.adjust_to_step(last_buy_price,self.tick_size, as_string=True)} | Qnt.: {self.adjust_to_step(float(last_executed_order['origQty']), self.step_size, as_string=True)}")
-
-                return last_buy_price
-            else:
-                if verbose:
-                    print(f"Não há ordens de COMPRA executadas para {self.operation_code}.")
-                return 0.0
-
-        except Exception as e:
+        order = self.getLastFilledOrder(SIDE_BUY)
+        if order:
             if verbose:
-                print(f"Erro ao verificar a última ordem de COMPRA executada para {self.operation_code}: {e}")
-            return 0.0
+                datetime_transact = datetime.utcfromtimestamp(order['time'] / 1000).strftime('(%H:%M:%S) %d-%m-%Y')
+                print(f"\nÚltima ordem de COMPRA executada para {self.operation_code}:")
+                print(f" - Data: {datetime_transact} | Preço: {self.adjust_to_step(order['price'],self.tick_size, as_string=True)} | Qnt.: {self.adjust_to_step(order['quantity'], self.step_size, as_string=True)}")
+            return order['price']
+        if verbose:
+            print(f"Não há ordens de COMPRA executadas para {self.operation_code}.")
+        return 0.0
         
     # Retorna o preço da última ordem de venda executada para o ativo configurado.
     # Retorna 0.0 se nenhuma ordem de venda foi encontrada.
     def getLastSellPrice(self, verbose = False):
+        order = self.getLastFilledOrder(SIDE_SELL)
+        if order:
+            if verbose:
+                datetime_transact = datetime.utcfromtimestamp(order['time'] / 1000).strftime('(%H:%M:%S) %d-%m-%Y')
+                print(f"Última ordem de VENDA executada para {self.operation_code}:")
+                print(f" - Data: {datetime_transact} | Preço: {self.adjust_to_step(order['price'],self.tick_size, as_string=True)} | Qnt.: {self.adjust_to_step(order['quantity'], self.step_size, as_string=True)}")
+            return order['price']
+        if verbose:
+            print(f"Não há ordens de VENDA executadas para {self.operation_code}.")
+        return 0.0
+
+    # Última ordem executada (FILLED) do lado informado: {'price' (preço médio), 'quantity', 'time'}
+    # Lida do histórico local; sem ele, busca as últimas 100 ordens na corretora.
+    def getLastFilledOrder(self, side):
+        if self.use_order_ledger and self.order_ledger_account:
+            try:
+                return OrderLedgerModel.get_last_fill(self.order_ledger_account, self.operation_code, side)
+            except Exception as e:
+                logging.error(f"Erro ao consultar histórico local de ordens de {self.operation_code}: {e}")
         try:
-            # Obtém o histórico de ordens do par configurado
             all_orders = self.client_binance.get_all_orders(symbol=self.operation_code, limit=100)
+            executed_orders = [order for order in all_orders if order['side'] == side and order['status'] == 'FILLED']
+            if not executed_orders:
+                return None
+            # Mais recente pela execução (updateTime), como no histórico local: `time` é a criação
+            last_executed_order = max(executed_orders, key=lambda x: x.get('updateTime', x['time']))
+            return {
+                'order_id': last_executed_order['orderId'],
+                'price': float(last_executed_order['cummulativeQuoteQty']) / float(last_executed_order['executedQty']),
+                'quantity': float(last_executed_order['executedQty']),
+                'time': last_executed_order.get('updateTime', last_executed_order['time']),
+            }
+        except CircuitOpenError:
+            raise # Sem resposta da corretora não há "nenhuma ordem" (0.0 seria um preço errado)
+        except Exception as e:
+            print(f"Erro ao verificar a última ordem executada ({side}) para {self.operation_code}: {e}")
+            return None
 
-            # Filtra apenas as ordens de venda executadas (FILLED)
-            executed_sell_orders = [
-                order for order in all_orders 
-                if order['side'] == 'SELL' and order['status'] == 'FILLED'
-            ]
-
-            if executed_sell_orders:
-                # Ordena as ordens por tempo (timestamp) para obter a mais recente
-                last_executed_order = sorted(executed_sell_orders, key=lambda x: x['time'], reverse=True)[0]
-
-                # Retorna o preço da última ordem de venda executada
-                last_sell_price = float(last_executed_order['cummulativeQuoteQty']) / float(last_executed_order['executedQty'])
+    # Sincroniza o histórico local de ordens apenas quando algo pode ter mudado:
+    # saldos do par diferentes, ordens abertas diferentes das conhecidas, ou a sincronização periódica.
+    def syncOrderLedger(self, force=False):
+        if not self.use_order_ledger:
+            return False
+        try:
+            if self.order_ledger_account is None:
+                OrderLedgerModel.init_db()
+                self.order_ledger_account = OrderLedgerModel.account_key(self.client_binance)
+
+            quote_code = self.operation_code.replace(self.stock_code, '')
+            balances = tuple(
+                (stock['asset'], stock['free'], stock['locked'])
+                for stock in self.account_data['balances'] if stock['asset'] in (self.stock_code, quote_code)
+            )
+            open_ids = {order['orderId'] for order in self.open_orders}
+
+            # Relógio do cliente (na reprodução, o horário gravado) em vez do relógio local
+            now = self.getTimestamp() / 1000
+            if (force or balances != self.order_ledger_balances or now >= self.order_ledger_next_sync
+                    or open_ids != OrderLedgerModel.get_open_order_ids(self.order_ledger_account, self.operation_code)):
+                OrderLedgerModel.sync(self.client_binance, self.order_ledger_account, self.operation_code)
+                self.order_ledger_balances = balances
+                self.order_ledger_next_sync = now + self.order_ledger_interval
+                self.syncFills()
+                return True
+            return False
+        except Exception as e:
+            # Sem histórico local: volta a consultar as últimas ordens na corretora
+            logging.error(f"Erro ao sincronizar histórico local de ordens de {self.operation_code}: {e}")
+            self.order_ledger_account = None
+            return False
 
-                # Corrige o timestamp para a chave correta
-                datetime_transact = datetime.utcfromtimestamp(last_executed_order['time'] / 1000).strftime('(%H:%M:%S) %d-%m-%Y')
-                
-                if verbose:
-                    print(f"Última ordem de VENDA executada para {self.operation_code}:")
-                    print(f" - Data: {datetime_transact} | Preço: {self.adjust_to_step(last_sell_price,self.tick_size, as_string=True)} | Qnt.: {self.adjust_to_step(float(last_executed_order['origQty']), self.step_size, as_string=True)}")
-                return last_sell_price
-            else:
-                if verbose:
-                    print(f"Não há ordens de VENDA executadas para {self.operation_code}.")
-                return 0.0
+    # Busca as execuções novas do par e atualiza o custo da posição do bot (PnL realizado, taxas, preço de equilíbrio)
+    def syncFills(self):
+        if not hasattr(self, 'bot_id'):
+            return 0
+        try:
+            return FillLedgerModel.sync_fills(
+                self.client_binance, self.bot_id, self.order_ledger_account, self.operation_code,
+                self.stock_code, self.operation_code.replace(self.stock_code, ''), self.started_at,
+                method=self.cost_basis_method, mark_price=float(self.stock_data["close_price"].iloc[-1]))
+        except Exception as e:
+            logging.error(f"Erro ao sincronizar execuções do bot {self.bot_id}: {e}")
+            return 0
 
+    # Marca as ordens enviadas como do bot: só as execuções delas entram no custo da posição dele
+    # (o myTrades é por par e outro bot pode operar o mesmo par)
+    def registerOwnOrders(self, order):
+        if not self.use_order_ledger or not order or not hasattr(self, 'bot_id'):
+            return
+        try:
+            reports = order.get('orderReports', order.get('orders', [order]))
+            FillLedgerModel.register_orders(self.bot_id, OrderLedgerModel.account_key(self.client_binance), self.operation_code,
+                                            [report['orderId'] for report in reports if 'orderId' in report])
         except Exception as e:
-            if verbose:
-                print(f"Erro ao verificar a última ordem de VENDA executada para {self.operation_code}: {e}")
-            return 0.0
+            logging.error(f"Erro ao registrar ordens do bot {self.bot_id}: {e}")
 
     def getTimestamp(self):
         """
         Retorna o timestamp ajustado com base no desvio de tempo entre o sistema local e o servidor da Binance.
+        O desvio vem do serviço de sincronização compartilhado pelos clientes (modules/ClockSync.py).
         """
-        try:
-            # Obtém o tempo do servidor da Binance e calcula o desvio apenas uma vez
-            if not hasattr(self, 'time_offset') or self.time_offset is None:
-                server_time = self.client_binance.get_server_time()["serverTime"]
-                local_time = int(time.time() * 1000)
-                self.time_offset = server_time - local_time
-            
-            # Retorna o timestamp ajustado
-            adjusted_timestamp = int(time.time() * 1000) + self.time_offset
-            return adjusted_timestamp
-
-        except Exception as e:
-            print(f"Erro ao ajustar o timestamp: {e}")
-            # Retorna o timestamp local em caso de falha, mas não é recomendado para chamadas críticas
-            return int(time.time() * 1000)
+        clock = getattr(self.client_binance, 'clock', None)
+        if clock is not None:
+            return clock.now_ms()
+        # Clientes sem o serviço (ex: emulador, simulação) usam o próprio desvio, se houver
+        return int(time.time() * 1000 + getattr(self.client_binance, 'timestamp_offset', 0))
 
 
 
@@ -318,23 +439,7 @@ class BinanceTraderBot():
         Returns:
             str|float: O valor ajustado no formato especificado.
         """
-        if step <= 0:
-            raise ValueError("O valor de 'step' deve ser maior que zero.")
-        
-        # Descobrir o número de casas decimais do step
-        decimal_places = max(0, abs(int(math.floor(math.log10(step))))) if step < 1 else 0
-        
-        # Ajustar o valor ao step usando floor
-        adjusted_value = math.floor(value / step) * step
-        
-        # Garantir que o resultado tenha a mesma precisão do step
-        adjusted_value = round(adjusted_value, decimal_places)
-        
-        # Retornar no formato especificado
-        if as_string:
-            return f"{adjusted_value:.{decimal_places}f}"
-        else:
-            return adjusted_value
+        return TraderOrder.adjust_to_step(value, step, as_string=as_string)
 
 
 
@@ -401,6 +506,45 @@ class BinanceTraderBot():
                 return stock
 
 
+    # --------------------------------------------------------------
+    # PERMISSÃO PARA ENVIAR ORDENS
+
+    # Instância parada (stop) não envia ordens: no reinício pelo supervisor a instância antiga
+    # recebe stop antes da nova iniciar, então um ciclo travado que volte depois não envia nada
+    # Multi-nó: o lease deste nó (dono + epoch) também precisa continuar válido no banco
+    # A consulta vale até LEASE_CHECK_MARGIN segundos antes do vencimento lido
+    # Lease de outro dono/epoch ou vencido: o robô foi substituído e encerra o loop
+    def canSendOrders(self):
+        if self.stop_event.is_set():
+            return False
+        return self.holdsLease()
+
+    # Só o lease (sem olhar o stop): usado pelo cancelamento do próprio stop
+    def holdsLease(self):
+        if self.lease is None:
+            return True
+        if time.time() < self.lease_valid_until:
+            return True
+        node_id, epoch = self.lease
+        bot_id = getattr(self, 'bot_id', None)
+        try:
+            expires = BotLeaseModel.check(bot_id, node_id, epoch)
+        except Exception as e:
+            logging.error(f"Erro ao conferir lease do robô {bot_id}: {e}")
+            return False
+        if expires is None:
+            logging.error(f"Lease do robô {bot_id} (nó {node_id}, epoch {epoch}) perdido; encerrando sem enviar ordens")
+            self.stop_event.set()
+            return False
+        self.lease_valid_until = expires - LEASE_CHECK_MARGIN
+        return True
+
+    # Chamada logo antes de cada envio de ordem
+    def assertCanSendOrders(self):
+        if not self.canSendOrders():
+            print(f"\n❌ Ordem não enviada: robô {getattr(self, 'bot_id', self.operation_code)} parado ou sem lease válido")
+            raise OrderFenced(f"Robô {getattr(self, 'bot_id', self.operation_code)} sem permissão para enviar ordens")
+
     # --------------------------------------------------------------
     # FUNÇÕES DE COMPRA
 
@@ -433,6 +577,7 @@ class BinanceTraderBot():
                         api.add_log_message(f"ERRO: {error_msg}", "error")
                     return False
 
+                self.assertCanSendOrders()
                 order_buy = self.client_binance.create_order(
                     symbol=self.operation_code,
                     side=SIDE_BUY,  # Compra
@@ -443,6 +588,7 @@ class BinanceTraderBot():
                 self.actual_trade_position = True  # Define posição como comprada
                 self.last_operation = "BUY"  # Atualiza a operação
                 createLogOrder(order_buy)  # Cria um log
+                self.registerOwnOrders(order_buy)
                 print(f"\nOrdem de COMPRA a mercado enviada com sucesso:")
                 print(order_buy)
                 
@@ -495,16 +641,59 @@ class BinanceTraderBot():
                 api.add_log_message(f"ERRO na compra: {str(e)}", "error")
             return False
 
+    # Preço limite a partir do livro de ofertas local
+    # BUY consome asks | SELL consome bids. Retorna None se o livro não estiver disponível.
+    def getOrderBookLimitPrice(self, side, quantity):
+        if not self.order_book_pricing:
+            return None
+        try:
+            mirror = getOrderBookMirror(self.service_client, self.operation_code)
+            if mirror is None:
+                return None
+            if not mirror.is_fresh(self.order_book_max_age):
+                mirror.resync()
+            if not mirror.synced:
+                return None
+
+            if self.order_book_pricing == "touch":
+                return mirror.best_ask() if side == SIDE_BUY else mirror.best_bid()
+
+            result = mirror.depth_weighted_price(side, quantity)
+            if result is None:
+                return None
+            average_price, marginal_price = result
+            print(f" - Livro ({side}): preço médio {average_price:.8f} | último nível {marginal_price:.8f} para {quantity}")
+            return marginal_price
+        except Exception as e:
+            logging.error(f"Erro ao precificar pelo livro de ofertas de {self.operation_code}: {e}")
+            return None
+
+    # Passa a acompanhar a posição na fila de uma ordem limitada recém-enviada
+    def trackOrderInBook(self, order, side):
+        if not self.order_book_pricing or not order:
+            return
+        try:
+            mirror = getOrderBookMirror(self.service_client, self.operation_code)
+            if mirror is not None and mirror.synced:
+                mirror.track_order(order["orderId"], side, float(order["price"]))
+        except Exception as e:
+            logging.error(f"Erro ao acompanhar ordem {order.get('orderId')} no livro: {e}")
+
     # Compra por um preço máximo (Ordem Limitada)
     # [NOVA] Define o valor usando RSI e Volume Médio
+    # Com order_book_pricing, usa o livro de ofertas (limitado a fechamento + 0,5%)
     def buyLimitedOrder(self, price=0):
         close_price = self.stock_data["close_price"].iloc[-1]
         volume = self.stock_data["volume"].iloc[-1]  # Volume atual do mercado
-        avg_volume = self.stock_data["volume"].rolling(window=20).mean().iloc[-1]  # Média de volume
-        rsi = Indicators.getRSI(series=self.stock_data["close_price"])  # RSI para ajuste
+        avg_volume = indicator_cache.get_indicator(self.stock_data, IndicatorSpec("sma", "volume", 20))[-1]  # Média de volume
+        rsi = indicator_cache.get_indicator(self.stock_data, IndicatorSpec("rsi", "close_price", 14))[-1]  # RSI para ajuste
+
+        book_price = self.getOrderBookLimitPrice(SIDE_BUY, self.traded_quantity - self.partial_quantity_discount) if price == 0 else None
 
         if price == 0:
-            if rsi < 30:  # Mercado sobrevendido
+            if book_price is not None:  # Livro de ofertas disponível
+                limit_price = min(book_price, close_price + (0.005 * close_price))  # Não paga mais que a faixa antiga
+            elif rsi < 30:  # Mercado sobrevendido
                 limit_price = close_price - (0.002 * close_price)  # Tenta comprar um pouco mais abaixo
             elif volume < avg_volume:  # Volume baixo (mercado lateral)
                 limit_price = close_price + (0.002 * close_price)  # Ajuste pequeno acima
@@ -547,9 +736,12 @@ class BinanceTraderBot():
         print(f" - Quantidade: {quantity}")
         print(f" - Close Price: {close_price}")
         print(f" - Preço Limite: {limit_price}")
+        if book_price is not None:
+            print(f" - Preço pelo livro ({self.order_book_pricing}): {book_price}")
 
         # Enviar ordem limitada de COMPRA
         try:
+            self.assertCanSendOrders()
             order_buy = self.client_binance.create_order(
                 symbol = self.operation_code,
                 side = SIDE_BUY,  # Compra
@@ -564,6 +756,9 @@ class BinanceTraderBot():
             # print(order_buy)
             if (order_buy is not None):
                 createLogOrder(order_buy) # Cria um log
+                self.registerOwnOrders(order_buy)
+                self.trackOrderInBook(order_buy, SIDE_BUY)
+                self.chaseOrder(order_buy, SIDE_BUY)
                 
                 # Registrar a operação no histórico
                 try:
@@ -619,6 +814,7 @@ class BinanceTraderBot():
                         api.add_log_message(f"ERRO: {error_msg}", "error")
                     return False
 
+                self.assertCanSendOrders()
                 order_sell = self.client_binance.create_order(
                     symbol=self.operation_code,
                     side=SIDE_SELL,  # Venda
@@ -629,6 +825,7 @@ class BinanceTraderBot():
                 self.actual_trade_position = False  # Define posição como vendida
                 self.last_operation = "SELL"  # Atualiza a operação
                 createLogOrder(order_sell)  # Cria um log
+                self.registerOwnOrders(order_sell)
                 print(f"\nOrdem de VENDA a mercado enviada com sucesso:")
                 # print(order_sell)
                 
@@ -684,14 +881,19 @@ class BinanceTraderBot():
 
     # Venda por um preço mínimo (Ordem Limitada)
     # [NOVA] Define o valor usando RSI e Volume Médio
+    # Com order_book_pricing, usa o livro de ofertas (limitado a fechamento - 0,5% e à perda aceitável)
     def sellLimitedOrder(self, price=0):
         close_price = self.stock_data["close_price"].iloc[-1]
         volume = self.stock_data["volume"].iloc[-1]  # Volume atual do mercado
-        avg_volume = self.stock_data["volume"].rolling(window=20).mean().iloc[-1]  # Média de volume
-        rsi = Indicators.getRSI(series=self.stock_data["close_price"])
+        avg_volume = indicator_cache.get_indicator(self.stock_data, IndicatorSpec("sma", "volume", 20))[-1]  # Média de volume
+        rsi = indicator_cache.get_indicator(self.stock_data, IndicatorSpec("rsi", "close_price", 14))[-1]
+
+        book_price = self.getOrderBookLimitPrice(SIDE_SELL, self.last_stock_account_balance) if price == 0 else None
 
         if price == 0:
-            if rsi > 70:  # Mercado sobrecomprado
+            if book_price is not None:  # Livro de ofertas disponível
+                limit_price = max(book_price, close_price - (0.005 * close_price))  # Não vende abaixo da faixa antiga
+            elif rsi > 70:  # Mercado sobrecomprado
                 limit_price = close_price + (0.002 * close_price)  # Tenta vender um pouco acima
             elif volume < avg_volume:  # Volume baixo (mercado lateral)
                 limit_price = close_price - (0.002 * close_price)  # Ajuste pequeno abaixo
@@ -732,12 +934,15 @@ class BinanceTraderBot():
         print(f" - Quantidade: {quantity}")
         print(f" - Close Price: {close_price}")
         print(f" - Preço Limite: {limit_price}")
+        if book_price is not None:
+            print(f" - Preço pelo livro ({self.order_book_pricing}): {book_price}")
 
 
         # Enviar ordem limitada de VENDA
         try:
             # Por algum motivo, fazer direto por aqui resolveu um bug de mudança de preço
             # Depois vou testar novamente.
+            self.assertCanSendOrders()
             order_sell = self.client_binance.create_order(
                 symbol = self.operation_code,
                 side = SIDE_SELL,  # Venda
@@ -752,6 +957,9 @@ class BinanceTraderBot():
             print(f"\nOrdem VENDA limitada enviada com sucesso:")
             # print(order_sell)
             createLogOrder(order_sell) # Cria um log
+            self.registerOwnOrders(order_sell)
+            self.trackOrderInBook(order_sell, SIDE_SELL)
+            self.chaseOrder(order_sell, SIDE_SELL)
             
             # Registrar a operação no histórico
             try:
@@ -798,18 +1006,74 @@ class BinanceTraderBot():
 
     # Cancela uma ordem a partir do seu ID
     def cancelOrderById(self, order_id):
+        self.assertCanSendOrders()
         self.client_binance.cancel_order(symbol=self.operation_code, orderId=order_id)
 
 
     # Cancela todas ordens abertas
-    def cancelAllOrders(self):
+    # Em lote (DELETE /openOrders do par) ou, se não houver suporte, em paralelo
+    # respeitando o limite de requisições. Cada cancelamento é confirmado pela corretora
+    # (status final da ordem) e o saldo é atualizado em seguida, sem esperas fixas.
+    # Cancelamentos passam pela mesma trava dos envios: uma instância antiga não cancela
+    # ordens da nova. No stop (stopping=True) o stop_event já está ligado e só o lease conta.
+    def cancelAllOrders(self, stopping=False):
         if self.open_orders:
-            for order in self.open_orders:
-                try:
-                    self.client_binance.cancel_order(symbol=self.operation_code, orderId=order['orderId'])
-                    print(f"❌ Ordem {order['orderId']} cancelada.")
-                except Exception as e:
-                    print(f"Erro ao cancelar ordem {order['orderId']}: {e}")
+            if not stopping:
+                self.assertCanSendOrders()
+            elif not self.holdsLease():
+                print(f"\n❌ Ordens não canceladas: robô {getattr(self, 'bot_id', self.operation_code)} sem lease válido")
+                return
+            results = order_manager.cancel_all(self.client_binance, self.operation_code, [order['orderId'] for order in self.open_orders])
+            for order_id, result in results.items():
+                if isinstance(result, Exception):
+                    print(f"Erro ao cancelar ordem {order_id}: {result}")
+                else:
+                    print(f"❌ Ordem {order_id} cancelada ({result.get('status')}).")
+            self.open_orders = []
+            # As pernas de proteção também foram canceladas pelo próprio bot: não é uma saída executada
+            self.clearProtectionState()
+            self.account_data = self.getUpdatedAccountData() # Saldo liberado pelos cancelamentos
+            self.last_stock_account_balance = self.getLastStockAccountBalance()
+
+    # Ordens limitadas deste bot sendo reprecificadas pelo motor de ordens
+    def getChasedOrders(self, side=None):
+        return order_manager.working_orders(self.operation_code, side, client_binance=self.service_client)
+
+    # Entrega uma ordem limitada ao motor de ordens
+    # Compra: teto = preço enviado + chase_bound_bps
+    # Venda: piso = preço enviado - chase_bound_bps, nunca abaixo do preço mínimo aceitável de venda
+    # Sem espaço para reprecificar (limite a menos de meio tick do preço) a ordem não é perseguida
+    def chaseOrder(self, order, side):
+        if not self.order_chasing or not order or order.get('status') in ('FILLED', 'CANCELED', 'EXPIRED', 'REJECTED'):
+            return None
+        try:
+            price = float(order['price'])
+            chase_range = price * self.chase_bound_bps / 10000
+            if side == SIDE_BUY:
+                bound = price + chase_range
+            else:
+                bound = price - chase_range
+                if self.last_buy_price > 0:
+                    bound = max(bound, self.getMinimumPriceToSell())
+            if abs(bound - price) < self.tick_size * 0.5:
+                print(f"Perseguição desativada para a ordem {order.get('orderId')}: limite {bound} igual ao preço {price}")
+                logging.info(f"Perseguição desativada para a ordem {order.get('orderId')} ({side}): limite {bound} igual ao preço {price} (chase_bound_bps={self.chase_bound_bps})")
+                return None
+            working = order_manager.track(WorkingOrder(self.service_client, order, bound, self.tick_size, self.step_size,
+                lock = self.order_lock,
+                on_replace = self.onOrderReplaced,
+                can_send = self.canSendOrders))
+            order_manager.attach(getTickerFeed(self.service_client))
+            return working
+        except Exception as e:
+            logging.error(f"Erro ao entregar ordem {order.get('orderId')} ao motor de ordens: {e}")
+            return None
+
+    # Chamado pelo motor de ordens após cancelar + substituir uma ordem
+    def onOrderReplaced(self, old_order, new_order):
+        createLogOrder(new_order)
+        self.registerOwnOrders(new_order)
+        self.trackOrderInBook(new_order, new_order['side'])
 
 
     # Verifica se há alguma ordem de COMPRA aberta
@@ -912,16 +1176,15 @@ class BinanceTraderBot():
     def stopLossTrigger(self):
         close_price = self.stock_data["close_price"].iloc[-1]
         weighted_price = self.stock_data["close_price"].iloc[-2]  # Preço ponderado pelo candle anterior
-        stop_loss_price = self.last_buy_price * (1 - self.stop_loss_percentage)
+        stop_loss_price = getStopLossPrice(self.last_buy_price, self.stop_loss_percentage)
 
         print(f'\n - Preço atual: {self.stock_data["close_price"].iloc[-1]}')
         print(f' - Preço mínimo para vender: {self.getMinimumPriceToSell()}')
         print(f' - Stop Loss em: {stop_loss_price:.4f} (-{self.stop_loss_percentage*100}%)\n')
 
-        if close_price < stop_loss_price and weighted_price < stop_loss_price and self.actual_trade_position == True:
+        if isStopLossTriggered(close_price, weighted_price, self.last_buy_price, self.stop_loss_percentage) and self.actual_trade_position == True:
             print("🔴 Ativando STOP LOSS...")
             self.cancelAllOrders()
-            time.sleep(2)
             sell_result = self.sellMarketOrder()
             
             # Atualizar last_operation para SELL se a venda for bem-sucedida
@@ -934,10 +1197,179 @@ class BinanceTraderBot():
     
 
         
+    # --------------------------------------------------------------
+    # PROTEÇÃO NA CORRETORA
+
+    # Retorna as ordens abertas de proteção (pernas de OCO ou stops)
+    def getProtectiveOrders(self):
+        return [
+            order for order in (self.open_orders or [])
+            if order['side'] == 'SELL' and (order.get('orderListId', -1) != -1 or order['type'] in ('STOP_LOSS', 'STOP_LOSS_LIMIT'))
+        ]
+
+    # Envia as ordens de proteção para a posição atual
+    # Com take_profit_percentage: OCO (LIMIT_MAKER acima + STOP_LOSS_LIMIT abaixo)
+    # Sem take_profit_percentage: apenas STOP_LOSS_LIMIT
+    def placeProtectiveOrders(self):
+        free_balance = 0.0
+        for stock in self.account_data['balances']:
+            if stock['asset'] == self.stock_code:
+                free_balance = float(stock['free'])
+
+        if free_balance < self.step_size or self.last_buy_price <= 0:
+            return None
+
+        stop_price = self.last_buy_price * (1 - self.stop_loss_percentage)
+        stop_limit_price = stop_price * (1 - 0.002) # Margem para a ordem limitada executar após o disparo
+
+        self.assertCanSendOrders()
+        if self.take_profit_percentage:
+            order = TraderOrder.create_oco_sell_order(self.client_binance,
+                _symbol = self.operation_code,
+                _quantity = free_balance,
+                _take_profit_price = self.last_buy_price * (1 + self.take_profit_percentage),
+                _stop_price = stop_price,
+                _stop_limit_price = stop_limit_price,
+                _tick_size = self.tick_size,
+                _step_size = self.step_size)
+        else:
+            order = self.create_order(self.operation_code, SIDE_SELL, ORDER_TYPE_STOP_LOSS_LIMIT, free_balance,
+                _timeInForce = TIME_IN_FORCE_GTC,
+                _limit_price = stop_limit_price,
+                _stop_price = stop_price)
+
+        if order:
+            self.registerOwnOrders(order)
+            self.protective_order_active = True
+            self.protected_quantity = self.adjust_to_step(free_balance, self.step_size)
+            self.protective_order_ids = [report['orderId'] for report in order.get('orderReports', order.get('orders', [order]))]
+            print(f"🛡️ Proteção enviada para a corretora: stop em {self.adjust_to_step(stop_price, self.tick_size, as_string=True)}")
+        return order
+
+    # Esquece a proteção na corretora (pernas canceladas pelo bot ou já finalizadas)
+    def clearProtectionState(self):
+        self.protective_order_active = False
+        self.protected_quantity = 0.0
+        self.protective_order_ids = []
+
+    # Perna de proteção executada (FILLED), consultada na corretora pelo id; None se nenhuma executou
+    def getFilledProtectiveOrder(self):
+        for order_id in self.protective_order_ids:
+            try:
+                order = self.client_binance.get_order(symbol=self.operation_code, orderId=order_id)
+            except Exception as e:
+                print(f"Erro ao consultar ordem de proteção {order_id}: {e}")
+                continue
+            if order.get('status') == 'FILLED' and float(order.get('executedQty', 0)) > 0:
+                return order
+        return None
+
+    # Cancela as pernas de proteção antes de uma saída da estratégia (libera o saldo bloqueado)
+    def cancelProtectiveOrders(self):
+        for order in self.getProtectiveOrders():
+            try:
+                order_manager.cancel(self.client_binance, self.operation_code, order['orderId'])
+            except Exception as e:
+                print(f"Erro ao cancelar ordem de proteção {order['orderId']}: {e}")
+        self.clearProtectionState()
+        self.open_orders = self.getOpenOrders()
+        self.account_data = self.getUpdatedAccountData()
+        self.last_stock_account_balance = self.getLastStockAccountBalance()
+
+    # Reconcilia o estado das ordens de proteção com a posição atual
+    # Substitui o stopLossTrigger quando use_exchange_protection está ativo
+    # Retorna True se o stop local (fallback) vendeu a posição: o ciclo termina aí
+    def reconcileProtectiveOrders(self):
+        protective_orders = self.getProtectiveOrders()
+
+        if self.actual_trade_position:
+            if protective_orders:
+                self.protective_order_active = True
+                self.protective_order_ids = [order['orderId'] for order in protective_orders]
+                return False
+            if self.placeProtectiveOrders() is None:
+                # Não foi possível proteger na corretora (ex: preço já abaixo do stop), usa o stop local
+                if self.stopLossTrigger():
+                    print("📉 STOP LOSS executado...")
+                    return True
+            return False
+
+        # Posição vendida com proteção ativa: só registra a saída se uma perna foi de fato executada
+        if self.protective_order_active:
+            filled = self.getFilledProtectiveOrder()
+            self.clearProtectionState()
+            if filled is not None:
+                price = float(filled['cummulativeQuoteQty']) / float(filled['executedQty'])
+                quantity = float(filled['executedQty'])
+                self.last_operation = "SELL"
+                print(f"🛡️ Ordem de proteção executada na corretora para {self.operation_code} (preço de venda: {price})")
+                try:
+                    from Models.BotTradeModel import BotTradeModel
+                    if hasattr(self, 'bot_id'):
+                        BotTradeModel.register_trade(
+                            bot_id=self.bot_id,
+                            operation_code=self.operation_code,
+                            trade_type="SELL",
+                            price=price,
+                            quantity=quantity,
+                            total_value=price * quantity
+                        )
+                except Exception as e:
+                    print(f"Erro ao registrar operação no histórico: {e}")
+
+        # Sobras de proteção sem posição são canceladas
+        for order in protective_orders:
+            try:
+                self.cancelOrderById(order['orderId'])
+            except Exception as e:
+                print(f"Erro ao cancelar ordem de proteção {order['orderId']}: {e}")
+        return False
+
+    # Registra (ou remove) a posição atual no monitor de proteção
+    # O monitor dispara stop loss, trailing stop e take profit a cada tick do feed,
+    # independente do time_to_trade / delay_after_order do loop de estratégia.
+    def updateProtectiveMonitor(self):
+        if not self.use_protective_monitor:
+            return
+
+        position_id = getattr(self, 'bot_id', None) or f"{self.operation_code}_{id(self)}"
+
+        if self.actual_trade_position and self.last_buy_price > 0:
+            feed = getTickerFeed(self.service_client)
+            protective_monitor.attach(feed)
+            protective_monitor.upsert(ProtectedPosition(
+                position_id = position_id,
+                symbol = self.operation_code,
+                on_trigger = self.onProtectiveTrigger,
+                stop_price = self.last_buy_price * (1 - self.stop_loss_percentage),
+                take_profit_price = self.last_buy_price * (1 + self.take_profit_percentage) if self.take_profit_percentage else None,
+                trailing_percentage = self.trailing_stop_percentage,
+                reference_price = self.last_buy_price,
+                feed_key = feed.key,
+            ))
+        else:
+            protective_monitor.remove(position_id)
+
+    # Chamado pelo monitor quando um gatilho de proteção é atingido
+    def onProtectiveTrigger(self, position, reason, price):
+        with self.order_lock:
+            print(f"🔴 {reason} disparado para {self.operation_code} em {price}...")
+            self.updateAllData()
+            if not self.actual_trade_position:
+                return False
+            self.cancelAllOrders()
+            self.updateAllData()
+            sell_result = self.sellMarketOrder()
+            if sell_result:
+                self.last_operation = "SELL"
+                print(f"Operação atualizada para: {self.last_operation}")
+            return sell_result
+
     # --------------------------------------------------------------
 
-    # Não usada por enquanto    
+    # Usada pelas ordens de proteção (STOP_LOSS_LIMIT), com arredondamento por tick/step
     def create_order(self, _symbol, _side, _type, _quantity, _timeInForce = None, _limit_price = None, _stop_price = None):
+        self.assertCanSendOrders()
         order_buy = TraderOrder.create_order(self.client_binance, 
                _symbol = _symbol,
                _side = _side,  # Compra
@@ -945,7 +1377,9 @@ class BinanceTraderBot():
                _timeInForce = _timeInForce,  # Good 'Til Canceled (Ordem válida até ser cancelada)
                _quantity = _quantity,
                _limit_price = _limit_price,
-               _stop_price = _stop_price
+               _stop_price = _stop_price,
+               _tick_size = self.tick_size,
+               _step_size = self.step_size
            )
          
         return order_buy    
@@ -954,8 +1388,39 @@ class BinanceTraderBot():
     # EXECUTE
         
     # Função principal e a única que deve ser execuda em loop, quando o
-    # robô estiver funcionando normalmente    
+    # robô estiver funcionando normalmente
+    # O order_lock impede que o monitor de proteção envie ordens no meio do ciclo
     def execute(self):
+        with self.order_lock:
+            result = self.executeCycle()
+            self.updateProtectiveMonitor()
+            self.recordEquity()
+            return result
+
+    # Amostra de patrimônio do ciclo: (id da série, timestamp em ms, patrimônio na moeda de cotação, preço)
+    # Patrimônio do par = moeda de cotação + ativo ao último fechamento (livre + bloqueado)
+    def getEquitySample(self):
+        if not hasattr(self, 'bot_id'):
+            return None
+        quote_code = self.operation_code.replace(self.stock_code, '')
+        balances = {
+            stock['asset']: float(stock['free']) + float(stock['locked'])
+            for stock in self.account_data['balances'] if stock['asset'] in (self.stock_code, quote_code)
+        }
+        price = float(self.stock_data["close_price"].iloc[-1])
+        equity = balances.get(quote_code, 0.0) + balances.get(self.stock_code, 0.0) * price
+        return self.bot_id, self.getTimestamp(), equity, price
+
+    # Registra o patrimônio na série do bot (Models/EquityModel.py)
+    def recordEquity(self):
+        try:
+            sample = self.getEquitySample()
+            if sample is not None:
+                EquityModel.record(*sample)
+        except Exception as e:
+            logging.error(f"Erro ao registrar patrimônio de {self.operation_code}: {e}")
+
+    def executeCycle(self):
         print('------------------------------------------------')
         print(f'🟢 Executado {datetime.now().strftime("(%H:%M:%S) %d-%m-%Y")}\n')  # Adiciona o horário atual formatado
 
@@ -974,8 +1439,12 @@ class BinanceTraderBot():
 
         # ---------
         # Estratégias sentinelas de saída
-        # Se perder mais que o panic sell aceitável, ele sai à mercado, independente.
-        if self.stopLossTrigger():
+        # Com proteção na corretora, apenas reconcilia o estado das ordens de proteção.
+        # Sem ela, se perder mais que o panic sell aceitável, ele sai à mercado, independente.
+        if self.use_exchange_protection:
+            if self.reconcileProtectiveOrders():
+                return
+        elif self.stopLossTrigger():
             print("📉 STOP LOSS executado...")
             return
         
@@ -985,17 +1454,35 @@ class BinanceTraderBot():
 
         # ---------
         # Verifica ordens anteriores abertas
+        # Ordens acompanhadas pelo motor de ordens continuam trabalhando (são reprecificadas lá);
+        # as demais são canceladas (com confirmação) e substituídas por uma nova ordem.
+        order_working = False
+        if self.last_trade_decision is not None:
+            # Decisão mudou de lado: o motor não deve continuar perseguindo a ordem oposta
+            for working in self.getChasedOrders(SIDE_SELL if self.last_trade_decision else SIDE_BUY):
+                try:
+                    order_manager.cancel(self.client_binance, self.operation_code, working.order_id)
+                    print(f"❌ Ordem {working.order_id} ({working.side}) cancelada: decisão mudou.")
+                except Exception as e:
+                    print(f"Erro ao cancelar ordem {working.order_id}: {e}")
+
         if self.last_trade_decision == True: # Se a decisão for COMPRA
             # Existem ordens de compra abertas?
             if(self.hasOpenBuyOrder()): # Sim e salva possíveis quantidades executadas incompletas.
-                self.cancelAllOrders() # Cancela todas ordens
-                time.sleep(2)
+                if self.getChasedOrders(SIDE_BUY):
+                    order_working = True
+                    print(" - Ordem de compra em andamento no motor de ordens, mantendo.")
+                else:
+                    self.cancelAllOrders() # Cancela todas ordens
 
         if self.last_trade_decision == False: # Se a decisão for VENDA
             # Existem ordens de venda abertas?
             if(self.hasOpenSellOrder()): # Sim e salva possíveis quantidades executadas incompletas.
-                self.cancelAllOrders() # Cancela todas ordens
-                time.sleep(2)
+                if self.getChasedOrders(SIDE_SELL):
+                    order_working = True
+                    print(" - Ordem de venda em andamento no motor de ordens, mantendo.")
+                else:
+                    self.cancelAllOrders() # Cancela todas ordens
         
         # ---------
         print('\n--------------')    
@@ -1004,7 +1491,12 @@ class BinanceTraderBot():
         # ---------
         # Se a posição for vendida (false) e a decisão for de compra (true), compra o ativo
         # Se a posição for comprada (true) e a decisão for de venda (false), vende o ativo
-        if self.actual_trade_position == False and self.last_trade_decision == True:
+        if order_working:
+            print(f'🏁 Ação final: Aguardar execução da ordem em andamento')
+            print('--------------')
+            self.time_to_sleep = self.time_to_trade
+
+        elif self.actual_trade_position == False and self.last_trade_decision == True:
             print('🏁 Ação final: Comprar')
             print('--------------')   
             print(f'\nCarteira em {self.stock_code} [ANTES]:') 
@@ -1016,8 +1508,10 @@ class BinanceTraderBot():
                 self.last_operation = "BUY"
                 print(f"Operação atualizada para: {self.last_operation}")
                 
-            time.sleep(2)
             self.updateAllData()
+            # Protege a posição na corretora assim que a compra for executada
+            if self.use_exchange_protection:
+                self.reconcileProtectiveOrders()
             print(f'Carteira em {self.stock_code} [DEPOIS]:')            
             self.printStock()
             self.time_to_sleep = self.delay_after_order
@@ -1027,6 +1521,8 @@ class BinanceTraderBot():
             print('--------------') 
             print(f'\nCarteira em {self.stock_code} [ANTES]:') 
             self.printStock()
+            if self.protective_order_active or self.getProtectiveOrders():
+                self.cancelProtectiveOrders()
             order_result = self.sellLimitedOrder()
             
             # Atualizar o atributo last_operation após a ordem
@@ -1034,7 +1530,6 @@ class BinanceTraderBot():
                 self.last_operation = "SELL"
                 print(f"Operação atualizada para: {self.last_operation}")
                 
-            time.sleep(2)
             self.updateAllData()
             print(f'\nCarteira em {self.stock_code} [DEPOIS]:') 
             self.printStock()
@@ -1052,6 +1547,7 @@ class BinanceTraderBot():
         """Método para execução contínua do bot em uma thread separada.
         Este método é chamado pela API quando o bot é iniciado."""
         print(f"Bot iniciado para {self.operation_code} com modo {self.stock_code}")
+        self.run_started_at = time.time()
         try:
             # Inicialização do bot
             self.updateAllData(verbose=True)
@@ -1061,33 +1557,98 @@ class BinanceTraderBot():
                 self.last_operation = "BUY" if self.actual_trade_position else "SELL"
                 print(f"Operação inicial definida como: {self.last_operation}")
             
-            # Loop principal do bot
-            while True:
+            # Loop principal do bot (as esperas são interrompidas pelo stop())
+            while not self.stop_event.is_set():
+                self.last_heartbeat = self.cycle_started_at = time.time()
                 try:
-                    self.execute()
-                    time.sleep(self.time_to_sleep)
+                    profile = self.cycle_profile
+                    if profile is not None and not profile.done:
+                        profile.run(self.execute)
+                    else:
+                        self.execute()
+                    self.last_cycle_at = time.time()
+                    self.cycle_started_at = None
+                    self.consecutive_failures = 0
+                    self.stop_event.wait(self.time_to_sleep)
                 except Exception as e:
+                    self.cycle_started_at = None
+                    self.consecutive_failures += 1
+                    self.last_error = str(e)
                     print(f"Erro durante execução do bot: {str(e)}")
                     import traceback
                     traceback.print_exc()
-                    time.sleep(60)  # Esperar um minuto antes de tentar novamente
+                    # Espera exponencial com jitter (15s, 30s, 60s... até 10min) antes de tentar novamente,
+                    # e no mínimo até o circuito da corretora voltar a aceitar chamadas
+                    delay = backoff_delay(self.consecutive_failures - 1, 15, 600)
+                    if isinstance(e, CircuitOpenError):
+                        delay = max(delay, e.retry_after)
+                    self.stop_event.wait(delay)
+            print(f"Bot {self.operation_code} encerrado")
         except Exception as e:
+            self.last_error = str(e)
             print(f"Bot encerrado com erro: {str(e)}")
             import traceback
             traceback.print_exc()
+
+    # Tempos de execução para listagens e para o supervisor
+    def getRuntimeStatus(self, now=None):
+        now = now or time.time()
+        return {
+            "start_time": format_time(self.created_at),
+            "uptime_seconds": round(now - self.run_started_at, 1) if self.run_started_at else 0,
+            "last_heartbeat": format_time(self.last_heartbeat),
+            "last_cycle_at": format_time(self.last_cycle_at),
+            "cycle_running_seconds": round(now - self.cycle_started_at, 1) if self.cycle_started_at else None,
+            "consecutive_failures": self.consecutive_failures,
+            "last_error": self.last_error,
+        }
+
+    # Reinício pelo supervisor: continua de onde a instância anterior parou
+    def restoreState(self, previous):
+        self.created_at = previous.created_at
+        self.lease = previous.lease
+        self.started_at = previous.started_at
+        for attr in ('last_operation', 'last_buy_price', 'last_sell_price'):
+            if getattr(previous, attr, None) is not None:
+                setattr(self, attr, getattr(previous, attr))
     
+    # cProfile do próximo ciclo executado pela thread do robô (um pedido pendente por vez)
+    def requestCycleProfile(self, sort="cumulative", limit=40):
+        profile = self.cycle_profile
+        if profile is None or profile.done:
+            profile = CycleProfile(sort=sort, limit=limit)
+            self.cycle_profile = profile
+        return profile
+
     # Método para parar o bot
-    def stop(self):
-        """Método para interromper o funcionamento do bot."""
+    def stop(self, cancel_orders=True):
+        """Método para interromper o funcionamento do bot.
+        cancel_orders=False: só encerra o loop (ex: lease perdido, outro nó já opera o par)."""
         print(f"Bot {self.operation_code} sendo finalizado")
+        self.stop_event.set()
+        # Remove a posição do monitor de proteção
+        protective_monitor.remove(getattr(self, 'bot_id', None) or f"{self.operation_code}_{id(self)}")
+        if not cancel_orders:
+            self.closeSession()
+            return True
         # Cancelar todas as ordens abertas ao finalizar
+        # O lock espera um ciclo em andamento terminar, então ordens enviadas nele também são canceladas
         try:
-            self.cancelAllOrders()
+            with self.order_lock:
+                self.open_orders = self.getOpenOrders()
+                self.cancelAllOrders(stopping=True)
             print("Todas as ordens foram canceladas")
             return True
         except Exception as e:
             print(f"Erro ao cancelar ordens: {str(e)}")
             return False
+        finally:
+            self.closeSession()
+
+    # Fecha o arquivo da sessão gravada (o cancelamento das ordens no stop também é gravado)
+    def closeSession(self):
+        if isinstance(self.client_binance, SessionRecorder):
+            self.client_binance.close()
 
 
 
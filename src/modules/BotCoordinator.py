@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+Coordenação de robôs entre várias réplicas da API (nós) por leases em SQLite.
+Cada nó renova periodicamente os leases dos robôs que executa, assume robôs sem dono
+ou com lease vencido até a sua cota (total de robôs / nós vivos) e libera o excedente
+quando novos nós entram. Um robô cujo lease foi perdido é parado no nó antigo sem
+cancelar ordens (o novo dono já pode estar operando o par). Se a renovação falha ou
+demora, os robôs do nó também param: o lease vai vencer e outro nó pode assumi-los.
+O robô recebe o lease (nó, epoch) e o confere no banco antes de enviar ordens.
+"""
+
+import logging
+import math
+import os
+import socket
+import threading
+import time
+
+from Models.BotLeaseModel import BotLeaseModel
+
+
+def default_node_id():
+    return os.environ.get('NODE_ID') or f"{socket.gethostname()}-{os.getpid()}"
+
+
+class BotCoordinator:
+    """
+    Parameters:
+        start_local (callable): start_local(bot_id, config, lease) cria e inicia o robô neste nó,
+            com lease = (node_id, epoch) para o robô conferir antes de enviar ordens.
+        stop_local (callable): stop_local(bot_id, cancel_orders) para o robô neste nó.
+        lease_ttl (float): Validade do lease em segundos (renovado a cada ttl/3).
+    """
+
+    def __init__(self, start_local, stop_local, node_id=None, lease_ttl=30.0):
+        self.node_id = node_id or default_node_id()
+        self.start_local = start_local
+        self.stop_local = stop_local
+        self.lease_ttl = lease_ttl
+        self.interval = lease_ttl / 3
+        BotLeaseModel.busy_timeout = min(BotLeaseModel.busy_timeout, self.interval / 4)
+        self.owned = {} # {bot_id: epoch} dos robôs executados por este nó
+        self.nodes = []
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def register(self, bot_id, operation_code, stock_code, config):
+        """
+        Cadastra um robô iniciado por este nó.
+
+        Returns:
+            tuple | None: lease (node_id, epoch) para o robô, ou None se o par já tem robô ativo em algum nó.
+        """
+        with self._lock:
+            epoch = BotLeaseModel.register(bot_id, operation_code, stock_code, config, self.node_id, self.lease_ttl)
+            if epoch is None:
+                return None
+            self.owned[bot_id] = epoch
+            return (self.node_id, epoch)
+
+    def owns(self, bot_id):
+        with self._lock:
+            return bot_id in self.owned
+
+    def forget(self, bot_id):
+        """Robô parado por este nó (ex: /api/bot/stop): remove o cadastro."""
+        with self._lock:
+            self.owned.pop(bot_id, None)
+            BotLeaseModel.remove(bot_id)
+
+    def tick(self):
+        """Uma rodada: heartbeat, renovação, paradas solicitadas, leases perdidos, aquisição e rebalanceamento."""
+        with self._lock:
+            started = time.time()
+            try:
+                self.nodes = BotLeaseModel.heartbeat(self.node_id, self.lease_ttl)
+                leases = BotLeaseModel.renew(self.node_id, self.lease_ttl)
+                elapsed = time.time() - started
+                if elapsed > self.interval:
+                    raise TimeoutError(f"renovação levou {elapsed:.1f}s (intervalo de {self.interval:.1f}s)")
+            except Exception as e:
+                # Sem renovação confiável o lease vence e outro nó assume: para antes, sem cancelar ordens
+                logging.error(f"[BotCoordinator] Falha ao renovar leases do nó {self.node_id}: {e}; parando {len(self.owned)} robô(s)")
+                for bot_id in list(self.owned):
+                    self._stop(bot_id, cancel_orders=False)
+                raise
+
+            for bot_id in list(self.owned):
+                if bot_id not in leases:
+                    logging.error(f"[BotCoordinator] Lease do robô {bot_id} perdido; parando sem cancelar ordens")
+                    self._stop(bot_id, cancel_orders=False)
+                elif leases[bot_id] == 'stopped':
+                    self._stop(bot_id, cancel_orders=True)
+                    BotLeaseModel.remove(bot_id)
+            # Parada solicitada para um robô que este nó assumiu mas não chegou a iniciar
+            for bot_id, desired in leases.items():
+                if desired == 'stopped' and bot_id not in self.owned:
+                    BotLeaseModel.remove(bot_id)
+
+            target = math.ceil(BotLeaseModel.count_running() / max(1, len(self.nodes)))
+            if len(self.owned) < target:
+                for bot_id, config, epoch in BotLeaseModel.claim(self.node_id, target - len(self.owned), self.lease_ttl):
+                    try:
+                        self.start_local(bot_id, config, (self.node_id, epoch))
+                        self.owned[bot_id] = epoch
+                        logging.info(f"[BotCoordinator] Robô {bot_id} assumido pelo nó {self.node_id} (epoch {epoch})")
+                    except Exception as e:
+                        logging.error(f"[BotCoordinator] Erro ao iniciar robô {bot_id}: {e}")
+                        BotLeaseModel.release(self.node_id, [bot_id])
+            elif len(self.owned) > target:
+                # Excedente volta para o pool (novos nós assumem na próxima rodada deles)
+                extra = sorted(self.owned)[target:]
+                for bot_id in extra:
+                    self._stop(bot_id, cancel_orders=True)
+                BotLeaseModel.release(self.node_id, extra)
+                logging.info(f"[BotCoordinator] {len(extra)} robô(s) liberados para rebalanceamento")
+
+    def _stop(self, bot_id, cancel_orders):
+        self.owned.pop(bot_id, None)
+        try:
+            self.stop_local(bot_id, cancel_orders)
+        except Exception as e:
+            logging.error(f"[BotCoordinator] Erro ao parar robô {bot_id}: {e}")
+
+    def release_stopped(self, bot_ids):
+        """
+        Encerramento do nó: libera os leases dos robôs já parados para outro nó assumi-los
+        imediatamente. Os que não pararam no prazo podem ainda enviar ordens: o lease deles
+        só vence sozinho (sem renovação).
+        """
+        with self._lock:
+            BotLeaseModel.release(self.node_id, [bot_id for bot_id in bot_ids if bot_id in self.owned])
+            self.owned.clear()
+            BotLeaseModel.remove_node(self.node_id)
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._loop, name="bot-coordinator", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop_event.set()
+        if self._thread and self._thread is not threading.current_thread():
+            self._thread.join(self.interval)
+
+    def _loop(self):
+        while not self._stop_event.is_set():
+            try:
+                self.tick()
+            except Exception as e:
+                logging.error(f"[BotCoordinator] Erro na rodada de coordenação: {e}")
+            self._stop_event.wait(self.interval)
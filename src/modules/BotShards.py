@@ -0,0 +1,532 @@
+#!/usr/bin/env python3
+"""
+Execução dos robôs em processos separados (shards).
+Cada par é atribuído a um processo por hash consistente do símbolo; o processo cria
+e roda os robôs dele (com os próprios caches, feeds e clientes), fora do GIL da API.
+O processo da API mantém só o plano de controle: encaminha start/stop/status por um
+Pipe por shard e recebe os logs dos robôs por uma fila de eventos.
+"""
+
+import bisect
+import hashlib
+import itertools
+import logging
+import multiprocessing
+import os
+import signal
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed, TimeoutError as FuturesTimeoutError
+
+
+class ConsistentHashRing:
+    """
+    Anel de hash com nós virtuais: cada shard ocupa `replicas` pontos, então adicionar
+    ou remover um shard move só ~1/N dos pares.
+    """
+
+    def __init__(self, nodes=(), replicas=100):
+        self.replicas = replicas
+        self.points = []  # [(hash, nó)] ordenado
+        for node in nodes:
+            self.add(node)
+
+    @staticmethod
+    def _hash(key):
+        return int(hashlib.sha1(str(key).encode()).hexdigest()[:16], 16)
+
+    def add(self, node):
+        for replica in range(self.replicas):
+            bisect.insort(self.points, (self._hash(f"{node}#{replica}"), node))
+
+    def remove(self, node):
+        self.points = [point for point in self.points if point[1] != node]
+
+    def get_node(self, key):
+        if not self.points:
+            return None
+        index = bisect.bisect(self.points, (self._hash(key),)) % len(self.points)
+        return self.points[index][1]
+
+
+# ------------------------------------------------------------------
+# Processo do shard
+
+def describe_bot(bot_id, bot):
+    """Resumo do robô para listagem (mesmos campos do /api/bot/list)."""
+    from modules.BotSupervisor import bot_supervisor
+    last_operation = getattr(bot, 'last_operation', None) or "NONE"
+    return {
+        "id": bot_id,
+        "stock_code": bot.stock_code,
+        "operation_code": bot.operation_code,
+        "last_operation": last_operation,
+        "last_price": getattr(bot, 'last_price', 0) or 0,
+        "last_buy_price": getattr(bot, 'last_buy_price', 0) or 0,
+        "last_sell_price": getattr(bot, 'last_sell_price', 0) or 0,
+        "wallet_balance": getattr(bot, 'last_stock_account_balance', 0) or 0,
+        **bot_supervisor.describe(bot_id, bot),
+    }
+
+
+def _forward_logs(shard_id, events):
+    # Os robôs registram mensagens com api.add_log_message; no shard elas vão para a API pela fila
+    try:
+        import api
+        api.add_log_message = lambda message, type="info": events.put(("log", shard_id, message, type))
+    except Exception as e:
+        logging.error(f"[Shard {shard_id}] Logs dos robôs não serão encaminhados: {e}")
+
+
+def shard_main(shard_id, conn, events):
+    """
+    Laço do processo do shard: recebe (id, operação, argumentos) pelo Pipe e responde
+    (id, ok, resultado). As operações rodam em threads para que um stop lento
+    (cancelamento de ordens) não bloqueie as consultas de status.
+    """
+    # Ctrl+C chega ao grupo de processos; o encerramento é coordenado pela API (drain)
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+    from modules.BinanceRobot import BinanceTraderBot
+    from modules.BotSupervisor import bot_supervisor, replace_bot
+    from modules.SessionRecorder import session_path
+    from modules.Profiler import sample_stacks
+    import modules.BinanceRobot as BinanceRobot
+    BinanceRobot.api_key = os.environ.get('BINANCE_API_KEY')
+    BinanceRobot.secret_key = os.environ.get('BINANCE_SECRET_KEY')
+    bot_supervisor.cycle_deadline = float(os.environ.get('BOT_CYCLE_DEADLINE', bot_supervisor.cycle_deadline))
+    bot_supervisor.max_failures = int(os.environ.get('BOT_MAX_FAILURES', bot_supervisor.max_failures))
+    _forward_logs(shard_id, events)
+
+    bots = {}
+    bots_lock = threading.Lock()
+    send_lock = threading.Lock()
+    executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix=f"shard-{shard_id}")
+
+    def spawn(bot_id, config, previous=None, lease=None):
+        record_dir = os.environ.get('BOT_RECORD_DIR')
+        bot = BinanceTraderBot(**config, record_session=session_path(record_dir, bot_id) if record_dir else None, bot_id=bot_id)
+        bot.config = config
+        bot.lease = lease
+        if previous is not None:
+            bot.restoreState(previous)
+        bot.thread = threading.Thread(target=bot.run, name=f"bot-{bot_id}", daemon=True)
+        bot.thread.start()
+        return bot
+
+    def restart(bot_id, old_bot):
+        # Reinício pelo supervisor do shard (mesma lógica do modo local)
+        bot = replace_bot(bot_id, old_bot, bots, bots_lock, spawn)
+        if bot is None:
+            return None
+        events.put(("log", shard_id, f"Robô {bot_id} reiniciado pelo supervisor (shard {shard_id})", "warning"))
+        return bot
+
+    def start(bot_id, config, lease=None):
+        with bots_lock:
+            if bot_id in bots:
+                raise ValueError(f"Robô {bot_id} já está em execução no shard {shard_id}")
+        bot = spawn(bot_id, config, lease=lease)
+        with bots_lock:
+            bots[bot_id] = bot
+        bot_supervisor.watch(bot_id, bot, restart)
+        return describe_bot(bot_id, bot)
+
+    def stop(bot_id, cancel_orders=True):
+        bot_supervisor.unwatch(bot_id)
+        with bots_lock:
+            bot = bots.pop(bot_id, None)
+        if bot is None:
+            return False
+        return bot.stop(cancel_orders)
+
+    def status():
+        with bots_lock:
+            items = list(bots.items())
+        return {
+            "shard": shard_id,
+            "pid": os.getpid(),
+            "bots": [describe_bot(bot_id, bot) for bot_id, bot in items],
+        }
+
+    def drain(timeout=60):
+        # Retorna [(bot_id, resultado do stop)] dos robôs cujo stop terminou dentro do prazo
+        bot_supervisor.stop()
+        with bots_lock:
+            items = list(bots.items())
+            bots.clear()
+        if not items:
+            return []
+        finished = []
+        # Sem `with`: o shutdown do bloco esperaria todos os stops e o timeout não valeria
+        pool = ThreadPoolExecutor(max_workers=min(8, len(items)), thread_name_prefix=f"shard-{shard_id}-drain")
+        futures = {pool.submit(bot.stop): bot_id for bot_id, bot in items}
+        try:
+            for future in as_completed(futures, timeout=timeout):
+                try:
+                    finished.append((futures[future], bool(future.result())))
+                except Exception as e:
+                    logging.error(f"[Shard {shard_id}] Erro ao parar robô {futures[future]}: {e}")
+        except FuturesTimeoutError:
+            logging.error(f"[Shard {shard_id}] Tempo esgotado ao encerrar robôs: {len(finished)}/{len(items)} parados")
+        pool.shutdown(wait=False)
+        return finished
+
+    def sample(duration=10.0, rate=100.0, include_idle=False):
+        with bots_lock:
+            current = dict(bots)
+        return sample_stacks(current, duration, rate, include_idle)
+
+    def profile_cycle(bot_id, timeout=60, sort="cumulative"):
+        with bots_lock:
+            bot = bots.get(bot_id)
+        if bot is None:
+            raise KeyError(f"Robô {bot_id} não está no shard {shard_id}")
+        profile = bot.requestCycleProfile(sort=sort)
+        profile.wait(timeout)
+        return profile.describe()
+
+    def handle_sigterm(signum, frame):
+        # SIGTERM direto no shard (ex: kill do grupo): para os robôs antes de sair
+        drain()
+        raise SystemExit(0)
+
+    signal.signal(signal.SIGTERM, handle_sigterm)
+
+    handlers = {
+        "start": start, "stop": stop, "status": status, "drain": drain, "ping": lambda: os.getpid(),
+        "sample": sample, "profile_cycle": profile_cycle,
+    }
+
+    def handle(request_id, op, kwargs):
+        try:
+            response = (request_id, True, handlers[op](**kwargs))
+        except Exception as e:
+            response = (request_id, False, f"{type(e).__name__}: {e}")
+        with send_lock:
+            try:
+                conn.send(response)
+            except (EOFError, OSError):
+                pass
+
+    while True:
+        try:
+            request_id, op, kwargs = conn.recv()
+        except (EOFError, OSError):
+            # API encerrada sem drain: para os robôs (cancela ordens) antes de sair
+            drain()
+            break
+        if op == "shutdown":
+            handle(request_id, "drain", kwargs)
+            break
+        executor.submit(handle, request_id, op, kwargs)
+
+    executor.shutdown(wait=False)
+
+
+# ------------------------------------------------------------------
+# Plano de controle (processo da API)
+
+class ShardClient:
+    """Ponta da API para um shard: envia operações e entrega as respostas às Futures pendentes."""
+
+    def __init__(self, shard_id, context, events):
+        self.shard_id = shard_id
+        self.context = context
+        self.events = events
+        self.process = None
+        self.conn = None
+        self._ids = itertools.count(1)
+        self._pending = {}
+        self._lock = threading.Lock()
+
+    def start(self):
+        """Inicia (ou reinicia, se o anterior morreu) o processo do shard com um Pipe novo."""
+        if self.conn is not None:
+            try:
+                self.conn.close()
+            except OSError:
+                pass
+        if self.process is not None:
+            self.process.join(0)
+        parent_conn, child_conn = self.context.Pipe()
+        self.process = self.context.Process(
+            target=shard_main, args=(self.shard_id, child_conn, self.events),
+            name=f"bot-shard-{self.shard_id}", daemon=True
+        )
+        self.process.start()
+        child_conn.close()
+        # Chamadas pendentes por processo: o leitor do processo morto só falha as dele
+        with self._lock:
+            self.conn = parent_conn
+            self._pending = {}
+            pending = self._pending
+        threading.Thread(target=self._reader, args=(parent_conn, pending), name=f"shard-reader-{self.shard_id}", daemon=True).start()
+
+    @property
+    def alive(self):
+        return self.process is not None and self.process.is_alive()
+
+    def call(self, op, kwargs=None, timeout=30):
+        if not self.alive:
+            raise RuntimeError(f"Shard {self.shard_id} não está em execução")
+        request_id = next(self._ids)
+        future = Future()
+        with self._lock:
+            pending = self._pending
+            pending[request_id] = future
+            self.conn.send((request_id, op, kwargs or {}))
+        try:
+            return future.result(timeout)
+        finally:
+            with self._lock:
+                pending.pop(request_id, None)
+
+    def _reader(self, conn, pending):
+        while True:
+            try:
+                request_id, ok, payload = conn.recv()
+            except (EOFError, OSError):
+                break
+            with self._lock:
+                future = pending.get(request_id)
+            if future is None:
+                continue
+            if ok:
+                future.set_result(payload)
+            else:
+                future.set_exception(RuntimeError(payload))
+        # Shard encerrado: falha as chamadas pendentes
+        with self._lock:
+            futures = list(pending.values())
+        for future in futures:
+            if not future.done():
+                future.set_exception(RuntimeError(f"Shard {self.shard_id} encerrado"))
+
+
+class ShardedBotPool:
+    """
+    Distribui os robôs entre `shards` processos por hash consistente do símbolo.
+
+    Um monitor confere a cada `check_interval` segundos se os processos estão vivos: um shard
+    morto é reiniciado e os robôs dele recriados com a mesma configuração e lease.
+
+    Parameters:
+        on_log (callable): Recebe (mensagem, tipo) dos logs dos robôs (ex: api.add_log_message).
+    """
+
+    def __init__(self, shards, on_log=None, start_method="spawn", check_interval=5.0):
+        self.context = multiprocessing.get_context(start_method)
+        self.events = self.context.Queue()
+        self.on_log = on_log
+        self.clients = {shard_id: ShardClient(shard_id, self.context, self.events) for shard_id in range(shards)}
+        self.ring = ConsistentHashRing(self.clients)
+        self.assignments = {}  # bot_id -> (shard, operation_code, stock_code)
+        self.configs = {}  # bot_id -> (config, lease), para recriar os robôs de um shard reiniciado
+        self.pending = {}  # bot_id -> shard, robôs de shards reiniciados ainda não recriados
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._respawn_lock = threading.Lock()
+        self._stop_event = threading.Event()
+
+    def start(self):
+        for client in self.clients.values():
+            client.start()
+        threading.Thread(target=self._event_loop, name="shard-events", daemon=True).start()
+        threading.Thread(target=self._monitor_loop, name="shard-monitor", daemon=True).start()
+        logging.info(f"[ShardedBotPool] {len(self.clients)} shard(s) iniciados")
+
+    def _event_loop(self):
+        while True:
+            try:
+                event = self.events.get()
+            except (EOFError, OSError):
+                break
+            if event is None:
+                break
+            kind, shard_id, message, level = event
+            if kind == "log" and self.on_log:
+                try:
+                    self.on_log(message, level)
+                except Exception as e:
+                    logging.error(f"[ShardedBotPool] Erro ao registrar log do shard {shard_id}: {e}")
+
+    def _monitor_loop(self):
+        while not self._stop_event.wait(self.check_interval):
+            try:
+                self.check()
+            except Exception as e:
+                logging.error(f"[ShardedBotPool] Erro na verificação dos shards: {e}")
+
+    def check(self):
+        """Uma rodada do monitor: reinicia os shards mortos e recria os robôs pendentes."""
+        for shard_id, client in self.clients.items():
+            if not client.alive:
+                self.respawn(shard_id)
+        self._recreate()
+
+    def respawn(self, shard_id):
+        """Reinicia o processo de um shard morto; os robôs dele ficam pendentes de recriação."""
+        client = self.clients[shard_id]
+        with self._respawn_lock:
+            if self._stop_event.is_set() or client.alive:
+                return False
+            exitcode = client.process.exitcode if client.process is not None else None
+            client.start()
+            with self._lock:
+                lost = [bot_id for bot_id, assignment in self.assignments.items() if assignment[0] == shard_id]
+                for bot_id in lost:
+                    self.pending[bot_id] = shard_id
+        message = f"Shard {shard_id} encerrado (código {exitcode}); processo reiniciado, recriando {len(lost)} robô(s)"
+        logging.error(f"[ShardedBotPool] {message}")
+        if self.on_log:
+            self.on_log(message, "warning")
+        return True
+
+    def _recreate(self, timeout=120):
+        # Falhas ficam pendentes e são tentadas de novo na próxima rodada
+        with self._lock:
+            pending = [(bot_id, shard_id, self.configs.get(bot_id)) for bot_id, shard_id in self.pending.items()]
+        for bot_id, shard_id, entry in pending:
+            if entry is None:
+                with self._lock:
+                    self.pending.pop(bot_id, None)
+                continue
+            config, lease = entry
+            client = self.clients[shard_id]
+            try:
+                client.call("start", {"bot_id": bot_id, "config": config, "lease": lease}, timeout)
+            except Exception as e:
+                logging.error(f"[ShardedBotPool] Erro ao recriar robô {bot_id} no shard {shard_id}: {e}")
+                continue
+            with self._lock:
+                still_assigned = self.pending.pop(bot_id, None) is not None and bot_id in self.assignments
+            if not still_assigned:
+                # Parado (stop_bot) enquanto era recriado
+                try:
+                    client.call("stop", {"bot_id": bot_id}, timeout)
+                except Exception as e:
+                    logging.error(f"[ShardedBotPool] Erro ao parar robô {bot_id} no shard {shard_id}: {e}")
+                continue
+            if self.on_log:
+                self.on_log(f"Robô {bot_id} recriado no shard {shard_id}", "warning")
+
+    def shard_for(self, symbol):
+        return self.ring.get_node(symbol)
+
+    def has(self, bot_id):
+        with self._lock:
+            return bot_id in self.assignments
+
+    def find(self, operation_code, stock_code):
+        with self._lock:
+            for bot_id, (_, code, stock) in self.assignments.items():
+                if code == operation_code and stock == stock_code:
+                    return bot_id
+        return None
+
+    def start_bot(self, bot_id, config, timeout=120, lease=None):
+        """
+        Cria o robô no shard do par. `config` são os argumentos de BinanceTraderBot (serializáveis)
+        e `lease` o (node_id, epoch) do BotCoordinator, conferido pelo robô antes de enviar ordens.
+        """
+        shard_id = self.shard_for(config['operation_code'])
+        if not self.clients[shard_id].alive:
+            self.respawn(shard_id)
+        self.clients[shard_id].call("start", {"bot_id": bot_id, "config": config, "lease": lease}, timeout)
+        with self._lock:
+            self.assignments[bot_id] = (shard_id, config['operation_code'], config['stock_code'])
+            self.configs[bot_id] = (config, lease)
+        return shard_id
+
+    def stop_bot(self, bot_id, cancel_orders=True, timeout=60):
+        with self._lock:
+            assignment = self.assignments.pop(bot_id, None)
+            self.configs.pop(bot_id, None)
+            self.pending.pop(bot_id, None)
+        if assignment is None:
+            return False
+        return self.clients[assignment[0]].call("stop", {"bot_id": bot_id, "cancel_orders": cancel_orders}, timeout)
+
+    def _each(self, op, timeout, kwargs=None):
+        """Executa a operação em todos os shards em paralelo. Retorna {shard: resultado | Exception}."""
+        results = {}
+        with ThreadPoolExecutor(max_workers=max(1, len(self.clients))) as pool:
+            futures = {pool.submit(client.call, op, kwargs, timeout): shard_id for shard_id, client in self.clients.items()}
+            for future in as_completed(futures):
+                try:
+                    results[futures[future]] = future.result()
+                except Exception as e:
+                    results[futures[future]] = e
+        return results
+
+    def list_bots(self, timeout=5):
+        bots = []
+        for shard_id, result in self._each("status", timeout).items():
+            if isinstance(result, Exception):
+                logging.error(f"[ShardedBotPool] Shard {shard_id} sem resposta: {result}")
+                continue
+            for bot in result["bots"]:
+                bots.append({**bot, "shard": shard_id})
+        return bots
+
+    def status(self, timeout=5):
+        """Situação de cada shard (vivo, pid, quantidade de robôs)."""
+        shards = []
+        for shard_id, result in sorted(self._each("status", timeout).items()):
+            if isinstance(result, Exception):
+                shards.append({"shard": shard_id, "alive": self.clients[shard_id].alive, "error": str(result)})
+            else:
+                shards.append({"shard": shard_id, "alive": True, "pid": result["pid"], "bots": len(result["bots"])})
+        return shards
+
+    def sample(self, duration=10.0, rate=100.0, include_idle=False):
+        """Amostragem de pilhas em todos os shards ao mesmo tempo. Retorna {shard: resultado | Exception}."""
+        kwargs = {"duration": duration, "rate": rate, "include_idle": include_idle}
+        return self._each("sample", duration + 10, kwargs)
+
+    def profile_cycle(self, bot_id, timeout=60, sort="cumulative"):
+        """cProfile do próximo ciclo do robô no shard dele (None se o robô não está nos shards)."""
+        with self._lock:
+            assignment = self.assignments.get(bot_id)
+        if assignment is None:
+            return None
+        kwargs = {"bot_id": bot_id, "timeout": timeout, "sort": sort}
+        return self.clients[assignment[0]].call("profile_cycle", kwargs, timeout + 10)
+
+    def drain(self, timeout=60):
+        """
+        Para todos os robôs de todos os shards em paralelo.
+        Retorna (parados, total, ids dos robôs cujo stop terminou dentro do prazo).
+        """
+        # Encerramento: o monitor não reinicia mais shards
+        self._stop_event.set()
+        with self._lock:
+            total = len(self.assignments)
+            self.assignments.clear()
+            self.configs.clear()
+            self.pending.clear()
+        stopped = 0
+        finished = []
+        for shard_id, result in self._each("drain", timeout + 5, {"timeout": timeout}).items():
+            if isinstance(result, Exception):
+                logging.error(f"[ShardedBotPool] Erro ao encerrar shard {shard_id}: {result}")
+                continue
+            for bot_id, ok in result:
+                finished.append(bot_id)
+                stopped += 1 if ok else 0
+        return stopped, total, finished
+
+    def shutdown(self, timeout=60):
+        """Para os robôs e encerra os processos."""
+        stopped = self.drain(timeout)
+        for client in self.clients.values():
+            try:
+                client.call("shutdown", timeout=10)
+            except Exception:
+                pass
+            if client.process is not None:
+                client.process.join(5)
+                if client.process.is_alive():
+                    client.process.terminate()
+        self.events.put(None)
+        return stopped
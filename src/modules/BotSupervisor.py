@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+"""
+Supervisor dos robôs em execução.
+Cada robô publica heartbeat, início/fim de ciclo e falhas consecutivas (BinanceTraderBot.run);
+uma thread verifica periodicamente quem travou (ciclo além do prazo), morreu (thread
+encerrada sem stop) ou está falhando em sequência e o reinicia a partir do último estado,
+com espera exponencial com jitter entre tentativas.
+Uma thread travada em uma chamada HTTP não pode ser interrompida em Python: o robô antigo
+recebe stop (sem cancelar ordens) e sai ao fim do ciclo em andamento.
+"""
+
+import logging
+import threading
+import time
+from datetime import datetime
+
+from modules.Resilience import backoff_delay
+
+# Estados em que o robô é considerado ativo
+ACTIVE_STATES = ("starting", "running")
+
+
+def format_time(timestamp):
+    return datetime.fromtimestamp(timestamp).strftime("%Y-%m-%d %H:%M:%S") if timestamp else None
+
+
+def replace_bot(bot_id, old_bot, bots, bots_lock, spawn):
+    """
+    Reinício pelo supervisor (modo local e shards): o robô travado/falhando recebe stop sem
+    cancelar ordens (não espera o ciclo preso) e `spawn(bot_id, config, previous=robô antigo)`
+    cria o substituto a partir do estado dele, trocado em `bots` sob `bots_lock`.
+    Retorna None se o robô foi parado nesse meio tempo.
+    """
+    old_bot.stop(cancel_orders=False)
+    with bots_lock:
+        if bots.get(bot_id) is not old_bot:
+            return None
+    bot = spawn(bot_id, old_bot.config, previous=old_bot)
+    with bots_lock:
+        replaced = bots.get(bot_id) is old_bot
+        if replaced:
+            bots[bot_id] = bot
+    if not replaced:
+        bot.stop()
+        return None
+    return bot
+
+
+class SupervisedBot:
+    def __init__(self, bot, restart):
+        self.bot = bot
+        self.restart = restart
+        self.restarts = 0
+        self.attempts = 0           # Reinícios seguidos sem período saudável
+        self.restarted_at = None
+        self.next_restart_at = None
+        self.reason = None
+
+
+class BotSupervisor:
+    """
+    Parameters:
+        cycle_deadline (float): Segundos máximos de um ciclo (execute) antes de o robô ser considerado travado.
+        max_failures (int): Falhas consecutivas de ciclo que disparam o reinício.
+        restart_base / restart_max (float): Espera do primeiro reinício e teto da espera exponencial.
+        healthy_after (float): Segundos saudáveis após um reinício para zerar a sequência de tentativas.
+    """
+
+    def __init__(self, interval=5.0, cycle_deadline=600.0, max_failures=5, restart_base=10.0, restart_max=600.0, healthy_after=600.0):
+        self.interval = interval
+        self.cycle_deadline = cycle_deadline
+        self.max_failures = max_failures
+        self.restart_base = restart_base
+        self.restart_max = restart_max
+        self.healthy_after = healthy_after
+        self.bots = {}
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def watch(self, bot_id, bot, restart):
+        """
+        Passa a supervisionar o robô. `restart(bot_id, robô antigo)` cria e inicia o
+        substituto e o retorna (None se o robô não deve mais rodar).
+        """
+        with self._lock:
+            entry = self.bots.get(bot_id)
+            if entry is None:
+                self.bots[bot_id] = SupervisedBot(bot, restart)
+            else:
+                entry.bot, entry.restart = bot, restart
+        self.start()
+
+    def unwatch(self, bot_id):
+        with self._lock:
+            self.bots.pop(bot_id, None)
+
+    def evaluate(self, bot, now=None):
+        """Estado do robô: starting, running, stalled, failing, dead ou stopped."""
+        now = now or time.time()
+        if bot.stop_event.is_set():
+            return "stopped"
+        thread = getattr(bot, 'thread', None)
+        if thread is not None and not thread.is_alive():
+            return "dead"
+        if bot.cycle_started_at and now - bot.cycle_started_at > self.cycle_deadline:
+            return "stalled"
+        if bot.last_heartbeat is None:
+            # Inicialização (updateAllData) também tem prazo
+            return "stalled" if bot.run_started_at and now - bot.run_started_at > self.cycle_deadline else "starting"
+        if now - bot.last_heartbeat > bot.time_to_sleep + self.cycle_deadline:
+            return "stalled"
+        if bot.consecutive_failures >= self.max_failures:
+            return "failing"
+        return "running"
+
+    def describe(self, bot_id, bot):
+        """Estado, heartbeat, último ciclo, tempo no ar e reinícios do robô (para listagens e saúde)."""
+        now = time.time()
+        with self._lock:
+            entry = self.bots.get(bot_id)
+        status = bot.getRuntimeStatus(now)
+        status["state"] = self.evaluate(bot, now)
+        status["is_active"] = status["state"] in ACTIVE_STATES
+        status["restarts"] = entry.restarts if entry else 0
+        status["restart_reason"] = entry.reason if entry else None
+        status["next_restart_at"] = format_time(entry.next_restart_at) if entry else None
+        return status
+
+    def check(self):
+        """Verifica todos os robôs e reinicia os travados/falhando respeitando a espera."""
+        now = time.time()
+        with self._lock:
+            entries = list(self.bots.items())
+
+        for bot_id, entry in entries:
+            state = self.evaluate(entry.bot, now)
+            if state in ACTIVE_STATES:
+                entry.next_restart_at = None
+                if entry.attempts and entry.restarted_at and now - entry.restarted_at > self.healthy_after:
+                    entry.attempts = 0
+                continue
+            if state == "stopped":
+                continue
+
+            if entry.next_restart_at is None:
+                entry.reason = state
+                entry.next_restart_at = now + backoff_delay(entry.attempts, self.restart_base, self.restart_max)
+                logging.error(f"[BotSupervisor] Robô {bot_id} {state}; reinício em {entry.next_restart_at - now:.0f}s")
+                continue
+            if now < entry.next_restart_at:
+                continue
+
+            self._restart(bot_id, entry, state)
+
+    def _restart(self, bot_id, entry, state):
+        old = entry.bot
+        try:
+            bot = entry.restart(bot_id, old)
+        except Exception as e:
+            logging.error(f"[BotSupervisor] Erro ao reiniciar robô {bot_id}: {e}")
+            bot = old
+        entry.attempts += 1
+        entry.next_restart_at = None
+        if bot is None:
+            self.unwatch(bot_id)
+            return
+        if bot is not old:
+            entry.bot = bot
+            entry.restarts += 1
+            entry.restarted_at = time.time()
+            logging.info(f"[BotSupervisor] Robô {bot_id} reiniciado ({state}, reinício {entry.restarts})")
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._loop, name="bot-supervisor", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop_event.set()
+
+    def _loop(self):
+        while not self._stop_event.is_set():
+            try:
+                self.check()
+            except Exception as e:
+                logging.error(f"[BotSupervisor] Erro na verificação: {e}")
+            self._stop_event.wait(self.interval)
+
+
+bot_supervisor = BotSupervisor()
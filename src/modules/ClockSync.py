@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Sincronização do relógio local com o servidor da Binance.
+Um serviço em segundo plano por endpoint, compartilhado por todos os clientes:
+amostras do /api/v3/time compensadas pelo RTT (ponto médio da requisição),
+com filtro de mediana. As requisições assinadas só leem o desvio atual.
+"""
+
+import logging
+import statistics
+import threading
+import time
+from collections import deque
+
+
+class ClockSync:
+    """
+    Estima o desvio (servidor - local, em ms).
+
+    Parameters:
+        fetch_server_time (callable): Retorna o serverTime em ms (ex: client.get_server_time()["serverTime"]).
+        interval (float): Segundos entre rodadas de sincronização.
+        samples (int): Amostras por rodada; usa a mediana das de menor RTT.
+        window (int): Rodadas mantidas; o desvio publicado é a mediana delas.
+    """
+
+    def __init__(self, fetch_server_time, interval=30.0, samples=5, window=5):
+        self.fetch_server_time = fetch_server_time
+        self.interval = interval
+        self.samples = samples
+        self.estimates = deque(maxlen=window)
+        self.offset = 0.0
+        self.rtt = None
+        self.last_sync = 0
+        self.ready = threading.Event()
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def measure(self):
+        """Uma amostra: o servidor respondeu em algum ponto do RTT, assumimos o ponto médio."""
+        sent = time.time()
+        server_time = self.fetch_server_time()
+        received = time.time()
+        return server_time - (sent + received) * 500, (received - sent) * 1000
+
+    def sync_now(self, reset=False):
+        """Executa uma rodada de amostras. reset=True descarta as estimativas anteriores (ex: após -1021)."""
+        measurements = []
+        for _ in range(self.samples):
+            try:
+                measurements.append(self.measure())
+            except Exception as e:
+                logging.error(f"[ClockSync] Erro ao consultar o horário do servidor: {e}")
+        if not measurements:
+            return False
+
+        # Amostras com RTT menor têm menos incerteza (±RTT/2)
+        measurements.sort(key=lambda m: m[1])
+        best = measurements[:len(measurements) // 2 + 1]
+        estimate = statistics.median(offset for offset, _ in best)
+
+        with self._lock:
+            if reset:
+                self.estimates.clear()
+            self.estimates.append(estimate)
+            self.offset = statistics.median(self.estimates)
+            self.rtt = best[0][1]
+            self.last_sync = time.time()
+        self.ready.set()
+        return True
+
+    def now_ms(self):
+        """Timestamp em ms no relógio do servidor."""
+        return int(time.time() * 1000 + self.offset)
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._loop, name="clock-sync", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop_event.set()
+
+    def _loop(self):
+        synced = self.ready.is_set()
+        # Após uma falha, tenta de novo mais cedo
+        while not self._stop_event.wait(self.interval if synced else min(self.interval, 5)):
+            synced = self.sync_now()
+
+
+_clocks = {}
+_clocks_lock = threading.Lock()
+
+def getClockSync(key, fetch_server_time, interval=30.0):
+    """
+    Retorna o serviço do endpoint `key` (ex: URL da API), criando-o no primeiro uso.
+    A primeira rodada roda na criação para que o desvio já esteja disponível.
+    """
+    with _clocks_lock:
+        clock = _clocks.get(key)
+        if clock is None:
+            clock = ClockSync(fetch_server_time, interval=interval)
+            _clocks[key] = clock
+            clock.sync_now()
+            clock.start()
+        return clock
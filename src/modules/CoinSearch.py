@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+"""
+Catálogo e busca de moedas da Binance.
+O catálogo guarda os pares em negociação já categorizados e é reconstruído apenas
+quando o exchange info (ou os nomes cadastrados) muda. A busca usa uma trie de
+prefixos (símbolo, ativo base, ativo de cotação, nome) e trigramas para erros de
+digitação, com resultados ordenados por relevância.
+"""
+
+import hashlib
+import heapq
+import logging
+import re
+import threading
+import time
+
+# Moedas fiduciárias e principais memecoins conhecidas (pode atualizar conforme necessário)
+FIAT_ASSETS = ('EUR', 'USD', 'GBP', 'AUD', 'BRL')
+MEMECOINS = ('DOGE', 'SHIB', 'PEPE', 'FLOKI', 'BABYDOGE', 'ELON', 'SAMO', 'BONK', 'WOJAK')
+CATEGORIES = ('USDT', 'BTC', 'ETH', 'BNB', 'BUSD', 'FIAT', 'OTHER')
+
+# Peso de cada campo na relevância
+FIELD_WEIGHTS = {'symbol': 1.0, 'baseAsset': 0.9, 'name': 0.7, 'quoteAsset': 0.4}
+FUZZY_THRESHOLD = 0.4 # Similaridade mínima (Jaccard de trigramas)
+FUZZY_MIN_RESULTS = 10 # Trigramas só completam buscas sem termo exato e com poucos resultados por prefixo
+FUZZY_MAX_TERMS = 20 # Termos parecidos considerados (os de maior similaridade)
+
+
+def normalize(text):
+    """Maiúsculas, só letras e números (ex: 'btc/usdt' -> 'BTCUSDT')."""
+    return re.sub(r'[^0-9A-Z]', '', (text or '').upper())
+
+
+def trigrams(term):
+    padded = f"${term}$"
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def categorize(quote_asset):
+    if quote_asset in ('USDT', 'BTC', 'ETH', 'BNB', 'BUSD'):
+        return quote_asset
+    if quote_asset in FIAT_ASSETS:
+        return 'FIAT'
+    return 'OTHER'
+
+
+class CoinSearchIndex:
+    """
+    Índice em memória sobre uma lista de moedas (dicionários com symbol, baseAsset, quoteAsset e name opcional).
+    Cada nó da trie guarda a melhor pontuação de prefixo por moeda, então uma busca por
+    prefixo custa O(tamanho da consulta) + ordenação das moedas encontradas.
+    """
+
+    def __init__(self, coins):
+        self.coins = coins
+        self.trie = {}          # caractere -> nó; nó[None] = {índice da moeda: pontuação}
+        self.terms = {}         # termo -> {índice da moeda: peso}
+        self.trigram_index = {} # trigrama -> {termo, ...}
+        self.term_grams = {}    # termo -> quantidade de trigramas
+        # Desempate fixo (símbolo mais curto, depois alfabético), pré-calculado para ordenar rápido
+        order = sorted(range(len(coins)), key=lambda index: (len(coins[index]['symbol']), coins[index]['symbol']))
+        self.rank = [0] * len(coins)
+        for position, index in enumerate(order):
+            self.rank[index] = position
+
+        for index, coin in enumerate(coins):
+            for field, weight in FIELD_WEIGHTS.items():
+                value = coin.get(field)
+                if not value:
+                    continue
+                terms = {normalize(value)}
+                if field == 'name':
+                    terms.update(normalize(word) for word in value.split())
+                for term in terms:
+                    if term:
+                        self._add(term, index, weight)
+
+    def _add(self, term, index, weight):
+        postings = self.terms.setdefault(term, {})
+        if postings.get(index, 0) >= weight:
+            return
+        postings[index] = weight
+        if term not in self.term_grams:
+            grams = trigrams(term)
+            self.term_grams[term] = len(grams)
+            for gram in grams:
+                self.trigram_index.setdefault(gram, set()).add(term)
+
+        # Prefixo mais longo em relação ao termo pontua mais; termo completo ganha bônus
+        node = self.trie
+        for position, char in enumerate(term, 1):
+            node = node.setdefault(char, {})
+            scores = node.setdefault(None, {})
+            score = weight * (50 + 40 * position / len(term) + (10 if position == len(term) else 0))
+            if score > scores.get(index, 0):
+                scores[index] = score
+
+    def search(self, query, limit=None, predicate=None):
+        """
+        Parameters:
+            query (str): Texto buscado (símbolo, ativo ou nome; aceita prefixo e erros de digitação).
+            limit (int): Quantidade de resultados ordenados (os demais só entram na contagem).
+            predicate (callable): Filtro opcional aplicado a cada moeda.
+
+        Returns:
+            tuple: (total de moedas encontradas, [(pontuação, moeda), ...] da mais relevante para a menos relevante)
+        """
+        term = normalize(query)
+        if not term:
+            return 0, []
+
+        scores = {}
+        node = self.trie
+        for char in term:
+            node = node.get(char)
+            if node is None:
+                break
+        else:
+            scores.update(node.get(None, {}))
+
+        # Trigramas: termos parecidos (ex: 'CARDNO', 'DOGECOIM') com pontuação abaixo dos prefixos
+        if len(term) >= 3 and len(scores) < FUZZY_MIN_RESULTS and term not in self.terms:
+            query_grams = trigrams(term)
+            shared = {}
+            for gram in query_grams:
+                for candidate in self.trigram_index.get(gram, ()):
+                    shared[candidate] = shared.get(candidate, 0) + 1
+            similar = heapq.nlargest(FUZZY_MAX_TERMS, (
+                (count / (len(query_grams) + self.term_grams[candidate] - count), candidate)
+                for candidate, count in shared.items() if candidate != term
+            ))
+            for similarity, candidate in similar:
+                if similarity < FUZZY_THRESHOLD:
+                    break
+                for index, weight in self.terms[candidate].items():
+                    score = 45 * weight * similarity
+                    if score > scores.get(index, 0):
+                        scores[index] = score
+
+        candidates = list(scores) if predicate is None else [index for index in scores if predicate(self.coins[index])]
+        key = lambda index: (-scores[index], self.rank[index])
+        if limit and limit < len(candidates):
+            ranked = heapq.nsmallest(limit, candidates, key=key)
+        else:
+            ranked = sorted(candidates, key=key)
+        return len(candidates), [(round(scores[index], 2), self.coins[index]) for index in ranked]
+
+
+class CoinCatalog:
+    """
+    Pares em negociação da corretora com categorias e índice de busca.
+    O exchange info é consultado no máximo a cada `ttl` segundos e o índice só é
+    reconstruído quando a lista de pares (ou os nomes cadastrados) muda.
+    """
+
+    def __init__(self, ttl=300):
+        self.ttl = ttl
+        self.coins = []
+        self.categories = {category: [] for category in CATEGORIES}
+        self.memecoins = []
+        self.index = CoinSearchIndex([])
+        self.fingerprint = None
+        self.refreshed_at = 0
+        self._lock = threading.Lock()
+
+    def refresh(self, client_binance, names=None, force=False):
+        """
+        Atualiza o catálogo se expirou.
+
+        Parameters:
+            names (callable): Retorna {ativo base: nome} (ex: moedas cadastradas no banco).
+        """
+        with self._lock:
+            if not force and self.coins and time.time() - self.refreshed_at < self.ttl:
+                return self
+
+            exchange_info = client_binance.get_exchange_info()
+            coin_names = names() if names else {}
+            symbols = [
+                (info['symbol'], info['baseAsset'], info['quoteAsset'])
+                for info in exchange_info['symbols'] if info['status'] == 'TRADING'
+            ]
+            fingerprint = hashlib.sha1(repr((symbols, sorted(coin_names.items()))).encode()).hexdigest()
+            self.refreshed_at = time.time()
+            if fingerprint == self.fingerprint:
+                return self
+
+            started = time.time()
+            coins = []
+            categories = {category: [] for category in CATEGORIES}
+            for symbol, base_asset, quote_asset in symbols:
+                coin = {
+                    'symbol': symbol,
+                    'baseAsset': base_asset,
+                    'quoteAsset': quote_asset,
+                    'name': coin_names.get(base_asset),
+                    'category': categorize(quote_asset),
+                    'is_memecoin': base_asset in MEMECOINS
+                }
+                coins.append(coin)
+                categories[coin['category']].append(coin)
+
+            self.index = CoinSearchIndex(coins)
+            self.coins, self.categories = coins, categories
+            self.memecoins = [coin for coin in coins if coin['is_memecoin']]
+            self.fingerprint = fingerprint
+            logging.info(f"[CoinCatalog] Índice de moedas reconstruído: {len(coins)} pares em {(time.time() - started) * 1000:.0f} ms")
+            return self
+
+    def filter(self, coin_type=None):
+        """Moedas do tipo solicitado ('memecoin', categoria como 'USDT', ou todas)."""
+        if not coin_type:
+            return self.coins
+        if coin_type == 'memecoin':
+            return self.memecoins
+        return self.categories.get(coin_type.upper(), [])
+
+    def search(self, query, coin_type=None, limit=None):
+        predicate = None
+        if coin_type == 'memecoin':
+            predicate = lambda coin: coin['is_memecoin']
+        elif coin_type:
+            predicate = lambda coin: coin['category'] == coin_type.upper()
+        return self.index.search(query, limit, predicate)
+
+
+coin_catalog = CoinCatalog()
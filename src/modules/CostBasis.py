@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Custo médio / FIFO da posição a partir das execuções (fills), com taxas.
+Cada execução é aplicada em O(1) amortizado: compras empilham um lote,
+vendas consomem os lotes mais antigos (FIFO) ou o lote único (custo médio).
+"""
+
+from collections import deque
+
+
+class CostBasis:
+    """
+    Parameters:
+        method (str): "fifo" (lotes por ordem de entrada) | "average" (custo médio ponderado).
+        lots (list): Lotes abertos [[quantidade, custo_unitário], ...] (estado salvo).
+    """
+
+    EPSILON = 1e-12
+
+    def __init__(self, method="fifo", lots=None, realized_pnl=0.0, fees=0.0, unmatched_quantity=0.0):
+        self.method = method
+        self.lots = deque([list(lot) for lot in (lots or [])])
+        self.position = sum(quantity for quantity, _ in self.lots)
+        self.cost = sum(quantity * unit_cost for quantity, unit_cost in self.lots)
+        self.realized_pnl = realized_pnl
+        self.fees = fees
+        self.unmatched_quantity = unmatched_quantity  # Vendido sem lote (posição anterior ao bot)
+
+    def apply_fill(self, side, price, quantity, fee_quote=0.0, fee_base=0.0):
+        """
+        Aplica uma execução.
+
+        Parameters:
+            fee_quote (float): Taxa cobrada na moeda de cotação (ex: USDT).
+            fee_base (float): Taxa cobrada no próprio ativo (ex: BTC), reduz a quantidade recebida/posição.
+
+        Returns:
+            float: PnL realizado por esta execução (0 nas compras).
+        """
+        self.fees += fee_quote + fee_base * price
+
+        if side == "BUY":
+            received = quantity - fee_base
+            if received <= self.EPSILON:
+                return 0.0
+            # A taxa entra no custo do lote
+            unit_cost = (price * quantity + fee_quote) / received
+            if self.method == "average" and self.lots:
+                lot = self.lots[0]
+                total = lot[0] + received
+                lot[1] = (lot[0] * lot[1] + received * unit_cost) / total
+                lot[0] = total
+            else:
+                self.lots.append([received, unit_cost])
+            self.position += received
+            self.cost += received * unit_cost
+            return 0.0
+
+        # Venda: recebe preço * quantidade - taxa; baixa quantidade + taxa em ativo dos lotes
+        proceeds = price * quantity - fee_quote
+        remaining = quantity + fee_base
+        consumed_cost = 0.0
+        while remaining > self.EPSILON and self.lots:
+            lot = self.lots[0]
+            take = min(remaining, lot[0])
+            consumed_cost += take * lot[1]
+            lot[0] -= take
+            remaining -= take
+            if lot[0] <= self.EPSILON:
+                self.lots.popleft()
+        matched = quantity + fee_base - remaining
+        self.position = max(0.0, self.position - matched)
+        self.cost = max(0.0, self.cost - consumed_cost)
+        if not self.lots:
+            self.position, self.cost = 0.0, 0.0
+
+        if remaining > self.EPSILON:
+            # Sem lote conhecido: custo = preço de venda (não gera PnL)
+            self.unmatched_quantity += remaining
+            consumed_cost += min(remaining, quantity) * price
+
+        pnl = proceeds - consumed_cost
+        self.realized_pnl += pnl
+        return pnl
+
+    @property
+    def average_cost(self):
+        return self.cost / self.position if self.position > self.EPSILON else 0.0
+
+    def unrealized_pnl(self, price):
+        if price is None or self.position <= self.EPSILON:
+            return 0.0
+        return self.position * price - self.cost
+
+    def break_even_price(self, fee_rate=0.001):
+        """
+        Preço de venda da posição atual que zera o resultado total do bot
+        (realizado + venda da posição com a taxa informada).
+        """
+        if self.position <= self.EPSILON:
+            return 0.0
+        return max(0.0, (self.cost - self.realized_pnl) / (self.position * (1 - fee_rate)))
+
+    def state(self):
+        return {
+            "method": self.method,
+            "lots": [list(lot) for lot in self.lots],
+            "realized_pnl": self.realized_pnl,
+            "fees": self.fees,
+            "unmatched_quantity": self.unmatched_quantity,
+        }
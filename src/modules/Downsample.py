@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""
+Redução de séries para gráficos: Largest-Triangle-Three-Buckets (LTTB).
+Mantém o primeiro e o último ponto e, em cada faixa, o ponto que forma o maior
+triângulo com o ponto escolhido antes e a média da faixa seguinte, preservando
+picos e vales com um número fixo de pontos.
+"""
+
+
+def lttb(points, threshold):
+    """
+    Parameters:
+        points (list): [(x, y), ...] ordenados por x.
+        threshold (int): Quantidade máxima de pontos no resultado.
+
+    Returns:
+        list: Subconjunto de `points` com no máximo `threshold` pontos.
+    """
+    length = len(points)
+    if threshold >= length or threshold <= 0:
+        return list(points)
+    if threshold < 3:
+        return [points[0], points[-1]][:threshold]
+
+    sampled = [points[0]]
+    bucket_size = (length - 2) / (threshold - 2)
+    a = 0
+
+    for i in range(threshold - 2):
+        # Média da próxima faixa (último ponto na última faixa)
+        next_start = int((i + 1) * bucket_size) + 1
+        next_end = min(int((i + 2) * bucket_size) + 1, length)
+        if next_start >= next_end:
+            next_start, next_end = length - 1, length
+        count = next_end - next_start
+        avg_x = sum(points[j][0] for j in range(next_start, next_end)) / count
+        avg_y = sum(points[j][1] for j in range(next_start, next_end)) / count
+
+        # Ponto da faixa atual com maior área em relação ao ponto anterior e à média seguinte
+        start = int(i * bucket_size) + 1
+        end = int((i + 1) * bucket_size) + 1
+        ax, ay = points[a]
+        max_area, max_index = -1.0, start
+        for j in range(start, end):
+            area = abs((ax - avg_x) * (points[j][1] - ay) - (ax - points[j][0]) * (avg_y - ay))
+            if area > max_area:
+                max_area, max_index = area, j
+
+        sampled.append(points[max_index])
+        a = max_index
+
+    sampled.append(points[-1])
+    return sampled
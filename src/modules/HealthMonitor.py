@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Coletor de saúde do sistema em segundo plano.
+As verificações (conexão com a Binance, banco de dados, robôs em execução) rodam
+em uma thread a cada intervalo; as rotas de status apenas devolvem o último
+retrato já montado, com a idade dele, sem nenhuma chamada externa por requisição.
+"""
+
+import logging
+import threading
+import time
+from datetime import datetime
+
+
+class HealthCollector:
+    """
+    Parameters:
+        interval (float): Segundos entre coletas.
+        stale_after (float): Idade a partir da qual o retrato é considerado desatualizado
+            (coletor parado ou travado). Padrão: 3 intervalos.
+    """
+
+    def __init__(self, interval=30.0, stale_after=None):
+        self.interval = interval
+        self.stale_after = stale_after or interval * 3
+        self.checks = {}
+        self.snapshot = None  # Substituído por inteiro a cada coleta (leitura sem trava)
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def register(self, name, check):
+        """
+        Registra uma verificação. `check()` retorna um dicionário com ao menos 'status'
+        ("ok", "degraded", "error", ...) e pode levantar exceção (vira status "error").
+        """
+        with self._lock:
+            self.checks[name] = check
+
+    def collect(self):
+        """Executa todas as verificações e publica o novo retrato."""
+        with self._lock:
+            checks = dict(self.checks)
+
+        results = {}
+        for name, check in checks.items():
+            started = time.time()
+            try:
+                result = dict(check())
+            except Exception as e:
+                logging.error(f"[HealthCollector] Erro na verificação '{name}': {e}")
+                result = {"status": "error", "error": str(e)}
+            result["latency_ms"] = round((time.time() - started) * 1000, 2)
+            results[name] = result
+
+        healthy = all(result.get("status") in ("ok", "not_configured") for result in results.values())
+        self.snapshot = {
+            "status": "healthy" if healthy else "degraded",
+            "collected_at": time.time(),
+            "collected_at_iso": datetime.now().isoformat(),
+            "checks": results,
+        }
+        return self.snapshot
+
+    def get_snapshot(self):
+        """
+        Último retrato com a idade em segundos. Sem coleta ainda, coleta na hora (só no primeiro acesso).
+
+        Returns:
+            dict: {'status', 'collected_at', 'collected_at_iso', 'age_seconds', 'stale', 'checks'}
+        """
+        snapshot = self.snapshot or self.collect()
+        age = time.time() - snapshot["collected_at"]
+        return {**snapshot, "age_seconds": round(age, 3), "stale": age > self.stale_after}
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._loop, name="health-collector", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop_event.set()
+
+    def _loop(self):
+        while not self._stop_event.is_set():
+            started = time.time()
+            try:
+                self.collect()
+            except Exception as e:
+                logging.error(f"[HealthCollector] Erro ao coletar: {e}")
+            self._stop_event.wait(max(0.0, self.interval - (time.time() - started)))
+
+
+health_collector = HealthCollector()
@@ -0,0 +1,352 @@
+#!/usr/bin/env python3
+"""
+Espelho local do livro de ofertas (order book) de um par.
+Mantido a partir de um snapshot REST (/api/v3/depth) + atualizações diff-depth
+(<symbol>@depth@100ms), com detecção de buraco na sequência e ressincronização.
+Oferece melhor compra/venda, profundidade por preço, preço ponderado pela
+profundidade e posição estimada na fila de uma ordem nossa.
+"""
+
+import bisect
+import logging
+import threading
+import time
+
+
+class BookSide:
+    """Um lado do livro: preços ordenados (bisect) + quantidade por preço."""
+
+    def __init__(self, is_bid):
+        self.is_bid = is_bid
+        self.prices = []    # Ordem crescente
+        self.quantity = {}  # preço -> quantidade
+
+    def __len__(self):
+        return len(self.prices)
+
+    def clear(self):
+        self.prices = []
+        self.quantity = {}
+
+    def set(self, price, quantity):
+        """Atualiza um nível (quantidade 0 remove). Retorna a quantidade anterior."""
+        previous = self.quantity.get(price, 0.0)
+        if quantity <= 0:
+            if price in self.quantity:
+                del self.quantity[price]
+                index = bisect.bisect_left(self.prices, price)
+                del self.prices[index]
+        else:
+            if price not in self.quantity:
+                bisect.insort(self.prices, price)
+            self.quantity[price] = quantity
+        return previous
+
+    def best(self):
+        if not self.prices:
+            return None
+        return self.prices[-1] if self.is_bid else self.prices[0]
+
+    def levels(self):
+        """Níveis do melhor para o pior preço."""
+        return reversed(self.prices) if self.is_bid else iter(self.prices)
+
+    def volume_better_than(self, price):
+        """Quantidade total com preço melhor que `price` (à frente na prioridade de preço)."""
+        if self.is_bid:
+            index = bisect.bisect_right(self.prices, price)
+            better = self.prices[index:]
+        else:
+            index = bisect.bisect_left(self.prices, price)
+            better = self.prices[:index]
+        return sum(self.quantity[p] for p in better)
+
+
+class OrderBookMirror:
+    """
+    Livro de um par.
+    Protocolo da Binance: guardar os eventos diff enquanto busca o snapshot;
+    descartar eventos com u <= lastUpdateId; o primeiro aplicado deve ter
+    U <= lastUpdateId + 1 <= u; depois, cada evento deve começar em u_anterior + 1.
+    Buraco na sequência => livro marcado como dessincronizado e novo snapshot.
+    """
+
+    def __init__(self, symbol, client_binance=None, snapshot_limit=1000):
+        self.symbol = symbol
+        self.client_binance = client_binance
+        self.snapshot_limit = snapshot_limit
+        self.bids = BookSide(is_bid=True)
+        self.asks = BookSide(is_bid=False)
+        self.last_update_id = 0
+        self.synced = False
+        self.last_event_time = 0
+        self.last_snapshot_time = 0
+        self.resyncs = 0
+        self.streaming = False  # True quando alimentado pelo WebSocket de diff-depth
+        self._resyncing = False  # Snapshot em andamento (no máximo um por vez: peso alto na API)
+        self._buffer = []
+        self._tracked = {}  # order_id -> [lado, preço, quantidade à frente]
+        self._lock = threading.RLock()
+
+    # ------------------------------------------------------------------
+    # Sincronização
+
+    def resync(self):
+        """
+        Busca um novo snapshot REST e reaplica os eventos guardados.
+        Com outro snapshot em andamento, não busca de novo e retorna o estado atual.
+        """
+        if not self._begin_resync():
+            return self.synced
+        try:
+            return self._resync()
+        finally:
+            self._resyncing = False
+
+    def resync_in_background(self):
+        """Snapshot em uma thread, se nenhum estiver em andamento (eventos do stream chegam a cada 100ms)."""
+        if not self._begin_resync():
+            return False
+
+        def run():
+            try:
+                self._resync()
+            finally:
+                self._resyncing = False
+
+        threading.Thread(target=run, name=f"orderbook-resync-{self.symbol}", daemon=True).start()
+        return True
+
+    def _begin_resync(self):
+        if self.client_binance is None:
+            return False
+        with self._lock:
+            if self._resyncing:
+                return False
+            self._resyncing = True
+            return True
+
+    def _resync(self):
+        try:
+            snapshot = self.client_binance.get_order_book(symbol=self.symbol, limit=self.snapshot_limit)
+        except Exception as e:
+            logging.error(f"[OrderBook] Erro ao buscar snapshot de {self.symbol}: {e}")
+            return False
+        with self._lock:
+            self.apply_snapshot(snapshot)
+            buffered, self._buffer = self._buffer, []
+            for event in buffered:
+                self._apply_diff(event)
+            self.resyncs += 1
+        return self.synced
+
+    def apply_snapshot(self, snapshot):
+        with self._lock:
+            self.bids.clear()
+            self.asks.clear()
+            for price, quantity in snapshot["bids"]:
+                self.bids.set(float(price), float(quantity))
+            for price, quantity in snapshot["asks"]:
+                self.asks.set(float(price), float(quantity))
+            self.last_update_id = int(snapshot["lastUpdateId"])
+            self.last_snapshot_time = time.time()
+            self.synced = True
+            # Ordens acompanhadas: a fila é reestimada com o novo snapshot
+            for tracked in self._tracked.values():
+                side = self.bids if tracked[0] == "BUY" else self.asks
+                tracked[2] = min(tracked[2], side.quantity.get(tracked[1], 0.0))
+
+    def apply_diff(self, event):
+        """Aplica um evento depthUpdate ({'U', 'u', 'b', 'a'}). Guarda o evento se ainda não há snapshot."""
+        with self._lock:
+            if not self.synced:
+                self._buffer.append(event)
+                if len(self._buffer) > 10000:
+                    self._buffer = self._buffer[-10000:]
+                return False
+            return self._apply_diff(event)
+
+    def _apply_diff(self, event):
+        first, last = int(event["U"]), int(event["u"])
+        if last <= self.last_update_id:
+            return True  # Já contido no snapshot
+        if first > self.last_update_id + 1:
+            logging.warning(f"[OrderBook] Buraco na sequência de {self.symbol}: esperado {self.last_update_id + 1}, recebido {first}")
+            self.synced = False
+            self._buffer = [event]
+            return False
+
+        for price, quantity in event.get("b", []):
+            self._update_level("BUY", self.bids, float(price), float(quantity))
+        for price, quantity in event.get("a", []):
+            self._update_level("SELL", self.asks, float(price), float(quantity))
+        self.last_update_id = last
+        self.last_event_time = time.time()
+        return True
+
+    def _update_level(self, side_name, side, price, quantity):
+        previous = side.set(price, quantity)
+        if quantity < previous:
+            # Redução no nível: assume consumo/cancelamento do início da fila
+            reduced = previous - quantity
+            for tracked in self._tracked.values():
+                if tracked[0] == side_name and tracked[1] == price:
+                    tracked[2] = max(0.0, tracked[2] - reduced)
+
+    # ------------------------------------------------------------------
+    # Consultas
+
+    def best_bid(self):
+        with self._lock:
+            return self.bids.best()
+
+    def best_ask(self):
+        with self._lock:
+            return self.asks.best()
+
+    def spread(self):
+        with self._lock:
+            bid, ask = self.bids.best(), self.asks.best()
+            return None if bid is None or ask is None else ask - bid
+
+    def depth_at(self, side, price):
+        """Quantidade no nível exato (side: 'BUY' = bids | 'SELL' = asks)."""
+        with self._lock:
+            return (self.bids if side == "BUY" else self.asks).quantity.get(price, 0.0)
+
+    def depth_weighted_price(self, side, quantity):
+        """
+        Executa `quantity` contra o lado oposto (BUY consome asks, SELL consome bids).
+
+        Returns:
+            tuple | None: (preço médio, preço do último nível necessário) ou None se a profundidade não basta.
+        """
+        with self._lock:
+            opposite = self.asks if side == "BUY" else self.bids
+            remaining = quantity
+            cost = 0.0
+            for price in opposite.levels():
+                take = min(remaining, opposite.quantity[price])
+                cost += take * price
+                remaining -= take
+                if remaining <= 1e-12:
+                    return cost / quantity, price
+            return None
+
+    def track_order(self, order_id, side, price, quantity_ahead=None):
+        """Passa a estimar a posição na fila de uma ordem nossa (por padrão, atrás de todo o nível atual)."""
+        with self._lock:
+            if quantity_ahead is None:
+                quantity_ahead = self.depth_at(side, price)
+            self._tracked[order_id] = [side, price, quantity_ahead]
+
+    def untrack_order(self, order_id):
+        with self._lock:
+            self._tracked.pop(order_id, None)
+
+    def queue_position(self, order_id):
+        """
+        Quantidade à frente da ordem: níveis com preço melhor + parte do próprio nível à frente.
+        Retorna None se a ordem não é acompanhada.
+        """
+        with self._lock:
+            tracked = self._tracked.get(order_id)
+            if tracked is None:
+                return None
+            side, price, ahead_in_level = tracked
+            book_side = self.bids if side == "BUY" else self.asks
+            return book_side.volume_better_than(price) + ahead_in_level
+
+    def is_fresh(self, max_age):
+        """True se o livro está sincronizado e atualizado há menos de max_age segundos."""
+        last = max(self.last_event_time, self.last_snapshot_time)
+        return self.synced and (time.time() - last) <= max_age
+
+
+# ------------------------------------------------------------------
+# Stream de diff-depth (WebSocket) compartilhado por par
+
+class OrderBookStream:
+    """
+    Assina <symbol>@depth@100ms e alimenta os espelhos.
+    Um único ThreadedWebsocketManager atende todos os pares do processo.
+    """
+
+    def __init__(self, api_key=None, api_secret=None):
+        self.api_key = api_key
+        self.api_secret = api_secret
+        self.manager = None
+        self.streams = {}
+        self._lock = threading.Lock()
+
+    def subscribe(self, mirror: OrderBookMirror):
+        with self._lock:
+            if mirror.symbol in self.streams:
+                return True
+            try:
+                if self.manager is None:
+                    from binance import ThreadedWebsocketManager
+                    self.manager = ThreadedWebsocketManager(api_key=self.api_key, api_secret=self.api_secret)
+                    self.manager.start()
+
+                def on_message(message):
+                    event = message.get("data", message)
+                    if event.get("e") != "depthUpdate":
+                        return
+                    if not mirror.apply_diff(event) and not mirror.synced:
+                        # Primeiro evento ou buraco na sequência: novo snapshot (um por vez)
+                        mirror.resync_in_background()
+
+                self.streams[mirror.symbol] = self.manager.start_depth_socket(callback=on_message, symbol=mirror.symbol, interval=100)
+                return True
+            except Exception as e:
+                logging.error(f"[OrderBook] Stream de profundidade indisponível para {mirror.symbol}: {e}")
+                return False
+
+
+_mirrors = {}  # Espelhos alimentados por stream, compartilhados por par
+_mirrors_lock = threading.Lock()
+_stream = None
+
+def getOrderBookMirror(client_binance, symbol, stream=True):
+    """
+    Retorna o espelho compartilhado do par.
+    Com stream=True tenta assinar o diff-depth via WebSocket; se não for possível
+    (ex: emulador local, cliente em processo), o livro funciona por snapshots REST
+    renovados sob demanda (ver OrderBookMirror.is_fresh / resync).
+    Retorna None se o cliente não tem livro de ofertas (get_order_book).
+    """
+    global _stream
+    from binance.client import Client
+
+    if not callable(getattr(client_binance, "get_order_book", None)):
+        return None
+
+    # Só o cliente da Binance apontando para a corretora real tem o stream de WebSocket
+    can_stream = stream and isinstance(client_binance, Client) and not getattr(client_binance, "custom_api_url", None)
+
+    with _mirrors_lock:
+        if can_stream:
+            mirror = _mirrors.get(symbol)
+            if mirror is None:
+                mirror = OrderBookMirror(symbol, client_binance, snapshot_limit=1000)
+                _mirrors[symbol] = mirror
+                if _stream is None:
+                    _stream = OrderBookStream(client_binance.API_KEY, client_binance.API_SECRET)
+                mirror.streaming = _stream.subscribe(mirror)
+            return mirror
+
+        # Livros por snapshot pertencem ao cliente (emulador, simulação): guardados no próprio
+        # cliente, vão embora junto com ele (um cache global manteria todos os clientes vivos)
+        # Sem stream, cada consulta busca um snapshot: usa um limite menor (peso menor na API)
+        mirrors = getattr(client_binance, "_order_book_mirrors", None)
+        if mirrors is None:
+            mirrors = {}
+            try:
+                client_binance._order_book_mirrors = mirrors
+            except AttributeError:
+                return OrderBookMirror(symbol, client_binance, snapshot_limit=100)
+        mirror = mirrors.get(symbol)
+        if mirror is None:
+            mirror = mirrors[symbol] = OrderBookMirror(symbol, client_binance, snapshot_limit=100)
+        return mirror
@@ -0,0 +1,399 @@
+#!/usr/bin/env python3
+"""
+Motor de ordens limitadas em aberto ("chasing").
+Acompanha cada ordem limitada enviada pelos bots e, a cada preço do feed de
+ticker, reprecifica com cancelar + substituir quando o topo do livro se afasta,
+sem passar do limite aceitável (teto na compra, piso na venda).
+Cancelamentos são confirmados pela resposta/eventos da corretora
+(status CANCELED/FILLED, executionReport), nunca por esperas fixas.
+"""
+
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from binance.exceptions import BinanceAPIException
+
+from modules.OrderBook import getOrderBookMirror
+from modules.ProtectiveMonitor import TickerFeed, feed_key
+from modules.TraderOrder import TraderOrder
+
+
+FINAL_STATUSES = ("FILLED", "CANCELED", "EXPIRED", "REJECTED", "EXPIRED_IN_MATCH")
+
+
+class RateLimiter:
+    """
+    Balde de fichas: até `rate` requisições de ordem por segundo, com rajadas de até `burst`.
+    Compartilhado por todos os bots do processo (o limite da corretora é por conta/IP).
+    """
+
+    def __init__(self, rate=10, burst=10):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)  # Tempo exato até a próxima ficha
+
+
+class WorkingOrder:
+    """
+    Ordem limitada acompanhada pelo motor.
+
+    Parameters:
+        order (dict): Resposta da corretora ao criar a ordem.
+        bound (float): Preço máximo (compra) ou mínimo (venda) aceito ao reprecificar.
+        lock (RLock): Lock de ordens do bot; o motor não mexe na ordem durante o ciclo de estratégia.
+        on_replace (callable): callback(ordem_antiga, ordem_nova) após cada substituição.
+        on_final (callable): callback(working_order) quando a ordem chega a um estado final.
+        can_send (callable): can_send() -> bool, se o dono ainda pode enviar ordens (ex: lease do nó);
+            False encerra a perseguição sem substituir a ordem.
+    """
+
+    def __init__(self, client_binance, order, bound, tick_size, step_size, lock=None, on_replace=None, on_final=None, max_replacements=20, can_send=None):
+        self.client_binance = client_binance
+        self.feed_key = feed_key(client_binance)  # Mercado cujos preços reprecificam a ordem
+        self.symbol = order["symbol"]
+        self.side = order["side"]
+        self.bound = bound
+        self.tick_size = tick_size
+        self.step_size = step_size
+        self.lock = lock or threading.RLock()
+        self.on_replace = on_replace
+        self.on_final = on_final
+        self.can_send = can_send
+        self.max_replacements = max_replacements
+        self.replacements = 0
+        self.filled_quantity = 0.0  # Executado nas ordens já substituídas
+        self.busy = False
+        self.last_action = time.time()
+        self.last_status_check = time.time()
+        self.done = threading.Event()
+        self._bind(order)
+
+    def _bind(self, order):
+        self.order = order
+        self.order_id = order["orderId"]
+        self.price = float(order["price"])
+        self.quantity = float(order["origQty"])
+        self.executed = float(order.get("executedQty", 0))
+        self.status = order.get("status", "NEW")
+
+    @property
+    def total_executed(self):
+        return self.filled_quantity + self.executed
+
+    def target_price(self, bid, ask, last_price):
+        """Preço desejado para a ordem: entra no topo do próprio lado, limitado pelo bound."""
+        if self.side == "BUY":
+            touch = bid if bid is not None else last_price
+            return min(touch, self.bound) if touch is not None else None
+        touch = ask if ask is not None else last_price
+        return max(touch, self.bound) if touch is not None else None
+
+    def needs_reprice(self, target):
+        """Só reprecifica quando o topo se afastou (compra abaixo do topo / venda acima do topo)."""
+        if target is None:
+            return False
+        if self.side == "BUY":
+            return target - self.price >= self.tick_size * 0.5
+        return self.price - target >= self.tick_size * 0.5
+
+
+class OrderManager:
+    """
+    Mantém as ordens em aberto de todos os bots do processo.
+    As ações (cancelar/substituir, consultar status) rodam em um pool de threads
+    para não atrasar o processamento dos próximos preços do feed.
+    """
+
+    def __init__(self, max_workers=4, min_replace_interval=1.0, status_interval=5.0):
+        self.orders = {}  # order_id -> WorkingOrder
+        self.min_replace_interval = min_replace_interval
+        self.status_interval = status_interval
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="order-manager")
+        self.feeds = {}  # feed_key -> (feed, callback)
+        self.user_streams = {}
+
+    def attach(self, feed: TickerFeed):
+        """Assina o feed de preços (uma vez por mercado) e inicia o feed se necessário."""
+        with self._lock:
+            current = self.feeds.get(feed.key)
+            if current is not None and current[0] is feed:
+                return
+            callback = lambda prices: self.on_prices(prices, feed.key)
+            self.feeds[feed.key] = (feed, callback)
+        if current is not None:
+            current[0].unsubscribe(current[1])
+        feed.subscribe(callback)
+        feed.start()
+
+    def track(self, working: WorkingOrder):
+        with self._lock:
+            self.orders[working.order_id] = working
+        self.attach_user_stream(working.client_binance)
+        return working
+
+    def untrack(self, order_id):
+        with self._lock:
+            return self.orders.pop(order_id, None)
+
+    def working_orders(self, symbol, side=None, client_binance=None):
+        with self._lock:
+            return [
+                working for working in self.orders.values()
+                if working.symbol == symbol and (side is None or working.side == side)
+                and (client_binance is None or working.client_binance is client_binance)
+            ]
+
+    # ------------------------------------------------------------------
+    # Cancelamento confirmado
+
+    def confirm_cancel(self, client_binance, symbol, order_id):
+        """
+        Cancela e retorna o estado final da ordem.
+        A resposta do DELETE /order já traz o status final (CANCELED); se a ordem
+        não existe mais (executada entre a consulta e o cancelamento), busca o estado real.
+        """
+        order_rate_limiter.acquire()
+        try:
+            result = client_binance.cancel_order(symbol=symbol, orderId=order_id)
+        except BinanceAPIException as e:
+            if e.code != -2011:  # -2011 = Unknown order (já executada ou cancelada)
+                raise
+            result = client_binance.get_order(symbol=symbol, orderId=order_id)
+
+        if result.get("status") not in FINAL_STATUSES:
+            result = client_binance.get_order(symbol=symbol, orderId=order_id)
+        return result
+
+    def cancel(self, client_binance, symbol, order_id):
+        """Cancelamento confirmado que também encerra o acompanhamento da ordem."""
+        result = self.confirm_cancel(client_binance, symbol, order_id)
+        with self._lock:
+            working = self.orders.get(order_id)
+        if working is not None:
+            self._finalize(working, result)
+        return result
+
+    def cancel_all(self, client_binance, symbol, order_ids, max_workers=5, on_progress=None):
+        """
+        Cancela as ordens do par.
+        Usa uma única chamada DELETE /openOrders (todas as ordens do par, inclusive OCO) quando
+        o cliente permite; senão cancela cada ordem em paralelo, limitado pelo order_rate_limiter.
+
+        Returns:
+            dict: order_id -> estado final da ordem (dict) ou a exceção do cancelamento.
+                  No lote, ordens já encerradas antes do cancelamento não aparecem.
+        """
+        order_ids = list(order_ids)
+        if not order_ids:
+            return {}
+        results = {}
+
+        if hasattr(client_binance, "_delete"):
+            order_rate_limiter.acquire()
+            try:
+                for report in client_binance._delete("openOrders", True, data={"symbol": symbol}):
+                    for order in report.get("orderReports", [report]):
+                        results[order["orderId"]] = order
+            except BinanceAPIException as e:
+                if e.code != -2011:  # -2011 = nenhuma ordem aberta no par
+                    logging.error(f"[OrderManager] Cancelamento em lote indisponível para {symbol}: {e}")
+                    results = None
+            except Exception as e:
+                logging.error(f"[OrderManager] Cancelamento em lote indisponível para {symbol}: {e}")
+                results = None
+
+            if results is not None:
+                for order_id, order in results.items():
+                    with self._lock:
+                        working = self.orders.get(order_id)
+                    if working is not None:
+                        self._finalize(working, order)
+                if on_progress:
+                    on_progress(len(order_ids), len(order_ids))
+                return results
+            results = {}
+
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(order_ids)), thread_name_prefix="order-cancel") as executor:
+            futures = {executor.submit(self.cancel, client_binance, symbol, order_id): order_id for order_id in order_ids}
+            for future in as_completed(futures):
+                try:
+                    results[futures[future]] = future.result()
+                except Exception as e:
+                    results[futures[future]] = e
+                if on_progress:
+                    on_progress(len(results), len(order_ids))
+        return results
+
+    def _finalize(self, working, order):
+        working._bind({**working.order, **order})
+        working.done.set()
+        self.untrack(working.order_id)
+        if working.on_final:
+            try:
+                working.on_final(working)
+            except Exception as e:
+                logging.error(f"[OrderManager] Erro no callback final da ordem {working.order_id}: {e}")
+
+    # ------------------------------------------------------------------
+    # Preços
+
+    def on_prices(self, prices, key=None):
+        """Preços de um feed: só as ordens de clientes do mesmo mercado são reprecificadas."""
+        with self._lock:
+            orders = list(self.orders.values())
+        now = time.time()
+        for working in orders:
+            if working.feed_key != key:
+                continue
+            price = prices.get(working.symbol)
+            if price is None or working.busy:
+                continue
+            if now - working.last_status_check >= self.status_interval:
+                working.busy = True
+                self._executor.submit(self._refresh, working)
+                continue
+            if now - working.last_action < self.min_replace_interval or working.replacements >= working.max_replacements:
+                continue
+            bid, ask = self.touch(working)
+            target = working.target_price(bid, ask, price)
+            if working.needs_reprice(target):
+                working.busy = True
+                self._executor.submit(self._reprice, working, target)
+
+    def touch(self, working):
+        """Melhor compra/venda pelo livro local quando ele é alimentado por stream; senão (None, None)."""
+        try:
+            mirror = getOrderBookMirror(working.client_binance, working.symbol)
+            if mirror is not None and mirror.streaming and mirror.is_fresh(2):
+                return mirror.best_bid(), mirror.best_ask()
+        except Exception:
+            pass
+        return None, None
+
+    def _refresh(self, working):
+        try:
+            order = working.client_binance.get_order(symbol=working.symbol, orderId=working.order_id)
+            working.last_status_check = time.time()
+            if order["status"] in FINAL_STATUSES:
+                self._finalize(working, order)
+            else:
+                working._bind({**working.order, **order})
+        except Exception as e:
+            logging.error(f"[OrderManager] Erro ao consultar ordem {working.order_id}: {e}")
+        finally:
+            working.busy = False
+
+    def _reprice(self, working, target):
+        # Não disputa com o ciclo de estratégia do bot: tenta de novo no próximo preço
+        if not working.lock.acquire(blocking=False):
+            working.busy = False
+            return
+        try:
+            if working.done.is_set():
+                return
+            # Dono sem permissão para enviar ordens: a ordem fica como está e deixa de ser perseguida
+            if working.can_send is not None and not working.can_send():
+                self.untrack(working.order_id)
+                working.done.set()
+                logging.error(f"[OrderManager] Ordem {working.order_id} de {working.symbol} deixou de ser perseguida: dono sem permissão para enviar ordens")
+                return
+            old_order = working.order
+            cancelled = self.confirm_cancel(working.client_binance, working.symbol, working.order_id)
+            working.last_action = time.time()
+
+            remaining = float(cancelled["origQty"]) - float(cancelled["executedQty"])
+            if cancelled["status"] == "FILLED" or remaining < working.step_size:
+                self._finalize(working, cancelled)  # Executada antes de reprecificar
+                return
+
+            self.untrack(working.order_id)
+            if working.can_send is not None and not working.can_send():
+                # Permissão perdida durante o cancelamento: não reenvia, o novo dono decide
+                self._finalize(working, cancelled)
+                logging.error(f"[OrderManager] Ordem {working.order_id} de {working.symbol} cancelada sem substituição: dono sem permissão para enviar ordens")
+                return
+            order_rate_limiter.acquire()
+            try:
+                new_order = working.client_binance.create_order(
+                    symbol = working.symbol,
+                    side = working.side,
+                    type = "LIMIT",
+                    timeInForce = "GTC",
+                    quantity = TraderOrder.adjust_to_step(remaining, working.step_size, as_string=True),
+                    price = TraderOrder.adjust_to_step(target, working.tick_size, as_string=True)
+                )
+            except Exception:
+                self._finalize(working, cancelled)  # Sem ordem na corretora: o próximo ciclo do bot decide
+                raise
+            working.filled_quantity += float(cancelled["executedQty"])
+            working.replacements += 1
+            working._bind(new_order)
+            if working.status in FINAL_STATUSES:
+                self._finalize(working, new_order)
+            else:
+                self.track(working)
+            print(f"🔁 Ordem {working.side} de {working.symbol} reprecificada: {old_order['price']} -> {new_order['price']} ({working.replacements}/{working.max_replacements})")
+            if working.on_replace:
+                working.on_replace(old_order, new_order)
+        except Exception as e:
+            logging.error(f"[OrderManager] Erro ao reprecificar ordem {working.order_id} de {working.symbol}: {e}")
+        finally:
+            working.busy = False
+            working.lock.release()
+
+    # ------------------------------------------------------------------
+    # Eventos da conta (user data stream)
+
+    def on_execution_report(self, event):
+        """Aplica um executionReport: estado final confirma a ordem sem consulta REST."""
+        if event.get("e") != "executionReport":
+            return
+        with self._lock:
+            working = self.orders.get(event["i"])
+        if working is None or (working.busy and event["X"] == "CANCELED"):
+            return  # Cancelamento de uma substituição em andamento
+        order = {"status": event["X"], "executedQty": event["z"], "price": event["p"], "origQty": event["q"]}
+        if event["X"] in FINAL_STATUSES:
+            self._finalize(working, order)
+        else:
+            working._bind({**working.order, **order})
+            working.last_status_check = time.time()
+
+    def attach_user_stream(self, client_binance):
+        """Assina o user data stream da corretora real (WebSocket) para receber os executionReport."""
+        from binance.client import Client
+
+        key = getattr(client_binance, "API_KEY", None)
+        if not key or key in self.user_streams or not isinstance(client_binance, Client) or getattr(client_binance, "custom_api_url", None):
+            return
+        try:
+            from binance import ThreadedWebsocketManager
+            manager = ThreadedWebsocketManager(api_key=client_binance.API_KEY, api_secret=client_binance.API_SECRET)
+            manager.start()
+            manager.start_user_socket(callback=self.on_execution_report)
+            self.user_streams[key] = manager
+        except Exception as e:
+            self.user_streams[key] = None  # Segue com a consulta periódica de status
+            logging.error(f"[OrderManager] User data stream indisponível: {e}")
+
+
+# Instâncias globais compartilhadas por todos os bots do processo
+order_rate_limiter = RateLimiter()
+order_manager = OrderManager()
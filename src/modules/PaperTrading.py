@@ -0,0 +1,611 @@
+#!/usr/bin/env python3
+"""
+Motor de paper trading.
+PaperExchange implementa a parte da interface do cliente da Binance usada pelo
+BinanceTraderBot (klines, conta, ordens, OCO), com saldos virtuais e ordens
+limitadas preenchidas contra os candles que chegam, aplicando taxas e slippage.
+Os candles vêm de um CandleFeed compartilhado por par/intervalo, então centenas
+de simulações no mesmo processo leem (e geram/baixam) os mesmos dados uma única vez.
+"""
+
+import itertools
+import logging
+import math
+import random
+import threading
+import time
+
+EPSILON = 1e-12
+
+INTERVAL_MS = {
+    "1m": 60_000, "3m": 180_000, "5m": 300_000, "15m": 900_000, "30m": 1_800_000,
+    "1h": 3_600_000, "2h": 7_200_000, "4h": 14_400_000, "6h": 21_600_000,
+    "8h": 28_800_000, "12h": 43_200_000, "1d": 86_400_000,
+}
+
+
+# ------------------------------------------------------------------
+# Fontes de candles (compartilhadas entre simulações)
+
+class CandleFeed:
+    """
+    Sequência de candles de um par/intervalo.
+    Cada candle é guardado como tupla numérica (open_time, o, h, l, c, v) e no
+    formato de resposta da Binance (lista de strings), formatado uma única vez.
+    """
+
+    def __init__(self, symbol, interval):
+        self.symbol = symbol
+        self.interval = interval
+        self.interval_ms = INTERVAL_MS[interval]
+        self.candles = []
+        self.formatted = []
+        self._lock = threading.Lock()
+
+    def _append(self, open_time, open_price, high, low, close, volume):
+        self.candles.append((open_time, open_price, high, low, close, volume))
+        self.formatted.append([
+            open_time, f"{open_price:.8f}", f"{high:.8f}", f"{low:.8f}", f"{close:.8f}", f"{volume:.8f}",
+            open_time + self.interval_ms - 1, f"{volume * close:.8f}", 0, "0", "0", "0",
+        ])
+
+    def get(self, index):
+        """Retorna o candle de posição index, gerando/buscando novos se necessário (None = ainda não disponível)."""
+        with self._lock:
+            while index >= len(self.candles):
+                if not self._next():
+                    return None
+            return self.candles[index]
+
+    def window(self, end_index, limit):
+        """Candles formatados terminando em end_index (inclusive)."""
+        start = max(0, end_index - limit + 1)
+        return self.formatted[start:end_index + 1]
+
+    def _next(self):
+        raise NotImplementedError
+
+
+class SyntheticCandleFeed(CandleFeed):
+    """Candles gerados por passeio aleatório geométrico (semente fixa = resultados reproduzíveis)."""
+
+    def __init__(self, symbol, interval, start_price=1000.0, volatility=0.002, drift=0.0, seed=None, history=500):
+        super().__init__(symbol, interval)
+        self.random = random.Random(seed)
+        self.volatility = volatility
+        self.drift = drift
+        self.price = start_price
+        now = int(time.time() * 1000)
+        self.next_open_time = now - now % self.interval_ms - history * self.interval_ms
+        for _ in range(history):
+            self._next()
+
+    def _next(self):
+        open_price = self.price
+        close = open_price * math.exp(self.drift + self.volatility * self.random.gauss(0, 1))
+        high = max(open_price, close) * (1 + abs(self.random.gauss(0, self.volatility / 2)))
+        low = min(open_price, close) * (1 - abs(self.random.gauss(0, self.volatility / 2)))
+        volume = abs(self.random.gauss(10, 3))
+        self._append(self.next_open_time, open_price, high, low, close, volume)
+        self.next_open_time += self.interval_ms
+        self.price = close
+        return True
+
+
+class BinanceCandleFeed(CandleFeed):
+    """Candles reais da Binance: histórico inicial e, depois, apenas candles novos já fechados."""
+
+    def __init__(self, client_binance, symbol, interval, history=500):
+        super().__init__(symbol, interval)
+        self.client_binance = client_binance
+        for candle in client_binance.get_klines(symbol=symbol, interval=interval, limit=history + 1)[:-1]:
+            self._append(int(candle[0]), float(candle[1]), float(candle[2]), float(candle[3]), float(candle[4]), float(candle[5]))
+
+    def _next(self):
+        last_open = self.candles[-1][0] if self.candles else 0
+        try:
+            candles = self.client_binance.get_klines(symbol=self.symbol, interval=self.interval,
+                                                     startTime=last_open + self.interval_ms, limit=100)
+        except Exception as e:
+            logging.error(f"[PaperTrading] Erro ao buscar candles de {self.symbol}: {e}")
+            return False
+        now = int(time.time() * 1000)
+        added = False
+        for candle in candles:
+            if int(candle[6]) >= now:
+                break  # Candle ainda aberto
+            self._append(int(candle[0]), float(candle[1]), float(candle[2]), float(candle[3]), float(candle[4]), float(candle[5]))
+            added = True
+        return added
+
+
+_feeds = {}
+_feeds_lock = threading.Lock()
+
+def getCandleFeed(key, factory):
+    """
+    Retorna o feed compartilhado, criando-o com factory() na primeira vez.
+    key identifica a fonte (ex: ('BTCUSDT', '5m', 'binance') ou ('BTCUSDT', '5m', 'synthetic', seed)).
+    """
+    with _feeds_lock:
+        if key not in _feeds:
+            _feeds[key] = factory()
+        return _feeds[key]
+
+
+# ------------------------------------------------------------------
+
+class PaperOrder:
+    __slots__ = (
+        "order_id", "client_order_id", "symbol", "side", "type", "time_in_force", "price", "stop_price",
+        "orig_qty", "executed_qty", "cumm_quote", "status", "time", "update_time", "order_list_id",
+        "fills", "is_working", "reservation",
+    )
+
+    def __init__(self, order_id, symbol, side, type, quantity, price, stop_price, time_in_force, now):
+        self.order_id = order_id
+        self.client_order_id = f"paper_{order_id}"
+        self.symbol = symbol
+        self.side = side
+        self.type = type
+        self.time_in_force = time_in_force or "GTC"
+        self.price = price or 0.0
+        self.stop_price = stop_price or 0.0
+        self.orig_qty = quantity
+        self.executed_qty = 0.0
+        self.cumm_quote = 0.0
+        self.status = "NEW"
+        self.time = now
+        self.update_time = now
+        self.order_list_id = -1
+        self.fills = []
+        self.is_working = not type.startswith(("STOP_LOSS", "TAKE_PROFIT"))
+        self.reservation = None
+
+    @property
+    def remaining(self):
+        return self.orig_qty - self.executed_qty
+
+    @property
+    def is_open(self):
+        return self.status in ("NEW", "PARTIALLY_FILLED")
+
+
+class PaperTradingError(Exception):
+    """Erro no formato da Binance (code/message), como a BinanceAPIException."""
+
+    def __init__(self, code, message):
+        super().__init__(f"APIError(code={code}): {message}")
+        self.code = code
+        self.message = message
+
+
+class PaperExchange:
+    """
+    Conta virtual de um par.
+
+    Parameters:
+        feed (CandleFeed): Fonte de candles (compartilhada).
+        stock_code / quote_code (str): Ativo negociado e moeda de cotação (ex: 'BTC' / 'USDT').
+        balances (dict): Saldos iniciais {asset: quantidade}.
+        fee_rate (float): Taxa cobrada por execução (0.001 = 0,1%).
+        slippage_bps (float): Slippage das execuções a mercado, em pontos-base.
+        max_volume_participation (float): Fração máxima do volume do candle que uma ordem pode executar.
+        on_fill (callable, optional): Callback(order, price, quantity) a cada execução.
+    """
+
+    def __init__(self, feed: CandleFeed, stock_code, quote_code, balances=None, tick_size=0.01, step_size=0.00001,
+                 fee_rate=0.001, slippage_bps=5, max_volume_participation=0.25, on_fill=None):
+        self.feed = feed
+        self.symbol = feed.symbol
+        self.stock_code = stock_code
+        self.quote_code = quote_code
+        self.tick_size = tick_size
+        self.step_size = step_size
+        self.fee_rate = fee_rate
+        self.slippage = slippage_bps / 10000
+        self.max_volume_participation = max_volume_participation
+        self.on_fill = on_fill
+
+        self.balances = {stock_code: [0.0, 0.0], quote_code: [0.0, 0.0]}
+        for asset, amount in (balances or {}).items():
+            self.balances[asset] = [float(amount), 0.0]
+        self.orders = {}
+        self.open_orders = []
+        self.order_lists = {}
+        self.trades = []
+        self.cursor = len(feed.candles) - 1  # Último candle visível para o bot
+        self._ids = itertools.count(1)
+        self._trade_ids = itertools.count(1)
+        self._lock = threading.RLock()
+
+    # ------------------------------------------------------------------
+    # Avanço do mercado
+
+    @property
+    def last_candle(self):
+        return self.feed.candles[self.cursor]
+
+    @property
+    def last_price(self):
+        return self.last_candle[4]
+
+    def now_ms(self):
+        open_time = self.last_candle[0]
+        return open_time + self.feed.interval_ms - 1
+
+    def step(self):
+        """Avança um candle e preenche as ordens abertas contra ele. Retorna False se não há candle novo."""
+        candle = self.feed.get(self.cursor + 1)
+        if candle is None:
+            return False
+        with self._lock:
+            self.cursor += 1
+            self._process_candle(candle)
+        return True
+
+    def _process_candle(self, candle):
+        _, open_price, high, low, close, volume = candle
+        capacity = volume * self.max_volume_participation if volume > 0 else float("inf")
+
+        for order in list(self.open_orders):
+            if not order.is_open:
+                continue
+
+            if not order.is_working:
+                is_stop_loss = order.type.startswith("STOP_LOSS")
+                if order.side == "SELL":
+                    hit = low <= order.stop_price if is_stop_loss else high >= order.stop_price
+                    # Gap: o candle já abre além do stop
+                    trigger = min(open_price, order.stop_price) if is_stop_loss else max(open_price, order.stop_price)
+                else:
+                    hit = high >= order.stop_price if is_stop_loss else low <= order.stop_price
+                    trigger = max(open_price, order.stop_price) if is_stop_loss else min(open_price, order.stop_price)
+                if not hit:
+                    continue
+                order.is_working = True
+                self._cancel_other_legs(order)
+                if order.type in ("STOP_LOSS", "TAKE_PROFIT"):
+                    capacity = self._fill(order, self._with_slippage(order.side, trigger), min(order.remaining, capacity), capacity)
+                    continue
+                # Limite executável no disparo: sai como taker no preço do disparo
+                if (order.side == "SELL" and trigger >= order.price) or (order.side == "BUY" and trigger <= order.price):
+                    price = self._with_slippage(order.side, trigger)
+                    price = max(price, order.price) if order.side == "SELL" else min(price, order.price)
+                    capacity = self._fill(order, price, min(order.remaining, capacity), capacity)
+                continue
+
+            if order.type == "MARKET":
+                continue
+            if order.type in ("STOP_LOSS", "TAKE_PROFIT"):
+                # Stop a mercado já disparado e executado em parte (limite de volume): segue a mercado na abertura
+                capacity = self._fill(order, self._with_slippage(order.side, open_price), min(order.remaining, capacity), capacity)
+                continue
+            # Limite: abertura além do preço (gap) executa na abertura; senão, no preço limite se tocado
+            if order.side == "BUY":
+                if open_price <= order.price:
+                    price = open_price
+                elif low <= order.price:
+                    price = order.price
+                else:
+                    continue
+            else:
+                if open_price >= order.price:
+                    price = open_price
+                elif high >= order.price:
+                    price = order.price
+                else:
+                    continue
+            capacity = self._fill(order, price, min(order.remaining, capacity), capacity)
+
+    def _with_slippage(self, side, price):
+        return price * (1 + self.slippage) if side == "BUY" else price * (1 - self.slippage)
+
+    # ------------------------------------------------------------------
+    # Saldos e execuções
+
+    def _balance(self, asset):
+        return self.balances.setdefault(asset, [0.0, 0.0])
+
+    def _lock_balance(self, asset, amount):
+        balance = self._balance(asset)
+        if balance[0] + EPSILON < amount:
+            raise PaperTradingError(-2010, "Account has insufficient balance for requested action.")
+        balance[0] -= amount
+        balance[1] += amount
+
+    def _fill(self, order, price, quantity, capacity):
+        quantity = self._round_step(quantity)
+        if quantity <= EPSILON:
+            return capacity
+        notional = price * quantity
+        reservation = order.reservation
+
+        if order.side == "BUY":
+            quote = self._balance(self.quote_code)
+            if reservation is not None:
+                reserved = quantity * order.price
+                reservation["amount"] -= reserved
+                quote[1] -= reserved
+                quote[0] += reserved - notional
+            else:
+                if quote[0] + EPSILON < notional:
+                    quantity = self._round_step(quote[0] / price)
+                    if quantity <= EPSILON:
+                        return capacity
+                    notional = price * quantity
+                quote[0] -= notional
+            commission = quantity * self.fee_rate
+            self._balance(self.stock_code)[0] += quantity - commission
+            commission_asset = self.stock_code
+        else:
+            stock = self._balance(self.stock_code)
+            if reservation is not None:
+                reservation["amount"] -= quantity
+                stock[1] -= quantity
+            else:
+                stock[0] -= quantity
+            commission = notional * self.fee_rate
+            self._balance(self.quote_code)[0] += notional - commission
+            commission_asset = self.quote_code
+
+        now = self.now_ms()
+        trade_id = next(self._trade_ids)
+        order.executed_qty += quantity
+        order.cumm_quote += notional
+        order.update_time = now
+        order.fills.append({
+            "price": f"{price:.8f}", "qty": f"{quantity:.8f}", "commission": f"{commission:.8f}",
+            "commissionAsset": commission_asset, "tradeId": trade_id,
+        })
+        self.trades.append({
+            "symbol": self.symbol, "id": trade_id, "orderId": order.order_id, "orderListId": order.order_list_id,
+            "price": f"{price:.8f}", "qty": f"{quantity:.8f}", "quoteQty": f"{notional:.8f}",
+            "commission": f"{commission:.8f}", "commissionAsset": commission_asset, "time": now,
+            "isBuyer": order.side == "BUY", "isMaker": order.type != "MARKET", "isBestMatch": True,
+        })
+        if order.remaining <= EPSILON:
+            self._finish(order, "FILLED")
+        else:
+            order.status = "PARTIALLY_FILLED"
+        self._cancel_other_legs(order)
+
+        if self.on_fill is not None:
+            try:
+                self.on_fill(order, price, quantity)
+            except Exception as e:
+                logging.error(f"[PaperTrading] Erro no callback de execução: {e}")
+        return capacity - quantity
+
+    def _finish(self, order, status):
+        order.status = status
+        order.update_time = self.now_ms()
+        if order in self.open_orders:
+            self.open_orders.remove(order)
+        reservation = order.reservation
+        if reservation is not None and not any(o.is_open for o in reservation["orders"]):
+            self._balance(reservation["asset"])[1] -= reservation["amount"]
+            self._balance(reservation["asset"])[0] += reservation["amount"]
+            reservation["amount"] = 0.0
+
+    def _cancel_other_legs(self, order):
+        if order.order_list_id == -1:
+            return
+        order_list = self.order_lists[order.order_list_id]
+        for other in order_list["orders"]:
+            if other is not order and other.is_open:
+                self._finish(other, "CANCELED")
+        order_list["status"] = "ALL_DONE"
+
+    def _round_step(self, quantity):
+        return round(math.floor(quantity / self.step_size + 1e-9) * self.step_size, 12)
+
+    def _round_tick(self, price):
+        return round(round(price / self.tick_size) * self.tick_size, 12)
+
+    # ------------------------------------------------------------------
+    # Ordens
+
+    def _new_order(self, side, type, quantity, price=None, stop_price=None, time_in_force=None, reservation=None):
+        side, type = side.upper(), type.upper()
+        quantity = self._round_step(float(quantity))
+        price = self._round_tick(float(price)) if price not in (None, "") else None
+        stop_price = self._round_tick(float(stop_price)) if stop_price not in (None, "") else None
+        if quantity <= EPSILON:
+            raise PaperTradingError(-1013, "Filter failure: LOT_SIZE")
+        if type in ("LIMIT", "LIMIT_MAKER", "STOP_LOSS_LIMIT", "TAKE_PROFIT_LIMIT") and not price:
+            raise PaperTradingError(-1102, "Mandatory parameter 'price' was not sent, was empty/null, or malformed.")
+        if type.startswith(("STOP_LOSS", "TAKE_PROFIT")) and not stop_price:
+            raise PaperTradingError(-1102, "Mandatory parameter 'stopPrice' was not sent, was empty/null, or malformed.")
+        if type == "LIMIT_MAKER" and ((side == "BUY" and price >= self.last_price) or (side == "SELL" and price <= self.last_price)):
+            raise PaperTradingError(-2010, "Order would immediately match and take.")
+
+        order = PaperOrder(next(self._ids), self.symbol, side, type, quantity, price, stop_price, time_in_force, self.now_ms())
+        if reservation is None:
+            if side == "SELL":
+                reservation = {"asset": self.stock_code, "amount": quantity, "orders": []}
+            elif type != "MARKET" and type not in ("STOP_LOSS", "TAKE_PROFIT"):
+                reservation = {"asset": self.quote_code, "amount": quantity * price, "orders": []}
+            if reservation is not None:
+                self._lock_balance(reservation["asset"], reservation["amount"])
+        if reservation is not None:
+            reservation["orders"].append(order)
+        order.reservation = reservation
+        self.orders[order.order_id] = order
+        return order
+
+    def _submit(self, order):
+        self.open_orders.append(order)
+        if not order.is_working:
+            return
+        last = self.last_price
+        if order.type == "MARKET":
+            self._fill(order, self._with_slippage(order.side, last), order.remaining, float("inf"))
+            if order.is_open:
+                self._finish(order, "EXPIRED")
+        elif order.type == "LIMIT" and ((order.side == "BUY" and order.price >= last) or (order.side == "SELL" and order.price <= last)):
+            # Limite que cruza o último preço executa na hora como taker (com slippage, sem passar do limite)
+            price = self._with_slippage(order.side, last)
+            price = min(price, order.price) if order.side == "BUY" else max(price, order.price)
+            self._fill(order, price, order.remaining, float("inf"))
+        if order.is_open and order.time_in_force in ("IOC", "FOK"):
+            self._finish(order, "EXPIRED")
+
+    # ------------------------------------------------------------------
+    # Interface do cliente da Binance
+
+    def ping(self):
+        return {}
+
+    def get_server_time(self):
+        return {"serverTime": self.now_ms()}
+
+    def get_symbol_info(self, symbol):
+        return self._symbol_info()
+
+    def get_exchange_info(self):
+        return {"symbols": [self._symbol_info()]}
+
+    def _symbol_info(self):
+        return {
+            "symbol": self.symbol, "status": "TRADING", "baseAsset": self.stock_code, "quoteAsset": self.quote_code,
+            "filters": [
+                {"filterType": "PRICE_FILTER", "tickSize": f"{self.tick_size:.8f}"},
+                {"filterType": "LOT_SIZE", "stepSize": f"{self.step_size:.8f}", "minQty": f"{self.step_size:.8f}"},
+            ],
+        }
+
+    def get_klines(self, symbol=None, interval=None, limit=500, **kwargs):
+        return self.feed.window(self.cursor, int(limit))
+
+    def get_symbol_ticker(self, symbol=None, **kwargs):
+        ticker = {"symbol": self.symbol, "price": f"{self.last_price:.8f}"}
+        return ticker if symbol else [ticker]
+
+    def get_ticker(self, symbol=None, **kwargs):
+        ticker = {"symbol": self.symbol, "lastPrice": f"{self.last_price:.8f}"}
+        return ticker if symbol else [ticker]
+
+    def get_account(self, **kwargs):
+        with self._lock:
+            return {
+                "canTrade": True,
+                "balances": [
+                    {"asset": asset, "free": f"{max(free, 0.0):.8f}", "locked": f"{max(locked, 0.0):.8f}"}
+                    for asset, (free, locked) in self.balances.items()
+                ],
+            }
+
+    def get_asset_balance(self, asset, **kwargs):
+        free, locked = self._balance(asset)
+        return {"asset": asset, "free": f"{free:.8f}", "locked": f"{locked:.8f}"}
+
+    def _payload(self, order, full=False):
+        payload = {
+            "symbol": order.symbol, "orderId": order.order_id, "orderListId": order.order_list_id,
+            "clientOrderId": order.client_order_id, "price": f"{order.price:.8f}",
+            "origQty": f"{order.orig_qty:.8f}", "executedQty": f"{order.executed_qty:.8f}",
+            "cummulativeQuoteQty": f"{order.cumm_quote:.8f}", "status": order.status,
+            "timeInForce": order.time_in_force, "type": order.type, "side": order.side,
+            "stopPrice": f"{order.stop_price:.8f}", "time": order.time, "updateTime": order.update_time,
+            "isWorking": order.is_working,
+        }
+        if full:
+            payload["transactTime"] = order.time
+            payload["fills"] = list(order.fills)
+        return payload
+
+    def create_order(self, symbol=None, side=None, type=None, quantity=None, price=None, stopPrice=None, timeInForce=None, **kwargs):
+        with self._lock:
+            order = self._new_order(side, type, quantity, price, stopPrice, timeInForce)
+            self._submit(order)
+            return self._payload(order, full=True)
+
+    def order_market_buy(self, **params):
+        return self.create_order(side="BUY", type="MARKET", **params)
+
+    def order_market_sell(self, **params):
+        return self.create_order(side="SELL", type="MARKET", **params)
+
+    def cancel_order(self, symbol=None, orderId=None, **kwargs):
+        with self._lock:
+            order = self.orders.get(int(orderId)) if orderId is not None else None
+            if order is None or not order.is_open:
+                raise PaperTradingError(-2011, "Unknown order sent.")
+            if order.order_list_id != -1:
+                for leg in self.order_lists[order.order_list_id]["orders"]:
+                    if leg.is_open:
+                        self._finish(leg, "CANCELED")
+            else:
+                self._finish(order, "CANCELED")
+            return self._payload(order)
+
+    def get_order(self, symbol=None, orderId=None, **kwargs):
+        order = self.orders.get(int(orderId)) if orderId is not None else None
+        if order is None:
+            raise PaperTradingError(-2013, "Order does not exist.")
+        return self._payload(order)
+
+    def get_open_orders(self, **kwargs):
+        with self._lock:
+            return [self._payload(o) for o in self.open_orders if o.is_open]
+
+    def get_all_orders(self, symbol=None, limit=500, orderId=None, **kwargs):
+        with self._lock:
+            orders = list(self.orders.values())
+            if orderId is not None:
+                orders = [o for o in orders if o.order_id >= int(orderId)][:int(limit)]
+            else:
+                orders = orders[-int(limit):]
+            return [self._payload(o) for o in orders]
+
+    def get_my_trades(self, symbol=None, limit=500, fromId=None, **kwargs):
+        trades = self.trades
+        if fromId is not None:
+            return [t for t in trades if t["id"] >= int(fromId)][:int(limit)]
+        return trades[-int(limit):]
+
+    def _post(self, path, signed=True, version="v3", data=None, **kwargs):
+        if path != "orderList/oco":
+            raise PaperTradingError(-1000, f"Endpoint não suportado no paper trading: {path}")
+        data = data or {}
+        with self._lock:
+            side = data["side"].upper()
+            quantity = self._round_step(float(data["quantity"]))
+            if side == "SELL":
+                reservation = {"asset": self.stock_code, "amount": quantity, "orders": []}
+            else:
+                prices = [float(data.get(k) or 0) for k in ("abovePrice", "aboveStopPrice", "belowPrice", "belowStopPrice")]
+                reservation = {"asset": self.quote_code, "amount": quantity * max(prices), "orders": []}
+
+            # Valida e monta as duas pernas antes de bloquear o saldo: uma perna recusada não deixa reserva presa
+            list_id = len(self.order_lists) + 1
+            legs = []
+            try:
+                for prefix in ("below", "above"):
+                    order = self._new_order(side, data[f"{prefix}Type"], quantity, data.get(f"{prefix}Price"),
+                                            data.get(f"{prefix}StopPrice"), data.get(f"{prefix}TimeInForce"), reservation)
+                    order.order_list_id = list_id
+                    legs.append(order)
+                self._lock_balance(reservation["asset"], reservation["amount"])
+            except Exception:
+                for order in legs:
+                    self.orders.pop(order.order_id, None)
+                raise
+            self.order_lists[list_id] = {"orders": legs, "status": "EXECUTING"}
+            for order in legs:
+                self.open_orders.append(order)
+            return {
+                "orderListId": list_id, "contingencyType": "OCO", "listOrderStatus": "EXECUTING",
+                "symbol": self.symbol, "transactionTime": self.now_ms(),
+                "orders": [{"symbol": o.symbol, "orderId": o.order_id, "clientOrderId": o.client_order_id} for o in legs],
+                "orderReports": [self._payload(o) for o in legs],
+            }
+
+    # ------------------------------------------------------------------
+
+    def equity(self):
+        """Patrimônio virtual na moeda de cotação (livre + bloqueado, ativo a último preço)."""
+        stock = sum(self._balance(self.stock_code))
+        quote = sum(self._balance(self.quote_code))
+        return quote + stock * self.last_price
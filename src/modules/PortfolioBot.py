@@ -0,0 +1,378 @@
+#!/usr/bin/env python3
+"""
+Robô de portfólio: avalia vários pares em uma única passada vetorizada.
+Mantém os candles de N ativos em uma matriz NumPy (ativo x tempo), aplica as
+regras de MA Antecipation e de fallback para todos os ativos de uma vez e
+compartilha um único snapshot da conta entre todos os pares.
+"""
+
+import os
+import time
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import numpy as np
+from dotenv import load_dotenv
+from binance.enums import SIDE_BUY, SIDE_SELL, ORDER_TYPE_LIMIT, ORDER_TYPE_MARKET
+
+from modules.BinanceClient import BinanceClient
+from modules.TraderOrder import TraderOrder
+from modules.OrderManager import order_manager
+from modules.Logger import createLogOrder
+from Models.OrderLedgerModel import OrderLedgerModel
+from strategies import isStopLossTriggered
+
+
+load_dotenv()
+api_key = os.getenv("BINANCE_API_KEY")
+secret_key = os.getenv("BINANCE_SECRET_KEY")
+base_endpoint = os.getenv("BINANCE_BASE_ENDPOINT", "https://api.binance.com")
+
+# Decisões vetorizadas
+DECISION_SELL = -1
+DECISION_NONE = 0
+DECISION_BUY = 1
+
+
+# ------------------------------------------------------------------
+# Cálculos vetorizados (linhas = ativos, colunas = tempo)
+
+def rolling_mean_at(matrix, window, offset):
+    """Média móvel de cada linha terminando na coluna len-offset (offset=1 é o último valor)."""
+    end = matrix.shape[1] - offset + 1
+    return matrix[:, end - window:end].mean(axis=1)
+
+def rolling_std_at(matrix, window, offset):
+    """Desvio padrão amostral (ddof=1, igual ao pandas) terminando na coluna len-offset."""
+    end = matrix.shape[1] - offset + 1
+    return matrix[:, end - window:end].std(axis=1, ddof=1)
+
+def moving_average_decisions(closes, volatility_factor, fast_window=7, slow_window=40,
+                             volatility_window=40, fallback_activated=True):
+    """
+    Aplica a MA Antecipation (e o fallback de MA) para todos os ativos de uma vez.
+    Mesmas regras de strategies.moving_average_antecipation e strategies.moving_average.
+
+    Parameters:
+        closes (np.ndarray): Matriz (ativos x tempo) com os preços de fechamento.
+        volatility_factor (float | np.ndarray): Fator por ativo ou único para todos.
+
+    Returns:
+        np.ndarray: int8 por ativo (1 = Comprar | -1 = Vender | 0 = Inconclusiva).
+    """
+    last_ma_fast = rolling_mean_at(closes, fast_window, 1)
+    prev_ma_fast = rolling_mean_at(closes, fast_window, 3)
+    last_ma_slow = rolling_mean_at(closes, slow_window, 1)
+    prev_ma_slow = rolling_mean_at(closes, slow_window, 3)
+    last_volatility = rolling_std_at(closes, volatility_window, 2)
+
+    fast_gradient = last_ma_fast - prev_ma_fast
+    slow_gradient = last_ma_slow - prev_ma_slow
+    current_difference = np.abs(last_ma_fast - last_ma_slow)
+
+    # MA Antecipation
+    anticipating = current_difference < last_volatility * volatility_factor
+    buy = anticipating & (fast_gradient > 0) & (fast_gradient > slow_gradient)
+    sell = anticipating & ~buy & (fast_gradient < 0) & (fast_gradient < slow_gradient)
+
+    decisions = np.full(closes.shape[0], DECISION_NONE, dtype=np.int8)
+    decisions[buy] = DECISION_BUY
+    decisions[sell] = DECISION_SELL
+
+    # Fallback: Moving Average simples para os inconclusivos
+    if fallback_activated:
+        undecided = decisions == DECISION_NONE
+        decisions[undecided] = np.where(last_ma_fast[undecided] > last_ma_slow[undecided], DECISION_BUY, DECISION_SELL)
+
+    # Ativos sem histórico suficiente (NaN) não operam
+    decisions[np.isnan(last_ma_slow) | np.isnan(last_volatility)] = DECISION_NONE
+    return decisions
+
+
+# ------------------------------------------------------------------
+
+class PortfolioTraderBot():
+
+    def __init__(self, assets, candle_period, volatility_factor=0.5, acceptable_loss_percentage=0.5,
+                 time_to_trade=30*60, fallback_activated=True, fast_window=7, slow_window=40,
+                 volatility_window=40, candles_limit=500, max_workers=8, client_binance=None,
+                 stop_loss_percentage=5, stale_order_timeout=None, use_order_ledger=True):
+        """
+        Parameters:
+            assets (list[AssetStartModel]): Pares operados (stockCode, operationCode, tradedQuantity).
+            candle_period (str): Intervalo dos candles, igual para todos os ativos.
+            max_workers (int): Requisições de klines em paralelo.
+            stop_loss_percentage (float): % de queda sobre o último preço de compra que vende à mercado.
+            stale_order_timeout (float): Segundos até uma ordem limitada aberta ser cancelada e
+                reenviada ao preço atual (padrão: time_to_trade).
+        """
+        self.assets = list(assets)
+        self.symbols = [asset.operationCode for asset in self.assets]
+        self.candle_period = candle_period
+        self.volatility_factor = volatility_factor
+        self.acceptable_loss_percentage = acceptable_loss_percentage / 100
+        self.time_to_trade = time_to_trade
+        self.fallback_activated = fallback_activated
+        self.fast_window = fast_window
+        self.slow_window = slow_window
+        self.volatility_window = volatility_window
+        self.candles_limit = candles_limit
+        self.max_workers = max_workers
+        self.stop_loss_percentage = stop_loss_percentage / 100
+        self.stale_order_timeout = stale_order_timeout if stale_order_timeout is not None else time_to_trade
+        self.running = False
+
+        self.client_binance = client_binance or BinanceClient(api_key, secret_key, base_endpoint=base_endpoint, sync=True, sync_interval=30000)
+
+        self.closes = np.empty((len(self.symbols), 0))
+        self.decisions = np.zeros(len(self.symbols), dtype=np.int8)
+        self.balances = {}
+        self.open_orders = {}  # symbol -> [ordens abertas]
+
+        # Histórico local de ordens (Models/OrderLedgerModel.py): último preço de compra sem
+        # consultar allOrders de cada par a cada ciclo; sincronizado só quando o par mudou
+        self.use_order_ledger = use_order_ledger
+        self.order_ledger_account = None
+        self.order_ledger_state = {}  # symbol -> (saldos do ativo, ids das ordens abertas) na última sincronização
+
+        self.setStepSizeAndTickSize()
+
+    # Busca os filtros de todos os ativos em uma única chamada
+    def setStepSizeAndTickSize(self):
+        exchange_info = self.client_binance.get_exchange_info()
+        wanted = set(self.symbols)
+        self.tick_sizes = {}
+        self.step_sizes = {}
+        for symbol_info in exchange_info['symbols']:
+            if symbol_info['symbol'] not in wanted:
+                continue
+            for f in symbol_info['filters']:
+                if f['filterType'] == 'PRICE_FILTER':
+                    self.tick_sizes[symbol_info['symbol']] = float(f['tickSize'])
+                elif f['filterType'] == 'LOT_SIZE':
+                    self.step_sizes[symbol_info['symbol']] = float(f['stepSize'])
+
+    @staticmethod
+    def adjust_to_step(value, step, as_string=False):
+        return TraderOrder.adjust_to_step(value, step, as_string=as_string)
+
+    # ------------------------------------------------------------------
+    # Dados
+
+    def fetchCandles(self):
+        """Monta a matriz (ativo x tempo) de fechamentos. Ativos com menos candles são completados com NaN à esquerda."""
+        def fetch(symbol):
+            try:
+                candles = self.client_binance.get_klines(symbol=symbol, interval=self.candle_period, limit=self.candles_limit)
+                return np.array([float(candle[4]) for candle in candles], dtype=np.float64)
+            except Exception as e:
+                logging.error(f"[Portfolio] Erro ao buscar candles de {symbol}: {e}")
+                return np.empty(0)
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            series = list(executor.map(fetch, self.symbols))
+
+        width = max((len(s) for s in series), default=0)
+        closes = np.full((len(self.symbols), width), np.nan)
+        for row, values in enumerate(series):
+            if len(values):
+                closes[row, width - len(values):] = values
+        self.closes = closes
+        return closes
+
+    def updateAccountSnapshot(self):
+        """Um único get_account e um único get_open_orders para todos os pares."""
+        account = self.client_binance.get_account()
+        self.balances = {
+            b['asset']: (float(b['free']), float(b['locked']))
+            for b in account['balances']
+        }
+        self.open_orders = {}
+        for order in self.client_binance.get_open_orders():
+            self.open_orders.setdefault(order['symbol'], []).append(order)
+
+    def getBalance(self, asset, free_only=False):
+        free, locked = self.balances.get(asset, (0.0, 0.0))
+        return free if free_only else free + locked
+
+    def syncOrderLedger(self, asset):
+        """Sincroniza o histórico do par só se o saldo do ativo ou as ordens abertas mudaram desde a última vez."""
+        symbol = asset.operationCode
+        if self.order_ledger_account is None:
+            OrderLedgerModel.init_db()
+            self.order_ledger_account = OrderLedgerModel.account_key(self.client_binance)
+        state = (self.balances.get(asset.stockCode), frozenset(order['orderId'] for order in self.open_orders.get(symbol, [])))
+        if self.order_ledger_state.get(symbol) != state:
+            OrderLedgerModel.sync(self.client_binance, self.order_ledger_account, symbol)
+            self.order_ledger_state[symbol] = state
+
+    def getLastBuyPrice(self, asset):
+        symbol = asset.operationCode
+        if self.use_order_ledger:
+            try:
+                self.syncOrderLedger(asset)
+                last_fill = OrderLedgerModel.get_last_fill(self.order_ledger_account, symbol, 'BUY')
+                return last_fill['price'] if last_fill else 0.0
+            except Exception as e:
+                # Sem histórico local: consulta as últimas ordens na corretora
+                logging.error(f"[Portfolio] Erro no histórico local de ordens de {symbol}: {e}")
+                self.order_ledger_state.pop(symbol, None)
+        try:
+            orders = self.client_binance.get_all_orders(symbol=symbol, limit=100)
+            filled = [o for o in orders if o['side'] == 'BUY' and o['status'] == 'FILLED']
+            if not filled:
+                return 0.0
+            last = max(filled, key=lambda o: o['time'])
+            return float(last['cummulativeQuoteQty']) / float(last['executedQty'])
+        except Exception as e:
+            logging.error(f"[Portfolio] Erro ao buscar último preço de compra de {symbol}: {e}")
+            return 0.0
+
+    # ------------------------------------------------------------------
+    # Decisão e roteamento
+
+    def evaluate(self):
+        self.decisions = moving_average_decisions(
+            self.closes, self.volatility_factor, self.fast_window, self.slow_window,
+            self.volatility_window, self.fallback_activated,
+        )
+        return self.decisions
+
+    def cancelStaleOrders(self):
+        """
+        Cancela as ordens limitadas abertas há mais de stale_order_timeout: o par volta a ser
+        roteado neste ciclo, então a ordem é reenviada ao preço atual se a decisão se mantiver.
+        """
+        now = int(time.time() * 1000)
+        cancelled = 0
+        for symbol, orders in list(self.open_orders.items()):
+            stale = [order['orderId'] for order in orders if now - order['time'] >= self.stale_order_timeout * 1000]
+            if not stale:
+                continue
+            results = order_manager.cancel_all(self.client_binance, symbol, stale)
+            failed = [order_id for order_id, result in results.items() if isinstance(result, Exception)]
+            for order_id in failed:
+                logging.error(f"[Portfolio] Erro ao cancelar ordem {order_id} de {symbol}: {results[order_id]}")
+            if failed:
+                continue
+            print(f"❌ {len(stale)} ordem(ns) antiga(s) de {symbol} cancelada(s) para reprecificação")
+            # O cancelamento em lote (DELETE /openOrders) também encerra as demais ordens do par
+            remaining = [order for order in orders if order['orderId'] not in stale and order['orderId'] not in results]
+            if remaining:
+                self.open_orders[symbol] = remaining
+            else:
+                del self.open_orders[symbol]
+            cancelled += len(stale)
+        if cancelled:
+            self.updateAccountSnapshot() # Saldo liberado pelos cancelamentos
+        return cancelled
+
+    def stopLossOrders(self):
+        """Stop loss de cada posição (mesma regra do BinanceRobot): cancela as ordens do par e vende à mercado."""
+        orders = []
+        if self.closes.shape[1] < 2:
+            return orders
+        for row, asset in enumerate(self.assets):
+            symbol = asset.operationCode
+            step_size = self.step_sizes.get(symbol)
+            if step_size is None or self.getBalance(asset.stockCode) < step_size:
+                continue
+            close_price, weighted_price = self.closes[row, -1], self.closes[row, -2]
+            if not isStopLossTriggered(close_price, weighted_price, self.getLastBuyPrice(asset), self.stop_loss_percentage):
+                continue
+            try:
+                print(f"🔴 Ativando STOP LOSS de {symbol}...")
+                if self.open_orders.get(symbol):
+                    order_manager.cancel_all(self.client_binance, symbol, [order['orderId'] for order in self.open_orders.pop(symbol)])
+                    self.updateAccountSnapshot()
+                quantity = self.adjust_to_step(self.getBalance(asset.stockCode, free_only=True), step_size, as_string=True)
+                if float(quantity) < step_size:
+                    continue
+                order = self.client_binance.create_order(symbol=symbol, side=SIDE_SELL, type=ORDER_TYPE_MARKET, quantity=quantity)
+                createLogOrder(order)
+                orders.append(order)
+                self.decisions[row] = DECISION_NONE # Já vendido neste ciclo
+            except Exception as e:
+                logging.error(f"[Portfolio] Erro no stop loss de {symbol}: {e}")
+                print(f"Erro no stop loss de {symbol}: {e}")
+        return orders
+
+    def routeOrders(self):
+        """Envia as ordens limitadas para os ativos cuja decisão difere da posição atual."""
+        orders = []
+        for row, asset in enumerate(self.assets):
+            symbol = asset.operationCode
+            decision = self.decisions[row]
+            if decision == DECISION_NONE or symbol in self.open_orders:
+                continue
+            if symbol not in self.step_sizes or symbol not in self.tick_sizes:
+                continue
+
+            step_size = self.step_sizes[symbol]
+            tick_size = self.tick_sizes[symbol]
+            close_price = self.closes[row, -1]
+            stock_balance = self.getBalance(asset.stockCode)
+            position = stock_balance >= step_size  # True = Comprado
+
+            try:
+                if decision == DECISION_BUY and not position:
+                    quantity = self.adjust_to_step(asset.tradedQuantity, step_size, as_string=True)
+                    limit_price = self.adjust_to_step(close_price * 1.002, tick_size, as_string=True)
+                    quote_asset = symbol.replace(asset.stockCode, '')
+                    if self.getBalance(quote_asset, free_only=True) < float(quantity) * float(limit_price):
+                        logging.error(f"[Portfolio] Saldo insuficiente em {quote_asset} para comprar {symbol}")
+                        continue
+                    order = self.client_binance.create_order(
+                        symbol=symbol, side=SIDE_BUY, type=ORDER_TYPE_LIMIT,
+                        timeInForce="GTC", quantity=quantity, price=limit_price,
+                    )
+                elif decision == DECISION_SELL and position:
+                    limit_price = close_price * 0.998
+                    minimum_price = self.getLastBuyPrice(asset) * (1 - self.acceptable_loss_percentage)
+                    limit_price = max(limit_price, minimum_price)
+                    quantity = self.adjust_to_step(self.getBalance(asset.stockCode, free_only=True), step_size, as_string=True)
+                    if float(quantity) < step_size:
+                        continue
+                    order = self.client_binance.create_order(
+                        symbol=symbol, side=SIDE_SELL, type=ORDER_TYPE_LIMIT, timeInForce="GTC",
+                        quantity=quantity, price=self.adjust_to_step(limit_price, tick_size, as_string=True),
+                    )
+                else:
+                    continue
+
+                createLogOrder(order)
+                orders.append(order)
+            except Exception as e:
+                logging.error(f"[Portfolio] Erro ao enviar ordem para {symbol}: {e}")
+                print(f"Erro ao enviar ordem para {symbol}: {e}")
+        return orders
+
+    # ------------------------------------------------------------------
+    # EXECUTE
+
+    def execute(self):
+        print('------------------------------------------------')
+        print(f'🟢 Portfólio executado {datetime.now().strftime("(%H:%M:%S) %d-%m-%Y")} ({len(self.symbols)} pares)')
+        self.fetchCandles()
+        self.updateAccountSnapshot()
+        self.evaluate()
+        self.cancelStaleOrders()
+        orders = self.stopLossOrders() + self.routeOrders()
+        print(f' - Compras: {int((self.decisions == DECISION_BUY).sum())} | Vendas: {int((self.decisions == DECISION_SELL).sum())} | Ordens enviadas: {len(orders)}')
+        print('------------------------------------------------')
+        return orders
+
+    def run(self):
+        self.running = True
+        while self.running:
+            try:
+                self.execute()
+            except Exception as e:
+                print(f"Erro durante execução do portfólio: {str(e)}")
+                logging.error(f"Erro durante execução do portfólio: {e}")
+            time.sleep(self.time_to_trade)
+
+    def stop(self):
+        self.running = False
+        return True
@@ -0,0 +1,242 @@
+#!/usr/bin/env python3
+"""
+Profiling dos robôs em produção, sem profiler externo.
+`sample_stacks` amostra sys._current_frames() de todas as threads do processo (robôs,
+requisições do Flask, feeds) na frequência pedida e agrega as pilhas no formato
+"collapsed" (uma linha `raiz;...;folha contagem`, entrada do flamegraph.pl/speedscope),
+separadas por robô. Cada amostra também é classificada pela camada mais interna
+reconhecida (pandas, json, rede, logging, banco) para responder onde o tempo vai.
+`CycleProfile` roda cProfile (determinístico) em um único ciclo execute() de um robô.
+"""
+
+import cProfile
+import io
+import os
+import pstats
+import re
+import sys
+import threading
+import time
+from collections import Counter, defaultdict
+
+from modules.BotSupervisor import format_time
+
+MAX_DURATION = 120.0    # Segundos
+MAX_RATE = 1000.0       # Amostras por segundo
+
+# Camadas reconhecidas na pilha (da folha para a raiz, a primeira que casar)
+CATEGORIES = (
+    ("json", ("/json/", "simplejson", "orjson", "ujson")),
+    ("logging", ("/logging/",)),
+    ("network", ("/ssl.py", "/socket.py", "/http/client.py", "/urllib3/", "/requests/", "/websocket")),
+    ("database", ("/sqlite3/", "/Models/")),
+    ("pandas", ("/pandas/",)),
+    ("numpy", ("/numpy/",)),
+)
+
+# Sessão de amostragem em andamento (uma por processo para limitar o custo)
+_sampling_lock = threading.Lock()
+
+
+class ProfilerBusy(RuntimeError):
+    """Já existe uma amostragem em andamento no processo."""
+
+
+def short_path(filename):
+    """Pasta e arquivo (`window/rolling.py`): distingue módulos homônimos sem o caminho inteiro."""
+    return '/'.join(filename.replace('\\', '/').rsplit('/', 2)[-2:])
+
+
+def frame_label(frame):
+    """`função (pasta/arquivo.py)`: agrega as linhas da mesma função."""
+    return f"{frame.f_code.co_name} ({short_path(frame.f_code.co_filename)})"
+
+
+def categorize(frames):
+    """Camada da amostra a partir dos caminhos dos frames (folha primeiro)."""
+    for frame in frames:
+        path = frame.f_code.co_filename.replace('\\', '/')
+        for category, patterns in CATEGORIES:
+            if any(pattern in path for pattern in patterns):
+                return category
+    return "python"
+
+
+def is_idle(frame):
+    """Thread parada em Event/Condition.wait (ex: robô dormindo entre ciclos)."""
+    return frame.f_code.co_filename.endswith('threading.py') and frame.f_code.co_name == 'wait'
+
+
+def thread_labels(bots):
+    """{ident da thread: rótulo}: robôs como `bot:<id>`, as demais pelo nome sem numeração."""
+    labels = {}
+    for thread in threading.enumerate():
+        labels[thread.ident] = "thread:" + re.sub(r'-\d+', '', thread.name)
+    for bot_id, bot in bots.items():
+        thread = getattr(bot, 'thread', None)
+        if thread is not None and thread.ident is not None:
+            labels[thread.ident] = f"bot:{bot_id}"
+    return labels
+
+
+def sample_stacks(bots, duration=10.0, rate=100.0, include_idle=False):
+    """
+    Amostra as pilhas de todas as threads por `duration` segundos a `rate` amostras/s.
+
+    Parameters:
+        bots (dict): {bot_id: robô} deste processo (a thread de cada um vira `bot:<id>`).
+        include_idle (bool): Inclui amostras de threads paradas em wait (padrão: só trabalho).
+
+    Returns:
+        dict: {'duration', 'rate', 'samples', 'threads': {rótulo: {'samples', 'categories', 'stacks'}}}
+            com `stacks` = {pilha collapsed: contagem}.
+    """
+    duration = min(max(float(duration), 0.1), MAX_DURATION)
+    rate = min(max(float(rate), 1.0), MAX_RATE)
+    interval = 1.0 / rate
+    if not _sampling_lock.acquire(blocking=False):
+        raise ProfilerBusy("Já existe uma amostragem em andamento neste processo")
+
+    try:
+        own = threading.get_ident()
+        labels = thread_labels(bots)
+        stacks = defaultdict(Counter)
+        categories = defaultdict(Counter)
+        samples = 0
+        started = time.perf_counter()
+        deadline = started + duration
+        next_sample = started
+        while True:
+            now = time.perf_counter()
+            if now >= deadline:
+                break
+            if now < next_sample:
+                time.sleep(next_sample - now)
+            next_sample += interval
+            samples += 1
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                if not include_idle and is_idle(frame):
+                    continue
+                label = labels.get(ident)
+                if label is None:
+                    # Thread criada durante a amostragem
+                    labels = thread_labels(bots)
+                    label = labels.get(ident, f"thread:{ident}")
+                frames = []
+                while frame is not None:
+                    frames.append(frame)
+                    frame = frame.f_back
+                stacks[label][';'.join(frame_label(f) for f in reversed(frames))] += 1
+                categories[label][categorize(frames)] += 1
+        elapsed = time.perf_counter() - started
+    finally:
+        _sampling_lock.release()
+
+    return {
+        "pid": os.getpid(),
+        "duration": round(elapsed, 3),
+        "rate": rate,
+        "samples": samples,
+        "threads": {
+            label: {
+                "samples": sum(counter.values()),
+                "categories": dict(categories[label].most_common()),
+                "stacks": dict(counter),
+            }
+            for label, counter in sorted(stacks.items())
+        },
+    }
+
+
+def collapsed_lines(threads, prefix=None):
+    """Linhas `rótulo;raiz;...;folha contagem` (o robô/thread vira o frame raiz do flamegraph)."""
+    lines = []
+    for label, thread in threads.items():
+        root = f"{prefix};{label}" if prefix else label
+        for stack, count in sorted(thread["stacks"].items()):
+            lines.append(f"{root};{stack} {count}")
+    return lines
+
+
+def summarize(threads):
+    """Resumo por thread sem as pilhas: amostras, camadas e as funções-folha mais frequentes."""
+    summary = {}
+    for label, thread in threads.items():
+        leaves = Counter()
+        for stack, count in thread["stacks"].items():
+            leaves[stack.rsplit(';', 1)[-1]] += count
+        summary[label] = {
+            "samples": thread["samples"],
+            "categories": thread["categories"],
+            "top_frames": [{"frame": frame, "samples": count} for frame, count in leaves.most_common(10)],
+        }
+    return summary
+
+
+class CycleProfile:
+    """
+    Pedido de cProfile do próximo ciclo de um robô: a thread do robô executa o ciclo dentro
+    de `run` (BinanceTraderBot.run) e quem pediu aguarda com `wait`. Perfilar o ciclo normal
+    do robô (em vez de chamar execute() de fora) não antecipa decisões de compra/venda.
+    """
+
+    def __init__(self, sort="cumulative", limit=40):
+        self.sort = sort
+        self.limit = limit
+        self.requested_at = time.time()
+        self.finished_at = None
+        self.result = None
+        self._done = threading.Event()
+
+    def run(self, function):
+        profiler = cProfile.Profile()
+        started = time.perf_counter()
+        profiler.enable()
+        try:
+            return function()
+        finally:
+            profiler.disable()
+            self._finish(profiler, time.perf_counter() - started)
+
+    def _finish(self, profiler, elapsed):
+        try:
+            stats = pstats.Stats(profiler, stream=io.StringIO())
+            stats.sort_stats(self.sort)
+            functions = []
+            for (filename, line, name), (calls, _, own, total, _) in stats.stats.items():
+                functions.append({
+                    "function": f"{name} ({short_path(filename)}:{line})",
+                    "calls": calls,
+                    "own_ms": round(own * 1000, 3),
+                    "total_ms": round(total * 1000, 3),
+                })
+            key = "own_ms" if self.sort in ("tottime", "time") else "total_ms"
+            functions.sort(key=lambda function: function[key], reverse=True)
+            stats.print_stats(self.limit)
+            self.result = {
+                "cycle_ms": round(elapsed * 1000, 3),
+                "sort": self.sort,
+                "functions": functions[:self.limit],
+                "report": stats.stream.getvalue(),
+            }
+        except Exception as e:
+            self.result = {"cycle_ms": round(elapsed * 1000, 3), "error": str(e)}
+        self.finished_at = time.time()
+        self._done.set()
+
+    def wait(self, timeout=None):
+        return self._done.wait(timeout)
+
+    @property
+    def done(self):
+        return self._done.is_set()
+
+    def describe(self):
+        return {
+            "status": "done" if self.done else "pending",
+            "requested_at": format_time(self.requested_at),
+            "finished_at": format_time(self.finished_at),
+            **(self.result or {}),
+        }
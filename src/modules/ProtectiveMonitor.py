@@ -0,0 +1,330 @@
+#!/usr/bin/env python3
+"""
+Monitor de saídas de proteção (stop loss, trailing stop e take profit).
+Roda separado do loop de estratégia: recebe preços de um feed de ticker
+compartilhado em intervalos sub-segundo e dispara as saídas das posições
+abertas usando índices ordenados de gatilhos (busca O(log n) por tick).
+"""
+
+import bisect
+import itertools
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+
+# ------------------------------------------------------------------
+# Feed de preços compartilhado
+
+class TickerFeed:
+    """
+    Consulta o preço de todos os pares em uma única chamada (get_symbol_ticker)
+    e repassa para os assinantes. Uma única thread atende todos os bots do mesmo
+    mercado (`key`, ver feed_key).
+    """
+
+    def __init__(self, client_binance, interval=0.5, key=None):
+        self.client_binance = client_binance
+        self.key = key
+        self.interval = interval
+        self.subscribers = []
+        self.last_prices = {}
+        self.last_update = 0
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def subscribe(self, callback):
+        with self._lock:
+            if callback not in self.subscribers:
+                self.subscribers.append(callback)
+
+    def unsubscribe(self, callback):
+        with self._lock:
+            if callback in self.subscribers:
+                self.subscribers.remove(callback)
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._loop, name="ticker-feed", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop_event.set()
+
+    def publish(self, prices):
+        """Entrega um dicionário {symbol: price} a todos os assinantes."""
+        self.last_prices = prices
+        self.last_update = time.time()
+        with self._lock:
+            subscribers = list(self.subscribers)
+        for callback in subscribers:
+            try:
+                callback(prices)
+            except Exception as e:
+                logging.error(f"[TickerFeed] Erro no assinante {callback}: {e}")
+
+    def _loop(self):
+        while not self._stop_event.is_set():
+            started = time.time()
+            try:
+                tickers = self.client_binance.get_symbol_ticker()
+                self.publish({t['symbol']: float(t['price']) for t in tickers})
+            except Exception as e:
+                logging.error(f"[TickerFeed] Erro ao buscar preços: {e}")
+            self._stop_event.wait(max(0.0, self.interval - (time.time() - started)))
+
+
+# ------------------------------------------------------------------
+# Índices de gatilhos
+
+class ThresholdIndex:
+    """
+    Lista ordenada de (preço_gatilho, seq) com busca binária.
+    pop_at_or_above / pop_at_or_below retornam os ids disparados em O(log n + k).
+    """
+
+    def __init__(self):
+        self.keys = []
+        self.ids = {}
+
+    def __len__(self):
+        return len(self.keys)
+
+    def add(self, threshold, seq, position_id):
+        bisect.insort(self.keys, (threshold, seq))
+        self.ids[seq] = position_id
+
+    def remove(self, threshold, seq):
+        index = bisect.bisect_left(self.keys, (threshold, seq))
+        if index < len(self.keys) and self.keys[index] == (threshold, seq):
+            del self.keys[index]
+        self.ids.pop(seq, None)
+
+    def pop_at_or_above(self, price):
+        index = bisect.bisect_left(self.keys, (price, -1))
+        fired, self.keys[index:] = self.keys[index:], []
+        return [self.ids.pop(seq) for _, seq in fired]
+
+    def pop_at_or_below(self, price):
+        index = bisect.bisect_right(self.keys, (price, float("inf")))
+        fired, self.keys[:index] = self.keys[:index], []
+        return [self.ids.pop(seq) for _, seq in fired]
+
+
+class TrailingIndex:
+    """
+    Trailing stops de um par com o mesmo percentual.
+    Os picos ficam ordenados; quando o preço sobe, todos os picos abaixo dele
+    são fundidos em um único nível (amortizado O(log n)). Dispara os picos
+    cujo stop (pico * (1 - pct)) foi atingido.
+    """
+
+    def __init__(self, percentage):
+        self.percentage = percentage
+        self.peaks = []     # Lista ordenada de picos distintos
+        self.buckets = {}   # pico -> set(position_id)
+        self.peak_of = {}   # position_id -> pico
+
+    def __len__(self):
+        return len(self.peak_of)
+
+    def add(self, position_id, peak):
+        if peak not in self.buckets:
+            bisect.insort(self.peaks, peak)
+            self.buckets[peak] = set()
+        self.buckets[peak].add(position_id)
+        self.peak_of[position_id] = peak
+
+    def remove(self, position_id):
+        peak = self.peak_of.pop(position_id, None)
+        if peak is None:
+            return
+        bucket = self.buckets.get(peak)
+        if bucket is not None:
+            bucket.discard(position_id)
+            if not bucket:
+                del self.buckets[peak]
+                index = bisect.bisect_left(self.peaks, peak)
+                if index < len(self.peaks) and self.peaks[index] == peak:
+                    del self.peaks[index]
+
+    def on_price(self, price):
+        # Sobe os picos que ficaram abaixo do preço atual
+        index = bisect.bisect_left(self.peaks, price)
+        if index:
+            merged = set()
+            for peak in self.peaks[:index]:
+                merged |= self.buckets.pop(peak)
+            del self.peaks[:index]
+            if price not in self.buckets:
+                self.peaks.insert(0, price)
+                self.buckets[price] = set()
+            self.buckets[price] |= merged
+            for position_id in merged:
+                self.peak_of[position_id] = price
+
+        # Dispara onde price <= pico * (1 - pct)  <=>  pico >= price / (1 - pct)
+        limit = price / (1 - self.percentage)
+        index = bisect.bisect_left(self.peaks, limit)
+        fired = []
+        for peak in self.peaks[index:]:
+            for position_id in self.buckets.pop(peak):
+                self.peak_of.pop(position_id, None)
+                fired.append(position_id)
+        del self.peaks[index:]
+        return fired
+
+
+# ------------------------------------------------------------------
+
+class ProtectedPosition:
+    def __init__(self, position_id, symbol, on_trigger, stop_price=None, take_profit_price=None,
+                 trailing_percentage=None, reference_price=None, feed_key=None):
+        self.position_id = position_id
+        self.symbol = symbol
+        self.feed_key = feed_key      # Mercado cujos preços disparam a posição (ver feed_key)
+        self.market = (feed_key, symbol)
+        self.on_trigger = on_trigger  # callback(position, reason, price)
+        self.stop_price = stop_price
+        self.take_profit_price = take_profit_price
+        self.trailing_percentage = trailing_percentage
+        self.reference_price = reference_price
+        self.seq = None
+
+
+class ProtectiveMonitor:
+    """
+    Mantém as posições protegidas indexadas por mercado (feed, par) e dispara as
+    saídas a cada preço recebido do TickerFeed do mercado da posição. Os callbacks
+    rodam em um pool de threads para não atrasar o processamento dos próximos ticks.
+    """
+
+    def __init__(self, max_workers=4):
+        self.positions = {}
+        self.stops = {}       # (feed, symbol) -> ThresholdIndex (dispara price <= stop)
+        self.takes = {}       # (feed, symbol) -> ThresholdIndex (dispara price >= take)
+        self.trailing = {}    # (feed, symbol) -> {pct: TrailingIndex}
+        self._seq = itertools.count()
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="protective-exit")
+        self.feeds = {}       # feed_key -> (feed, callback)
+
+    def attach(self, feed: TickerFeed):
+        """Assina o feed de preços (uma vez por mercado) e inicia o feed se necessário."""
+        with self._lock:
+            current = self.feeds.get(feed.key)
+            if current is not None and current[0] is feed:
+                return
+            callback = lambda prices: self.on_prices(prices, feed.key)
+            self.feeds[feed.key] = (feed, callback)
+        if current is not None:
+            current[0].unsubscribe(current[1])
+        feed.subscribe(callback)
+        feed.start()
+
+    def upsert(self, position: ProtectedPosition):
+        """Registra ou substitui os gatilhos de uma posição."""
+        with self._lock:
+            self._remove(position.position_id)
+            position.seq = next(self._seq)
+            self.positions[position.position_id] = position
+            if position.stop_price:
+                self.stops.setdefault(position.market, ThresholdIndex()).add(position.stop_price, position.seq, position.position_id)
+            if position.take_profit_price:
+                self.takes.setdefault(position.market, ThresholdIndex()).add(position.take_profit_price, position.seq, position.position_id)
+            if position.trailing_percentage:
+                groups = self.trailing.setdefault(position.market, {})
+                index = groups.setdefault(position.trailing_percentage, TrailingIndex(position.trailing_percentage))
+                index.add(position.position_id, position.reference_price or position.stop_price or 0.0)
+
+    def remove(self, position_id):
+        with self._lock:
+            self._remove(position_id)
+
+    def _remove(self, position_id):
+        position = self.positions.pop(position_id, None)
+        if position is None:
+            return
+        if position.stop_price and position.market in self.stops:
+            self.stops[position.market].remove(position.stop_price, position.seq)
+        if position.take_profit_price and position.market in self.takes:
+            self.takes[position.market].remove(position.take_profit_price, position.seq)
+        if position.trailing_percentage:
+            index = self.trailing.get(position.market, {}).get(position.trailing_percentage)
+            if index is not None:
+                index.remove(position_id)
+
+    def on_prices(self, prices, feed_key=None):
+        """Preços de um feed: só as posições do mesmo mercado são avaliadas."""
+        for market_key, symbol in list(self.positions_markets()):
+            if market_key != feed_key:
+                continue
+            price = prices.get(symbol)
+            if price is not None:
+                self.on_price(symbol, price, feed_key)
+
+    def positions_markets(self):
+        with self._lock:
+            return set(self.stops) | set(self.takes) | set(self.trailing)
+
+    def on_price(self, symbol, price, feed_key=None):
+        """Processa um preço de um par (no mercado `feed_key`) e dispara as posições atingidas."""
+        market = (feed_key, symbol)
+        triggered = []
+        with self._lock:
+            if market in self.stops:
+                triggered += [(pid, "STOP_LOSS") for pid in self.stops[market].pop_at_or_above(price)]
+            if market in self.takes:
+                triggered += [(pid, "TAKE_PROFIT") for pid in self.takes[market].pop_at_or_below(price)]
+            for index in self.trailing.get(market, {}).values():
+                triggered += [(pid, "TRAILING_STOP") for pid in index.on_price(price)]
+
+            fired = []
+            for position_id, reason in triggered:
+                position = self.positions.get(position_id)
+                if position is None:
+                    continue  # Já disparada por outro gatilho neste tick
+                self._remove(position_id)
+                fired.append((position, reason))
+
+        for position, reason in fired:
+            logging.info(f"[ProtectiveMonitor] {reason} disparado para {position.symbol} ({position.position_id}) em {price}")
+            self._executor.submit(self._dispatch, position, reason, price)
+        return fired
+
+    def _dispatch(self, position, reason, price):
+        try:
+            position.on_trigger(position, reason, price)
+        except Exception as e:
+            logging.error(f"[ProtectiveMonitor] Erro ao executar saída {reason} de {position.position_id}: {e}")
+
+
+# Instâncias globais compartilhadas por todos os bots do processo
+protective_monitor = ProtectiveMonitor()
+_ticker_feeds = {}
+_ticker_feeds_lock = threading.Lock()
+
+def feed_key(client_binance):
+    """
+    Mercado de onde vêm os preços do cliente: clientes da Binance compartilham o feed
+    do mesmo endpoint; os demais (simulação, emulador) têm o próprio feed.
+    """
+    from binance.client import Client
+    if isinstance(client_binance, Client):
+        return ("binance", getattr(client_binance, "custom_api_url", None) or client_binance.API_URL)
+    return ("client", id(client_binance))
+
+def getTickerFeed(client_binance, interval=0.5):
+    """Retorna o feed de preços do mercado do cliente, criando-o na primeira vez."""
+    key = feed_key(client_binance)
+    with _ticker_feeds_lock:
+        feed = _ticker_feeds.get(key)
+        if feed is None:
+            # O feed guarda o cliente, então o id() de um cliente sem endpoint não é reutilizado
+            feed = TickerFeed(client_binance, interval=interval, key=key)
+            _ticker_feeds[key] = feed
+        return feed
@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+"""
+Resiliência das chamadas à Binance (usado por modules/BinanceClient.py).
+Um circuit breaker por endpoint (host + método + caminho), compartilhado por todos os
+clientes do processo: após falhas transitórias seguidas o circuito abre e as chamadas
+falham na hora (CircuitOpenError) até a próxima tentativa de prova, com espera exponencial
+com jitter entre aberturas. Limite de requisições (429/418) abre o circuito do host inteiro
+pelo tempo do Retry-After. O histórico de latência de cada endpoint define o atraso das
+requisições "hedged" (leituras repetidas em paralelo quando a primeira demora).
+"""
+
+import collections
+import logging
+import random
+import threading
+import time
+
+import requests
+from binance.exceptions import BinanceAPIException, BinanceRequestException
+
+
+class CircuitOpenError(BinanceRequestException):
+    """Chamada recusada sem ir à rede: circuito aberto. `retry_after` = segundos até a próxima tentativa."""
+
+    def __init__(self, name, retry_after):
+        super().__init__(f"Circuito aberto para {name}; nova tentativa em {retry_after:.1f}s")
+        self.name = name
+        self.retry_after = retry_after
+
+
+class BudgetExceededError(BinanceRequestException):
+    """Orçamento de tempo da chamada esgotado (inclui novas tentativas e hedge)."""
+
+
+def backoff_delay(attempt, base, cap):
+    """Espera exponencial com jitter: metade fixa + metade aleatória de min(cap, base * 2^attempt)."""
+    delay = min(cap, base * 2 ** max(0, attempt))
+    return delay / 2 + random.uniform(0, delay / 2)
+
+
+def is_rate_limited(error):
+    return isinstance(error, BinanceAPIException) and (error.status_code in (418, 429) or error.code == -1003)
+
+
+def is_transient(error):
+    """Falhas que indicam problema na corretora/rede (contam para o circuito e podem ser repetidas)."""
+    if isinstance(error, (requests.exceptions.ConnectionError, requests.exceptions.Timeout, BudgetExceededError)):
+        return True
+    if isinstance(error, BinanceAPIException):
+        return error.status_code >= 500 or is_rate_limited(error)
+    return False
+
+
+def retry_after(error):
+    """Segundos do cabeçalho Retry-After (429/418), se houver."""
+    response = getattr(error, 'response', None)
+    try:
+        return float(response.headers.get('Retry-After'))
+    except (AttributeError, TypeError, ValueError):
+        return None
+
+
+class CircuitBreaker:
+    """
+    Parameters:
+        failure_threshold (int): Falhas transitórias seguidas que abrem o circuito.
+        reset_timeout / max_reset_timeout (float): Espera da primeira abertura e teto das seguintes.
+    """
+
+    def __init__(self, name, failure_threshold=5, reset_timeout=5.0, max_reset_timeout=120.0, latency_window=100):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.max_reset_timeout = max_reset_timeout
+        self.state = "closed"
+        self.failures = 0
+        self.opens = 0              # Aberturas seguidas (sem sucesso entre elas)
+        self.opened_until = 0
+        self.probing = False
+        self.calls = 0
+        self.hedges = 0
+        self.rejected = 0
+        self.latencies = collections.deque(maxlen=latency_window)
+        self._lock = threading.Lock()
+
+    def before_call(self):
+        """Levanta CircuitOpenError se o circuito está aberto; em meia-abertura deixa passar uma chamada de prova."""
+        with self._lock:
+            now = time.time()
+            if self.state == "open":
+                if now < self.opened_until:
+                    self.rejected += 1
+                    raise CircuitOpenError(self.name, self.opened_until - now)
+                self.state = "half_open"
+                self.probing = False
+            if self.state == "half_open":
+                if self.probing:
+                    self.rejected += 1
+                    raise CircuitOpenError(self.name, self.reset_timeout)
+                self.probing = True
+            self.calls += 1
+
+    def check_open(self):
+        """Só recusa enquanto aberto, sem meia-abertura (bloqueio do host por limite de requisições)."""
+        with self._lock:
+            now = time.time()
+            if self.state == "open" and now < self.opened_until:
+                self.rejected += 1
+                raise CircuitOpenError(self.name, self.opened_until - now)
+            if self.state == "open":
+                self.state = "closed"
+                self.opens = 0
+
+    def on_success(self, latency=None):
+        with self._lock:
+            self.state = "closed"
+            self.failures = 0
+            self.opens = 0
+            self.probing = False
+            if latency is not None:
+                self.latencies.append(latency)
+
+    def on_failure(self):
+        with self._lock:
+            self.failures += 1
+            self.probing = False
+            if self.state == "half_open" or self.failures >= self.failure_threshold:
+                self._open(backoff_delay(self.opens, self.reset_timeout, self.max_reset_timeout))
+
+    def trip(self, seconds):
+        """Abre o circuito por `seconds` (ex: Retry-After de um 429)."""
+        with self._lock:
+            self._open(seconds)
+
+    def _open(self, seconds):
+        self.state = "open"
+        self.opened_until = max(self.opened_until, time.time() + seconds)
+        self.opens += 1
+        self.failures = 0
+        logging.error(f"[CircuitBreaker] Circuito aberto para {self.name} por {seconds:.1f}s")
+
+    def hedge_delay(self, default=1.0, minimum=0.1):
+        """Atraso antes do hedge: p95 das latências recentes (padrão enquanto há poucas amostras)."""
+        with self._lock:
+            if len(self.latencies) < 20:
+                return default
+            ordered = sorted(self.latencies)
+        return max(minimum, ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))])
+
+    def allow_hedge(self, ratio=0.1):
+        """Hedge limitado a ~10% das chamadas e só com o circuito fechado (não agrava incidentes)."""
+        with self._lock:
+            if self.state != "closed" or self.hedges >= self.calls * ratio + 1:
+                return False
+            self.hedges += 1
+            return True
+
+    def snapshot(self):
+        with self._lock:
+            ordered = sorted(self.latencies)
+            return {
+                "state": self.state,
+                "failures": self.failures,
+                "retry_in": round(max(0, self.opened_until - time.time()), 1) if self.state == "open" else 0,
+                "calls": self.calls,
+                "hedges": self.hedges,
+                "rejected": self.rejected,
+                "p50_ms": round(ordered[len(ordered) // 2] * 1000, 1) if ordered else None,
+                "p95_ms": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))] * 1000, 1) if ordered else None,
+            }
+
+
+_breakers = {}
+_breakers_lock = threading.Lock()
+
+
+def get_breaker(name, **kwargs):
+    """Circuito compartilhado no processo (um por endpoint ou host)."""
+    with _breakers_lock:
+        breaker = _breakers.get(name)
+        if breaker is None:
+            breaker = CircuitBreaker(name, **kwargs)
+            _breakers[name] = breaker
+        return breaker
+
+
+def breakers_snapshot():
+    """Estado de todos os circuitos, ordenado por nome (para a rota de saúde)."""
+    with _breakers_lock:
+        items = sorted(_breakers.items())
+    return {name: breaker.snapshot() for name, breaker in items}
@@ -0,0 +1,308 @@
+#!/usr/bin/env python3
+"""
+Gravação e reprodução de sessões dos robôs.
+SessionRecorder envolve o cliente da corretora e grava cada chamada (método, argumentos,
+resposta ou erro, horário) em um arquivo JSON Lines comprimido com gzip. ReplayClient
+devolve as mesmas respostas na mesma ordem, então `replay_session` reproduz o robô
+(BinanceTraderBot.execute) de forma determinística e na velocidade máxima: para
+investigar um comportamento de produção ou como carga realista para profiling.
+
+    BOT_RECORD_DIR=src/logs/sessions python run.py             # grava as sessões dos robôs
+    cd src && python -m modules.SessionRecorder logs/sessions/BTCUSDT_....jsonl.gz
+"""
+
+import gzip
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from collections import defaultdict, deque
+
+from binance.exceptions import BinanceAPIException
+
+SESSION_VERSION = 1
+FLUSH_INTERVAL = 1.0 # Segundos entre descargas do gzip (sessão legível mesmo se o processo morrer)
+
+# Parâmetros que mudam a cada chamada e não identificam a requisição na reprodução
+VOLATILE_PARAMS = ('timestamp', 'recvWindow', 'startTime', 'endTime', 'newClientOrderId')
+
+
+def session_path(directory, bot_id):
+    return os.path.join(directory, f"{bot_id}_{int(time.time())}.jsonl.gz")
+
+
+def _jsonable(value):
+    return json.loads(json.dumps(value, default=str))
+
+
+def list_delta(previous, current, max_skip=100):
+    """
+    Diferença entre duas respostas em lista com janela deslizante (ex: klines do ciclo anterior):
+    (descartados do início, mantidos, novos itens) ou None se não compensa.
+    """
+    if not previous or not current:
+        return None
+    for skip in range(min(max_skip, len(previous))):
+        if previous[skip] == current[0]:
+            keep = 1
+            limit = min(len(previous) - skip, len(current))
+            while keep < limit and previous[skip + keep] == current[keep]:
+                keep += 1
+            if keep * 2 >= len(current):
+                return skip, keep, current[keep:]
+            return None
+    return None
+
+
+def call_key(name, args, kwargs):
+    """Identifica a chamada sem os parâmetros voláteis (timestamps, ids gerados)."""
+    params = {key: value for key, value in kwargs.items() if key not in VOLATILE_PARAMS}
+    return json.dumps([name, args, params], sort_keys=True, default=str)
+
+
+class SessionRecorder:
+    """
+    Cliente que repassa as chamadas ao cliente real e grava cada uma na sessão.
+    Atributos que não são métodos (API_KEY, clock, ...) são repassados sem gravação.
+    """
+
+    def __init__(self, client, path, header=None):
+        self._client = client
+        self._path = path
+        self._lock = threading.Lock()
+        self._seq = 0
+        self._started = time.monotonic()
+        self._last_flush = 0
+        self._last_results = {} # Chave da chamada -> (seq, resultado), para gravar só a diferença de listas
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self._file = gzip.open(path, 'wt', encoding='utf-8', compresslevel=6)
+        self._write({"version": SESSION_VERSION, "recorded_at": int(time.time() * 1000), **(header or {})})
+
+    def __getattr__(self, name):
+        attribute = getattr(self._client, name)
+        if not callable(attribute) or name.startswith('__'):
+            return attribute
+
+        def recorded(*args, **kwargs):
+            started = time.monotonic()
+            try:
+                result = attribute(*args, **kwargs)
+            except BinanceAPIException as e:
+                self._record(name, args, kwargs, started, error={
+                    "type": "BinanceAPIException", "status": e.status_code, "text": getattr(e.response, 'text', None) or json.dumps({"code": e.code, "msg": e.message})
+                })
+                raise
+            except Exception as e:
+                self._record(name, args, kwargs, started, error={"type": type(e).__name__, "message": str(e)})
+                raise
+            self._record(name, args, kwargs, started, result=result)
+            return result
+
+        return recorded
+
+    def _record(self, name, args, kwargs, started, result=None, error=None):
+        record = {
+            "t": round((started - self._started) * 1000, 3),    # ms desde o início da sessão
+            "ts": int(time.time() * 1000),                        # horário da resposta (ms)
+            "ms": round((time.monotonic() - started) * 1000, 3),  # latência
+            "call": name,
+            "args": _jsonable(list(args)),
+            "kwargs": _jsonable(kwargs),
+        }
+        key = call_key(name, record["args"], record["kwargs"])
+        if error is not None:
+            record["error"] = error
+        else:
+            result = _jsonable(result)
+        try:
+            with self._lock:
+                self._seq += 1
+                record["seq"] = self._seq
+                if error is None:
+                    previous = self._last_results.get(key)
+                    delta = list_delta(previous[1], result) if previous and isinstance(result, list) else None
+                    if delta is not None:
+                        skip, keep, tail = delta
+                        record["delta"] = {"ref": previous[0], "skip": skip, "keep": keep, "tail": tail}
+                    else:
+                        record["result"] = result
+                    self._last_results[key] = (self._seq, result)
+                self._write(record)
+        except Exception as e:
+            logging.error(f"[SessionRecorder] Erro ao gravar sessão {self._path}: {e}")
+
+    def _write(self, record):
+        self._file.write(json.dumps(record, separators=(',', ':')) + '\n')
+        now = time.monotonic()
+        if now - self._last_flush >= FLUSH_INTERVAL:
+            self._file.flush()
+            self._last_flush = now
+
+    def close(self):
+        with self._lock:
+            if not self._file.closed:
+                self._file.close()
+
+
+def load_session(path):
+    """Retorna (cabeçalho, [registros]) com as respostas gravadas como diferença já reconstruídas."""
+    with gzip.open(path, 'rt', encoding='utf-8') as file:
+        header = None
+        records = []
+        results = {}
+        try:
+            for line in file:
+                record = json.loads(line)
+                if header is None:
+                    header = record
+                    continue
+                delta = record.pop("delta", None)
+                if delta is not None:
+                    base = results[delta["ref"]]
+                    record["result"] = base[delta["skip"]:delta["skip"] + delta["keep"]] + delta["tail"]
+                if "result" in record:
+                    results[record["seq"]] = record["result"]
+                records.append(record)
+        except (EOFError, json.JSONDecodeError):
+            # Sessão interrompida (processo encerrado sem fechar o arquivo): usa o que foi gravado
+            pass
+    return header, records
+
+
+class ReplayExhausted(Exception):
+    """A sessão não tem mais respostas para a chamada pedida."""
+
+
+class _Response:
+    def __init__(self, status_code, text):
+        self.status_code = status_code
+        self.text = text
+        self.request = None
+        self.headers = {}
+
+
+class ReplayClient:
+    """
+    Cliente que responde com as respostas gravadas. Cada chamada consome a próxima resposta
+    gravada com o mesmo método e parâmetros; se não houver (ex: parâmetro derivado do
+    relógio), a próxima do mesmo método. O relógio (`clock.now_ms`) acompanha o horário
+    gravado da última resposta, então getTimestamp() também é reproduzido.
+    """
+
+    API_KEY = "replay"
+    API_SECRET = None
+    timestamp_offset = 0
+
+    def __init__(self, records):
+        self.by_key = defaultdict(deque)
+        self.by_call = defaultdict(deque)
+        for record in records:
+            entry = [record, False] # [registro, consumido]
+            self.by_key[call_key(record["call"], record["args"], record["kwargs"])].append(entry)
+            self.by_call[record["call"]].append(entry)
+        self.now = records[0]["ts"] if records else int(time.time() * 1000)
+        self.calls = 0
+        self.unmatched = 0
+        self.clock = self
+
+    def now_ms(self):
+        return self.now
+
+    def _next(self, queue):
+        while queue and queue[0][1]:
+            queue.popleft()
+        return queue.popleft() if queue else None
+
+    def __getattr__(self, name):
+        if name.startswith('__'):
+            raise AttributeError(name)
+
+        def replayed(*args, **kwargs):
+            entry = self._next(self.by_key[call_key(name, _jsonable(list(args)), _jsonable(kwargs))])
+            if entry is None:
+                entry = self._next(self.by_call[name])
+                self.unmatched += 1
+            if entry is None:
+                raise ReplayExhausted(f"Sessão sem resposta para {name}")
+            entry[1] = True
+            record = entry[0]
+            self.calls += 1
+            self.now = record["ts"]
+            error = record.get("error")
+            if error is None:
+                return record["result"]
+            if error["type"] == "BinanceAPIException":
+                raise BinanceAPIException(_Response(error["status"], error["text"]), error["status"], error["text"])
+            raise RuntimeError(f"{error['type']}: {error['message']}")
+
+        return replayed
+
+
+def replay_session(path, cycles=None, bot_class=None, on_cycle=None):
+    """
+    Reproduz a sessão: cria o robô com a configuração gravada sobre o ReplayClient e executa
+    execute() até a sessão acabar (ou `cycles` ciclos). Monitor de proteção e perseguição de
+    ordens (threads em segundo plano) ficam desligados para a ordem das chamadas ser determinística,
+    e o preço pelo livro de ofertas também: o livro usa o cliente sem gravação (não está na sessão).
+    Gravações no banco vão para o src/database.db do diretório atual.
+
+    Returns:
+        dict: {'cycles', 'calls', 'unmatched', 'cycle_ms': [...], 'operations': [...]}
+    """
+    if bot_class is None:
+        from modules.BinanceRobot import BinanceTraderBot as bot_class
+
+    header, records = load_session(path)
+    client = ReplayClient(records)
+    config = dict(header.get("config", {}))
+    config.update(use_protective_monitor=False, order_chasing=False, order_book_pricing=None)
+    bot = bot_class(**config, client_binance=client, bot_id=header.get("bot_id") or "replay")
+
+    durations, operations = [], []
+    while cycles is None or len(durations) < cycles:
+        started = time.perf_counter()
+        try:
+            bot.execute()
+        except ReplayExhausted:
+            break
+        durations.append((time.perf_counter() - started) * 1000)
+        operations.append(getattr(bot, 'last_operation', None))
+        if on_cycle:
+            on_cycle(bot)
+    return {
+        "cycles": len(durations),
+        "calls": client.calls,
+        "unmatched": client.unmatched,
+        "cycle_ms": durations,
+        "operations": operations,
+    }
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Reproduz uma sessão gravada de um robô")
+    parser.add_argument("session")
+    parser.add_argument("--cycles", type=int, default=None)
+    parser.add_argument("--workdir", default=None, help="Diretório do banco da reprodução (padrão: temporário)")
+    args = parser.parse_args()
+
+    session = os.path.abspath(args.session)
+    workdir = args.workdir or tempfile.mkdtemp(prefix="replay-")
+    os.makedirs(os.path.join(workdir, "src", "logs"), exist_ok=True)
+    os.chdir(workdir) # Não escreve no banco de produção
+
+    from Models.OrderLedgerModel import OrderLedgerModel
+    from Models.FillLedgerModel import FillLedgerModel
+    from Models.EquityModel import EquityModel
+    OrderLedgerModel.init_db()
+    FillLedgerModel.init_db()
+    EquityModel.init_db()
+
+    result = replay_session(session, cycles=args.cycles)
+    cycle_ms = sorted(result["cycle_ms"]) or [0]
+    print(f"Ciclos: {result['cycles']} | Chamadas: {result['calls']} (sem correspondência exata: {result['unmatched']})")
+    print(f"Ciclo: mediana {cycle_ms[len(cycle_ms) // 2]:.1f} ms | máx {cycle_ms[-1]:.1f} ms")
+    print(f"Operações: {result['operations']}")
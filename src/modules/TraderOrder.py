@@ -1,10 +1,43 @@
 import logging
+import math
 
 class TraderOrder:
-        
-    def create_order(client_binance, _symbol, _side, _type, _quantity, _timeInForce = None, _limit_price = None, _stop_price = None):
+
+    # Ajusta o valor para o múltiplo do passo (tickSize/stepSize), sem notação científica
+    @staticmethod
+    def adjust_to_step(value, step, as_string=False):
+        if step <= 0:
+            raise ValueError("O valor de 'step' deve ser maior que zero.")
+
+        # Descobrir o número de casas decimais do step
+        decimal_places = max(0, abs(int(math.floor(math.log10(step))))) if step < 1 else 0
+
+        # Ajustar o valor ao step usando floor e manter a precisão do step
+        adjusted_value = round(math.floor(value / step) * step, decimal_places)
+
+        if as_string:
+            return f"{adjusted_value:.{decimal_places}f}"
+        else:
+            return adjusted_value
+
+    # Arredonda pelo tickSize quando informado (padrão antigo: 2 casas)
+    @staticmethod
+    def _price(value, tick_size):
+        if tick_size:
+            return TraderOrder.adjust_to_step(value, tick_size, as_string=True)
+        return round(value, 2)
+
+    @staticmethod
+    def _quantity(value, step_size):
+        if step_size:
+            return TraderOrder.adjust_to_step(float(value), step_size, as_string=True)
+        return value
+
+    def create_order(client_binance, _symbol, _side, _type, _quantity, _timeInForce = None, _limit_price = None, _stop_price = None, _tick_size = None, _step_size = None):
         ordemExecute = 0;
-        
+        order_buy = None
+        _quantity = TraderOrder._quantity(_quantity, _step_size)
+
         try:
             print(f"[create_order] _symbol: '{_symbol}',_side: '{_side}',_type: '{_type}',_quantity: '{_quantity}',_timeInForce: '{_timeInForce}',_limit_price: '{_limit_price}',_stop_price: '{_stop_price}'")
 
@@ -24,9 +57,10 @@ class TraderOrder:
                     type = _type,  # Ordem Limitada
                     timeInForce = _timeInForce,  # Good 'Til Canceled (Ordem válida até ser cancelada)
                     quantity = _quantity,
-                    price = round(_limit_price, 2)
+                    price = TraderOrder._price(_limit_price, _tick_size)
                 )
-            elif (_limit_price is not None and _stop_price is None):
+            elif (_limit_price is not None and _stop_price is not None):
+                # STOP_LOSS_LIMIT / TAKE_PROFIT_LIMIT
                 ordemExecute = 3;
                 order_buy = client_binance.create_order(
                     symbol = _symbol,
@@ -34,12 +68,44 @@ class TraderOrder:
                     type = _type,
                     timeInForce = _timeInForce,
                     quantity = _quantity,
-                    price = round(_limit_price, 2),  # Preço limite ajustado
-                    stopPrice = round(_stop_price, 2)  # Preço de disparo ajustado
-                )        
+                    price = TraderOrder._price(_limit_price, _tick_size),  # Preço limite ajustado
+                    stopPrice = TraderOrder._price(_stop_price, _tick_size)  # Preço de disparo ajustado
+                )
+            else:
+                # STOP_LOSS / TAKE_PROFIT (executa a mercado no disparo)
+                ordemExecute = 4;
+                order_buy = client_binance.create_order(
+                    symbol = _symbol,
+                    side = _side,
+                    type = _type,
+                    quantity = _quantity,
+                    stopPrice = TraderOrder._price(_stop_price, _tick_size)
+                )
         except Exception as e:
             print(f"[create_order][ERROR]({ordemExecute}) _symbol: '{_symbol}',_side: '{_side}',_type: '{_type}',_quantity: '{_quantity}',_timeInForce: '{_timeInForce}',_limit_price: '{_limit_price}',_stop_price: '{_stop_price}'")
             logging.error(f"[create_order][ERROR]({ordemExecute}) Erro ao enviar ordem ({ordemExecute}): {e}")
-            print(f"[create_order][ERROR]({ordemExecute}) Erro ao enviar ordem STOP_LOSS_LIMIT de venda ({ordemExecute}): {e}")        
-        
-        return order_buy
\ No newline at end of file
+            print(f"[create_order][ERROR]({ordemExecute}) Erro ao enviar ordem {_type} ({ordemExecute}): {e}")
+
+        return order_buy
+
+    # Envia uma OCO de VENDA (take profit LIMIT_MAKER + STOP_LOSS_LIMIT) na corretora
+    # Usa o endpoint orderList/oco; quando uma perna executa, a outra é cancelada pela própria Binance
+    def create_oco_sell_order(client_binance, _symbol, _quantity, _take_profit_price, _stop_price, _stop_limit_price, _tick_size, _step_size):
+        params = {
+            "symbol": _symbol,
+            "side": "SELL",
+            "quantity": TraderOrder._quantity(_quantity, _step_size),
+            "aboveType": "LIMIT_MAKER",
+            "abovePrice": TraderOrder._price(_take_profit_price, _tick_size),
+            "belowType": "STOP_LOSS_LIMIT",
+            "belowStopPrice": TraderOrder._price(_stop_price, _tick_size),
+            "belowPrice": TraderOrder._price(_stop_limit_price, _tick_size),
+            "belowTimeInForce": "GTC",
+        }
+        try:
+            print(f"[create_oco_sell_order] {params}")
+            return client_binance._post("orderList/oco", True, data=params)
+        except Exception as e:
+            logging.error(f"[create_oco_sell_order][ERROR] Erro ao enviar OCO de venda: {e}")
+            print(f"[create_oco_sell_order][ERROR] Erro ao enviar OCO de venda: {e}")
+            return None
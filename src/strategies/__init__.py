@@ -1 +1,12 @@
-from .strategy_runner import runStrategies
\ No newline at end of file
+from .strategy_runner import runStrategies, buildStrategyPipeline
+from .stop_loss import getStopLossPrice, isStopLossTriggered
+from .registry import (
+    STRATEGIES,
+    registerStrategy,
+    getStrategy,
+    StrategyInstance,
+    FallbackStrategy,
+    VoteStrategy,
+    WeightedStrategy,
+    evaluateStrategies,
+)
@@ -1,27 +1,37 @@
-
 import pandas as pd
 
+from .registry import IndicatorSpec, registerStrategy, StrategyInstance, evaluateStrategies
+
 # Fallback strategy
 # Se a estratégia de antecipação de média móvel não retornar nada
 # Executamos a estratégia original de media móvel, para ter como referência.
-def getMovingAverageTradeStrategy(stock_data: pd.DataFrame, fast_window = 7, slow_window = 40):
-    # Calcula as Médias Moveis Rápida e Lenta
-    stock_data["ma_fast"] = stock_data["close_price"].rolling(window=fast_window).mean()  # Média Rápida
-    stock_data["ma_slow"] = stock_data["close_price"].rolling(window=slow_window).mean() # Média Lenta
+def _movingAverageRequires(fast_window, slow_window):
+    return {
+        "ma_fast": IndicatorSpec("sma", "close_price", fast_window), # Média Rápida
+        "ma_slow": IndicatorSpec("sma", "close_price", slow_window), # Média Lenta
+    }
+
+@registerStrategy("moving_average", _movingAverageRequires, fast_window=7, slow_window=40)
+def movingAverageTradeStrategy(inputs, fast_window, slow_window):
     # Pega as últimas Moving Average
-    last_ma_fast = stock_data["ma_fast"].iloc[-1] # iloc[-1] pega o último dado do array.
-    last_ma_slow = stock_data["ma_slow"].iloc[-1]
+    last_ma_fast = inputs["ma_fast"][-1] # [-1] pega o último dado do array.
+    last_ma_slow = inputs["ma_slow"][-1]
     # Toma a decisão, baseada na posição da média movel
     # (False = Vender | True = Comprar)
     if last_ma_fast > last_ma_slow:
         ma_trade_decision = True # Compra
     else:
         ma_trade_decision = False # Vende
-        
+
     print('-------')
     print('Estratégia executada: Moving Average')
     print(f' | {last_ma_fast:.3f} = Última Média Rápida \n | {last_ma_slow:.3f} = Última Média Lenta')
     print(f' | Decisão: {"Comprar" if ma_trade_decision == True else "Vender"}')
     print('-------')
-    
-    return ma_trade_decision;
\ No newline at end of file
+
+    return ma_trade_decision
+
+# Mantido por compatibilidade: executa a estratégia registrada sem alterar o stock_data
+def getMovingAverageTradeStrategy(stock_data: pd.DataFrame, fast_window = 7, slow_window = 40):
+    strategy = StrategyInstance("moving_average", fast_window=fast_window, slow_window=slow_window)
+    return evaluateStrategies(strategy, stock_data)
@@ -1,20 +1,28 @@
 import pandas as pd
 
+from .registry import IndicatorSpec, registerStrategy, StrategyInstance, evaluateStrategies
+
 # Principal
 # Executa a estratégia de antecipação de média movel
-# Ela leva em consideração as médias moveis o desvio padrão e o gradiente de inclinação das médias 
+# Ela leva em consideração as médias moveis o desvio padrão e o gradiente de inclinação das médias
 # Por enquanto nossa estratégia principal
-def getMovingAverageAntecipationTradeStrategy(stock_data: pd.DataFrame, volatility_factor: float, fast_window=7, slow_window=40):
-    # Calcula as Médias Moveis Rápida e Lenta
-    stock_data["ma_fast"] = stock_data["close_price"].rolling(window=fast_window).mean()  # Média Rápida
-    stock_data["ma_slow"] = stock_data["close_price"].rolling(window=slow_window).mean()  # Média Lenta
+def _movingAverageAntecipationRequires(volatility_factor, fast_window, slow_window, volatility_window):
+    return {
+        "ma_fast": IndicatorSpec("sma", "close_price", fast_window),          # Média Rápida
+        "ma_slow": IndicatorSpec("sma", "close_price", slow_window),          # Média Lenta
+        "volatility": IndicatorSpec("std", "close_price", volatility_window), # Desvio padrão
+    }
+
+@registerStrategy("moving_average_antecipation", _movingAverageAntecipationRequires,
+                  volatility_factor=0.5, fast_window=7, slow_window=40, volatility_window=40)
+def movingAverageAntecipationTradeStrategy(inputs, volatility_factor, fast_window, slow_window, volatility_window):
     # Pega as últimas Médias Móveis e as penúltimas para calcular o gradiente
-    last_ma_fast = stock_data["ma_fast"].iloc[-1]  # Última Média Rápida
-    prev_ma_fast = stock_data["ma_fast"].iloc[-3]  # Penúltima Média Rápida
-    last_ma_slow = stock_data["ma_slow"].iloc[-1]  # Última Média Lenta
-    prev_ma_slow = stock_data["ma_slow"].iloc[-3]  # Penúltima Média Lenta
+    last_ma_fast = inputs["ma_fast"][-1]  # Última Média Rápida
+    prev_ma_fast = inputs["ma_fast"][-3]  # Penúltima Média Rápida
+    last_ma_slow = inputs["ma_slow"][-1]  # Última Média Lenta
+    prev_ma_slow = inputs["ma_slow"][-3]  # Penúltima Média Lenta
     # Última volatilidade
-    last_volatility = stock_data["volatility"].iloc[-2]
+    last_volatility = inputs["volatility"][-2]
     # Calcula o gradiente (mudança) das médias móveis
     fast_gradient = last_ma_fast - prev_ma_fast
     slow_gradient = last_ma_slow - prev_ma_slow
@@ -45,4 +53,10 @@ def getMovingAverageAntecipationTradeStrategy(stock_data: pd.DataFrame, volatili
     print(f' | Gradiente Lento: {slow_gradient:.3f} ({ "Subindo" if slow_gradient > 0 else "Descendo" })')
     print(f' | Decisão: {"Comprar" if ma_trade_decision == True else "Vender" if ma_trade_decision == False else "Nenhuma"}')
     print('-------')
-    return ma_trade_decision
\ No newline at end of file
+    return ma_trade_decision
+
+# Mantido por compatibilidade: executa a estratégia registrada sem alterar o stock_data
+def getMovingAverageAntecipationTradeStrategy(stock_data: pd.DataFrame, volatility_factor: float, fast_window=7, slow_window=40):
+    strategy = StrategyInstance("moving_average_antecipation", volatility_factor=volatility_factor,
+                                fast_window=fast_window, slow_window=slow_window)
+    return evaluateStrategies(strategy, stock_data)
@@ -0,0 +1,174 @@
+from indicators import IndicatorSpec, indicator_cache
+
+# Registro de estratégias
+# Cada estratégia declara os indicadores (e janelas) que precisa, e recebe
+# os valores já calculados como arrays somente leitura, sem alterar o stock_data.
+# Estratégias podem ser combinadas (votação, pesos ou cadeia de fallback) e os
+# indicadores compartilhados são calculados uma única vez por ciclo.
+
+STRATEGIES = {}
+
+
+class Strategy:
+    """
+    Estratégia registrada.
+
+    Attributes:
+        name (str): Nome único da estratégia no registro.
+        evaluate (callable): Função (inputs, **params) -> True (Comprar) | False (Vender) | None (Inconclusiva).
+        requires (callable): Função (**params) -> {alias: IndicatorSpec} com os indicadores necessários.
+        defaults (dict): Parâmetros padrão da estratégia.
+    """
+
+    def __init__(self, name, evaluate, requires, defaults):
+        self.name = name
+        self.evaluate = evaluate
+        self.requires = requires
+        self.defaults = defaults
+
+
+def registerStrategy(name, requires, **defaults):
+    """Decorator que registra uma função de estratégia no registro global."""
+    def decorator(evaluate):
+        if name in STRATEGIES:
+            raise ValueError(f"Estratégia já registrada: {name}")
+        STRATEGIES[name] = Strategy(name, evaluate, requires, defaults)
+        return evaluate
+    return decorator
+
+
+def getStrategy(name):
+    if name not in STRATEGIES:
+        raise KeyError(f"Estratégia não registrada: {name}")
+    return STRATEGIES[name]
+
+
+# ------------------------------------------------------------------
+# Nós da árvore de decisão
+# Todos expõem requirements() e decide(indicators)
+
+class StrategyInstance:
+    """Estratégia registrada com os parâmetros definidos."""
+
+    def __init__(self, name, **params):
+        self.strategy = getStrategy(name)
+        self.params = {**self.strategy.defaults, **params}
+        self.aliases = self.strategy.requires(**self.params)
+
+    def requirements(self):
+        return set(self.aliases.values())
+
+    def decide(self, indicators):
+        inputs = {alias: indicators[spec] for alias, spec in self.aliases.items()}
+        return self.strategy.evaluate(inputs, **self.params)
+
+    def __repr__(self):
+        return f"StrategyInstance({self.strategy.name!r}, {self.params!r})"
+
+
+class CompositeStrategy:
+    """Base para combinações de estratégias."""
+
+    def __init__(self, members):
+        self.members = list(members)
+        if not self.members:
+            raise ValueError("Uma estratégia composta precisa de ao menos um membro.")
+
+    def requirements(self):
+        specs = set()
+        for member in self.members:
+            specs |= member.requirements()
+        return specs
+
+
+class FallbackStrategy(CompositeStrategy):
+    """Retorna a primeira decisão conclusiva (diferente de None) na ordem dos membros."""
+
+    def decide(self, indicators):
+        for index, member in enumerate(self.members):
+            decision = member.decide(indicators)
+            if decision is not None:
+                return decision
+            if index + 1 < len(self.members):
+                print('Estratégia inconclusiva\nExecutando estratégia de fallback...')
+        return None
+
+
+class VoteStrategy(CompositeStrategy):
+    """
+    Decisão por maioria simples entre os votos conclusivos.
+    min_votes define quantos votos conclusivos são necessários para decidir.
+    """
+
+    def __init__(self, members, min_votes=1):
+        super().__init__(members)
+        self.min_votes = min_votes
+
+    def decide(self, indicators):
+        decisions = [member.decide(indicators) for member in self.members]
+        buys = sum(1 for d in decisions if d is True)
+        sells = sum(1 for d in decisions if d is False)
+        if buys + sells < self.min_votes or buys == sells:
+            return None
+        return buys > sells
+
+
+class WeightedStrategy(CompositeStrategy):
+    """
+    Soma ponderada das decisões (Comprar = +peso | Vender = -peso).
+    Decide apenas quando o score normalizado ultrapassa o threshold.
+    """
+
+    def __init__(self, weighted_members, threshold=0.0):
+        super().__init__([member for member, _ in weighted_members])
+        self.weights = [float(weight) for _, weight in weighted_members]
+        self.threshold = threshold
+
+    def decide(self, indicators):
+        total_weight = sum(abs(w) for w in self.weights) or 1.0
+        score = 0.0
+        for member, weight in zip(self.members, self.weights):
+            decision = member.decide(indicators)
+            if decision is True:
+                score += weight
+            elif decision is False:
+                score -= weight
+        score /= total_weight
+        if score > self.threshold:
+            return True
+        if score < -self.threshold:
+            return False
+        return None
+
+
+# ------------------------------------------------------------------
+
+def evaluateStrategies(node, stock_data, indicator_source=None):
+    """
+    Calcula uma única vez todos os indicadores exigidos pela árvore de estratégias
+    e retorna a decisão final.
+
+    Parameters:
+        node: StrategyInstance ou CompositeStrategy.
+        stock_data (pd.DataFrame): Candles do ativo (não é alterado).
+        indicator_source (callable, optional): Função (stock_data, specs) -> {spec: array}.
+            Padrão: indicator_cache.compute_indicators (cache compartilhado por par/intervalo/candle).
+    """
+    compute = indicator_source or indicator_cache.compute_indicators
+    indicators = compute(stock_data, node.requirements())
+    return node.decide(indicators)
+
+
+__all__ = [
+    "IndicatorSpec",
+    "STRATEGIES",
+    "Strategy",
+    "registerStrategy",
+    "getStrategy",
+    "StrategyInstance",
+    "CompositeStrategy",
+    "FallbackStrategy",
+    "VoteStrategy",
+    "WeightedStrategy",
+    "evaluateStrategies",
+]
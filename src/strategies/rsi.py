@@ -1,45 +1,45 @@
-def getMovingAverageVergenceRSI(
-        self, fast_window=7, slow_window=40, volatility_factor=0.7
-    ):
+import logging
+
+import numpy as np
+import pandas as pd
+
+from .registry import IndicatorSpec, registerStrategy
+
+erro_logger = logging.getLogger(__name__)
+
+
+# Estratégia de Moving Average com Volatilidade + Gradiente + RSI
+# Recebe os indicadores já calculados (somente leitura) através do registro de estratégias
+def _movingAverageVergenceRSIRequires(fast_window, slow_window, volatility_factor, rsi_window, rsi_upper, rsi_lower):
+    return {
+        "ma_fast": IndicatorSpec("sma", "close_price", fast_window),
+        "ma_slow": IndicatorSpec("sma", "close_price", slow_window),
+        "volatility": IndicatorSpec("std", "close_price", slow_window),
+        "rsi": IndicatorSpec("rsi", "close_price", rsi_window),
+    }
+
+@registerStrategy("moving_average_vergence_rsi", _movingAverageVergenceRSIRequires,
+                  fast_window=7, slow_window=40, volatility_factor=0.7, rsi_window=14, rsi_upper=70, rsi_lower=30)
+def getMovingAverageVergenceRSI(inputs, fast_window, slow_window, volatility_factor, rsi_window, rsi_upper, rsi_lower):
         try:
             hysteresis = 0.001  # Define a histerese
             growth_threshold = 2.0  # Detectar crescimento quando o gradiente é duas vezes maior que o valor anterior
             correction_threshold = (
                 0.3  # Detectar correção quando o gradiente diminui pelo menos 0.3
             )
+            ma_trade_decision = None
 
-            self.stock_data["ma_fast"] = (
-                self.stock_data["close_price"].rolling(window=fast_window).mean()
-            )
-            self.stock_data["ma_slow"] = (
-                self.stock_data["close_price"].rolling(window=slow_window).mean()
-            )
-            self.stock_data["volatility"] = (
-                self.stock_data["close_price"].rolling(window=slow_window).std()
-            )
-            last_ma_fast = self.stock_data["ma_fast"].iloc[-1]
-            last_ma_slow = self.stock_data["ma_slow"].iloc[-1]
-            prev_ma_slow = self.stock_data["ma_slow"].iloc[-2]
-            prev_ma_fast = self.stock_data["ma_fast"].iloc[-2]
-
-            # instanciar a instância da classe RSICalculationClass
-            # Após calcular o RSI
-            self.indicators.calculate_rsi()
-
-            # Verifique se a coluna 'rsi' existe e pegue o último valor
-            if "rsi" in self.stock_data:
-                last_rsi = self.stock_data["rsi"].iloc[-1]
-            else:
-                raise ValueError(
-                    "Erro: a coluna 'rsi' não foi encontrada em 'self.stock_data' após o cálculo."
-                )
+            last_ma_fast = inputs["ma_fast"][-1]
+            last_ma_slow = inputs["ma_slow"][-1]
+            prev_ma_slow = inputs["ma_slow"][-2]
+            prev_ma_fast = inputs["ma_fast"][-2]
 
-            last_rsi = self.stock_data["rsi"].iloc[-1]
+            last_rsi = inputs["rsi"][-1]
 
-            last_volatility = self.stock_data["volatility"].iloc[-1]
-            volatility = self.stock_data["volatility"][
-                len(self.stock_data) - slow_window :
-            ].mean()  # Média da volatilidade dos últimos n valores
+            last_volatility = inputs["volatility"][-1]
+            volatility = np.nanmean(
+                inputs["volatility"][-slow_window:]
+            )  # Média da volatilidade dos últimos n valores
             fast_gradient = last_ma_fast - prev_ma_fast
             slow_gradient = last_ma_slow - prev_ma_slow
 
@@ -54,7 +54,7 @@ def getMovingAverageVergenceRSI(
             if (
                 current_difference > volatility * volatility_factor
                 and last_volatility < volatility
-                and last_rsi < self.rsi_upper
+                and last_rsi < rsi_upper
             ):
                 ma_trade_decision = True  # Sinal de compra
                 print(
@@ -84,7 +84,7 @@ def getMovingAverageVergenceRSI(
                 current_difference > volatility * volatility_factor
                 and last_volatility > volatility
                 and fast_gradient > slow_gradient
-                and last_rsi > self.rsi_lower
+                and last_rsi > rsi_lower
             ):
                 ma_trade_decision = True  # Sinal de compra
                 print(
@@ -116,7 +116,7 @@ def getMovingAverageVergenceRSI(
                             "Venda: MA rápida maior que a lenta, mas a volatilidade anterior é maior que a atual, e o gradiente rápido menor que o lento."
                         )
 
-            elif last_rsi < self.rsi_lower:
+            elif last_rsi < rsi_lower:
                 if fast_gradient < slow_gradient:
                     ma_trade_decision = False  # Sinal de venda
                     print(
@@ -148,7 +148,7 @@ def getMovingAverageVergenceRSI(
                 f"Estratégia executada: Moving Average com Volatilidade + Gradiente + RSI"
             )
             print(
-                f"{self.operation_code}:\n {last_ma_fast:.3f} - Última Média Rápida \n {last_ma_slow:.3f} - Última Média Lenta"
+                f"{last_ma_fast:.3f} - Última Média Rápida \n {last_ma_slow:.3f} - Última Média Lenta"
             )
             print(f"Última Volatilidade: {last_volatility:.3f}")
             print(f"Média da Volatilidade: {volatility:.3f}")
@@ -161,7 +161,7 @@ def getMovingAverageVergenceRSI(
             print(
                 f'Gradiente lento: {slow_gradient:.3f} ({ "Subindo" if slow_gradient > 0 else "Descendo" })'
             )
-            print(f'Decisão: {"Comprar" if ma_trade_decision == True else "Vender" }')
+            print(f'Decisão: {"Comprar" if ma_trade_decision == True else "Vender" if ma_trade_decision == False else "Nenhuma"}')
             print("-----")
 
             
@@ -175,10 +175,6 @@ def getMovingAverageVergenceRSI(
         return ma_trade_decision
 
 
-import pandas as pd
-from functions.logger import erro_logger
-
-
 class TechnicalIndicators:
     """
     Classe para calcular indicadores técnicos.
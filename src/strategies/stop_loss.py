@@ -0,0 +1,13 @@
+# Regra de stop loss compartilhada entre o robô de um par (BinanceRobot) e o de portfólio (PortfolioBot)
+
+# Preço abaixo do qual a posição é vendida à mercado
+def getStopLossPrice(last_buy_price, stop_loss_percentage):
+    return last_buy_price * (1 - stop_loss_percentage)
+
+# Dispara quando o fechamento atual e o anterior (preço ponderado) estão abaixo do stop
+# stop_loss_percentage em fração (0.03 = 3%); sem preço de compra conhecido não dispara
+def isStopLossTriggered(close_price, weighted_price, last_buy_price, stop_loss_percentage):
+    if not last_buy_price or last_buy_price <= 0:
+        return False
+    stop_loss_price = getStopLossPrice(last_buy_price, stop_loss_percentage)
+    return close_price < stop_loss_price and weighted_price < stop_loss_price
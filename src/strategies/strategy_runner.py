@@ -1,20 +1,25 @@
-from .moving_average_antecipation import getMovingAverageAntecipationTradeStrategy
-from .moving_average import getMovingAverageTradeStrategy
+from .registry import StrategyInstance, FallbackStrategy, evaluateStrategies
+# Importa os módulos para registrar as estratégias
+from . import moving_average_antecipation, moving_average, rsi
+
+# Monta a árvore de estratégias padrão a partir da configuração do bot
+# MA Antecipation como principal e, se ativado, MA como fallback
+def buildStrategyPipeline(self):
+    main_strategy = StrategyInstance("moving_average_antecipation", volatility_factor=self.volatility_factor)
+
+    if self.fallback_activated == True:
+        return FallbackStrategy([main_strategy, StrategyInstance("moving_average")])
+
+    return main_strategy
 
 def runStrategies(self):
-    
-    # strategies
-    movingAverageAntecipationTrade = getMovingAverageAntecipationTradeStrategy(self.stock_data, self.volatility_factor)    
-    
-    # Executa a estratégia de média movel
-    maant_trade_decision = movingAverageAntecipationTrade
-    final_decision = maant_trade_decision
 
-    if maant_trade_decision == None and self.fallback_activated == True:
-        print('Estratégia de MA Antecipation inconclusiva\nExecutando estratégia de fallback...')
-        movingAverageTrade = getMovingAverageTradeStrategy(self.stock_data)
-        ma_trade_decision = movingAverageTrade
-        final_decision = ma_trade_decision
-        
-    return final_decision
+    # Usa a árvore definida no bot, se houver, ou a padrão
+    pipeline = getattr(self, "strategy_pipeline", None)
+    if pipeline is None:
+        pipeline = buildStrategyPipeline(self)
+
+    # Os indicadores compartilhados são calculados uma única vez
+    final_decision = evaluateStrategies(pipeline, self.stock_data)
 
+    return final_decision